@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Multi-session load generator with realtime pacing and an SLO report.
+
+Replays real audio (WAV, raw PCM16 or recording-lane .epcm files) as N
+concurrent live-listener sessions, optionally accelerated, with mixed
+mic/system sources and staggered joins. Collects per-session latency from
+the client's point of view, the server's per-source metrics events and the
+server's RSS from /metrics. It then prints a report and exits non-zero when an
+SLO threshold is breached. Use it to size hardware: raise --sessions until
+the report fails.
+
+Usage:
+    python scripts/load_test.py --audio test_speech.wav --sessions 8 --duration 120
+    python scripts/load_test.py --audio /tmp/echopanel_recordings/a_mic_1.wav \\
+        --sessions 20 --stagger 2 --sources system,both --speed 1.5 \\
+        --slo-p95 4 --report load_report.json
+
+Metrics:
+    - time to first final: first audio frame sent -> first asr_final received
+    - final latency: audio up to a final's t1 was sent -> that final received
+    - drop ratio: server-dropped frames / frames sent (from metrics events)
+    - server RTF: realtime_factor from metrics events, over time
+    - RSS: echopanel_process_resident_memory_bytes from GET /metrics, over time
+
+Exit codes: 0 all SLOs met, 1 SLO breached, 2 no session could run.
+
+Requirements:
+    - Server running (default ws://127.0.0.1:8000/ws/live-listener)
+    - uv pip install websockets
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+import urllib.request
+import wave
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+# Add project root to path (for .epcm recording-lane files)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2
+FRAME_SECONDS = 0.02
+FRAME_BYTES = int(SAMPLE_RATE * FRAME_SECONDS) * BYTES_PER_SAMPLE
+SOURCE_BYTES = {"system": 0, "mic": 1}
+
+
+# ---------------------------------------------------------------------------
+# Audio
+# ---------------------------------------------------------------------------
+
+def load_pcm(path: Path) -> bytes:
+    """Load `path` as 16 kHz mono PCM16 bytes."""
+    suffix = path.suffix.lower()
+    if suffix == ".epcm":
+        from server.services.pcm_codec import BlockPCMReader
+
+        reader = BlockPCMReader(path)
+        if reader.sample_rate != SAMPLE_RATE:
+            raise ValueError(f"{path}: sample rate {reader.sample_rate}, expected {SAMPLE_RATE}")
+        return reader.read(0, len(reader)).astype("<i2").tobytes()
+    if suffix in (".pcm", ".raw"):
+        data = path.read_bytes()
+        return data[: len(data) - len(data) % BYTES_PER_SAMPLE]
+
+    with wave.open(str(path), "rb") as wf:
+        if wf.getsampwidth() != BYTES_PER_SAMPLE:
+            raise ValueError(f"{path}: only 16-bit WAV is supported")
+        channels, rate = wf.getnchannels(), wf.getframerate()
+        data = wf.readframes(wf.getnframes())
+    if channels == 1 and rate == SAMPLE_RATE:
+        return data
+
+    import numpy as np
+
+    samples = np.frombuffer(data, dtype="<i2").astype(np.float32)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        n_out = int(len(samples) * SAMPLE_RATE / rate)
+        samples = np.interp(np.linspace(0, len(samples) - 1, n_out), np.arange(len(samples)), samples)
+    return np.clip(samples, -32768, 32767).astype("<i2").tobytes()
+
+
+def frame_at(audio: bytes, index: int, offset_frames: int = 0) -> bytes:
+    """20 ms frame `index` of `audio`, looping (whole frames only)."""
+    n_frames = max(1, len(audio) // FRAME_BYTES)
+    start = ((index + offset_frames) % n_frames) * FRAME_BYTES
+    frame = audio[start:start + FRAME_BYTES]
+    return frame if len(frame) == FRAME_BYTES else frame + bytes(FRAME_BYTES - len(frame))
+
+
+# ---------------------------------------------------------------------------
+# Stats
+# ---------------------------------------------------------------------------
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile (q in [0, 100]); None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100.0
+    lo, hi = math.floor(rank), math.ceil(rank)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+
+@dataclass
+class SessionResult:
+    session_id: str
+    sources: List[str]
+    joined_at: float = 0.0  # seconds since the run started
+    first_audio_at: Optional[float] = None  # wall clock
+    first_final_at: Optional[float] = None
+    frames_sent: int = 0
+    finals: int = 0
+    final_latencies: List[float] = field(default_factory=list)
+    dropped_frames: int = 0
+    rtf_samples: List[Tuple[float, float]] = field(default_factory=list)  # (run elapsed, rtf)
+    backpressure_events: int = 0
+    got_final_summary: bool = False
+    error: Optional[str] = None
+
+    @property
+    def time_to_first_final(self) -> Optional[float]:
+        if self.first_audio_at is None or self.first_final_at is None:
+            return None
+        return self.first_final_at - self.first_audio_at
+
+
+def _timeline(samples: Sequence[Tuple[float, float]], bucket_s: float) -> List[Dict[str, float]]:
+    buckets: Dict[int, List[float]] = {}
+    for t, value in samples:
+        buckets.setdefault(int(t // bucket_s), []).append(value)
+    return [
+        {"t": round(b * bucket_s, 1), "mean": round(sum(v) / len(v), 3), "max": round(max(v), 3)}
+        for b, v in sorted(buckets.items())
+    ]
+
+
+def build_report(results: Sequence[SessionResult], rss_samples: Sequence[Tuple[float, float]],
+                 wall_seconds: float, bucket_s: float = 10.0) -> Dict:
+    """Aggregate session results into the report dict (latencies in seconds)."""
+    ran = [r for r in results if r.error is None]
+    latencies = [x for r in ran for x in r.final_latencies]
+    ttff = [r.time_to_first_final for r in ran if r.time_to_first_final is not None]
+    frames = sum(r.frames_sent for r in ran)
+    dropped = sum(r.dropped_frames for r in ran)
+    rtf = [(t, v) for r in ran for t, v in r.rtf_samples]
+
+    def _round(value: Optional[float]) -> Optional[float]:
+        return None if value is None else round(value, 3)
+
+    return {
+        "sessions": len(results),
+        "sessions_failed": len(results) - len(ran),
+        "sessions_without_final": sum(1 for r in ran if r.first_final_at is None),
+        "wall_seconds": round(wall_seconds, 1),
+        "frames_sent": frames,
+        "finals": len(latencies),
+        "time_to_first_final": {
+            "p50": _round(percentile(ttff, 50)), "p95": _round(percentile(ttff, 95)),
+            "max": _round(max(ttff) if ttff else None),
+        },
+        "final_latency": {
+            "p50": _round(percentile(latencies, 50)), "p95": _round(percentile(latencies, 95)),
+            "p99": _round(percentile(latencies, 99)), "max": _round(max(latencies) if latencies else None),
+        },
+        "drop_ratio": round(dropped / frames, 4) if frames else 0.0,
+        "backpressure_events": sum(r.backpressure_events for r in ran),
+        "server_rtf": {
+            "p50": _round(percentile([v for _, v in rtf], 50)),
+            "p95": _round(percentile([v for _, v in rtf], 95)),
+            "timeline": _timeline(rtf, bucket_s),
+        },
+        "rss_mb": {
+            "max": _round(max((v for _, v in rss_samples), default=None)),
+            "timeline": _timeline(rss_samples, bucket_s),
+        },
+        "errors": sorted({r.error for r in results if r.error}),
+    }
+
+
+@dataclass
+class SLO:
+    ttff_s: Optional[float] = None
+    p95_s: Optional[float] = None
+    p99_s: Optional[float] = None
+    drop_ratio: Optional[float] = None
+    rtf: Optional[float] = None
+    rss_mb: Optional[float] = None
+    max_failed_sessions: int = 0
+
+
+def check_slos(report: Dict, slo: SLO) -> List[str]:
+    """Human-readable breaches of `slo` in `report` (empty when all pass)."""
+    checks = [
+        ("time to first final p95", report["time_to_first_final"]["p95"], slo.ttff_s),
+        ("final latency p95", report["final_latency"]["p95"], slo.p95_s),
+        ("final latency p99", report["final_latency"]["p99"], slo.p99_s),
+        ("drop ratio", report["drop_ratio"], slo.drop_ratio),
+        ("server RTF p95", report["server_rtf"]["p95"], slo.rtf),
+        ("RSS max (MB)", report["rss_mb"]["max"], slo.rss_mb),
+    ]
+    breaches = [
+        f"{name} {value} > {limit}"
+        for name, value, limit in checks
+        if limit is not None and value is not None and value > limit
+    ]
+    if report["sessions_failed"] > slo.max_failed_sessions:
+        breaches.append(f"failed sessions {report['sessions_failed']} > {slo.max_failed_sessions}")
+    if slo.ttff_s is not None and report["sessions_without_final"]:
+        breaches.append(f"{report['sessions_without_final']} session(s) never produced a final")
+    return breaches
+
+
+# ---------------------------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------------------------
+
+def _auth_headers(token: Optional[str]) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def metrics_url(ws_uri: str) -> str:
+    parts = urlsplit(ws_uri)
+    scheme = "https" if parts.scheme == "wss" else "http"
+    return urlunsplit((scheme, parts.netloc, "/metrics", "", ""))
+
+
+def _read_rss_mb(url: str, token: Optional[str]) -> Optional[float]:
+    request = urllib.request.Request(url, headers=_auth_headers(token))
+    with urllib.request.urlopen(request, timeout=5) as response:
+        for line in response.read().decode("utf-8", errors="replace").splitlines():
+            if line.startswith("echopanel_process_resident_memory_bytes "):
+                return float(line.split()[-1]) / (1024 * 1024)
+    return None
+
+
+async def sample_rss(url: str, token: Optional[str], start: float, interval: float,
+                     out: List[Tuple[float, float]], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            rss = await asyncio.to_thread(_read_rss_mb, url, token)
+            if rss is not None:
+                out.append((time.monotonic() - start, rss))
+        except Exception as e:
+            print(f"⚠️  RSS sample failed: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_session(
+    result: SessionResult,
+    audio: bytes,
+    uri: str,
+    duration_s: float,
+    speed: float,
+    run_start: float,
+    token: Optional[str] = None,
+    summary_timeout: float = 60.0,
+) -> SessionResult:
+    import websockets
+
+    # Offset the mic lane so two sources don't carry identical audio.
+    offsets = {"system": 0, "mic": max(1, len(audio) // FRAME_BYTES) // 2}
+    send_walls: Dict[str, List[float]] = {s: [] for s in result.sources}
+    n_frames = int(duration_s / FRAME_SECONDS)
+    frame_interval = FRAME_SECONDS / speed
+
+    try:
+        async with websockets.connect(uri, max_size=2**24, additional_headers=_auth_headers(token)) as ws:
+            await ws.send(json.dumps({
+                "type": "start",
+                "session_id": result.session_id,
+                "sample_rate": SAMPLE_RATE,
+                "format": "pcm_s16le",
+                "channels": 1,
+            }))
+            while True:
+                event = json.loads(await asyncio.wait_for(ws.recv(), timeout=30))
+                if event.get("type") == "status" and event.get("state") == "streaming":
+                    break
+                if event.get("type") == "status" and event.get("state") == "error":
+                    raise RuntimeError(f"start rejected: {event.get('message')}")
+
+            sending_done = asyncio.Event()
+
+            async def send_audio() -> None:
+                t0 = time.monotonic()
+                result.first_audio_at = time.time()
+                for i in range(n_frames):
+                    # Absolute deadlines: a late frame doesn't push back the rest.
+                    delay = t0 + i * frame_interval - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    for source in result.sources:
+                        header = b"EP\x01" + bytes([SOURCE_BYTES[source]])
+                        await ws.send(header + frame_at(audio, i, offsets[source]))
+                        send_walls[source].append(time.time())
+                    result.frames_sent += len(result.sources)
+                sending_done.set()
+                await ws.send(json.dumps({"type": "stop", "session_id": result.session_id}))
+
+            async def receive_events() -> None:
+                async for message in ws:
+                    if isinstance(message, bytes):
+                        continue
+                    event = json.loads(message)
+                    kind = event.get("type")
+                    now = time.time()
+                    if kind == "asr_final":
+                        result.finals += 1
+                        if result.first_final_at is None:
+                            result.first_final_at = now
+                        walls = send_walls.get(event.get("source", ""), [])
+                        if walls:
+                            # Wall time at which the audio up to t1 had been sent
+                            index = min(len(walls) - 1, max(0, math.ceil(float(event.get("t1", 0.0)) / FRAME_SECONDS) - 1))
+                            result.final_latencies.append(max(0.0, now - walls[index]))
+                    elif kind == "metrics":
+                        result.dropped_frames = max(result.dropped_frames, int(event.get("dropped_total", 0)))
+                        rtf = float(event.get("realtime_factor", 0.0) or 0.0)
+                        if rtf > 0:
+                            result.rtf_samples.append((time.monotonic() - run_start, rtf))
+                    elif kind == "status" and event.get("state") in ("backpressure", "overloaded"):
+                        result.backpressure_events += 1
+                    elif kind == "final_summary":
+                        result.got_final_summary = True
+                        return
+
+            receiver = asyncio.create_task(receive_events())
+            await send_audio()
+            try:
+                await asyncio.wait_for(receiver, timeout=summary_timeout)
+            except asyncio.TimeoutError:
+                receiver.cancel()
+                print(f"⚠️  {result.session_id}: no final summary within {summary_timeout:.0f}s")
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+        print(f"❌ {result.session_id}: {result.error}")
+    return result
+
+
+def plan_sources(index: int, mix: Sequence[str]) -> List[str]:
+    """Sources for session `index`, cycling through `mix` (system, mic or both)."""
+    choice = mix[index % len(mix)]
+    return ["system", "mic"] if choice == "both" else [choice]
+
+
+async def run_load(args: argparse.Namespace) -> Tuple[Dict, List[SessionResult]]:
+    audio_files = [Path(p) for p in args.audio]
+    audios = [load_pcm(p) for p in audio_files]
+    mix = [m.strip() for m in args.sources.split(",") if m.strip()]
+    for m in mix:
+        if m not in ("system", "mic", "both"):
+            raise ValueError(f"Unknown source mix entry: {m}")
+
+    run_start = time.monotonic()
+    run_id = int(time.time())
+    results = [
+        SessionResult(session_id=f"load-{run_id}-{i}", sources=plan_sources(i, mix))
+        for i in range(args.sessions)
+    ]
+    rss_samples: List[Tuple[float, float]] = []
+    stop = asyncio.Event()
+    rss_task = asyncio.create_task(
+        sample_rss(metrics_url(args.uri), args.token, run_start, args.rss_interval, rss_samples, stop)
+    )
+
+    async def staggered(i: int, result: SessionResult) -> SessionResult:
+        await asyncio.sleep(i * args.stagger)
+        result.joined_at = time.monotonic() - run_start
+        print(f"▶️  {result.session_id} joining ({'+'.join(result.sources)})")
+        return await run_session(
+            result, audios[i % len(audios)], args.uri, args.duration, args.speed, run_start,
+            token=args.token, summary_timeout=args.summary_timeout,
+        )
+
+    await asyncio.gather(*(staggered(i, r) for i, r in enumerate(results)))
+    stop.set()
+    await rss_task
+    report = build_report(results, rss_samples, time.monotonic() - run_start, args.report_interval)
+    report["config"] = {
+        "audio": [str(p) for p in audio_files],
+        "sessions": args.sessions,
+        "duration_s": args.duration,
+        "speed": args.speed,
+        "stagger_s": args.stagger,
+        "sources": mix,
+    }
+    return report, results
+
+
+def print_report(report: Dict, breaches: List[str]) -> None:
+    print()
+    print("=" * 60)
+    print("LOAD TEST REPORT")
+    print("=" * 60)
+    print(f"Sessions: {report['sessions']} (failed {report['sessions_failed']}, "
+          f"no final {report['sessions_without_final']})")
+    print(f"Frames sent: {report['frames_sent']:,} | Finals: {report['finals']}")
+    ttff, lat = report["time_to_first_final"], report["final_latency"]
+    print(f"Time to first final (p50/p95/max): {ttff['p50']} / {ttff['p95']} / {ttff['max']} s")
+    print(f"Final latency (p50/p95/p99/max): {lat['p50']} / {lat['p95']} / {lat['p99']} / {lat['max']} s")
+    print(f"Drop ratio: {report['drop_ratio']:.2%} | Backpressure events: {report['backpressure_events']}")
+    print(f"Server RTF (p50/p95): {report['server_rtf']['p50']} / {report['server_rtf']['p95']}")
+    print(f"RSS max: {report['rss_mb']['max']} MB")
+    for point in report["server_rtf"]["timeline"]:
+        print(f"   t={point['t']:>6}s  RTF mean={point['mean']:.2f} max={point['max']:.2f}")
+    if breaches:
+        print("\n❌ FAIL: SLO breached")
+        for breach in breaches:
+            print(f"   - {breach}")
+    else:
+        print("\n✅ PASS: All SLOs met")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EchoPanel multi-session load test")
+    parser.add_argument("--audio", nargs="+", default=["test_speech.wav"],
+                        help="WAV/PCM/.epcm files, assigned to sessions round-robin")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent sessions (default: 4)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Audio seconds per session (default: 60)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Pacing multiplier; 1.0 = realtime")
+    parser.add_argument("--stagger", type=float, default=1.0, help="Seconds between session joins")
+    parser.add_argument("--sources", default="system,mic,both",
+                        help="Comma-separated source mix cycled across sessions (system, mic, both)")
+    parser.add_argument("--uri", default="ws://127.0.0.1:8000/ws/live-listener")
+    parser.add_argument("--token", default=None, help="Auth token (ECHOPANEL_WS_AUTH_TOKEN)")
+    parser.add_argument("--rss-interval", type=float, default=2.0, help="Seconds between /metrics RSS samples")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="Timeline bucket in seconds")
+    parser.add_argument("--summary-timeout", type=float, default=60.0,
+                        help="Seconds to wait for final_summary after stop")
+    parser.add_argument("--report", type=Path, default=None, help="Write the JSON report here")
+    parser.add_argument("--slo-ttff", type=float, default=10.0, help="Max p95 time to first final (s)")
+    parser.add_argument("--slo-p95", type=float, default=5.0, help="Max p95 final latency (s)")
+    parser.add_argument("--slo-p99", type=float, default=None, help="Max p99 final latency (s)")
+    parser.add_argument("--slo-drop-ratio", type=float, default=0.01, help="Max dropped/sent frame ratio")
+    parser.add_argument("--slo-rtf", type=float, default=1.0, help="Max p95 server realtime factor")
+    parser.add_argument("--slo-rss-mb", type=float, default=None, help="Max server RSS (MB)")
+    parser.add_argument("--max-failed-sessions", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        print("Please install websockets: uv pip install websockets")
+        sys.exit(2)
+
+    report, _ = asyncio.run(run_load(args))
+    breaches = check_slos(report, SLO(
+        ttff_s=args.slo_ttff, p95_s=args.slo_p95, p99_s=args.slo_p99,
+        drop_ratio=args.slo_drop_ratio, rtf=args.slo_rtf, rss_mb=args.slo_rss_mb,
+        max_failed_sessions=args.max_failed_sessions,
+    ))
+    report["slo_breaches"] = breaches
+    print_report(report, breaches)
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.report}")
+
+    if report["sessions_failed"] == report["sessions"]:
+        sys.exit(2)
+    sys.exit(1 if breaches else 0)
+
+
+if __name__ == "__main__":
+    main()
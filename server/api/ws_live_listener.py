@@ -7,19 +7,36 @@ import time
 import uuid
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, AsyncIterator, Dict, Optional, Set
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from server.services.admission_control import (
+    ADMISSION_CONTROL,
+    DEFAULT_SOURCES,
+    AdmissionVerdict,
+    SessionRequest,
+    get_admission_controller,
+)
 from server.services.analysis_stream import extract_cards, extract_cards_incremental, extract_entities, extract_entities_incremental, generate_rolling_summary
 from server.services.asr_stream import stream_asr
-from server.services.diarization import diarize_pcm, merge_transcript_with_speakers
+from server.services.diarization import diarize_pcm, merge_transcript_with_speakers_by_source, open_recording_audio
+from server.services.diarization_stream import STEP_SECONDS as DIARIZATION_STEP_SECONDS
+from server.services.diarization_stream import StreamingDiarizer, resolve_diarization_mode
+from server.services.echo_bleed import BLEED_DETECTION, BleedDetector
+from server.services.inference_scheduler import bind_flow, unbind_flow
+from server.services.latency_trace import LatencyTracer, bind_source, unbind_source
+from server.services.metrics_registry import get_registry
+from server.services.offline_transcriber import OFFLINE_TRANSCRIBE_ENABLED, submit_session_job
+from server.services.recording_writer import WAV_HEADER_BYTES, get_recording_writer
+from server.services.recording_writer import write_wav_header as _write_wav_header
 from server.services.transcript_ids import generate_segment_id
 from server.services.concurrency_controller import (
     get_concurrency_controller,
 )
 from server.services.degrade_ladder import DegradeLadder, DegradeLevel
-from server.services.screen_ocr import get_ocr_handler
+from server.services.overload_controller import PREDICTIVE_DEGRADE, get_overload_controller
+from server.services.screen_ocr import OCR_ENABLED, get_ocr_handler_async
 from server.services.brain_dump_integration import (
     get_integration,
     index_transcript_event
@@ -59,9 +76,17 @@ from server.security import extract_ws_token, is_authorized
 # Lane B (Recording): Lossless, never drops, write to disk for post-processing
 RECORDING_LANE_ENABLED = os.getenv("ECHOPANEL_RECORDING_LANE", "1") == "1"
 RECORDING_LANE_DIR = Path(os.getenv("ECHOPANEL_RECORDING_DIR", "/tmp/echopanel_recordings"))
-RECORDING_LANE_FORMAT = os.getenv("ECHOPANEL_RECORDING_FORMAT", "wav")  # wav, pcm, or both
+RECORDING_LANE_FORMAT = os.getenv("ECHOPANEL_RECORDING_FORMAT", "wav")  # wav, pcm, both, or epcm (compressed)
 RECORDING_LANE_MAX_AGE_SECONDS = int(os.getenv("ECHOPANEL_RECORDING_MAX_AGE", "604800"))  # 7 days
 RECORDING_LANE_MAX_TOTAL_BYTES = int(os.getenv("ECHOPANEL_RECORDING_MAX_BYTES", str(10 * 1024 * 1024 * 1024)))  # 10GB
+RECORDING_FLUSH_TIMEOUT_SECONDS = float(os.getenv("ECHOPANEL_RECORDING_FLUSH_TIMEOUT", "30"))
+
+# V1: Metric handles bound once at import (see metrics_registry)
+_AUDIO_BYTES_RECEIVED = get_registry().counter_family("audio_bytes_received")
+_AUDIO_FRAMES_DROPPED = get_registry().counter_family("audio_frames_dropped")
+_AUDIO_BYTES_DROPPED = get_registry().counter_family("audio_bytes_dropped")
+_QUEUE_DEPTH = get_registry().gauge_family("queue_depth")
+_INFERENCE_TIME_MS = get_registry().histogram("inference_time_ms")
 
 
 @dataclass
@@ -75,10 +100,14 @@ class SessionState:
     analysis_tasks: list[asyncio.Task] = field(default_factory=list)
     transcript: list[dict] = field(default_factory=list)
     transcript_lock: asyncio.Lock = field(default_factory=asyncio.Lock)  # Protect transcript mutations
-    # Source-aware PCM buffers used for session-end diarization.
-    pcm_buffers_by_source: Dict[str, bytearray] = field(default_factory=dict)
+    # Session-end (batch) diarization reads the recording-lane files; this caps
+    # how much trailing audio it maps.
     diarization_enabled: bool = False
     diarization_max_bytes: int = 0
+    # Streaming diarization: "streaming" labels audio online, "batch" diarizes the recording lane at stop.
+    diarization_mode: str = "batch"
+    diarizers_by_source: Dict[str, Any] = field(default_factory=dict)
+    diarization_task: Optional[asyncio.Task] = None
     bytes_received: int = 0
     active_sources: Set[str] = field(default_factory=set)
     # Map source -> Queue
@@ -91,16 +120,18 @@ class SessionState:
     closed: bool = False
     # P1 fix: track if backpressure warning was sent
     backpressure_warned: bool = False
-    # P2-13: Audio debug dump file handles
+    # P2-13: Audio debug dump streams (written by the recording writer thread)
     debug_dump_files: Dict[str, Any] = field(default_factory=dict)
     # PR2: Metrics tracking
     metrics_task: Optional[asyncio.Task] = None
     asr_processing_times: list[float] = field(default_factory=list)  # Track inference times
-    # PR6: Per-source processing samples (processing_time_s, audio_duration_s) for accurate RTF in metrics.
-    asr_samples_by_source: Dict[str, list[tuple[float, float]]] = field(default_factory=dict)
+    # PR6: Per-source measured inference samples (inference_s, audio_duration_s) for accurate RTF in metrics.
+    asr_samples_by_source: Dict[str, Any] = field(default_factory=dict)
     asr_last_dropped: int = 0  # For computing dropped_recent
     audio_time_processed: float = 0.0  # Total audio seconds processed
     processing_time_total: float = 0.0  # Total processing time spent
+    # Per-chunk stage latencies (receive -> ws_send) and optional Chrome trace
+    latency: LatencyTracer = field(default_factory=LatencyTracer)
     # V1: Provider info for metrics
     provider_name: str = "unknown"
     model_id: str = "unknown"
@@ -118,15 +149,23 @@ class SessionState:
     max_source_clock_spread_ms: float = 0.0
     # TCK-20260211-010: Degrade ladder for adaptive performance
     degrade_ladder: Optional[DegradeLadder] = None
+    # Key in the process-wide overload controller when it drives the ladder
+    overload_key: Optional[str] = None
+    # Key in the admission controller while this session holds capacity
+    admission_key: Optional[str] = None
+    admission: Optional[Dict[str, Any]] = None
+    # Mic/system bleed suppression (created on the first mic or system chunk)
+    bleed: Optional[BleedDetector] = None
+    # Hybrid OCR pipeline that holds VLM backfill for this session, if any
+    ocr_hybrid: Any = None
     # INT-010 incremental analysis state
     last_entity_analysis_t1: float = 0.0
     last_card_analysis_t1: float = 0.0
     current_entities: Dict[str, Any] = field(default_factory=dict)
     current_cards: Dict[str, Any] = field(default_factory=dict)
     # TCK-20260213-074: Dual-lane pipeline - Recording lane (lossless)
-    recording_files: Dict[str, Any] = field(default_factory=dict)  # source -> file handles
-    recording_paths: Dict[str, Path] = field(default_factory=dict)  # source -> file paths
-    recording_bytes_written: Dict[str, int] = field(default_factory=dict)  # source -> bytes
+    recording_streams: Dict[str, Any] = field(default_factory=dict)  # source -> RecordingStream
+    recording_bytes_written: Dict[str, int] = field(default_factory=dict)  # source -> bytes queued
     # VNI: Voice note support
     voice_note_buffer: bytearray = field(default_factory=bytearray)  # Buffer for voice note audio
     voice_note_started: bool = False  # Whether voice note session is active
@@ -230,37 +269,104 @@ def _update_source_clock_spread(state: SessionState) -> None:
 
 
 def _append_diarization_audio(state: SessionState, source: str, chunk: bytes) -> None:
-    if not state.diarization_enabled or not chunk:
+    # Batch mode needs no copy here: it reads the recording-lane file at stop.
+    if not state.diarization_enabled or not chunk or state.diarization_mode != "streaming":
         return
 
     source_key = _normalize_source(source)
-    pcm_buffer = state.pcm_buffers_by_source.setdefault(source_key, bytearray())
-    pcm_buffer.extend(chunk)
+    diarizer = state.diarizers_by_source.get(source_key)
+    if diarizer is None:
+        diarizer = StreamingDiarizer(sample_rate=state.sample_rate)
+        state.diarizers_by_source[source_key] = diarizer
+    diarizer.feed(chunk)
+
+
+def _recording_lane_audio(state: SessionState, source: str) -> list[tuple[Path, int, int]]:
+    """Locate a source's recorded PCM on disk as (path, data_offset, num_bytes) per segment.
 
-    if state.diarization_max_bytes > 0 and len(pcm_buffer) > state.diarization_max_bytes:
-        overflow = len(pcm_buffer) - state.diarization_max_bytes
-        if overflow > 0:
-            del pcm_buffer[:overflow]
+    Blocks until queued audio is flushed; call from a worker thread.
+    """
+    stream = state.recording_streams.get(source)
+    if stream is None or state.recording_bytes_written.get(source, 0) <= 0:
+        return []
+    if not stream.flush(timeout=RECORDING_FLUSH_TIMEOUT_SECONDS):
+        logger.warning(f"Recording lane flush for {source} timed out; diarizing what is on disk")
+    return stream.segment_files()
+
+
+async def _diarization_loop(state: SessionState) -> None:
+    """Label streamed audio as it arrives so stop only has to reconcile."""
+    while True:
+        await asyncio.sleep(DIARIZATION_STEP_SECONDS)
+        for source, diarizer in list(state.diarizers_by_source.items()):
+            try:
+                await asyncio.to_thread(diarizer.process_pending)
+            except Exception as e:
+                logger.error(f"Streaming diarization failed for {source}: {e}")
+
+
+def _live_speaker_label(state: SessionState, source: str, t0: float, t1: float) -> Optional[str]:
+    diarizer = state.diarizers_by_source.get(_normalize_source(source))
+    if diarizer is None:
+        return None
+    return diarizer.speaker_for(t0, t1)
 
 
 async def _run_diarization_per_source(state: SessionState) -> Dict[str, list[dict]]:
     if not state.diarization_enabled:
         return {}
 
-    sources_with_audio = [
-        (source, bytes(pcm_buffer))
-        for source, pcm_buffer in state.pcm_buffers_by_source.items()
-        if pcm_buffer
-    ]
-    if not sources_with_audio:
+    if state.diarization_mode == "streaming":
+        # Audio was labelled online; finalize only processes the tail and reconciles speakers.
+        sources = list(state.diarizers_by_source.items())
+        finalized = await asyncio.gather(
+            *(asyncio.to_thread(diarizer.finalize) for _, diarizer in sources),
+            return_exceptions=True,
+        )
+        streamed: Dict[str, list[dict]] = {}
+        for (source, _), segments in zip(sources, finalized):
+            if isinstance(segments, Exception):
+                logger.error("Streaming diarization finalize failed for %s: %s", source, segments)
+                continue
+            if segments:
+                streamed[source] = segments
+        return streamed
+
+    if not RECORDING_LANE_ENABLED:
+        logger.warning("Session-end diarization reads the recording lane; ECHOPANEL_RECORDING_LANE is disabled")
         return {}
 
-    async def _run_one(source: str, pcm_bytes: bytes) -> tuple[str, list[dict]]:
-        segments = await asyncio.to_thread(diarize_pcm, pcm_bytes, state.sample_rate)
+    def _diarize_recording(source: str) -> list[dict]:
+        files = _recording_lane_audio(state, source)
+        total = sum(num_bytes for _, _, num_bytes in files)
+        # Only the trailing diarization_max_bytes are opened; memmap pages and
+        # epcm blocks are read on demand.
+        skip = 0
+        if state.diarization_max_bytes > 0 and total > state.diarization_max_bytes:
+            skip = total - state.diarization_max_bytes
+            skip -= skip % 2
+        parts = []
+        remaining_skip = skip
+        for path, data_offset, num_bytes in files:
+            if remaining_skip >= num_bytes:
+                remaining_skip -= num_bytes
+                continue
+            parts.append(open_recording_audio(path, data_offset + remaining_skip, num_bytes - remaining_skip))
+            remaining_skip = 0
+        if not parts:
+            return []
+        segments = diarize_pcm(parts[0] if len(parts) == 1 else parts, state.sample_rate)
+        if skip:
+            shift = (skip // 2) / state.sample_rate
+            segments = [{**seg, "t0": seg["t0"] + shift, "t1": seg["t1"] + shift} for seg in segments]
+        return segments
+
+    async def _run_one(source: str) -> tuple[str, list[dict]]:
+        segments = await asyncio.to_thread(_diarize_recording, source)
         return source, segments
 
     results = await asyncio.gather(
-        *(_run_one(source, pcm_bytes) for source, pcm_bytes in sources_with_audio),
+        *(_run_one(source) for source in list(state.recording_streams.keys())),
         return_exceptions=True,
     )
 
@@ -280,18 +386,7 @@ def _merge_transcript_with_source_diarization(
 ) -> list[dict]:
     if not diarization_by_source:
         return transcript
-
-    merged_transcript: list[dict] = []
-    for seg in transcript:
-        source_key = _normalize_source(seg.get("source"))
-        speaker_segments = diarization_by_source.get(source_key, [])
-        if not speaker_segments:
-            merged_transcript.append(dict(seg))
-            continue
-
-        labeled = merge_transcript_with_speakers([dict(seg)], speaker_segments)
-        merged_transcript.append(labeled[0] if labeled else dict(seg))
-    return merged_transcript
+    return merge_transcript_with_speakers_by_source(transcript, diarization_by_source, _normalize_source)
 
 
 def _flatten_diarization_segments(diarization_by_source: Dict[str, list[dict]]) -> list[dict]:
@@ -375,47 +470,46 @@ async def ws_send(state: SessionState, websocket: WebSocket, event: dict) -> Non
 
 
 def _init_audio_dump(state: SessionState, source: str) -> None:
-    """Initialize audio dump file for a source (P2-13)."""
+    """Initialize audio dump stream for a source (P2-13).
+
+    Files are created and retention applied by the recording writer thread.
+    """
     if not DEBUG_AUDIO_DUMP or source in state.debug_dump_files:
         return
 
     try:
-        DEBUG_AUDIO_DUMP_DIR.mkdir(parents=True, exist_ok=True)
-        _cleanup_audio_dump_dir()
+        writer = get_recording_writer()
+        writer.add_retention_task("debug_audio_dump", _cleanup_audio_dump_dir)
         timestamp = int(time.time())
         session_id = state.session_id or "unknown"
-        filename = f"{session_id}_{source}_{timestamp}.pcm"
-        filepath = DEBUG_AUDIO_DUMP_DIR / filename
-
-        file_handle = open(filepath, "wb")
-        # Set restrictive permissions (owner read/write only)
-        os.chmod(filepath, 0o600)
-        state.debug_dump_files[source] = file_handle
-        logger.info(f"Audio dump enabled for {source}: {filepath}")
+        base_path = DEBUG_AUDIO_DUMP_DIR / f"{session_id}_{source}_{timestamp}"
+        state.debug_dump_files[source] = writer.open_stream(
+            base_path, ("pcm",), state.sample_rate, segment_seconds=0
+        )
+        logger.info(f"Audio dump enabled for {source}: {base_path}.pcm")
     except Exception as e:
         logger.error(f"Failed to initialize audio dump for {source}: {e}")
 
 
 def _write_audio_dump(state: SessionState, source: str, chunk: bytes) -> None:
-    """Write audio chunk to dump file (P2-13)."""
+    """Queue audio chunk for the dump file (P2-13)."""
     if not DEBUG_AUDIO_DUMP or source not in state.debug_dump_files:
         return
     
     try:
         state.debug_dump_files[source].write(chunk)
-        state.debug_dump_files[source].flush()
     except Exception as e:
         logger.error(f"Failed to write audio dump for {source}: {e}")
 
 
 def _close_audio_dumps(state: SessionState) -> None:
-    """Close all audio dump files (P2-13)."""
+    """Close all audio dump streams (P2-13)."""
     if not DEBUG_AUDIO_DUMP:
         return
     
-    for source, file_handle in state.debug_dump_files.items():
+    for source, stream in state.debug_dump_files.items():
         try:
-            file_handle.close()
+            stream.close()
             logger.info(f"Closed audio dump for {source}")
         except Exception as e:
             logger.error(f"Failed to close audio dump for {source}: {e}")
@@ -502,9 +596,9 @@ def _cleanup_recording_dir(now: Optional[float] = None) -> None:
         logger.error(f"Failed to prepare recording directory: {e}")
         return
 
-    # Get all recording files (wav, pcm)
+    # Get all recording files (wav, pcm, epcm) and canonical transcripts
     entries: list[tuple[Path, os.stat_result]] = []
-    for pattern in ("*.wav", "*.pcm"):
+    for pattern in ("*.wav", "*.pcm", "*.epcm", "*.canonical.json"):
         for path in RECORDING_LANE_DIR.glob(pattern):
             try:
                 entries.append((path, path.stat()))
@@ -546,120 +640,63 @@ def _cleanup_recording_dir(now: Optional[float] = None) -> None:
                     logger.warning(f"Failed to remove recording {path}: {e}")
 
 
-def _write_wav_header(f, sample_rate: int, num_samples: int) -> None:
-    """Write a standard WAV file header.
-    
-    WAV format:
-    - RIFF header (12 bytes)
-    - fmt chunk (24 bytes)
-    - data chunk header (8 bytes)
-    """
-    import struct
-    
-    # Calculate sizes
-    bits_per_sample = 16
-    byte_rate = sample_rate * 2  # 16-bit mono
-    data_size = num_samples * 2  # 16-bit samples
-    riff_size = 36 + data_size  # 44 bytes header - 8 (RIFF size field)
-    
-    # RIFF header
-    f.write(b'RIFF')
-    f.write(struct.pack('<I', riff_size))
-    f.write(b'WAVE')
-    
-    # fmt chunk
-    f.write(b'fmt ')
-    f.write(struct.pack('<I', 16))  # Subchunk1Size (16 for PCM)
-    f.write(struct.pack('<H', 1))   # AudioFormat (1 = PCM)
-    f.write(struct.pack('<H', 1))   # NumChannels (1 = mono)
-    f.write(struct.pack('<I', sample_rate))
-    f.write(struct.pack('<I', byte_rate))
-    f.write(struct.pack('<H', 2))   # BlockAlign (2 bytes per sample)
-    f.write(struct.pack('<H', bits_per_sample))
-    
-    # data chunk header
-    f.write(b'data')
-    f.write(struct.pack('<I', data_size))
-
-
 def _init_recording_lane(state: SessionState, source: str, sample_rate: int = 16000) -> None:
-    """Initialize recording lane files for a source (TCK-20260213-074).
+    """Initialize recording lane stream for a source (TCK-20260213-074).
     
     Creates WAV and/or PCM files depending on RECORDING_LANE_FORMAT.
-    WAV is preferred for easy playback, PCM is raw for processing.
+    WAV is preferred for easy playback, PCM is raw for processing, and
+    EPCM is lossless block-compressed PCM (~60% of the size) that keeps
+    random access via its seek index.
+    The recording writer thread creates the files, rotates segments and
+    applies retention, so nothing here touches the disk.
     """
     if not RECORDING_LANE_ENABLED:
         return
     
-    if source in state.recording_files:
+    if source in state.recording_streams:
         return  # Already initialized
     
     try:
-        RECORDING_LANE_DIR.mkdir(parents=True, exist_ok=True)
-        _cleanup_recording_dir()
+        writer = get_recording_writer()
+        writer.add_retention_task("recording_lane", _cleanup_recording_dir)
         
         timestamp = int(time.time())
         session_id = state.session_id or "unknown"
         base_name = f"{session_id}_{source}_{timestamp}"
+        formats = {
+            "wav": ("wav",),
+            "pcm": ("pcm",),
+            "both": ("wav", "pcm"),
+            "epcm": ("epcm",),
+        }.get(RECORDING_LANE_FORMAT, ("wav",))
         
-        files = {}
-        paths = {}
-        
-        if RECORDING_LANE_FORMAT in ("wav", "both"):
-            wav_path = RECORDING_LANE_DIR / f"{base_name}.wav"
-            # Open for read/write, we'll update the header at the end
-            wav_file = open(wav_path, "w+b")
-            # Set restrictive permissions (owner read/write only)
-            os.chmod(wav_path, 0o600)
-            # Write placeholder header (will be updated on close)
-            _write_wav_header(wav_file, sample_rate, 0)
-            files['wav'] = wav_file
-            paths['wav'] = wav_path
-            logger.info(f"Recording lane (WAV) initialized: {wav_path}")
-
-        if RECORDING_LANE_FORMAT in ("pcm", "both"):
-            pcm_path = RECORDING_LANE_DIR / f"{base_name}.pcm"
-            pcm_file = open(pcm_path, "wb")
-            # Set restrictive permissions (owner read/write only)
-            os.chmod(pcm_path, 0o600)
-            files['pcm'] = pcm_file
-            paths['pcm'] = pcm_path
-            logger.info(f"Recording lane (PCM) initialized: {pcm_path}")
-        
-        state.recording_files[source] = files
-        state.recording_paths[source] = paths
+        state.recording_streams[source] = writer.open_stream(
+            RECORDING_LANE_DIR / base_name, formats, sample_rate
+        )
         state.recording_bytes_written[source] = 0
+        logger.info(f"Recording lane initialized: {RECORDING_LANE_DIR / base_name} ({', '.join(formats)})")
         
     except Exception as e:
         logger.error(f"Failed to initialize recording lane for {source}: {e}")
 
 
 def _write_recording_lane(state: SessionState, source: str, chunk: bytes) -> None:
-    """Write audio chunk to recording lane files (lossless, never drops).
+    """Queue audio chunk for the recording lane (lossless, never drops).
     
-    This is Lane B of the dual-lane pipeline - always write to disk regardless
+    This is Lane B of the dual-lane pipeline - always recorded regardless
     of realtime lane backpressure. This ensures we never lose audio even if
-    ASR is falling behind.
+    ASR is falling behind. The write itself happens on the recording writer
+    thread, so a slow disk cannot stall ingest.
     """
     if not RECORDING_LANE_ENABLED:
         return
     
-    if source not in state.recording_files:
+    stream = state.recording_streams.get(source)
+    if stream is None:
         return
     
     try:
-        files = state.recording_files[source]
-        
-        # Write to WAV file (after the 44-byte header)
-        if 'wav' in files:
-            wav_file = files['wav']
-            wav_file.write(chunk)
-        
-        # Write to PCM file
-        if 'pcm' in files:
-            pcm_file = files['pcm']
-            pcm_file.write(chunk)
-        
+        stream.write(chunk)
         # Track bytes written
         state.recording_bytes_written[source] = state.recording_bytes_written.get(source, 0) + len(chunk)
         
@@ -668,73 +705,53 @@ def _write_recording_lane(state: SessionState, source: str, chunk: bytes) -> Non
 
 
 def _finalize_recording_lane(state: SessionState, source: str, sample_rate: int = 16000) -> Optional[Path]:
-    """Finalize recording files and return the primary path.
+    """Close a source's recording stream and return the primary path.
     
-    For WAV files, updates the header with correct sizes.
-    Returns the path to the WAV file (or PCM if WAV not available).
+    The writer thread drains queued audio and rewrites WAV headers with the
+    final sizes. Returns the first segment's WAV path (or PCM if WAV not enabled).
     """
-    if source not in state.recording_files:
+    stream = state.recording_streams.pop(source, None)
+    bytes_written = state.recording_bytes_written.pop(source, 0)
+    if stream is None:
         return None
     
-    files = state.recording_files.get(source, {})
-    paths = state.recording_paths.get(source, {})
-    bytes_written = state.recording_bytes_written.get(source, 0)
-    
-    primary_path = None
-    
-    try:
-        # Finalize WAV: update header with actual sizes
-        if 'wav' in files:
-            wav_file = files['wav']
-            try:
-                # Calculate actual number of samples
-                num_samples = bytes_written // 2  # 16-bit samples
-                
-                # Seek to beginning and rewrite header
-                wav_file.seek(0)
-                _write_wav_header(wav_file, sample_rate, num_samples)
-                wav_file.close()
-                
-                wav_path = paths.get('wav')
-                if wav_path:
-                    primary_path = wav_path
-                    duration_sec = num_samples / sample_rate
-                    logger.info(f"Recording lane finalized: {wav_path} ({duration_sec:.1f}s, {bytes_written} bytes)")
-            except Exception as e:
-                logger.error(f"Failed to finalize WAV for {source}: {e}")
-                try:
-                    wav_file.close()
-                except Exception:
-                    pass
-        
-        # Finalize PCM: just close
-        if 'pcm' in files:
-            pcm_file = files['pcm']
-            try:
-                pcm_file.close()
-                pcm_path = paths.get('pcm')
-                if pcm_path and not primary_path:
-                    primary_path = pcm_path
-            except Exception as e:
-                logger.error(f"Failed to close PCM for {source}: {e}")
-        
-    finally:
-        # Clean up state
-        state.recording_files.pop(source, None)
-        state.recording_paths.pop(source, None)
-        state.recording_bytes_written.pop(source, None)
-    
-    return primary_path
+    stream.close()
+    duration_sec = bytes_written / 2 / sample_rate
+    logger.info(f"Recording lane closing: {stream.primary_path} ({duration_sec:.1f}s, {bytes_written} bytes)")
+    return stream.primary_path
 
 
 def _close_all_recording_lanes(state: SessionState, sample_rate: int = 16000) -> Dict[str, Optional[Path]]:
     """Finalize all recording lanes and return paths by source."""
     results = {}
-    for source in list(state.recording_files.keys()):
+    for source in list(state.recording_streams.keys()):
         results[source] = _finalize_recording_lane(state, source, sample_rate)
     return results
 
 
+def _schedule_offline_transcription(
+    state: SessionState, streams: Dict[str, object], transcript: list[dict]
+) -> None:
+    """Queue canonical re-transcription of the closed recording lanes.
+
+    Runs off the session path: the job waits for the writer to finish the
+    files, transcribes them in low-priority worker processes and writes
+    `<session>_<ts>.canonical.json` next to the recordings.
+    """
+    if not OFFLINE_TRANSCRIBE_ENABLED or not streams:
+        return
+    session_id = state.session_id or "unknown"
+    output_path = RECORDING_LANE_DIR / f"{session_id}_{int(time.time())}.canonical.json"
+    try:
+        submit_session_job(
+            session_id, streams, transcript, output_path,
+            sample_rate=state.sample_rate, flush_timeout=RECORDING_FLUSH_TIMEOUT_SECONDS,
+        )
+        logger.info(f"Offline re-transcription queued for {session_id}: {output_path}")
+    except Exception as e:
+        logger.warning(f"Failed to queue offline re-transcription for {session_id}: {e}")
+
+
 def get_queue(state: SessionState, source: str) -> asyncio.Queue:
     if source not in state.queues:
         state.queues[source] = asyncio.Queue(maxsize=QUEUE_MAX)
@@ -757,6 +774,8 @@ async def put_audio(
     state: Optional["SessionState"] = None,
     source: str = "",
     websocket: Optional[WebSocket] = None,
+    received_at: Optional[float] = None,
+    client_timestamp: Optional[float] = None,
 ) -> None:
     """Enqueue audio chunk with byte-based backpressure handling (Dual-Lane Pipeline).
     
@@ -767,6 +786,9 @@ async def put_audio(
     LANE B (Recording): Lossless file write, never drops, for post-processing.
     - Writes all audio to disk regardless of realtime lane backpressure
     - Ensures no audio is lost even if ASR is overloaded
+
+    `received_at` (perf_counter at websocket receive) and the client's capture
+    `client_timestamp` are stamped on the chunk for latency tracing.
     
     NOTE:
     This function must reflect the *actual* ingest queue used by `_asr_loop()`.
@@ -778,22 +800,28 @@ async def put_audio(
     if not chunk:
         return
 
-    # Track metrics
+    # Track metrics (pre-bound family: no lock or key building per frame)
     if state is not None:
-        from server.services.metrics_registry import get_registry
-        get_registry().inc_counter("audio_bytes_received", amount=len(chunk), labels={"source": source})
+        _AUDIO_BYTES_RECEIVED.labels(source).inc(len(chunk))
     
     # TCK-20260213-074: LANE B (Recording) - Write to disk BEFORE any dropping
     # This ensures lossless capture regardless of realtime lane backpressure
     if state is not None and RECORDING_LANE_ENABLED:
         _write_recording_lane(state, source, chunk)
 
+    # System audio is the bleed reference even when the realtime lane drops it
+    if state is not None and BLEED_DETECTION and source in ("mic", "system"):
+        if state.bleed is None:
+            state.bleed = BleedDetector(state.sample_rate)
+        state.bleed.on_receive(source, chunk, received_at)
+
     # Byte-based backpressure: ensure we don't exceed QUEUE_MAX_BYTES
     # This gives predictable max latency (e.g., 2 seconds) regardless of frame size
     current_bytes = _queue_bytes(q)
     chunk_bytes = len(chunk)
     
     # Drop oldest chunks until we have room for the new chunk
+    tracer = state.latency.source(source, state.sample_rate) if state is not None else None
     dropped_count = 0
     dropped_bytes = 0
     while current_bytes + chunk_bytes > QUEUE_MAX_BYTES and not q.empty():
@@ -806,16 +834,24 @@ async def put_audio(
                 dropped_count += 1
         except asyncio.QueueEmpty:
             break
+    if tracer is not None and dropped_count:
+        tracer.on_drop(dropped_count)
     
     # Try to enqueue the new chunk (should succeed now unless queue is weird)
     try:
         q.put_nowait(chunk)
+        if tracer is not None:
+            tracer.on_enqueue(chunk_bytes, received_at, client_timestamp)
     except asyncio.QueueFull:
         # Shouldn't happen with byte-based management, but handle gracefully
         dropped_count += 1
         dropped_bytes += chunk_bytes
         logger.warning(f"Queue full even after dropping - discarding new chunk for {source}")
 
+    # Dropped mic audio still advances the bleed detector's mic clock
+    if dropped_bytes and state is not None and state.bleed is not None:
+        state.bleed.on_drop(source, dropped_bytes)
+
     # Log backpressure events
     if dropped_count > 0 and state is not None:
         state.dropped_frames = getattr(state, "dropped_frames", 0) + dropped_count
@@ -830,9 +866,8 @@ async def put_audio(
             state.dropped_frames,
         )
 
-        from server.services.metrics_registry import get_registry
-        get_registry().inc_counter("audio_frames_dropped", amount=dropped_count, labels={"source": source})
-        get_registry().inc_counter("audio_bytes_dropped", amount=dropped_bytes, labels={"source": source})
+        _AUDIO_FRAMES_DROPPED.labels(source).inc(dropped_count)
+        _AUDIO_BYTES_DROPPED.labels(source).inc(dropped_bytes)
 
         # Send backpressure warning to client (throttled)
         if websocket is not None and not state.backpressure_warned:
@@ -847,62 +882,79 @@ async def put_audio(
             }))
 
 
-async def _pcm_stream(queue: asyncio.Queue) -> AsyncIterator[bytes]:
-    """Drain audio queue until EOF (None sentinel)."""
+async def _pcm_stream(
+    queue: asyncio.Queue, tracer: Any = None, transform: Optional[Callable[[bytes], bytes]] = None
+) -> AsyncIterator[bytes]:
+    """Drain audio queue until EOF (None sentinel), stamping dequeues on `tracer`."""
     while True:
         chunk = await queue.get()
         if chunk is None:
             return
-        yield chunk
+        if tracer is not None:
+            tracer.on_dequeue(len(chunk))
+        yield transform(chunk) if transform is not None else chunk
+
+
+def _mic_bleed_filter(state: SessionState) -> Callable[[bytes], bytes]:
+    """Silence mic chunks that are system bleed (checked at dequeue, after the aligned system audio arrived)."""
+    def _filter(chunk: bytes) -> bytes:
+        if state.bleed is None:
+            return chunk
+        state.bleed.set_clock_spread_ms(state.source_clock_spread_ms)
+        return state.bleed.filter_mic(chunk)
+    return _filter
 
 
 async def _asr_loop(websocket: WebSocket, state: SessionState, queue: asyncio.Queue, source: str) -> None:
     logger.debug(f"starting ASR loop for source={source}")
     
-    # TCK-20260211-010: Track RTF for degrade ladder
-    last_chunk_time = None
-    chunk_count = 0
+    # Providers report VAD/inference timings to this source's tracer via a contextvar.
+    tracer = state.latency.source(source, state.sample_rate)
+    trace_token = bind_source(tracer)
+    source_key = _normalize_source(source)
+    # Decodes from this loop are scheduled fairly against other sessions' flows
+    flow_token = bind_flow(state.connection_id or str(id(state)), source_key)
+    # PR6: the metrics loop reads measured (inference_s, audio_s) samples directly.
+    state.asr_samples_by_source[source_key] = tracer.inference_samples
     
+    transform = _mic_bleed_filter(state) if BLEED_DETECTION and source_key == "mic" else None
+
     try:
-        async for event in stream_asr(_pcm_stream(queue), sample_rate=state.sample_rate, source=source):
+        async for event in stream_asr(_pcm_stream(queue, tracer, transform), sample_rate=state.sample_rate,
+                                      source=source, session_config=lambda: _session_asr_config(state)):
             logger.debug(f"yielding event: {event}")
+            emission = None
+            if event.get("type") in ("asr_partial", "asr_final"):
+                emission = tracer.on_emit(float(event.get("t1", 0.0) or 0.0))
             
-            # TCK-20260211-010: Calculate RTF for degrade ladder
-            chunk_count += 1
-            current_time = time.time()
-            
-            if event.get("type") == "asr_final":
-                # Calculate processing time and audio duration
-                t0 = event.get("t0", 0)
-                t1 = event.get("t1", 0)
-                audio_duration = t1 - t0
-                
-                if last_chunk_time is not None and audio_duration > 0:
-                    processing_time = current_time - last_chunk_time
-                    rtf = processing_time / audio_duration
-                    
-                    # Store for metrics
+            # TCK-20260211-010: RTF for the degrade ladder from measured inference
+            # time over the audio each call covered (not time between finals).
+            samples = tracer.take_new_inferences()
+            if samples:
+                for processing_time, audio_duration in samples:
                     state.asr_processing_times.append(processing_time)
-                    source_key = _normalize_source(event.get("source", source))
-                    samples = state.asr_samples_by_source.setdefault(source_key, [])
-                    samples.append((processing_time, audio_duration))
-                    # Bound memory: keep a moderate amount of history per source.
-                    if len(samples) > 200:
-                        del samples[: len(samples) - 200]
                     state.audio_time_processed += audio_duration
                     state.processing_time_total += processing_time
-                    
-                    # Check degrade ladder if available
-                    if state.degrade_ladder and chunk_count % 5 == 0:  # Check every 5 chunks
-                        try:
-                            new_level, action = await state.degrade_ladder.check(rtf)
-                            if action:
-                                logger.info(f"Degrade action applied: {action.name}")
-                        except Exception as e:
-                            logger.error(f"Degrade ladder check failed: {e}")
-                
-                last_chunk_time = current_time
-                
+                if len(state.asr_processing_times) > 200:
+                    del state.asr_processing_times[: len(state.asr_processing_times) - 200]
+                rtf = _compute_recent_rtf(samples)
+                if state.admission_key:
+                    get_admission_controller().observe(state.admission_key, source_key, rtf)
+                if state.overload_key and rtf > 0:
+                    # Predictive controller decides levels across sessions; ladder keeps RTF for status
+                    overload = get_overload_controller()
+                    for processing_time, audio_duration in samples:
+                        overload.observe_inference(state.overload_key, source_key, processing_time, audio_duration)
+                    state.degrade_ladder.observe(rtf)
+                elif state.degrade_ladder and rtf > 0:
+                    try:
+                        new_level, action = await state.degrade_ladder.check(rtf)
+                        if action:
+                            logger.info(f"Degrade action applied: {action.name}")
+                    except Exception as e:
+                        logger.error(f"Degrade ladder check failed: {e}")
+            
+            if event.get("type") == "asr_final":
                 # Add source if missing (stream_asr does it, but double check)
                 if "source" not in event:
                     event["source"] = source
@@ -914,6 +966,15 @@ async def _asr_loop(websocket: WebSocket, state: SessionState, queue: asyncio.Qu
                         t1=float(event.get("t1", 0.0) or 0.0),
                         text=str(event.get("text", "") or ""),
                     )
+                if state.diarization_mode == "streaming" and "speaker" not in event:
+                    speaker = _live_speaker_label(
+                        state,
+                        event.get("source", source),
+                        float(event.get("t0", 0.0) or 0.0),
+                        float(event.get("t1", 0.0) or 0.0),
+                    )
+                    if speaker:
+                        event["speaker"] = speaker
                 source_key = _normalize_source(event.get("source", source))
                 state.asr_last_t1_by_source[source_key] = float(event.get("t1", 0.0))
                 _update_source_clock_spread(state)
@@ -933,6 +994,8 @@ async def _asr_loop(websocket: WebSocket, state: SessionState, queue: asyncio.Qu
                     logger.debug(f"Failed to index transcript: {e}")
             
             await ws_send(state, websocket, event)
+            if emission is not None:
+                tracer.on_sent(emission, event["type"])
             
     except Exception as e:
         logger.error(f"error in ASR loop ({source}): {e}")
@@ -942,6 +1005,9 @@ async def _asr_loop(websocket: WebSocket, state: SessionState, queue: asyncio.Qu
                 await state.degrade_ladder.report_provider_error(e)
             except Exception as degrade_err:
                 logger.error(f"Failed to report error to degrade ladder: {degrade_err}")
+    finally:
+        unbind_flow(flow_token)
+        unbind_source(trace_token)
 
 
 def _has_new_transcript_segments(state: SessionState, last_t1: float) -> bool:
@@ -1027,6 +1093,34 @@ async def _analysis_loop(websocket: WebSocket, state: SessionState) -> None:
         return
 
 
+async def _send_ocr_backfill(websocket: WebSocket, state: SessionState, hybrid: Any) -> None:
+    """Send enriched OCR results completed by the VLM scheduler's idle-time backfill."""
+    drain = getattr(hybrid, "drain_backfill_results", None)
+    if drain is None:
+        return
+    for result in drain(state.session_id or "unknown"):
+        response = {
+            "type": "ocr_result",
+            "timestamp": time.time(),
+            "success": result.success,
+            "backfill": True,
+            "text_preview": result.primary_text[:100] + "..." if len(result.primary_text) > 100 else result.primary_text,
+            "full_text": result.primary_text,
+            "word_count": result.word_count,
+            "confidence": round(result.confidence, 1),
+            "source": result.source,
+            "is_enriched": result.is_enriched,
+            "layout_type": result.layout_type,
+        }
+        if result.semantic_summary:
+            response["semantic_summary"] = result.semantic_summary
+        if result.key_insights:
+            response["key_insights"] = result.key_insights
+        if result.entities:
+            response["entities"] = [{"text": e.text, "type": e.type} for e in result.entities]
+        await ws_send(state, websocket, response)
+
+
 async def _transcribe_voice_note(websocket: WebSocket, state: SessionState, audio_data: bytes) -> None:
     """VNI: Transcribe voice note audio and send transcript back to client."""
     if not audio_data:
@@ -1101,6 +1195,23 @@ async def _transcribe_voice_note(websocket: WebSocket, state: SessionState, audi
 
 
 
+def _session_asr_config(state: SessionState) -> Optional[Any]:
+    """ASRConfig this session's streams must use now, or None to follow the model manager.
+
+    A session admitted on a cheaper config keeps it. Otherwise the session
+    streams on its degrade ladder's config while the ladder is above NORMAL,
+    so the overload controller degrades one session, not the whole server.
+    """
+    if state.asr_config is None:
+        return None
+    if (state.admission or {}).get("verdict") == AdmissionVerdict.DEGRADED.value:
+        return state.asr_config
+    ladder = state.degrade_ladder
+    if ladder is not None and ladder.state.level > DegradeLevel.NORMAL:
+        return ladder.config
+    return None
+
+
 async def _on_degrade_level_change(
     websocket: WebSocket, 
     state: SessionState, 
@@ -1121,6 +1232,8 @@ async def _on_degrade_level_change(
         DegradeLevel.FAILOVER: ("reconnecting", "Switching to fallback provider"),
     }
     
+    # Chunk size, model and VAD changes reach this session's streams at their
+    # next chunk boundary (stream_asr polls _session_asr_config)
     status, message = level_to_status.get(new_level, ("warning", "Performance issue"))
     
     await ws_send(state, websocket, {
@@ -1167,6 +1280,8 @@ async def _metrics_loop(websocket: WebSocket, state: SessionState) -> None:
                 bytes_per_second = SAMPLE_RATE * BYTES_PER_SAMPLE
                 backlog_seconds = queue_bytes / bytes_per_second if bytes_per_second > 0 else 0
                 max_backlog_seconds = QUEUE_MAX_SECONDS
+                if state.overload_key:
+                    get_overload_controller().observe_backlog(state.overload_key, source_key, backlog_seconds)
                 
                 # Legacy: also report frame count for compatibility
                 queue_depth = q.qsize()
@@ -1176,8 +1291,8 @@ async def _metrics_loop(websocket: WebSocket, state: SessionState) -> None:
                 state.asr_last_dropped = state.dropped_frames
                 
                 # PR6: Compute realtime factor from actual audio duration processed (not configured chunk size).
-                recent_samples = state.asr_samples_by_source.get(source_key, [])
-                recent_window = recent_samples[-10:] if recent_samples else []
+                recent_samples = list(state.asr_samples_by_source.get(source_key, ()))
+                recent_window = recent_samples[-10:]
                 recent_processing_times = [p for (p, _) in recent_window]
                 avg_infer_time = (
                     (sum(recent_processing_times) / len(recent_processing_times)) if recent_processing_times else 0.0
@@ -1237,6 +1352,8 @@ async def _metrics_loop(websocket: WebSocket, state: SessionState) -> None:
                     "avg_infer_ms": round(avg_infer_time * 1000, 1),
                     "avg_processing_ms": round(avg_infer_time * 1000, 1),
                     "realtime_factor": round(realtime_factor, 2),
+                    # Per-stage p50/p95/p99 (ms) over the last minute, whole session
+                    "latency_ms": state.latency.summary(window=60.0),
                     # Provider info
                     "provider": state.provider_name,
                     "model_id": state.model_id,
@@ -1259,14 +1376,26 @@ async def _metrics_loop(websocket: WebSocket, state: SessionState) -> None:
                     metrics_payload["degrade_level"] = degrade_status.get("level")
                     metrics_payload["degrade_level_num"] = degrade_status.get("level_number")
                     metrics_payload["rtf_avg_10s"] = degrade_status.get("rtf_avg_10s")
+                if state.bleed is not None and source == "mic":
+                    # ASR-seconds saved by not transcribing system bleed on the mic lane
+                    metrics_payload["bleed"] = state.bleed.snapshot()
+                if state.overload_key:
+                    metrics_payload["overload_pressure"] = round(
+                        get_overload_controller().session_pressure(state.overload_key), 2
+                    )
                 
                 await ws_send(state, websocket, metrics_payload)
                 
                 # V1: Update global metrics registry
-                from server.services.metrics_registry import get_registry
-                registry = get_registry()
-                registry.set_gauge("queue_depth", queue_depth, labels={"source": source})
-                registry.observe_histogram("inference_time_ms", avg_infer_time * 1000)
+                _QUEUE_DEPTH.labels(source).set(queue_depth)
+                _INFERENCE_TIME_MS.observe(avg_infer_time * 1000)
+
+            # Predictive degrade: rate-limited inside, so every session's tick may call it
+            if state.overload_key:
+                try:
+                    await get_overload_controller().evaluate()
+                except Exception as e:
+                    logger.error(f"Overload controller evaluation failed: {e}")
                 
     except asyncio.CancelledError:
         return
@@ -1295,6 +1424,8 @@ async def ws_live_listener(websocket: WebSocket) -> None:
     diarization_max_seconds = int(os.getenv("ECHOPANEL_DIARIZATION_MAX_SECONDS", "1800"))
     state.diarization_enabled = diarization_enabled
     state.diarization_max_bytes = diarization_max_seconds * 16000 * 2
+    if diarization_enabled:
+        state.diarization_mode = resolve_diarization_mode()
 
     # PR2: Don't send streaming status on connect - wait for start message
     # Initial status is "connected" not "streaming"
@@ -1306,6 +1437,7 @@ async def ws_live_listener(websocket: WebSocket) -> None:
         while True:
             try:
                 message = await websocket.receive()
+                received_at = time.perf_counter()
                 if DEBUG:
                     logger.debug("ws_live_listener: received %s", _debug_ws_message_summary(message))
             except RuntimeError:
@@ -1364,10 +1496,50 @@ async def ws_live_listener(websocket: WebSocket) -> None:
                             await websocket.close()
                             return
                         
+                        from dataclasses import replace
+
+                        from server.services.asr_providers import ASRProviderRegistry
+                        from server.services.model_preloader import get_model_manager
+                        # What the session streams on unless admission hands it a cheaper config
+                        manager = get_model_manager()
+                        config = replace(manager.active_config())
+
+                        # Admit against estimated compute demand, possibly with a cheaper config
+                        if ADMISSION_CONTROL and not state.started:
+                            sources = {_normalize_source(s) for s in start_msg.sources or ()}
+                            admission = get_admission_controller().admit(state.connection_id, SessionRequest(
+                                config=config,
+                                sources=len(sources) or DEFAULT_SOURCES,
+                                ocr=OCR_ENABLED,
+                                diarization=state.diarization_enabled,
+                                client_vad=state.client_vad_enabled,
+                            ))
+                            state.admission = admission.to_dict()
+                            if not admission.admitted:
+                                await ws_send(state, websocket, {
+                                    "type": "status",
+                                    "state": "error",
+                                    "message": "Server at capacity, please try again later",
+                                    "retry_after_s": state.admission.get("retry_after_s"),
+                                    "admission": state.admission,
+                                })
+                                await websocket.close()
+                                return
+                            state.admission_key = state.connection_id
+                            config = admission.config
+                            if admission.verdict is AdmissionVerdict.DEGRADED:
+                                provider = ASRProviderRegistry.get_provider(name=manager.provider_name, config=config)
+                                if provider is not None:
+                                    # Load a smaller model off the event loop before streaming
+                                    await getattr(provider, "_provider", provider).preload()
+
                         # PR5: Acquire session slot (concurrency limiting)
                         controller = get_concurrency_controller()
                         session_acquired = await controller.acquire_session(timeout=5.0)
                         if not session_acquired:
+                            if state.admission_key:
+                                get_admission_controller().release(state.admission_key)
+                                state.admission_key = None
                             await ws_send(state, websocket, {
                                 "type": "status",
                                 "state": "error",
@@ -1377,13 +1549,12 @@ async def ws_live_listener(websocket: WebSocket) -> None:
                             return
                         
                         state.sample_rate = sample_rate
+                        if not state.started:
+                            get_registry().gauge("active_sessions").inc()  # Paired with release in finally
                         state.started = True
                         
                         # V1: Get provider info for metrics
-                        from server.services.asr_providers import ASRProviderRegistry
-                        from server.services.asr_stream import _get_default_config
-                        config = _get_default_config()
-                        provider = ASRProviderRegistry.get_provider(config=config)
+                        provider = ASRProviderRegistry.get_provider(name=manager.provider_name, config=config)
                         if provider:
                             state.provider_name = provider.name
                             state.model_id = config.model_name
@@ -1400,11 +1571,14 @@ async def ws_live_listener(websocket: WebSocket) -> None:
                                 )
                             )
                             logger.info(f"Degrade ladder initialized at level {state.degrade_ladder.state.level.name}")
+                            if PREDICTIVE_DEGRADE:
+                                state.overload_key = state.connection_id
+                                get_overload_controller().register(
+                                    state.overload_key, state.degrade_ladder, priority=start_msg.priority
+                                )
                         
                         # V1: Track connection in metrics
-                        from server.services.metrics_registry import get_registry
                         get_registry().inc_counter("ws_connections_total")
-                        get_registry().set_gauge("active_sessions", 1)  # Simplified - should count actual
                         
                         # PR2: Now ASR is ready, send streaming ACK
                         await ws_send(state, websocket, {
@@ -1418,6 +1592,7 @@ async def ws_live_listener(websocket: WebSocket) -> None:
                                 "clock_drift_telemetry_enabled": state.client_clock_drift_telemetry_enabled,
                                 "client_vad_telemetry_enabled": state.client_vad_telemetry_enabled,
                             },
+                            "admission": state.admission,
                         })
                         
                         logger.info(f"Session started: session_id={state.session_id}, "
@@ -1443,6 +1618,8 @@ async def ws_live_listener(websocket: WebSocket) -> None:
                         state.analysis_tasks.append(asyncio.create_task(_analysis_loop(websocket, state)))
                         # PR2: Start metrics emission task
                         state.metrics_task = asyncio.create_task(_metrics_loop(websocket, state))
+                        if state.diarization_enabled and state.diarization_mode == "streaming":
+                            state.diarization_task = asyncio.create_task(_diarization_loop(state))
 
                     elif msg_type == "audio":
                         # B1 Fix: Handle source-tagged audio frames
@@ -1472,14 +1649,19 @@ async def ws_live_listener(websocket: WebSocket) -> None:
                             # P2-13: Write audio to dump file
                             _write_audio_dump(state, source, chunk)
                             
-                            await put_audio(q, chunk, state=state, source=source, websocket=websocket)
+                            client_timestamp = payload.get("timestamp")
+                            await put_audio(
+                                q, chunk, state=state, source=source, websocket=websocket,
+                                received_at=received_at,
+                                client_timestamp=client_timestamp if isinstance(client_timestamp, (int, float)) else None,
+                            )
                             _append_diarization_audio(state, source, chunk)
 
                     elif msg_type == "screen_frame":
                         # OCR Pipeline: Process screen capture frame
                         if state.started:
                             try:
-                                ocr_handler = get_ocr_handler()
+                                ocr_handler = await get_ocr_handler_async()
                                 if ocr_handler.enabled:
                                     image_data = payload.get("image_data", "")
                                     timestamp = payload.get("timestamp", time.time())
@@ -1487,6 +1669,13 @@ async def ws_live_listener(websocket: WebSocket) -> None:
                                     
                                     # Use hybrid pipeline with mode
                                     hybrid = getattr(ocr_handler, '_hybrid', None)
+                                    if hybrid and state.ocr_hybrid is None:
+                                        # Push backfilled enrichment as soon as the VLM finishes it
+                                        state.ocr_hybrid = hybrid
+                                        hybrid.on_backfill_ready(
+                                            state.session_id or "unknown",
+                                            lambda: asyncio.create_task(_send_ocr_backfill(websocket, state, state.ocr_hybrid)),
+                                        )
                                     
                                     if hybrid and mode in ["query", "quality"]:
                                         # Direct hybrid pipeline for special modes
@@ -1571,7 +1760,7 @@ async def ws_live_listener(websocket: WebSocket) -> None:
                         # Query a specific slide (requires hybrid OCR)
                         if state.started:
                             try:
-                                ocr_handler = get_ocr_handler()
+                                ocr_handler = await get_ocr_handler_async()
                                 hybrid = getattr(ocr_handler, '_hybrid', None)
                                 
                                 if hybrid and hybrid.is_available():
@@ -1722,6 +1911,11 @@ async def ws_live_listener(websocket: WebSocket) -> None:
                         except asyncio.TimeoutError:
                             logger.warning("Analysis task cancellation timed out, some tasks may be orphaned")
                         
+                        if state.diarization_task:
+                            state.diarization_task.cancel()
+                            await asyncio.gather(state.diarization_task, return_exceptions=True)
+                            state.diarization_task = None
+                        
                         # Run session-end diarization per source to avoid mixed-source corruption.
                         diarization_by_source = await _run_diarization_per_source(state)
                         diarization_segments = _flatten_diarization_segments(diarization_by_source)
@@ -1744,9 +1938,11 @@ async def ws_live_listener(websocket: WebSocket) -> None:
                         entities = await asyncio.to_thread(extract_entities, transcript_snapshot)
                         
                         # TCK-20260213-074: Finalize recording lanes (lossless audio files)
+                        recording_streams = dict(state.recording_streams)
                         recording_paths = _close_all_recording_lanes(state, state.sample_rate)
                         if recording_paths:
                             logger.info(f"Session recordings finalized: {recording_paths}")
+                        _schedule_offline_transcription(state, recording_streams, transcript_snapshot)
                         
                         await ws_send(
                             state,
@@ -1819,7 +2015,7 @@ async def ws_live_listener(websocket: WebSocket) -> None:
                 
                 # P2-13: Write audio to dump file
                 _write_audio_dump(state, source, chunk)
-                await put_audio(q, chunk, state=state, source=source, websocket=websocket)
+                await put_audio(q, chunk, state=state, source=source, websocket=websocket, received_at=received_at)
                 _append_diarization_audio(state, source, chunk)
                 
                 if DEBUG:
@@ -1839,18 +2035,25 @@ async def ws_live_listener(websocket: WebSocket) -> None:
             controller = get_concurrency_controller()
             controller.release_session()
             logger.debug(f"Released session slot for {state.session_id}")
+            get_registry().gauge("active_sessions").dec()
+        if state.overload_key:
+            get_overload_controller().unregister(state.overload_key)
+        if state.admission_key:
+            get_admission_controller().release(state.admission_key)
+        
+        if state.ocr_hybrid:
+            state.ocr_hybrid.end_session(state.session_id or "unknown")
         
         # P2-13: Close audio dump files
         _close_audio_dumps(state)
         
         # TCK-20260213-074: Finalize recording lanes on disconnect/abnormal close
-        if state.recording_files:
+        if state.recording_streams:
             recording_paths = _close_all_recording_lanes(state, state.sample_rate)
             if recording_paths:
                 logger.info(f"Disconnect recordings finalized: {recording_paths}")
         
         # V1: Track disconnect in metrics
-        from server.services.metrics_registry import get_registry
         get_registry().inc_counter("ws_disconnects_total")
         
         # PR2: Cancel metrics task
@@ -1864,6 +2067,8 @@ async def ws_live_listener(websocket: WebSocket) -> None:
         for q in state.queues.values():
             await q.put(None)
         all_tasks = state.tasks + state.asr_tasks + state.analysis_tasks
+        if state.diarization_task:
+            all_tasks.append(state.diarization_task)
         for task in all_tasks:
             task.cancel()
         
@@ -1878,6 +2083,14 @@ async def ws_live_listener(websocket: WebSocket) -> None:
                 "(some tasks may still be running). Forcing closure."
             )
         
+        # Opt-in (ECHOPANEL_LATENCY_TRACE=1): Chrome trace of per-chunk stage spans
+        if state.started and state.latency.tracing:
+            try:
+                trace_path = await asyncio.to_thread(state.latency.write_chrome_trace, state.session_id)
+                logger.info(f"Latency trace written: {trace_path}")
+            except Exception as e:
+                logger.warning(f"Failed to write latency trace: {e}")
+        
         # Brain Dump: End indexing session
         try:
             integration = get_integration()
@@ -1891,4 +2104,6 @@ async def ws_live_listener(websocket: WebSocket) -> None:
                    f"connection_id={state.connection_id}, "
                    f"dropped_frames={state.dropped_frames}, "
                    f"transcript_segments={len(state.transcript)}, "
-                   f"audio_time={state.audio_time_processed:.1f}s")
+                   f"audio_time={state.audio_time_processed:.1f}s, "
+                   f"bleed_suppressed={state.bleed.suppressed_seconds if state.bleed else 0.0:.1f}s, "
+                   f"end_to_end_p95_ms={state.latency.stages['end_to_end'].quantile(0.95):.0f}")
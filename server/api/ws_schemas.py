@@ -1,7 +1,7 @@
 """Pydantic schemas for WebSocket message validation."""
 
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, List, Literal
 
 
 class StartMessage(BaseModel):
@@ -14,6 +14,10 @@ class StartMessage(BaseModel):
     attempt_id: Optional[str] = Field(default=None, max_length=256)
     connection_id: Optional[str] = Field(default=None, max_length=256)
     client_features: Optional[Dict[str, Any]] = None
+    # Overload handling degrades lower-priority sessions first
+    priority: int = Field(default=0, ge=-10, le=10)
+    # Sources the client will stream ("mic", "system"); sizes admission control's estimate
+    sources: Optional[List[str]] = Field(default=None, max_length=4)
 
     @field_validator("session_id")
     @classmethod
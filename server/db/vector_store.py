@@ -6,14 +6,14 @@ for storing and querying transcript embeddings.
 
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 from uuid import UUID
 
-import chromadb
-from chromadb.config import Settings
-
 from .models import TranscriptSegment
 
+if TYPE_CHECKING:
+    import chromadb
+
 logger = logging.getLogger(__name__)
 
 
@@ -52,12 +52,16 @@ class VectorStore:
         self.persist_directory.parent.mkdir(parents=True, exist_ok=True)
         self.collection_name = collection_name
         
-        self._client: Optional[chromadb.Client] = None
-        self._collection: Optional[chromadb.Collection] = None
+        self._client: Optional["chromadb.ClientAPI"] = None
+        self._collection: Optional["chromadb.Collection"] = None
     
     async def initialize(self) -> None:
         """Initialize ChromaDB client and collection."""
         logger.info(f"Initializing vector store at {self.persist_directory}")
+
+        # Imported here: chromadb costs ~0.4s of server import time
+        import chromadb
+        from chromadb.config import Settings
         
         # Create ChromaDB client
         self._client = chromadb.PersistentClient(
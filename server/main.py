@@ -4,7 +4,10 @@ import os
 from pathlib import Path
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Request
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from pydantic import BaseModel
 
 from server.api.documents import router as documents_router
 from server.api.ws_live_listener import router as ws_router
@@ -14,7 +17,6 @@ from server.security import (
     require_http_auth as _require_http_auth,
 )
 from server.services.asr_providers import ASRProviderRegistry
-from server.services.asr_stream import _get_default_config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -83,6 +85,8 @@ def _prefer_whisper_cpp_for_apple_silicon(detector, profile, recommendation):
         return recommendation
     if recommendation.provider == "whisper_cpp":
         return recommendation
+    if getattr(recommendation, "calibrated", False):
+        return recommendation  # Measured on this machine; don't override with a RAM heuristic
     if not getattr(profile, "has_mps", False):
         return recommendation
 
@@ -175,32 +179,25 @@ async def lifespan(app: FastAPI):
                 "Set ECHOPANEL_WS_AUTH_TOKEN for security."
             )
     
+    # On-box calibration (ECHOPANEL_CALIBRATION=1|force) feeds the auto-selection below
+    if not os.getenv("ECHOPANEL_ASR_PROVIDER"):
+        try:
+            from server.services.calibration import calibrate_at_startup
+            await calibrate_at_startup()
+        except Exception as e:
+            logger.warning(f"ASR calibration failed: {e}. Using static capability tiers.")
+
     # TCK-20260211-009: Auto-select provider based on capabilities
     _auto_select_provider()
     
-    # PR4: Initialize model with warmup (eager loading)
-    try:
-        from server.services.model_preloader import initialize_model_at_startup
-        model_ready = await initialize_model_at_startup()
-        if not model_ready:
-            logger.warning("Model warmup incomplete, first request may be slower")
-    except Exception as e:
-        logger.error(f"Model preloading failed: {e}")
-        # Continue anyway - will load on first request
-
-    # QW-003: Preload embedding model for RAG
-    try:
-        from server.services.embeddings import get_embedding_service
-        embedding_service = get_embedding_service()
-        if embedding_service.is_available():
-            # Warmup is lightweight, do it synchronously
-            embedding_service.warmup()
-            logger.info("Embedding model warmed up successfully")
-        else:
-            logger.warning("Embedding service not available (sentence-transformers not installed)")
-    except Exception as e:
-        logger.warning(f"Embedding model warmup failed: {e}")
-        # Continue anyway - RAG will work without embeddings (lexical only)
+    # PR4 + QW-003: Warm ASR, VAD, embeddings/RAG, diarization and OCR concurrently.
+    # Startup only waits for the blocking set (ASR by default); the rest report
+    # readiness per component in /health as they finish.
+    from server.services.startup_warmup import blocking_components, get_startup_warmup, selected_components
+    warmup = get_startup_warmup()
+    warmup.start(selected_components())
+    if not await warmup.wait_for(blocking_components()):
+        logger.warning(f"Startup warmup incomplete: {warmup.snapshot()}; first requests may be slower")
 
     # Brain Dump: Initialize storage and indexing
     try:
@@ -227,17 +224,9 @@ async def lifespan(app: FastAPI):
         logger.warning(f"Rate limiter initialization failed: {e}")
         # Continue anyway - rate limiting is optional
 
-    diarization_prewarm_task: asyncio.Task[bool] | None = None
-    if _env_flag("ECHOPANEL_PREWARM_DIARIZATION", default=True):
-        try:
-            from server.services.diarization import prewarm_diarization_pipeline
-
-            timeout_seconds = float(os.getenv("ECHOPANEL_DIARIZATION_PREWARM_TIMEOUT", "120"))
-            diarization_prewarm_task = asyncio.create_task(
-                prewarm_diarization_pipeline(timeout_seconds=timeout_seconds)
-            )
-        except Exception as e:
-            logger.warning(f"Failed to start diarization prewarm task: {e}")
+    # Event-loop lag heartbeat (and optional blocking-call watchdog) feeding /metrics
+    from server.services.loop_monitor import get_loop_monitor
+    await get_loop_monitor().start()
 
     # Initialize ASR providers (legacy check)
     try:
@@ -252,12 +241,9 @@ async def lifespan(app: FastAPI):
 
     yield
 
-    if diarization_prewarm_task and not diarization_prewarm_task.done():
-        diarization_prewarm_task.cancel()
-        try:
-            await diarization_prewarm_task
-        except asyncio.CancelledError:
-            pass
+    await get_loop_monitor().stop()
+
+    await warmup.cancel()
 
     try:
         from server.services.model_preloader import shutdown_model_manager
@@ -285,6 +271,21 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Rate limiter shutdown failed: {e}")
 
+    # Offline re-transcription: drop queued jobs, don't wait on a running one
+    try:
+        from server.services.offline_transcriber import shutdown_offline_jobs
+        shutdown_offline_jobs(wait=False)
+    except Exception as e:
+        logger.warning(f"Offline transcription shutdown failed: {e}")
+
+    # Recording writer: drain queued audio and finalize segment files
+    try:
+        from server.services.recording_writer import shutdown_recording_writer
+        if not await asyncio.to_thread(shutdown_recording_writer):
+            logger.warning("Recording writer did not drain before shutdown timeout")
+    except Exception as e:
+        logger.warning(f"Recording writer shutdown failed: {e}")
+
     logger.info("Shutting down EchoPanel server...")
 
 
@@ -299,8 +300,8 @@ async def rate_limit_middleware(request: Request, call_next):
     """Apply rate limiting to all HTTP requests."""
     from server.api.rate_limiter import get_rate_limiter
     
-    # Skip rate limiting for health checks (used by monitoring)
-    if request.url.path == "/health":
+    # Skip rate limiting for health checks and metrics scrapes (used by monitoring)
+    if request.url.path in ("/health", "/metrics"):
         return await call_next(request)
     
     # Skip rate limiting for test clients (TestClient uses "testclient" as host)
@@ -317,7 +318,7 @@ async def rate_limit_middleware(request: Request, call_next):
     
     limiter = get_rate_limiter()
     if not await limiter.acquire(client_id):
-        remaining = limiter.get_remaining(client_id)
+        remaining = await limiter.get_remaining(client_id)
         from fastapi.responses import JSONResponse
         return JSONResponse(
             status_code=429,
@@ -337,7 +338,7 @@ async def rate_limit_middleware(request: Request, call_next):
     response = await call_next(request)
     
     # Add rate limit headers to response
-    remaining = limiter.get_remaining(client_id)
+    remaining = await limiter.get_remaining(client_id)
     response.headers["X-RateLimit-Remaining-Minute"] = str(remaining.get("minute", 0))
     response.headers["X-RateLimit-Remaining-Hour"] = str(remaining.get("hour", 0))
     
@@ -352,25 +353,40 @@ async def root(request: Request) -> dict:
 
 
 @app.get("/health")
-async def health_check(request: Request) -> dict:
+async def health_check(request: Request, component: Optional[str] = None) -> dict:
     _require_http_auth(request)
     """
     Health check that reflects ASR readiness.
 
     - Returns 200 only when an ASR provider is available and model is warmed up.
     - Returns 503 with a reason when the server is up but can't transcribe.
+    - `components` reports startup warmup readiness per component; with
+      `?component=<name>` the status code reflects that component alone.
     """
     logger.debug("Health check requested.")
 
+    from server.services.startup_warmup import get_startup_warmup
+    warmup = get_startup_warmup()
+    components = warmup.snapshot()
+    if component is not None:
+        status = warmup.status(component)
+        if status is None:
+            raise HTTPException(status_code=404, detail={"status": "error", "component": component,
+                                                         "reason": "component not warmed"})
+        if not status["ready"]:
+            raise HTTPException(status_code=503, detail={"status": "loading", "component": component, **status})
+        return {"status": "ok", "service": "echopanel", "component": component, **status}
+
     try:
-        config = _get_default_config()
-        provider = ASRProviderRegistry.get_provider(config=config)
-        provider_name = provider.name if provider else None
-        
         # PR4: Check model preloader status
         from server.services.model_preloader import get_model_manager
         manager = get_model_manager()
         model_health = manager.health()
+
+        # The hot-swapped model once there is one, else the environment default
+        config = manager.active_config()
+        provider = ASRProviderRegistry.get_provider(name=manager.provider_name, config=config)
+        provider_name = provider.name if provider else None
         
         # Deep health: provider must be available AND model warmed up
         if provider and provider.is_available and model_health.ready:
@@ -384,6 +400,7 @@ async def health_check(request: Request) -> dict:
                 "load_time_ms": model_health.load_time_ms,
                 "warmup_time_ms": model_health.warmup_time_ms,
                 "process_rss_mb": model_health.process_rss_mb,
+                "components": components,
             }
         
         # Not ready - determine why
@@ -403,6 +420,7 @@ async def health_check(request: Request) -> dict:
                 "model": config.model_name,
                 "model_state": model_health.state.name,
                 "reason": reason,
+                "components": components,
             },
         )
     except HTTPException:
@@ -411,6 +429,31 @@ async def health_check(request: Request) -> dict:
         raise HTTPException(status_code=500, detail={"status": "error", "service": "echopanel", "error": str(e)})
 
 
+@app.get("/metrics")
+async def metrics(request: Request) -> Response:
+    _require_http_auth(request)
+    """
+    Prometheus text-format metrics (counters, gauges, histograms, process stats).
+    """
+    from server.services.metrics_registry import EXPOSITION_CONTENT_TYPE, get_registry
+
+    return Response(content=get_registry().render_prometheus(), media_type=EXPOSITION_CONTENT_TYPE)
+
+
+@app.get("/debug/event-loop")
+async def debug_event_loop(request: Request) -> dict:
+    _require_http_auth(request)
+    """
+    Event-loop lag quantiles and recent stall reports.
+
+    With ECHOPANEL_LOOP_WATCHDOG=1 each stall carries the loop thread's stack
+    captured while it was blocked.
+    """
+    from server.services.loop_monitor import get_loop_monitor
+
+    return {"status": "ok", **get_loop_monitor().snapshot()}
+
+
 @app.get("/capabilities")
 async def get_capabilities(request: Request) -> dict:
     _require_http_auth(request)
@@ -421,7 +464,15 @@ async def get_capabilities(request: Request) -> dict:
     """
     try:
         from server.services.capability_detector import get_optimal_config
-        return get_optimal_config()
+        from server.services.admission_control import get_admission_controller
+        from server.services.inference_scheduler import get_inference_scheduler
+        from server.services.thread_planner import get_thread_planner
+        return {
+            **get_optimal_config(),
+            "thread_plan": get_thread_planner().snapshot(),
+            "inference_scheduler": get_inference_scheduler().snapshot(),
+            "admission": get_admission_controller().snapshot(),
+        }
     except Exception as e:
         logger.error(f"Failed to get capabilities: {e}")
         raise HTTPException(
@@ -455,6 +506,57 @@ async def get_model_status(request: Request) -> dict:
         )
 
 
+class ModelSwapRequest(BaseModel):
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    chunk_seconds: Optional[int] = None
+    compute_type: Optional[str] = None
+    device: Optional[str] = None
+    wait: bool = True
+
+
+@app.post("/model-swap")
+async def model_swap(request: Request, body: ModelSwapRequest) -> dict:
+    _require_http_auth(request)
+    """
+    Hot-swap the ASR model without dropping live audio.
+
+    The target is loaded and warmed while the current model keeps serving;
+    live streams switch at their next chunk boundary. With wait=false the swap
+    runs in the background and progress shows up in /model-status.
+    """
+    from dataclasses import replace
+
+    from server.services.model_preloader import get_model_manager
+
+    manager = get_model_manager()
+    if body.provider is not None and not ASRProviderRegistry.is_registered(body.provider):
+        raise HTTPException(status_code=400, detail={"status": "error", "message": f"Unknown provider {body.provider}"})
+
+    base = manager.active_config()
+    overrides = {
+        "model_name": body.model,
+        "chunk_seconds": body.chunk_seconds,
+        "compute_type": body.compute_type,
+        "device": body.device,
+    }
+    config = replace(base, **{k: v for k, v in overrides.items() if v is not None})
+
+    if not body.wait:
+        started = manager.request_swap(body.provider, config)
+        return {"status": "started" if started else "busy", "generation": manager.generation}
+
+    if not await manager.swap_model(body.provider, config):
+        raise HTTPException(status_code=500, detail={"status": "error", "message": manager.health().last_error})
+    return {
+        "status": "ok",
+        "generation": manager.generation,
+        "provider": manager.provider_name,
+        "model": config.model_name,
+        "swap_ms": round(manager.get_stats()["last_swap_ms"], 1),
+    }
+
+
 def main() -> None:
     import uvicorn
 
@@ -12,13 +12,17 @@ Available ASR Providers:
 - onnx_whisper: ONNX Runtime with CoreML (placeholder)
 - voxtral_official: Official Mistral Voxtral
 - voxtral_realtime: Third-party C port (use with caution)
+- synthetic: CPU-free calibrated cost model for scale testing
 
 Available OCR Services:
 - Hybrid OCR: PaddleOCR v5 (fast) + SmolVLM (smart)
 - Layout Classification: Detect slide content types
 - Fusion Engine: Intelligent result merging
+- VLM Scheduler: Batched, budgeted SmolVLM enrichment
 """
 
+import importlib
+
 # ASR Providers
 from .asr_providers import (
     ASRConfig,
@@ -28,84 +32,52 @@ from .asr_providers import (
     AudioSource,
 )
 
-# Import provider implementations (these auto-register)
-try:
-    from .provider_faster_whisper import FasterWhisperProvider
-except ImportError:
-    FasterWhisperProvider = None
-
-try:
-    from .provider_whisper_cpp import WhisperCppProvider
-except ImportError:
-    WhisperCppProvider = None
-
-try:
-    from .provider_mlx_whisper import MLXWhisperProvider
-except ImportError:
-    MLXWhisperProvider = None
-
-try:
-    from .provider_onnx_whisper import ONNXWhisperProvider
-except ImportError:
-    ONNXWhisperProvider = None
-
-try:
-    from .provider_voxtral_realtime import VoxtralRealtimeProvider
-except ImportError:
-    VoxtralRealtimeProvider = None
-
-try:
-    from .provider_voxtral_official import VoxtralOfficialProvider
-except ImportError:
-    VoxtralOfficialProvider = None
-
-# OCR Services
-try:
-    from .screen_ocr import (
-        OCResult,
-        OCRFrameHandler,
-        ScreenOCRPipeline,
-        get_ocr_handler,
-        reset_ocr_handler,
-    )
-except ImportError:
-    OCResult = None
-    OCRFrameHandler = None
-    ScreenOCRPipeline = None
-    get_ocr_handler = None
-    reset_ocr_handler = None
-
-try:
-    from .ocr_hybrid import HybridOCRPipeline, OCRMode, VLMTriggerMode
-except ImportError:
-    HybridOCRPipeline = None
-    OCRMode = None
-    VLMTriggerMode = None
-
-try:
-    from .ocr_fusion import FusionEngine, HybridOCRResult
-except ImportError:
-    FusionEngine = None
-    HybridOCRResult = None
-
-try:
-    from .ocr_layout_classifier import LayoutClassifier, LayoutType
-except ImportError:
-    LayoutClassifier = None
-    LayoutType = None
-
-try:
-    from .ocr_paddle import PaddleOCRPipeline, PaddleOCRResult
-except ImportError:
-    PaddleOCRPipeline = None
-    PaddleOCRResult = None
-
-try:
-    from .ocr_smolvlm import Entity, SmolVLMPipeline, SmolVLMResult
-except ImportError:
-    Entity = None
-    SmolVLMPipeline = None
-    SmolVLMResult = None
+# Provider implementations and OCR services pull in heavy optional stacks
+# (CTranslate2, torch, PaddleOCR, transformers), so they are imported on first
+# attribute access. Providers register with ASRProviderRegistry lazily too.
+# A name whose module fails to import resolves to None.
+_LAZY_EXPORTS = {
+    "FasterWhisperProvider": ".provider_faster_whisper",
+    "WhisperCppProvider": ".provider_whisper_cpp",
+    "MLXWhisperProvider": ".provider_mlx_whisper",
+    "ONNXWhisperProvider": ".provider_onnx_whisper",
+    "VoxtralRealtimeProvider": ".provider_voxtral_realtime",
+    "VoxtralOfficialProvider": ".provider_voxtral_official",
+    "SyntheticProvider": ".provider_synthetic",
+    # OCR Legacy
+    "OCResult": ".screen_ocr",
+    "OCRFrameHandler": ".screen_ocr",
+    "ScreenOCRPipeline": ".screen_ocr",
+    "get_ocr_handler": ".screen_ocr",
+    "get_ocr_handler_async": ".screen_ocr",
+    "reset_ocr_handler": ".screen_ocr",
+    # OCR Hybrid
+    "HybridOCRPipeline": ".ocr_hybrid",
+    "OCRMode": ".ocr_hybrid",
+    "VLMTriggerMode": ".ocr_hybrid",
+    "FusionEngine": ".ocr_fusion",
+    "HybridOCRResult": ".ocr_fusion",
+    "LayoutClassifier": ".ocr_layout_classifier",
+    "LayoutType": ".ocr_layout_classifier",
+    "PaddleOCRPipeline": ".ocr_paddle",
+    "PaddleOCRResult": ".ocr_paddle",
+    "Entity": ".ocr_smolvlm",
+    "SmolVLMPipeline": ".ocr_smolvlm",
+    "SmolVLMResult": ".ocr_smolvlm",
+    "VLMScheduler": ".ocr_vlm_scheduler",
+}
+
+
+def __getattr__(name):
+    module_path = _LAZY_EXPORTS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    try:
+        value = getattr(importlib.import_module(module_path, __name__), name)
+    except ImportError:
+        value = None
+    globals()[name] = value
+    return value
 
 
 __all__ = [
@@ -118,6 +90,7 @@ __all__ = [
     "FasterWhisperProvider",
     "MLXWhisperProvider",
     "ONNXWhisperProvider",
+    "SyntheticProvider",
     "VoxtralOfficialProvider",
     "VoxtralRealtimeProvider",
     "WhisperCppProvider",
@@ -126,6 +99,7 @@ __all__ = [
     "OCRFrameHandler",
     "ScreenOCRPipeline",
     "get_ocr_handler",
+    "get_ocr_handler_async",
     "reset_ocr_handler",
     # OCR Hybrid (New)
     "HybridOCRPipeline",
@@ -139,5 +113,6 @@ __all__ = [
     "PaddleOCRResult",
     "SmolVLMPipeline",
     "SmolVLMResult",
+    "VLMScheduler",
     "Entity",
 ]
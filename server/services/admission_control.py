@@ -0,0 +1,286 @@
+"""
+Cost-model admission control for live sessions.
+
+ConcurrencyController.acquire_session caps sessions with a fixed semaphore,
+so a two-source session on medium.en counted the same as a mic-only session on
+tiny.en. Sessions admitted near capacity pushed every session into backpressure
+drops.
+
+Each new session's compute demand is estimated in decode streams at RTF 1.0,
+the unit the inference scheduler's workers provide:
+
+    demand = sum over sources of rtf(model, vad) [+ OCR] [+ diarization]
+
+rtf(model, vad) comes from the first source that has it:
+1. RTF measured by earlier sessions with that model and VAD setting
+   (per-session EWMA, folded into history when the session ends).
+2. The calibration profile (calibration.py) at the expected concurrency.
+3. A static table by model size.
+
+VAD (server or client side) scales the cost by VAD_SPEECH_FRACTION.
+
+Active sessions count at their measured RTF once they have one, and at their
+admission estimate until then. Capacity is the scheduler's worker count times
+ECHOPANEL_ADMISSION_UTILIZATION, which leaves headroom for bursts.
+
+A new session is accepted if it fits. Otherwise it is offered a degraded
+config that fits: VAD forced on, then successively smaller models. If nothing
+fits, it is rejected with a retry-after hint.
+
+Environment:
+    ECHOPANEL_ADMISSION_CONTROL          Enable cost-based admission (1)
+    ECHOPANEL_ADMISSION_CAPACITY         Capacity in decode streams at RTF 1.0 (scheduler workers)
+    ECHOPANEL_ADMISSION_UTILIZATION      Fraction of capacity to admit up to (0.8)
+    ECHOPANEL_ADMISSION_RETRY_AFTER_S    Base retry-after hint for rejected sessions (30)
+    ECHOPANEL_ADMISSION_DEFAULT_SOURCES  Sources assumed when start doesn't list them (2)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass, field, replace
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from .asr_providers import ASRConfig
+from .degrade_ladder import MODEL_DOWNGRADE
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_CONTROL = os.getenv("ECHOPANEL_ADMISSION_CONTROL", "1").strip().lower() not in {"0", "false", "no", "off"}
+UTILIZATION = float(os.getenv("ECHOPANEL_ADMISSION_UTILIZATION", "0.8"))
+RETRY_AFTER_S = float(os.getenv("ECHOPANEL_ADMISSION_RETRY_AFTER_S", "30"))
+DEFAULT_SOURCES = int(os.getenv("ECHOPANEL_ADMISSION_DEFAULT_SOURCES", "2"))
+
+# Per-stream RTF at the shared thread plan when nothing better is known
+STATIC_RTF = {"tiny": 0.06, "base": 0.12, "small": 0.3, "medium": 0.7, "large": 1.4}
+# Share of audio VAD passes to the decoder (~40% saved in typical meetings)
+VAD_SPEECH_FRACTION = 0.6
+OCR_COST = 0.15
+DIARIZATION_COST = 0.1
+# Weight of the newest session in the per-model RTF history
+HISTORY_ALPHA = 0.3
+
+
+class AdmissionVerdict(Enum):
+    ACCEPT = "accept"
+    DEGRADED = "degraded"
+    REJECT = "reject"
+
+
+@dataclass
+class SessionRequest:
+    """What a new session asks for, from its start parameters."""
+    config: ASRConfig
+    sources: int = DEFAULT_SOURCES
+    ocr: bool = False
+    diarization: bool = False
+    client_vad: bool = False
+
+
+@dataclass
+class AdmissionDecision:
+    verdict: AdmissionVerdict
+    demand: float
+    available: float
+    config: Optional[ASRConfig] = None
+    retry_after_s: Optional[float] = None
+    reason: str = ""
+
+    @property
+    def admitted(self) -> bool:
+        return self.verdict is not AdmissionVerdict.REJECT
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "verdict": self.verdict.value,
+            "demand": round(self.demand, 3),
+            "available": round(self.available, 3),
+            "reason": self.reason,
+        }
+        if self.config is not None:
+            result["model"] = self.config.model_name
+            result["vad_enabled"] = self.config.vad_enabled
+        if self.retry_after_s is not None:
+            result["retry_after_s"] = round(self.retry_after_s)
+        return result
+
+
+@dataclass
+class _Admitted:
+    request: SessionRequest
+    estimate_per_source: float
+    extras: float
+    measured: Dict[str, float] = field(default_factory=dict)  # source -> RTF EWMA
+
+    def load(self) -> float:
+        unmeasured = max(0, self.request.sources - len(self.measured))
+        return sum(self.measured.values()) + unmeasured * self.estimate_per_source + self.extras
+
+
+class AdmissionController:
+    """Admits sessions against remaining inference capacity."""
+
+    def __init__(self, capacity: Optional[float] = None, utilization: float = UTILIZATION,
+                 calibration: Any = None):
+        if capacity is None:
+            capacity = float(os.getenv("ECHOPANEL_ADMISSION_CAPACITY", "0"))
+        if capacity <= 0:
+            from .inference_scheduler import get_inference_scheduler
+
+            capacity = float(get_inference_scheduler().workers)
+        self.capacity = capacity
+        self.utilization = utilization
+        self._calibration = calibration
+        self._sessions: Dict[str, _Admitted] = {}
+        self._history: Dict[Tuple[str, bool], float] = {}  # (model, vad) -> RTF per source
+        self._lock = threading.Lock()
+        self._stats = {"accepted": 0, "degraded": 0, "rejected": 0}
+
+    # ------------------------------------------------------------------ cost model
+
+    def rtf_estimate(self, model: str, vad: bool) -> float:
+        """Expected RTF of one source on `model` with or without VAD."""
+        measured = self._history.get((model, vad))
+        if measured is not None:
+            return measured
+        other = self._history.get((model, not vad))
+        if other is not None:
+            return other * VAD_SPEECH_FRACTION if vad else other / VAD_SPEECH_FRACTION
+        rtf = self._calibrated_rtf(model)
+        if rtf is None:
+            name = model.lower()
+            rtf = next((cost for size, cost in reversed(list(STATIC_RTF.items())) if size in name),
+                       STATIC_RTF["base"])
+        return rtf * VAD_SPEECH_FRACTION if vad else rtf
+
+    def _calibrated_rtf(self, model: str) -> Optional[float]:
+        if self._calibration is None:
+            return None
+        from .calibration import EXPECTED_CONCURRENCY
+
+        for result in self._calibration.results:
+            if result.ok and result.model == model:
+                return result.rtf_at(EXPECTED_CONCURRENCY)
+        return None
+
+    def _demand(self, request: SessionRequest) -> Tuple[float, float, float]:
+        """(per-source estimate, extras, total demand) for a request."""
+        vad = request.config.vad_enabled or request.client_vad
+        per_source = self.rtf_estimate(request.config.model_name, vad)
+        extras = (OCR_COST if request.ocr else 0.0) + (DIARIZATION_COST if request.diarization else 0.0)
+        return per_source, extras, per_source * request.sources + extras
+
+    def _offers(self, request: SessionRequest) -> List[SessionRequest]:
+        """Degraded alternatives, least degraded first."""
+        offers = []
+        config = request.config
+        if not config.vad_enabled:
+            config = replace(config, vad_enabled=True)
+            offers.append(replace(request, config=config))
+        while config.model_name in MODEL_DOWNGRADE:
+            config = replace(config, model_name=MODEL_DOWNGRADE[config.model_name], vad_enabled=True)
+            offers.append(replace(request, config=config))
+        return offers
+
+    # ------------------------------------------------------------------ admission
+
+    @property
+    def budget(self) -> float:
+        return self.capacity * self.utilization
+
+    def load(self) -> float:
+        return sum(session.load() for session in self._sessions.values())
+
+    def admit(self, key: str, request: SessionRequest) -> AdmissionDecision:
+        """Decide on a new session and reserve its estimated demand if admitted."""
+        with self._lock:
+            available = self.budget - self.load()
+            per_source, extras, demand = self._demand(request)
+            chosen: Optional[SessionRequest] = None
+            if demand <= available:
+                chosen = request
+                decision = AdmissionDecision(AdmissionVerdict.ACCEPT, demand, available, request.config,
+                                             reason="fits remaining capacity")
+            else:
+                cheapest = demand
+                for offer in self._offers(request):
+                    offer_per_source, offer_extras, offer_demand = self._demand(offer)
+                    cheapest = min(cheapest, offer_demand)
+                    if offer_demand <= available:
+                        chosen, per_source, extras = offer, offer_per_source, offer_extras
+                        decision = AdmissionDecision(
+                            AdmissionVerdict.DEGRADED, offer_demand, available, offer.config,
+                            reason=f"degraded to {offer.config.model_name} with VAD to fit capacity",
+                        )
+                        break
+                if chosen is None:
+                    # Longer wait the further over budget even the cheapest offer is
+                    overshoot = (cheapest - max(available, 0.0)) / self.budget if self.budget > 0 else 1.0
+                    decision = AdmissionDecision(
+                        AdmissionVerdict.REJECT, demand, available,
+                        retry_after_s=min(300.0, RETRY_AFTER_S * (1.0 + overshoot)),
+                        reason="server at capacity",
+                    )
+
+            self._stats[{AdmissionVerdict.ACCEPT: "accepted", AdmissionVerdict.DEGRADED: "degraded",
+                         AdmissionVerdict.REJECT: "rejected"}[decision.verdict]] += 1
+            if chosen is not None:
+                self._sessions[key] = _Admitted(chosen, per_source, extras)
+        log = logger.info if decision.admitted else logger.warning
+        log(f"Admission {decision.verdict.value} for {key}: demand {decision.demand:.2f} "
+            f"of {available:.2f} available ({decision.reason})")
+        return decision
+
+    def observe(self, key: str, source: str, rtf: float) -> None:
+        """Fold a measured RTF sample for one source of an admitted session into its load."""
+        session = self._sessions.get(key)
+        if session is None or rtf <= 0:
+            return
+        previous = session.measured.get(source)
+        session.measured[source] = rtf if previous is None else previous + 0.2 * (rtf - previous)
+
+    def release(self, key: str) -> None:
+        """A session ended; its measured RTF updates the per-model history."""
+        with self._lock:
+            session = self._sessions.pop(key, None)
+            if session is None or not session.measured:
+                return
+            config = session.request.config
+            history_key = (config.model_name, config.vad_enabled or session.request.client_vad)
+            rtf = sum(session.measured.values()) / len(session.measured)
+            previous = self._history.get(history_key)
+            self._history[history_key] = rtf if previous is None else previous + HISTORY_ALPHA * (rtf - previous)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "budget": round(self.budget, 3),
+            "load": round(self.load(), 3),
+            "sessions": len(self._sessions),
+            "rtf_history": {f"{model}{'+vad' if vad else ''}": round(rtf, 3)
+                            for (model, vad), rtf in self._history.items()},
+            **self._stats,
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get the process-wide admission controller (seeded from the calibration profile)."""
+    global _controller
+    if _controller is None:
+        from .calibration import load_profile
+
+        # No hardware check here: detection imports the torch stack; the profile path is per machine
+        _controller = AdmissionController(calibration=load_profile())
+    return _controller
+
+
+def reset_admission_controller() -> None:
+    """Reset the global controller (for testing)."""
+    global _controller
+    _controller = None
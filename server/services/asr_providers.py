@@ -13,16 +13,34 @@ New in v0.3:
 
 from __future__ import annotations
 
+import importlib
 import logging
 import os
 import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import AsyncIterator, Optional, List, Dict, Any, cast
+from typing import AsyncIterator, Optional, List, Dict, Any, Tuple, cast
+
+from .latency_trace import trace_inference
+from .metrics_registry import get_registry
+from .model_residency import weights_key
+from .quantiles import WindowedQuantiles
 
 logger = logging.getLogger(__name__)
 
+# Trailing window behind health() latency stats (falls back to 10 min, then lifetime)
+INFER_STATS_WINDOW_SECONDS = float(os.getenv("ECHOPANEL_INFER_STATS_WINDOW_S", "60"))
+
+
+def is_digital_silence(pcm: bytes) -> bool:
+    """True for PCM whose bytes are all zero, e.g. mic bleed replaced with silence.
+
+    Chunked providers skip inference for these: without VAD in the path the
+    model would otherwise decode (and may hallucinate on) pure silence.
+    """
+    return pcm.count(0) == len(pcm)
+
 
 class AudioSource(Enum):
     """Audio source identifier for multi-source capture."""
@@ -189,6 +207,8 @@ class ASRProvider(ABC):
         self._debug = os.getenv("ECHOPANEL_DEBUG", "0") == "1"
         self._health = ASRHealth()
         self._session_start_time: Optional[float] = None
+        # Streaming inference-latency quantiles (ms), shared shape across providers
+        self._infer_stats = WindowedQuantiles()
 
     @property
     @abstractmethod
@@ -207,6 +227,15 @@ class ASRProvider(ABC):
         """Report provider capabilities. Override to advertise features."""
         return ProviderCapabilities()
 
+    @property
+    def weights_key(self) -> str:
+        """Residency key for this provider's weights (see model_residency).
+
+        Config variants that differ only in streaming parameters share a key.
+        Override when the loaded weights depend on more than the config.
+        """
+        return weights_key(self.name, self.config.model_name, self.config.device, self.config.compute_type)
+
     @abstractmethod
     async def transcribe_stream(
         self,
@@ -271,6 +300,11 @@ class ASRProvider(ABC):
         # Update session duration if active
         if self._session_start_time:
             self._health.session_duration_s = time.time() - self._session_start_time
+        if self._infer_stats.count():
+            avg_ms, p95_ms, p99_ms = self._inference_summary()
+            self._health.avg_infer_ms = avg_ms
+            self._health.p95_infer_ms = p95_ms
+            self._health.p99_infer_ms = p99_ms
         return self._health
 
     async def flush(self, source: Optional[AudioSource] = None) -> List[ASRSegment]:
@@ -286,6 +320,13 @@ class ASRProvider(ABC):
         """
         return []
 
+    async def preload(self) -> None:
+        """Load model weights ahead of the first stream (used by hot-swap).
+
+        Providers that load lazily on first transcribe_stream should override
+        this to load off the event loop. Default implementation is a no-op.
+        """
+
     async def unload(self) -> None:
         """Release provider-held resources.
         
@@ -299,6 +340,21 @@ class ASRProvider(ABC):
         """Debug logging helper."""
         logger.debug(f"[{self.name}] {msg}")
     
+    def _record_inference(self, infer_ms: float, audio_seconds: float = 0.0) -> None:
+        """Record one inference latency (ms) over `audio_seconds` of audio.
+
+        Feeds health(), /metrics and the live session's latency trace.
+        """
+        self._infer_stats.observe(infer_ms)
+        get_registry().summary_family("asr_inference_ms").labels(self.name).observe(infer_ms)
+        trace_inference(infer_ms, audio_seconds)
+
+    def _inference_summary(self) -> Tuple[float, float, float]:
+        """(avg, p95, p99) inference ms over the recent stats window."""
+        window = self._infer_stats.recent(INFER_STATS_WINDOW_SECONDS)
+        p95_ms, p99_ms = self._infer_stats.quantiles((0.95, 0.99), window)
+        return self._infer_stats.mean(window), p95_ms, p99_ms
+
     def _update_health(self, **kwargs) -> None:
         """Update health metrics (internal helper)."""
         for key, value in kwargs.items():
@@ -307,9 +363,15 @@ class ASRProvider(ABC):
 
 
 class ASRProviderRegistry:
-    """Registry for managing ASR providers."""
+    """Registry for managing ASR providers.
+
+    Providers are registered lazily by name and module path; the module (and
+    its heavy dependencies) is imported only when the provider is selected.
+    Importing the module registers the class via register().
+    """
 
     _providers: dict[str, type[ASRProvider]] = {}
+    _lazy: dict[str, str] = {}  # name -> module path, imported on first use
     _instances: dict[str, ASRProvider] = {}
     _lock: "threading.Lock | None" = None  # Lazy init to avoid import at module level
 
@@ -326,6 +388,33 @@ class ASRProviderRegistry:
         """Register a provider class."""
         cls._providers[name] = provider_class
 
+    @classmethod
+    def register_lazy(cls, name: str, module_path: str) -> None:
+        """Register a provider by the module that defines (and registers) it."""
+        cls._lazy[name] = module_path
+
+    @classmethod
+    def names(cls) -> List[str]:
+        """All registered provider names, imported or not."""
+        return list(dict.fromkeys([*cls._providers, *cls._lazy]))
+
+    @classmethod
+    def is_registered(cls, name: str) -> bool:
+        return name in cls._providers or name in cls._lazy
+
+    @classmethod
+    def provider_class(cls, name: str) -> Optional[type[ASRProvider]]:
+        """Provider class for `name`, importing its module on first use."""
+        provider_class = cls._providers.get(name)
+        if provider_class is None and name in cls._lazy:
+            try:
+                importlib.import_module(cls._lazy[name])
+            except Exception as e:
+                logger.warning(f"Failed to import ASR provider '{name}' ({cls._lazy[name]}): {e}")
+                return None
+            provider_class = cls._providers.get(name)
+        return provider_class
+
     @classmethod
     def _cfg_key(cls, name: str, cfg: ASRConfig) -> str:
         return f"{name}|{cfg.model_name}|{cfg.device}|{cfg.compute_type}|{cfg.language}|{int(cfg.vad_enabled)}|{cfg.chunk_seconds}"
@@ -339,7 +428,8 @@ class ASRProviderRegistry:
         if name is None:
             name = os.getenv("ECHOPANEL_ASR_PROVIDER", "faster_whisper")
         
-        if name not in cls._providers:
+        provider_class = cls.provider_class(name)
+        if provider_class is None:
             return None
         
         cfg = config or ASRConfig()
@@ -348,7 +438,7 @@ class ASRProviderRegistry:
         # Thread-safe instance creation (P0 fix: RC-1)
         with cls._get_lock():
             if key not in cls._instances:
-                base_provider = cls._providers[name](cfg)
+                base_provider = provider_class(cfg)
                 
                 # Wrap with VAD if enabled
                 if cfg.vad_enabled:
@@ -373,9 +463,9 @@ class ASRProviderRegistry:
     def available_providers(cls) -> List[str]:
         """List all registered providers that are available."""
         result = []
-        for name, provider_class in cls._providers.items():
+        for name in cls.names():
             try:
-                instance = provider_class(ASRConfig())
+                instance = cls.provider_class(name)(ASRConfig())
                 if instance.is_available:
                     result.append(name)
             except Exception:
@@ -390,9 +480,9 @@ class ASRProviderRegistry:
             Dict mapping provider name to info dict with availability and capabilities.
         """
         result = {}
-        for name, provider_class in cls._providers.items():
+        for name in cls.names():
             try:
-                instance = provider_class(ASRConfig())
+                instance = cls.provider_class(name)(ASRConfig())
                 result[name] = {
                     "available": instance.is_available,
                     "capabilities": instance.capabilities.to_dict(),
@@ -404,6 +494,12 @@ class ASRProviderRegistry:
                 }
         return result
 
+    @classmethod
+    def cached_instances(cls) -> List[ASRProvider]:
+        """Snapshot of cached provider instances (distinct objects)."""
+        with cls._get_lock():
+            return list({id(p): p for p in cls._instances.values()}.values())
+
     @classmethod
     def evict_provider_instance(cls, provider: ASRProvider) -> int:
         """Evict a provider instance from the cache.
@@ -418,3 +514,16 @@ class ASRProviderRegistry:
                 cls._instances.pop(key, None)
                 removed += 1
         return removed
+
+
+# Built-in providers; each module calls ASRProviderRegistry.register() when imported
+for _name, _module in {
+    "faster_whisper": "provider_faster_whisper",
+    "whisper_cpp": "provider_whisper_cpp",
+    "mlx_whisper": "provider_mlx_whisper",
+    "onnx_whisper": "provider_onnx_whisper",
+    "voxtral_realtime": "provider_voxtral_realtime",
+    "voxtral_official": "provider_voxtral_official",
+    "synthetic": "provider_synthetic",
+}.items():
+    ASRProviderRegistry.register_lazy(_name, f"{__package__}.{_module}")
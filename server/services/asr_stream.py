@@ -9,14 +9,11 @@ from __future__ import annotations
 
 import logging
 import os
-from typing import AsyncIterator, Optional
+from dataclasses import replace
+from typing import AsyncIterator, Callable, Optional, Tuple
 
-from .asr_providers import ASRConfig, ASRProviderRegistry, AudioSource
-
-# Import providers to trigger registration
-from . import provider_faster_whisper  # noqa: F401
-from . import provider_voxtral_realtime  # noqa: F401
-from . import provider_whisper_cpp  # noqa: F401
+from .asr_providers import ASRConfig, AudioSource
+from .model_residency import get_model_residency, provider_weights_key
 
 logger = logging.getLogger(__name__)
 
@@ -40,34 +37,88 @@ def _get_default_config() -> ASRConfig:
     )
 
 
+def _stream_params(config: Optional[ASRConfig]) -> Optional[Tuple]:
+    """Fields that select a provider instance (see ASRProviderRegistry._cfg_key)."""
+    if config is None:
+        return None
+    return (config.model_name, config.device, config.compute_type, config.language,
+            config.vad_enabled, config.chunk_seconds)
+
+
+class _ProviderFeed:
+    """Feeds one provider's stream until EOF or a pending swap reaches a chunk boundary."""
+
+    def __init__(self, frames: AsyncIterator[bytes], first: Optional[bytes],
+                 chunk_bytes: int, swap_pending: Callable[[], bool]):
+        self._frames = frames
+        self._first = first
+        self._chunk_bytes = chunk_bytes
+        self._swap_pending = swap_pending
+        self._last_len = 0
+        self.consumed = 0  # bytes handed to the provider
+        self.carry: Optional[bytes] = None  # first frame for the next provider
+        self.eof = False
+
+    def _at_boundary(self) -> bool:
+        if self.consumed == 0 or self._chunk_bytes <= 0:
+            return True
+        # The previous frame completed (or crossed) a provider chunk
+        return self.consumed % self._chunk_bytes < max(self._last_len, 1)
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        frame = self._first
+        while True:
+            if frame is None:
+                try:
+                    frame = await self._frames.__anext__()
+                except StopAsyncIteration:
+                    self.eof = True
+                    return
+            if self._swap_pending() and self._at_boundary():
+                self.carry = frame
+                return
+            self.consumed += len(frame)
+            self._last_len = len(frame)
+            yield frame
+            frame = None
+
+
 async def stream_asr(
     pcm_stream: AsyncIterator[bytes],
     sample_rate: int = 16000,
     source: Optional[str] = None,
+    config: Optional[ASRConfig] = None,
+    session_config: Optional[Callable[[], Optional[ASRConfig]]] = None,
 ) -> AsyncIterator[dict]:
     """
     Streaming ASR pipeline using the registered provider.
 
     Converts ASRSegment objects to the dict format expected by the WebSocket handler.
+    When the ModelManager hot-swaps the model, the current provider's stream is
+    ended at the next chunk boundary (flushing its buffered tail) and the
+    remaining audio continues on the new provider, with timestamps offset so the
+    transcript stays continuous. A change of the session config switches
+    providers the same way.
     
     Args:
         pcm_stream: Async iterator of raw PCM16 audio chunks
         sample_rate: Audio sample rate (default 16000)
         source: Optional audio source tag ("system" or "mic")
+        config: Session config (e.g. degraded by admission control), kept across hot-swaps.
+            If None the stream uses the environment default, then each swapped-in model.
+        session_config: Polled between frames instead of `config`, for sessions whose config
+            changes while streaming (their degrade ladder); None from it follows the manager.
     
     Yields:
         Dict events with type "asr_partial" or "asr_final"
     """
-    config = _get_default_config()
-    provider = ASRProviderRegistry.get_provider(config=config)
-    
-    if provider is None or not provider.is_available:
-        logger.warning("ASR provider unavailable, using fallback")
-        # Fallback: emit a single status event and no transcript pollution
-        yield {"type": "status", "state": "no_asr_provider", "message": "ASR provider unavailable"}
-        async for _ in pcm_stream:
-            pass
-        return
+    from .model_preloader import get_model_manager  # model_preloader imports this module's providers
+
+    manager = get_model_manager()
+    if session_config is None:
+        def session_config() -> Optional[ASRConfig]:
+            return config
+    default_config = _get_default_config()
 
     # Convert source string to AudioSource enum
     audio_source: Optional[AudioSource] = None
@@ -76,24 +127,69 @@ async def stream_asr(
     elif source == "mic":
         audio_source = AudioSource.MICROPHONE
 
-    logger.debug(f"Using provider '{provider.name}', source={source}")
-
-    async for segment in provider.transcribe_stream(pcm_stream, sample_rate, audio_source):
-        event_type = "asr_final" if segment.is_final else "asr_partial"
-        event = {
-            "type": event_type,
-            "t0": segment.t0,
-            "t1": segment.t1,
-            "text": segment.text,
-            "stable": segment.is_final,
-            "confidence": segment.confidence,
-        }
-        # Add optional fields if present
-        if segment.source:
-            event["source"] = segment.source.value
-        if segment.language:
-            event["language"] = segment.language
-        if segment.speaker:
-            event["speaker"] = segment.speaker
-        
-        yield event
+    frames = pcm_stream.__aiter__()
+    carry: Optional[bytes] = None
+    offset_s = 0.0  # audio already transcribed by earlier providers
+    bytes_per_second = sample_rate * 2
+
+    while True:
+        current = session_config()
+        # A copy: the degrade ladder edits its config in place
+        current = replace(current) if current is not None else None
+        params = _stream_params(current)
+        provider, generation = manager.acquire_stream(default_config, current)
+        try:
+            if provider is None or not provider.is_available:
+                logger.warning("ASR provider unavailable, using fallback")
+                # Fallback: emit a single status event and no transcript pollution
+                yield {"type": "status", "state": "no_asr_provider", "message": "ASR provider unavailable"}
+                async for _ in frames:
+                    pass
+                return
+
+            logger.debug(f"Using provider '{provider.name}', source={source}, generation={generation}")
+            if current is not None and carry is not None:
+                # Switching mid-stream: load the session's model off the event loop first
+                await getattr(provider, "_provider", provider).preload()
+
+            chunk_seconds = getattr(getattr(provider, "config", None), "chunk_seconds", 0) or 0
+            feed = _ProviderFeed(frames, carry, int(bytes_per_second * chunk_seconds),
+                                 lambda: manager.generation != generation
+                                 or _stream_params(session_config()) != params)
+            # Keep these weights resident while this stream uses them
+            pin_key = provider_weights_key(provider)
+            pin_owner = f"stream:{id(feed)}"
+            if pin_key:
+                get_model_residency().pin(pin_key, pin_owner)
+            try:
+                async for segment in provider.transcribe_stream(feed.stream(), sample_rate, audio_source):
+                    event_type = "asr_final" if segment.is_final else "asr_partial"
+                    event = {
+                        "type": event_type,
+                        "t0": segment.t0 + offset_s,
+                        "t1": segment.t1 + offset_s,
+                        "text": segment.text,
+                        "stable": segment.is_final,
+                        "confidence": segment.confidence,
+                    }
+                    # Add optional fields if present
+                    if segment.source:
+                        event["source"] = segment.source.value
+                    if segment.language:
+                        event["language"] = segment.language
+                    if segment.speaker:
+                        event["speaker"] = segment.speaker
+                    
+                    yield event
+            finally:
+                if pin_key:
+                    get_model_residency().unpin(pin_key, pin_owner)
+        finally:
+            manager.release_stream(generation)
+
+        if feed.eof or feed.carry is None:
+            return
+        offset_s += feed.consumed / bytes_per_second
+        carry = feed.carry
+        logger.info(f"ASR stream for source={source} switched to model generation {manager.generation} "
+                    f"(session config {_stream_params(session_config())}) at t={offset_s:.2f}s")
@@ -0,0 +1,415 @@
+"""
+On-box ASR calibration (machine profile).
+
+CapabilityDetector's static tiers only look at RAM and GPU flags, so two
+machines with the same RAM but very different CPUs get the same model. This
+module runs a short fixed-audio benchmark of each available
+provider/model/compute_type and records the measured real-time factor (RTF)
+at 1 and N concurrent streams, plus peak RSS. The results are persisted as a
+machine profile that CapabilityDetector.recommend() uses to pick the largest
+model meeting a target RTF at the expected concurrency.
+
+Calibration runs at startup with ECHOPANEL_CALIBRATION=1 (only when no valid
+profile exists) or =force (always), or on demand:
+
+    python -m server.services.calibration [--force] [--streams N]
+
+Environment:
+    ECHOPANEL_CALIBRATION_PROFILE          Profile path (~/.echopanel/machine_profile.json)
+    ECHOPANEL_CALIBRATION_AUDIO            Fixed audio (WAV); default test_speech.wav
+    ECHOPANEL_CALIBRATION_AUDIO_SECONDS    Seconds of audio per stream (10)
+    ECHOPANEL_CALIBRATION_CANDIDATES       provider:model:compute[:device],... to override the ladder
+    ECHOPANEL_TARGET_RTF                   RTF a recommendation must meet (0.5)
+    ECHOPANEL_EXPECTED_CONCURRENCY         Concurrent streams to plan for (2)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import wave
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .asr_providers import ASRConfig, ASRProviderRegistry
+
+logger = logging.getLogger(__name__)
+
+CALIBRATION_MODE = os.getenv("ECHOPANEL_CALIBRATION", "0").strip().lower()
+PROFILE_PATH = Path(os.getenv("ECHOPANEL_CALIBRATION_PROFILE", "~/.echopanel/machine_profile.json")).expanduser()
+AUDIO_SECONDS = float(os.getenv("ECHOPANEL_CALIBRATION_AUDIO_SECONDS", "10"))
+TARGET_RTF = float(os.getenv("ECHOPANEL_TARGET_RTF", "0.5"))
+EXPECTED_CONCURRENCY = int(os.getenv("ECHOPANEL_EXPECTED_CONCURRENCY", "2"))
+
+PROFILE_VERSION = 1
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 2
+_DEFAULT_AUDIO = Path(__file__).resolve().parents[2] / "test_speech.wav"
+
+# Smallest to largest; the recommender prefers the largest that meets the target
+MODEL_SIZE_ORDER = ("tiny", "base", "small", "medium", "large")
+
+# (provider, model, compute_type, device) ladder, filtered by availability and RAM
+DEFAULT_CANDIDATES = (
+    ("faster_whisper", "tiny.en", "int8", "auto"),
+    ("faster_whisper", "base.en", "int8", "auto"),
+    ("faster_whisper", "small.en", "int8", "auto"),
+    ("faster_whisper", "medium.en", "int8", "auto"),
+    ("whisper_cpp", "base.en", "q5_0", "gpu"),
+    ("whisper_cpp", "small.en", "q5_0", "gpu"),
+    ("whisper_cpp", "medium.en", "q5_0", "gpu"),
+)
+
+# Providers that run inference out of process (their RSS is not ours)
+_OUT_OF_PROCESS = {"whisper_cpp", "voxtral_realtime"}
+
+
+def model_size_rank(model: str) -> int:
+    """Rank of a model name in MODEL_SIZE_ORDER (-1 if unknown)."""
+    name = model.lower()
+    for rank, size in reversed(list(enumerate(MODEL_SIZE_ORDER))):
+        if size in name:
+            return rank
+    return -1
+
+
+@dataclass
+class CalibrationResult:
+    """Measured cost of one provider/model/compute_type."""
+    provider: str
+    model: str
+    compute_type: str
+    device: str
+    chunk_seconds: int = CHUNK_SECONDS
+    load_ms: float = 0.0
+    # Streams -> wall-clock seconds per audio second for each stream
+    rtf_by_streams: Dict[int, float] = field(default_factory=dict)
+    peak_rss_mb: Optional[float] = None
+    rss_delta_mb: Optional[float] = None
+    rss_in_process: bool = True
+    error: Optional[str] = None
+    skipped: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.skipped is None and bool(self.rtf_by_streams)
+
+    def rtf_at(self, streams: int) -> Optional[float]:
+        """RTF at `streams`, interpolating linearly between measured points."""
+        if not self.rtf_by_streams:
+            return None
+        if streams in self.rtf_by_streams:
+            return self.rtf_by_streams[streams]
+        points = sorted(self.rtf_by_streams.items())
+        if len(points) == 1:
+            (n, rtf), = points
+            return rtf * max(streams, 1) / n  # assume it shares one set of cores
+        lo = max((p for p in points if p[0] <= streams), default=points[0])
+        hi = min((p for p in points if p[0] >= streams), default=points[-1])
+        if lo[0] == hi[0]:
+            lo, hi = points[-2], points[-1]  # extrapolate past the largest measurement
+        slope = (hi[1] - lo[1]) / (hi[0] - lo[0])
+        return lo[1] + slope * (streams - lo[0])
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["rtf_by_streams"] = {str(k): round(v, 4) for k, v in self.rtf_by_streams.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CalibrationResult":
+        data = dict(data)
+        data["rtf_by_streams"] = {int(k): float(v) for k, v in (data.get("rtf_by_streams") or {}).items()}
+        known = cls.__dataclass_fields__.keys()
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+@dataclass
+class CalibrationProfile:
+    """Persisted calibration for one machine."""
+    machine: Dict[str, Any]
+    results: List[CalibrationResult]
+    streams: int
+    audio_seconds: float
+    created_at: float = field(default_factory=time.time)
+    version: int = PROFILE_VERSION
+
+    def matches(self, machine: Dict[str, Any]) -> bool:
+        """Same hardware as `machine` (MachineProfile.to_dict())?"""
+        return self.version == PROFILE_VERSION and _fingerprint(self.machine) == _fingerprint(machine)
+
+    def best(self, target_rtf: float, streams: int, max_rss_mb: Optional[float] = None) -> List[CalibrationResult]:
+        """Results meeting `target_rtf` at `streams`, largest model first (then fastest)."""
+        passing = []
+        for result in self.results:
+            rtf = result.rtf_at(streams) if result.ok else None
+            if rtf is None or rtf > target_rtf:
+                continue
+            if max_rss_mb is not None and result.rss_in_process \
+                    and result.rss_delta_mb is not None and result.rss_delta_mb > max_rss_mb:
+                continue
+            passing.append((model_size_rank(result.model), -rtf, result))
+        return [result for _, _, result in sorted(passing, key=lambda p: (p[0], p[1]), reverse=True)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "created_at": self.created_at,
+            "machine": self.machine,
+            "streams": self.streams,
+            "audio_seconds": self.audio_seconds,
+            "results": [r.to_dict() for r in self.results],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CalibrationProfile":
+        return cls(
+            machine=data["machine"],
+            results=[CalibrationResult.from_dict(r) for r in data.get("results", [])],
+            streams=int(data.get("streams", EXPECTED_CONCURRENCY)),
+            audio_seconds=float(data.get("audio_seconds", AUDIO_SECONDS)),
+            created_at=float(data.get("created_at", 0.0)),
+            version=int(data.get("version", 0)),
+        )
+
+
+def _fingerprint(machine: Dict[str, Any]) -> tuple:
+    return (
+        machine.get("os_name"),
+        machine.get("arch"),
+        machine.get("cpu_cores"),
+        round(float(machine.get("ram_gb", 0.0))),
+        bool(machine.get("has_mps")),
+        bool(machine.get("has_cuda")),
+    )
+
+
+def save_profile(profile: CalibrationProfile, path: Path = PROFILE_PATH) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(profile.to_dict(), indent=2))
+    tmp.replace(path)
+    return path
+
+
+def load_profile(machine: Optional[Dict[str, Any]] = None, path: Path = PROFILE_PATH) -> Optional[CalibrationProfile]:
+    """Load the saved profile; None if missing, unreadable or for other hardware."""
+    try:
+        profile = CalibrationProfile.from_dict(json.loads(path.read_text()))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable calibration profile {path}: {e}")
+        return None
+    if machine is not None and not profile.matches(machine):
+        logger.info(f"Calibration profile {path} is for different hardware; ignoring")
+        return None
+    return profile
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def load_calibration_audio(seconds: float = AUDIO_SECONDS, path: Optional[Path] = None) -> bytes:
+    """`seconds` of 16 kHz mono PCM16 from the fixed calibration clip (looped if short)."""
+    path = path or Path(os.getenv("ECHOPANEL_CALIBRATION_AUDIO", str(_DEFAULT_AUDIO)))
+    import numpy as np
+
+    with wave.open(str(path), "rb") as wf:
+        channels, rate = wf.getnchannels(), wf.getframerate()
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: calibration audio must be 16-bit PCM")
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, len(samples), rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples.astype(np.float64))
+    samples = samples.astype("<i2")
+    if not len(samples):
+        raise ValueError(f"{path}: empty calibration audio")
+    needed = int(seconds * SAMPLE_RATE)
+    reps = -(-needed // len(samples))
+    return np.tile(samples, reps)[:needed].tobytes()
+
+
+def _candidates(detector: Any, profile: Any) -> List[tuple]:
+    override = os.getenv("ECHOPANEL_CALIBRATION_CANDIDATES", "").strip()
+    if override:
+        parsed = []
+        for item in override.split(","):
+            parts = item.strip().split(":")
+            if len(parts) < 3:
+                continue
+            parsed.append((parts[0], parts[1], parts[2], parts[3] if len(parts) > 3 else "auto"))
+        return parsed
+    result = []
+    for candidate in DEFAULT_CANDIDATES:
+        can_run, reason = detector.can_run_model(candidate[1], profile)
+        if can_run:
+            result.append(candidate)
+        else:
+            logger.info(f"Calibration: skipping {candidate[0]}/{candidate[1]} ({reason})")
+    return result
+
+
+async def _run_stream(provider: Any, pcm: bytes, frame_bytes: int = 640) -> float:
+    """Push `pcm` through one stream as fast as the provider takes it; wall seconds."""
+
+    async def frames():
+        for i in range(0, len(pcm), frame_bytes):
+            yield pcm[i:i + frame_bytes]
+
+    start = time.perf_counter()
+    async for _ in provider.transcribe_stream(frames(), SAMPLE_RATE):
+        pass
+    return time.perf_counter() - start
+
+
+async def _sample_peak_rss(stop: asyncio.Event, peak: List[float], interval: float = 0.05) -> None:
+    from .model_preloader import _get_process_rss_mb
+
+    while not stop.is_set():
+        rss = _get_process_rss_mb()
+        if rss is not None:
+            peak[0] = max(peak[0], rss)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def calibrate_candidate(provider_name: str, model: str, compute_type: str, device: str,
+                              pcm: bytes, streams: int) -> CalibrationResult:
+    """Benchmark one candidate at 1 and `streams` concurrent streams."""
+    from .model_preloader import _get_process_rss_mb
+
+    result = CalibrationResult(provider=provider_name, model=model, compute_type=compute_type, device=device,
+                               rss_in_process=provider_name not in _OUT_OF_PROCESS)
+    provider_class = ASRProviderRegistry.provider_class(provider_name)
+    if provider_class is None:
+        result.error = "provider not registered"
+        return result
+
+    # A private instance: not cached in the registry and not VAD-wrapped
+    config = ASRConfig(model_name=model, device=device, compute_type=compute_type,
+                       chunk_seconds=CHUNK_SECONDS, vad_enabled=False)
+    provider = provider_class(config)
+    if not provider.is_available:
+        result.skipped = "provider unavailable"
+        return result
+
+    audio_seconds = len(pcm) / (SAMPLE_RATE * 2)
+    rss_before = _get_process_rss_mb()
+    peak = [rss_before or 0.0]
+    stop = asyncio.Event()
+    sampler = asyncio.get_running_loop().create_task(_sample_peak_rss(stop, peak))
+    try:
+        start = time.perf_counter()
+        await provider.preload()
+        result.load_ms = (time.perf_counter() - start) * 1000
+        await _run_stream(provider, pcm[: SAMPLE_RATE * 2])  # warm caches, not timed
+
+        for n in sorted({1, streams}):
+            elapsed = await asyncio.gather(*(_run_stream(provider, pcm) for _ in range(n)))
+            # Every stream finishes all its audio, so the slowest one sets the RTF
+            result.rtf_by_streams[n] = max(elapsed) / audio_seconds
+            logger.info(f"Calibration: {provider_name}/{model}/{compute_type} "
+                        f"x{n} stream(s) RTF={result.rtf_by_streams[n]:.3f}")
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+        logger.warning(f"Calibration: {provider_name}/{model} failed: {result.error}")
+    finally:
+        stop.set()
+        await sampler
+        try:
+            await provider.unload()
+        except Exception as e:
+            logger.debug(f"Calibration: unload of {provider_name}/{model} failed: {e}")
+
+    if rss_before is not None and peak[0]:
+        result.peak_rss_mb = round(peak[0], 1)
+        result.rss_delta_mb = round(max(0.0, peak[0] - rss_before), 1)
+    return result
+
+
+async def run_calibration(streams: int = EXPECTED_CONCURRENCY, audio_seconds: float = AUDIO_SECONDS,
+                          target_rtf: float = TARGET_RTF, path: Path = PROFILE_PATH) -> CalibrationProfile:
+    """Benchmark the candidate ladder on this machine and persist the profile."""
+    from .capability_detector import CapabilityDetector
+
+    detector = CapabilityDetector()
+    machine = detector.detect()
+    pcm = load_calibration_audio(audio_seconds)
+    streams = max(1, streams)
+
+    results: List[CalibrationResult] = []
+    missed_at_one: Dict[str, int] = {}  # provider -> smallest model rank too slow for even 1 stream
+    for provider_name, model, compute_type, device in _candidates(detector, machine):
+        rank = model_size_rank(model)
+        if provider_name in missed_at_one and rank > missed_at_one[provider_name]:
+            results.append(CalibrationResult(provider_name, model, compute_type, device,
+                                             skipped="smaller model already missed the target at 1 stream"))
+            continue
+        result = await calibrate_candidate(provider_name, model, compute_type, device, pcm, streams)
+        results.append(result)
+        rtf_one = result.rtf_by_streams.get(1)
+        if rtf_one is not None and rtf_one > target_rtf:
+            missed_at_one[provider_name] = min(rank, missed_at_one.get(provider_name, rank))
+
+    profile = CalibrationProfile(machine=machine.to_dict(), results=results, streams=streams,
+                                 audio_seconds=audio_seconds)
+    saved = save_profile(profile, path)
+    logger.info(f"Calibration profile written: {saved} ({sum(r.ok for r in results)}/{len(results)} measured)")
+    return profile
+
+
+async def calibrate_at_startup() -> Optional[CalibrationProfile]:
+    """Run calibration per ECHOPANEL_CALIBRATION (1 = only if no valid profile, force = always)."""
+    if CALIBRATION_MODE in {"", "0", "false", "no", "off"}:
+        return None
+    if CALIBRATION_MODE != "force":
+        from .capability_detector import CapabilityDetector
+
+        existing = load_profile(CapabilityDetector().detect().to_dict())
+        if existing is not None:
+            return existing
+    logger.info("Running on-box ASR calibration (first start or forced)...")
+    return await run_calibration()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ASR models on this machine")
+    parser.add_argument("--streams", type=int, default=EXPECTED_CONCURRENCY, help="Concurrent streams to measure")
+    parser.add_argument("--seconds", type=float, default=AUDIO_SECONDS, help="Audio seconds per stream")
+    parser.add_argument("--target-rtf", type=float, default=TARGET_RTF)
+    parser.add_argument("--profile", type=Path, default=PROFILE_PATH)
+    parser.add_argument("--force", action="store_true", help="Re-run even if a valid profile exists")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from .capability_detector import CapabilityDetector
+
+    detector = CapabilityDetector()
+    machine = detector.detect()
+    profile = None if args.force else load_profile(machine.to_dict(), args.profile)
+    if profile is None:
+        profile = asyncio.run(run_calibration(args.streams, args.seconds, args.target_rtf, args.profile))
+
+    print(f"{'provider':<16}{'model':<12}{'compute':<9}{'RTF x1':>8}{f'RTF x{profile.streams}':>9}{'peak MB':>9}  note")
+    for r in profile.results:
+        rtf_n = r.rtf_by_streams.get(profile.streams)
+        print(f"{r.provider:<16}{r.model:<12}{r.compute_type:<9}"
+              f"{r.rtf_by_streams.get(1, float('nan')):>8.3f}{rtf_n if rtf_n is not None else float('nan'):>9.3f}"
+              f"{r.peak_rss_mb or float('nan'):>9.0f}  {r.error or r.skipped or ''}")
+    print(f"\nRecommendation: {detector.recommend(machine, calibration=profile).to_dict()}")
+
+
+if __name__ == "__main__":
+    main()
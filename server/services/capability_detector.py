@@ -35,10 +35,11 @@ try:
 except ImportError:
     HAS_PSUTIL = False
 
+# torch takes seconds to import; probe for it here and import in the GPU checks
 try:
-    import torch
-    HAS_TORCH = True
-except ImportError:
+    import importlib.util
+    HAS_TORCH = importlib.util.find_spec("torch") is not None
+except (ImportError, ValueError):
     HAS_TORCH = False
 
 logger = logging.getLogger(__name__)
@@ -84,6 +85,7 @@ class ProviderRecommendation:
     # Recommendation metadata
     reason: str = ""  # Why this recommendation was made
     fallback: Optional["ProviderRecommendation"] = None  # Fallback if primary fails
+    calibrated: bool = False  # Chosen from on-box measurements (calibration.py), not RAM tiers
     
     def to_dict(self) -> Dict[str, Any]:
         result = {
@@ -94,6 +96,7 @@ class ProviderRecommendation:
             "device": self.device,
             "vad_enabled": self.vad_enabled,
             "reason": self.reason,
+            "calibrated": self.calibrated,
         }
         if self.n_threads is not None:
             result["n_threads"] = self.n_threads
@@ -254,6 +257,7 @@ class CapabilityDetector:
         # Try torch MPS
         if HAS_TORCH:
             try:
+                import torch
                 return torch.backends.mps.is_available()
             except Exception as e:
                 logger.debug(f"torch MPS detection failed: {e}")
@@ -281,6 +285,7 @@ class CapabilityDetector:
         """
         if HAS_TORCH:
             try:
+                import torch
                 has_cuda = torch.cuda.is_available()
                 num_devices = torch.cuda.device_count() if has_cuda else 0
                 return has_cuda, num_devices
@@ -304,11 +309,17 @@ class CapabilityDetector:
         
         return False, 0
 
-    def recommend(self, profile: Optional[MachineProfile] = None) -> ProviderRecommendation:
+    def recommend(self, profile: Optional[MachineProfile] = None,
+                  calibration: Optional[Any] = None) -> ProviderRecommendation:
         """Recommend optimal ASR configuration based on machine profile.
         
+        A calibration profile measured on this machine (see calibration.py)
+        takes precedence over the RAM tiers below.
+        
         Args:
             profile: MachineProfile from detect(). If None, calls detect().
+            calibration: CalibrationProfile to use. If None, the saved profile
+                for this hardware is loaded, if any.
         
         Returns:
             ProviderRecommendation with optimal configuration.
@@ -318,6 +329,17 @@ class CapabilityDetector:
         
         logger.info(f"Machine profile: {profile.to_dict()}")
         
+        if calibration is None:
+            from .calibration import load_profile
+
+            calibration = load_profile(profile.to_dict())
+        if calibration is not None:
+            recommendation = self._recommend_calibrated(profile, calibration)
+            if recommendation is not None:
+                logger.info(f"Recommendation: {recommendation.provider}/{recommendation.model} "
+                            f"({recommendation.reason})")
+                return recommendation
+        
         # Determine capability tier
         if profile.ram_gb < 4:
             tier = "ultra_low"
@@ -409,6 +431,48 @@ class CapabilityDetector:
         logger.info(f"Recommendation: {recommendation.provider}/{recommendation.model} ({reason})")
         return recommendation
 
+    def _recommend_calibrated(self, profile: MachineProfile,
+                              calibration: Any) -> Optional[ProviderRecommendation]:
+        """Largest measured model meeting the target RTF at the expected concurrency."""
+        from .calibration import EXPECTED_CONCURRENCY, TARGET_RTF
+
+        max_rss_mb = profile.ram_gb * 1024 * 0.8  # Same headroom as can_run_model
+        passing = calibration.best(TARGET_RTF, EXPECTED_CONCURRENCY, max_rss_mb=max_rss_mb)
+        if passing:
+            primary = passing[0]
+            reason = (f"Calibrated: RTF {primary.rtf_at(EXPECTED_CONCURRENCY):.2f} <= {TARGET_RTF} "
+                      f"at {EXPECTED_CONCURRENCY} stream(s)")
+        else:
+            measured = [r for r in calibration.results if r.ok]
+            if not measured:
+                return None
+            primary = min(measured, key=lambda r: r.rtf_at(EXPECTED_CONCURRENCY))
+            passing = [primary]
+            reason = (f"Calibrated: no model meets RTF {TARGET_RTF} at {EXPECTED_CONCURRENCY} stream(s); "
+                      f"fastest measured (RTF {primary.rtf_at(EXPECTED_CONCURRENCY):.2f})")
+            logger.warning(reason)
+
+        recommendation = self._calibrated_recommendation(primary, reason)
+        smaller = next((r for r in passing[1:] if r.model != primary.model or r.provider != primary.provider), None)
+        if smaller is not None:
+            recommendation.fallback = self._calibrated_recommendation(smaller, "Fallback if primary provider fails")
+        return recommendation
+
+    def _calibrated_recommendation(self, result: Any, reason: str) -> ProviderRecommendation:
+        # Non-measured knobs (VAD, threads) follow the static tier for the same provider
+        tier = next((c for c in self.TIER_CONFIGS.values() if c["provider"] == result.provider), {})
+        return ProviderRecommendation(
+            provider=result.provider,
+            model=result.model,
+            chunk_seconds=result.chunk_seconds,
+            compute_type=result.compute_type,
+            device=tier.get("device", result.device) if result.device == "auto" else result.device,
+            vad_enabled=tier.get("vad_enabled", False),
+            n_threads=tier.get("n_threads"),
+            reason=reason,
+            calibrated=True,
+        )
+
     def _whisper_cpp_available(self) -> bool:
         """Check if whisper.cpp is available."""
         try:
@@ -477,13 +541,21 @@ def get_optimal_config() -> Dict[str, Any]:
     Returns:
         Dict with provider, model, and configuration settings.
     """
+    from .calibration import load_profile
+
     detector = CapabilityDetector()
     profile = detector.detect()
-    recommendation = detector.recommend(profile)
+    calibration = load_profile(profile.to_dict())
+    recommendation = detector.recommend(profile, calibration=calibration)
     
     return {
         "profile": profile.to_dict(),
         "recommendation": recommendation.to_dict(),
+        "calibration": {
+            "created_at": calibration.created_at,
+            "streams": calibration.streams,
+            "results": len(calibration.results),
+        } if calibration else None,
         "env_vars": {
             "ECHOPANEL_ASR_PROVIDER": recommendation.provider,
             "ECHOPANEL_WHISPER_MODEL": recommendation.model,
@@ -6,6 +6,9 @@ Implements multi-level concurrency control:
 2. Per-source bounded priority queues (mic > system priority)
 3. Inference semaphore (respects ASR threading constraints)
 4. Adaptive chunk sizing based on load
+
+Live decodes are ordered by inference_scheduler.py (weighted fair queuing
+across sessions, mic over system); the queues here are not on the live path.
 """
 
 import asyncio
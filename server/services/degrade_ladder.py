@@ -12,7 +12,11 @@ Degrade Levels:
     4 (Failover):   Provider crash — Switch to fallback provider
 
 Recovery:
-    When RTF < 0.7 for 30s, step up one level (if not at level 0)
+    When the smoothed RTF (EWMA over ~30s) is < 0.7, step up one level (if not at level 0)
+
+Live sessions are driven by the predictive overload controller
+(overload_controller.py), which moves ladders one step at a time via
+degrade_step()/recover_step(); check() remains the standalone RTF-driven path.
 
 Usage:
     from server.services.degrade_ladder import DegradeLadder, DegradeLevel
@@ -34,16 +38,27 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import math
 import time
+from collections import deque
 from dataclasses import dataclass, field
 from enum import IntEnum
 from pathlib import Path
-from typing import Optional, Dict, Any, Callable, List, Tuple
+from typing import Optional, Deque, Dict, Any, Callable, List, Tuple
 
 from .asr_providers import ASRConfig, ASRProvider
 
 logger = logging.getLogger(__name__)
 
+# One step down in model size (reduce_quality; admission control's degraded offers)
+MODEL_DOWNGRADE: Dict[str, str] = {
+    "large-v3": "medium.en",
+    "large-v2": "medium.en",
+    "medium.en": "small.en",
+    "small.en": "base.en",
+    "base.en": "tiny.en",
+}
+
 
 class DegradeLevel(IntEnum):
     """Degradation levels from normal to emergency."""
@@ -76,7 +91,8 @@ class DegradeAction:
 class DegradeState:
     """Current state of the degrade ladder."""
     level: DegradeLevel = DegradeLevel.NORMAL
-    rtf_history: List[Tuple[float, float]] = field(default_factory=list)  # (timestamp, rtf)
+    rtf_history: Deque[Tuple[float, float]] = field(default_factory=deque)  # (timestamp, rtf)
+    rtf_ewma: Optional[float] = None  # smoothed RTF used for recovery decisions
     level_since: float = field(default_factory=time.time)
     actions_applied: List[str] = field(default_factory=list)
     dropped_chunks: int = 0
@@ -198,17 +214,9 @@ class DegradeLadder:
             Tuple of (current_level, action_to_apply or None)
         """
         async with self._lock:
+            self.observe(rtf)
             now = time.time()
             
-            # Record RTF in history
-            self.state.rtf_history.append((now, rtf))
-            
-            # Prune old history
-            cutoff = now - self.HISTORY_WINDOW_S
-            self.state.rtf_history = [
-                (ts, r) for ts, r in self.state.rtf_history if ts > cutoff
-            ]
-            
             # Determine target level based on RTF
             target_level = self._rtf_to_level(rtf)
             
@@ -233,6 +241,36 @@ class DegradeLadder:
             
             return self.state.level, None
 
+    def observe(self, rtf: float) -> None:
+        """Record an RTF sample without making a level decision."""
+        now = time.time()
+        history = self.state.rtf_history
+        if history and self.state.rtf_ewma is not None:
+            # Time-based decay: a sample's weight depends on how long since the last one
+            dt = max(0.0, now - history[-1][0])
+            alpha = 1.0 - math.exp(-dt / (self.RECOVERY_WINDOW_S / 2))
+            self.state.rtf_ewma += alpha * (rtf - self.state.rtf_ewma)
+        else:
+            self.state.rtf_ewma = rtf
+        history.append((now, rtf))
+        cutoff = now - self.HISTORY_WINDOW_S
+        while history and history[0][0] <= cutoff:
+            history.popleft()
+
+    async def degrade_step(self, max_level: DegradeLevel = DegradeLevel.EMERGENCY) -> Tuple[DegradeLevel, Optional[DegradeAction]]:
+        """Degrade one level (not past max_level); used by the overload controller."""
+        async with self._lock:
+            if self.state.level >= max_level:
+                return self.state.level, None
+            return await self._degrade_to(DegradeLevel(self.state.level + 1))
+
+    async def recover_step(self) -> Tuple[DegradeLevel, Optional[DegradeAction]]:
+        """Recover one level; FAILOVER is left to provider health, not load."""
+        async with self._lock:
+            if self.state.level in (DegradeLevel.NORMAL, DegradeLevel.FAILOVER):
+                return self.state.level, None
+            return await self._do_recover(DegradeLevel(self.state.level - 1))
+
     def _rtf_to_level(self, rtf: float) -> DegradeLevel:
         """Convert RTF to degrade level."""
         if rtf >= self.thresholds.emergency:
@@ -279,19 +317,11 @@ class DegradeLadder:
 
     async def _maybe_recover(self, target_level: DegradeLevel) -> Tuple[DegradeLevel, Optional[DegradeAction]]:
         """Check if we can recover to a higher performance level."""
-        now = time.time()
-        
-        # Check average RTF over recovery window
-        recent_rtfs = [
-            rtf for ts, rtf in self.state.rtf_history
-            if now - ts < self.RECOVERY_WINDOW_S
-        ]
-        
-        if not recent_rtfs:
+        # Smoothed RTF over roughly the recovery window
+        avg_rtf = self.state.rtf_ewma
+        if avg_rtf is None:
             return self.state.level, None
         
-        avg_rtf = sum(recent_rtfs) / len(recent_rtfs)
-        
         if avg_rtf >= self.thresholds.recovery:
             logger.debug(f"RTF avg {avg_rtf:.2f} above recovery threshold {self.thresholds.recovery}")
             return self.state.level, None
@@ -305,19 +335,11 @@ class DegradeLadder:
         This handles the case where RTF is sustained good at the current level,
         allowing step-by-step recovery even when not crossing level thresholds.
         """
-        now = time.time()
-        
-        # Check average RTF over recovery window
-        recent_rtfs = [
-            rtf for ts, rtf in self.state.rtf_history
-            if now - ts < self.RECOVERY_WINDOW_S
-        ]
-        
-        if not recent_rtfs:
+        # Smoothed RTF over roughly the recovery window
+        avg_rtf = self.state.rtf_ewma
+        if avg_rtf is None:
             return self.state.level, None
         
-        avg_rtf = sum(recent_rtfs) / len(recent_rtfs)
-        
         # Only recover if avg RTF is comfortably below recovery threshold
         # Use a margin to avoid flapping (e.g., 0.6 vs 0.7 threshold)
         recovery_margin = self.thresholds.recovery * 0.85
@@ -397,17 +419,8 @@ class DegradeLadder:
 
     def _action_reduce_quality(self) -> None:
         """Switch to smaller model and disable VAD."""
-        # Model size downgrade map
-        model_downgrade = {
-            "large-v3": "medium.en",
-            "large-v2": "medium.en",
-            "medium.en": "small.en",
-            "small.en": "base.en",
-            "base.en": "tiny.en",
-        }
-        
         old_model = self.config.model_name
-        new_model = model_downgrade.get(old_model, old_model)
+        new_model = MODEL_DOWNGRADE.get(old_model, old_model)
         
         if new_model != old_model:
             self.config.model_name = new_model
@@ -450,6 +463,7 @@ class DegradeLadder:
             "current_rtf": self.state.rtf_history[-1][1] if self.state.rtf_history else 0.0,
             "rtf_avg_10s": self.state._avg_rtf(10.0),
             "rtf_avg_60s": self.state._avg_rtf(60.0),
+            "rtf_ewma": round(self.state.rtf_ewma, 3) if self.state.rtf_ewma is not None else None,
             "actions_applied": self.state.actions_applied,
             "dropped_chunks": self.state.dropped_chunks,
             "time_at_level": time.time() - self.state.level_since,
@@ -2,36 +2,66 @@
 Speaker Diarization (v0.2)
 
 Provides batch speaker diarization at session end using pyannote.audio.
-Segments are merged by speaker for cleaner output.
+Segments are merged by speaker for cleaner output. The online mode used
+during a session lives in `diarization_stream.py`.
 """
 
 from __future__ import annotations
 
 import asyncio
+import importlib.util
 import logging
 import os
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
-from typing import Any, List, Optional
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    import numpy as np  # imported where audio is first touched (see HAS_NUMPY)
 
 logger = logging.getLogger(__name__)
 
-try:
-    import numpy as np
-except Exception:  # pragma: no cover - optional dependency
-    np = None
 
-try:
-    import torch
-except Exception:  # pragma: no cover - optional dependency
-    torch = None
+def _has_module(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
 
-try:
-    from pyannote.audio import Pipeline
-except Exception:  # pragma: no cover - optional dependency
-    Pipeline = None
+# numpy is only probed here too; functions that touch audio import it, keeping
+# it off the server import path.
+HAS_NUMPY = _has_module("numpy")
+
+# torch and pyannote.audio take seconds to import, so server import only probes
+# for them; _import_torch_stack() imports them on first diarization use.
+torch = None
+Pipeline = None
+HAS_TORCH_STACK = _has_module("torch") and _has_module("pyannote.audio")
+
+
+def _import_torch_stack() -> bool:
+    """Import torch and pyannote.audio's Pipeline on first use."""
+    global torch, Pipeline, HAS_TORCH_STACK
+    if Pipeline is None:
+        if not HAS_TORCH_STACK:
+            return False
+        try:
+            import torch as _torch
+            from pyannote.audio import Pipeline as _Pipeline
+        except Exception as e:  # pragma: no cover - optional dependency
+            logger.warning(f"Diarization unavailable: {e}")
+            HAS_TORCH_STACK = False
+            return False
+        torch, Pipeline = _torch, _Pipeline
+    return True
 
 _PIPELINE: Optional["Pipeline"] = None
 
+# Long recordings are diarized in windows so only one window is resident as float32.
+WINDOW_SECONDS = float(os.getenv("ECHOPANEL_DIARIZATION_BATCH_WINDOW_S", "600"))
+
 
 @dataclass
 class SpeakerSegment:
@@ -43,7 +73,7 @@ class SpeakerSegment:
 
 def is_diarization_available() -> bool:
     """Check if diarization dependencies are available."""
-    if np is None or torch is None or Pipeline is None:
+    if not HAS_NUMPY or not HAS_TORCH_STACK:
         return False
     token = os.getenv("ECHOPANEL_HF_TOKEN")
     return bool(token)
@@ -79,7 +109,7 @@ async def prewarm_diarization_pipeline(timeout_seconds: float = 120.0) -> bool:
 
 def _get_pipeline() -> Optional["Pipeline"]:
     global _PIPELINE
-    if Pipeline is None:
+    if not _import_torch_stack():
         return None
     if _PIPELINE is None:
         token = os.getenv("ECHOPANEL_HF_TOKEN")
@@ -143,17 +173,20 @@ def _merge_adjacent_segments(segments: List[SpeakerSegment], gap_threshold: floa
     return merged
 
 
+def speaker_name(index: int) -> str:
+    """Friendly label for a 0-based speaker index, used by live and final labels alike."""
+    return f"Speaker {index + 1}"
+
+
 def _assign_speaker_names(segments: List[SpeakerSegment]) -> List[SpeakerSegment]:
     """
     Convert speaker IDs (SPEAKER_00, SPEAKER_01) to friendly names.
     """
     speaker_order = {}
-    speaker_count = 0
     
     for seg in sorted(segments, key=lambda s: s.t0):
         if seg.speaker not in speaker_order:
-            speaker_count += 1
-            speaker_order[seg.speaker] = f"Speaker {speaker_count}"
+            speaker_order[seg.speaker] = speaker_name(len(speaker_order))
     
     return [
         SpeakerSegment(t0=seg.t0, t1=seg.t1, speaker=speaker_order.get(seg.speaker, seg.speaker))
@@ -161,36 +194,142 @@ def _assign_speaker_names(segments: List[SpeakerSegment]) -> List[SpeakerSegment
     ]
 
 
-def diarize_pcm(pcm_bytes: bytes, sample_rate: int = 16000) -> List[dict[str, Any]]:
+def open_pcm_memmap(path: Union[str, Path], offset_bytes: int = 0, num_bytes: Optional[int] = None) -> "np.ndarray":
+    """
+    Memory-map PCM16 mono audio from a recording-lane file.
+
+    Args:
+        path: WAV or raw PCM file
+        offset_bytes: Byte offset of the first sample (44 for the recording-lane WAV header)
+        num_bytes: Bytes of audio to map (default: to end of file)
+    """
+    if not HAS_NUMPY:
+        raise RuntimeError("numpy is required to read recording-lane audio")
+    import numpy as np
+
+    available = os.path.getsize(path) - offset_bytes
+    if num_bytes is None or num_bytes > available:
+        num_bytes = available
+    num_samples = max(0, num_bytes // 2)
+    if num_samples == 0:
+        return np.zeros(0, dtype=np.int16)
+    return np.memmap(path, dtype=np.int16, mode="r", offset=offset_bytes, shape=(num_samples,))
+
+
+def open_recording_audio(path: Union[str, Path], offset_bytes: int = 0, num_bytes: Optional[int] = None):
+    """
+    Open recording-lane audio for random access as an int16 sequence.
+
+    WAV/PCM files are memory-mapped; block-compressed .epcm files get a
+    reader that decodes only the blocks a slice touches. Offsets and sizes
+    are in PCM16 bytes (data offset for WAV headers included).
+    """
+    from server.services.pcm_codec import SUFFIX as EPCM_SUFFIX
+    from server.services.pcm_codec import BlockPCMReader
+
+    if Path(path).suffix == EPCM_SUFFIX:
+        return BlockPCMReader(path, offset_bytes // 2, None if num_bytes is None else num_bytes // 2)
+    return open_pcm_memmap(path, offset_bytes, num_bytes)
+
+
+def _iter_audio_windows(
+    parts: Sequence["np.ndarray"], window_samples: int
+) -> Iterator[Tuple[int, "np.ndarray"]]:
+    """
+    Yield (start_sample, float32 window) pairs over consecutive int16 parts.
+
+    Windows may span part boundaries (rotated recording segments); only one
+    window is converted at a time.
+    """
+    import numpy as np
+
+    total = sum(len(part) for part in parts)
+    for start in range(0, total, window_samples):
+        stop = min(start + window_samples, total)
+        window = np.empty(stop - start, dtype=np.float32)
+        filled = 0
+        part_start = 0
+        for part in parts:
+            part_stop = part_start + len(part)
+            lo, hi = max(start, part_start), min(stop, part_stop)
+            if lo < hi:
+                window[filled:filled + hi - lo] = part[lo - part_start:hi - part_start]
+                filled += hi - lo
+            part_start = part_stop
+        window /= 32768.0
+        yield start, window
+
+
+def _diarize_window(pipeline: Any, audio: "np.ndarray", sample_rate: int) -> Tuple[Any, Optional["np.ndarray"]]:
+    """Run the pipeline on one window, returning (annotation, per-label embeddings or None)."""
+    waveform = torch.from_numpy(audio).unsqueeze(0)
+    inputs = {"waveform": waveform, "sample_rate": sample_rate}
+    try:
+        diarization, embeddings = pipeline(inputs, return_embeddings=True)
+        return diarization, embeddings
+    except TypeError:
+        # Older pipelines don't support return_embeddings.
+        return pipeline(inputs), None
+
+
+def diarize_pcm(
+    pcm: Union[bytes, "np.ndarray", Sequence["np.ndarray"]],
+    sample_rate: int = 16000,
+    window_seconds: float = WINDOW_SECONDS,
+) -> List[dict[str, Any]]:
     """
     Run speaker diarization on PCM16 mono audio.
     
+    `pcm` may be raw bytes, an int16 array (or `BlockPCMReader`), or a list
+    of consecutive ones, typically recording-lane segment files opened with
+    `open_recording_audio`. Audio longer than
+    `window_seconds` is diarized window by window and speakers are linked
+    across windows by their embeddings.
+    
     Requires pyannote.audio + torch + numpy + HuggingFace token.
     Returns a list of segments with t0, t1, and speaker label.
     """
-    if np is None or torch is None:
+    if not HAS_NUMPY or not _import_torch_stack():
         logger.debug("numpy or torch not available, skipping diarization")
         return []
+    import numpy as np
     
     pipeline = _get_pipeline()
     if pipeline is None:
         return []
 
-    logger.debug(f"Processing {len(pcm_bytes)} bytes for diarization")
+    if isinstance(pcm, (bytes, bytearray, memoryview)):
+        parts = [np.frombuffer(pcm, dtype=np.int16)]
+    elif isinstance(pcm, (list, tuple)):
+        parts = list(pcm)
+    else:
+        parts = [pcm]
+    window_samples = max(1, int(window_seconds * sample_rate))
+    logger.debug(f"Processing {sum(len(p) for p in parts)} samples for diarization")
 
     try:
-        audio = np.frombuffer(pcm_bytes, dtype=np.int16).astype(np.float32) / 32768.0
-        waveform = torch.from_numpy(audio).unsqueeze(0)
-        
-        diarization = pipeline({"waveform": waveform, "sample_rate": sample_rate})
+        from server.services.diarization_stream import SpeakerRegistry
 
+        registry = SpeakerRegistry()
         segments: List[SpeakerSegment] = []
-        for turn, _, speaker in diarization.itertracks(yield_label=True):
-            segments.append(SpeakerSegment(
-                t0=float(turn.start),
-                t1=float(turn.end),
-                speaker=str(speaker)
-            ))
+        for index, (start, window) in enumerate(_iter_audio_windows(parts, window_samples)):
+            diarization, embeddings = _diarize_window(pipeline, window, sample_rate)
+            offset = start / sample_rate
+
+            # Map window-local labels onto session-wide speakers.
+            labels = {}
+            for i, label in enumerate(diarization.labels()):
+                if embeddings is not None and i < len(embeddings) and np.all(np.isfinite(embeddings[i])):
+                    labels[label] = f"SPEAKER_{registry.assign(np.asarray(embeddings[i], dtype=np.float32)):02d}"
+                else:
+                    labels[label] = f"W{index}_{label}" if index else str(label)
+
+            for turn, _, speaker in diarization.itertracks(yield_label=True):
+                segments.append(SpeakerSegment(
+                    t0=offset + float(turn.start),
+                    t1=offset + float(turn.end),
+                    speaker=labels.get(speaker, str(speaker))
+                ))
         
         logger.debug(f"Diarization found {len(segments)} raw segments")
         
@@ -209,6 +348,99 @@ def diarize_pcm(pcm_bytes: bytes, sample_rate: int = 16000) -> List[dict[str, An
         return []
 
 
+class SpeakerAligner:
+    """
+    Interval index over speaker segments for max-overlap speaker lookup.
+
+    Segments are kept sorted by start time alongside a running maximum of end
+    times. A query bisects to the first segment whose running max end reaches
+    the query start and scans every segment from there to the last one that
+    starts before the query end: O(log m + c) for c scanned candidates. With
+    diarization output, where segments barely overlap, c is the k overlapping
+    segments plus a few neighbours; a segment that outlasts later ones keeps
+    them all as candidates until it ends, degrading toward O(m).
+    `add()` supports live use: appending in time order is O(1) amortized and
+    a segment that continues the last one for the same speaker extends it in
+    place; an out-of-order insert is O(m).
+    """
+
+    def __init__(self, segments: Iterable[dict] = ()):
+        ordered = sorted(
+            (float(seg.get("t0", 0.0)), float(seg.get("t1", 0.0)), str(seg["speaker"]))
+            for seg in segments
+            if seg.get("speaker")
+        )
+        self._starts: List[float] = [seg[0] for seg in ordered]
+        self._ends: List[float] = [seg[1] for seg in ordered]
+        self._speakers: List[str] = [seg[2] for seg in ordered]
+        self._max_ends: List[float] = []
+        self._rebuild_max_ends(0)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def _rebuild_max_ends(self, start: int) -> None:
+        del self._max_ends[start:]
+        running = self._max_ends[-1] if self._max_ends else float("-inf")
+        for end in self._ends[start:]:
+            running = max(running, end)
+            self._max_ends.append(running)
+
+    def add(self, t0: float, t1: float, speaker: str) -> None:
+        """Insert a speaker segment; contiguous same-speaker appends extend the last one."""
+        if self._starts and t0 >= self._starts[-1]:
+            if self._speakers[-1] == speaker and t0 <= self._ends[-1] + 1e-6:
+                self._ends[-1] = max(self._ends[-1], t1)
+                self._rebuild_max_ends(len(self._ends) - 1)
+                return
+            index = len(self._starts)
+        else:
+            index = bisect_right(self._starts, t0)
+        self._starts.insert(index, t0)
+        self._ends.insert(index, t1)
+        self._speakers.insert(index, speaker)
+        self._rebuild_max_ends(index)
+
+    def speaker_for(self, t0: float, t1: float) -> Optional[str]:
+        """Speaker with the most overlap with [t0, t1] (a point query if t1 <= t0)."""
+        point = t1 <= t0
+        # First segment whose running max end reaches t0; nothing before it can overlap.
+        i = bisect_left(self._max_ends, t0)
+        stop = bisect_right(self._starts, t0 if point else t1)
+        overlap: dict[str, float] = {}
+        for j in range(i, stop):
+            start, end = self._starts[j], self._ends[j]
+            if point:
+                if start <= t0 <= end:
+                    return self._speakers[j]
+                continue
+            covered = min(t1, end) - max(t0, start)
+            if covered > 0:
+                speaker = self._speakers[j]
+                overlap[speaker] = overlap.get(speaker, 0.0) + covered
+        if not overlap:
+            return None
+        return max(overlap, key=overlap.get)
+
+    def segments(self) -> List[dict]:
+        """Indexed segments in start order."""
+        return [
+            {"t0": t0, "t1": t1, "speaker": speaker}
+            for t0, t1, speaker in zip(self._starts, self._ends, self._speakers)
+        ]
+
+    def label(self, transcript: Iterable[dict]) -> List[dict]:
+        """Return copies of transcript segments with 'speaker' set where one overlaps."""
+        result = []
+        for seg in transcript:
+            merged = dict(seg)
+            speaker = self.speaker_for(float(seg.get("t0", 0.0)), float(seg.get("t1", 0.0)))
+            if speaker:
+                merged["speaker"] = speaker
+            result.append(merged)
+        return result
+
+
 def merge_transcript_with_speakers(
     transcript: List[dict],
     speaker_segments: List[dict]
@@ -216,28 +448,37 @@ def merge_transcript_with_speakers(
     """
     Merge transcript segments with speaker labels based on time overlap.
     
-    Each transcript segment gets a 'speaker' field based on which speaker
-    segment it overlaps most with.
+    Each transcript segment gets a 'speaker' field for the speaker segment
+    it overlaps most with.
     """
     if not speaker_segments:
         return transcript
-    
+    return SpeakerAligner(speaker_segments).label(transcript)
+
+
+def merge_transcript_with_speakers_by_source(
+    transcript: List[dict],
+    speaker_segments_by_source: Dict[str, List[dict]],
+    source_key: Callable[[Optional[str]], str] = lambda source: source or "",
+) -> List[dict]:
+    """
+    Label a multi-source transcript in one pass.
+
+    Builds one aligner per source, then labels each transcript segment only
+    from its own source's speakers. `source_key` normalizes segment sources.
+    """
+    aligners = {
+        source: SpeakerAligner(segments)
+        for source, segments in speaker_segments_by_source.items()
+        if segments
+    }
     result = []
     for seg in transcript:
-        t0 = seg.get("t0", 0.0)
-        t1 = seg.get("t1", 0.0)
-        mid = (t0 + t1) / 2.0
-        
-        # Find the speaker segment that contains the midpoint
-        speaker = None
-        for spk_seg in speaker_segments:
-            if spk_seg["t0"] <= mid <= spk_seg["t1"]:
-                speaker = spk_seg["speaker"]
-                break
-        
         merged = dict(seg)
-        if speaker:
-            merged["speaker"] = speaker
+        aligner = aligners.get(source_key(seg.get("source")))
+        if aligner is not None:
+            speaker = aligner.speaker_for(float(seg.get("t0", 0.0)), float(seg.get("t1", 0.0)))
+            if speaker:
+                merged["speaker"] = speaker
         result.append(merged)
-    
     return result
@@ -0,0 +1,361 @@
+"""
+Streaming Speaker Diarization
+
+Online counterpart to the batch pyannote pass in `diarization.py`.
+
+Audio is fed per source as it arrives. Every `step_s` seconds of new audio a
+`window_s` window ending at that point is embedded with a speaker-embedding
+model and assigned to a persistent speaker registry (incremental cosine
+clustering). Labels have `step_s` resolution and are available to the live
+ASR path via `speaker_for(t0, t1)`. Only one window of audio is held in
+memory per source.
+
+At session end `finalize()` processes the tail and runs a cheap
+reconciliation: speakers whose centroids converged are merged into the
+earlier one, segments are relabelled and adjacent same-speaker segments are
+joined. Live and final labels share `speaker_name()` over registry indices,
+so a speaker keeps the name clients already saw unless it was merged away.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from server.services import diarization as _diarization
+from server.services.diarization import (
+    SpeakerAligner,
+    SpeakerSegment,
+    _merge_adjacent_segments,
+    speaker_name,
+)
+
+if TYPE_CHECKING:
+    import numpy as np  # imported where audio is first touched (see diarization.HAS_NUMPY)
+
+logger = logging.getLogger(__name__)
+
+# Imported on first use (see diarization._import_torch_stack)
+torch = None
+Inference = None
+Model = None
+
+DIARIZATION_MODE = os.getenv("ECHOPANEL_DIARIZATION_MODE", "auto")  # auto, streaming, batch
+EMBEDDING_MODEL = os.getenv("ECHOPANEL_DIARIZATION_EMBEDDING_MODEL", "pyannote/wespeaker-voxceleb-resnet34-LM")
+WINDOW_SECONDS = float(os.getenv("ECHOPANEL_DIARIZATION_WINDOW_S", "3.0"))
+STEP_SECONDS = float(os.getenv("ECHOPANEL_DIARIZATION_STEP_S", "1.5"))
+SIMILARITY_THRESHOLD = float(os.getenv("ECHOPANEL_DIARIZATION_SIMILARITY", "0.55"))
+MERGE_THRESHOLD = float(os.getenv("ECHOPANEL_DIARIZATION_MERGE_SIMILARITY", "0.7"))
+MAX_SPEAKERS = int(os.getenv("ECHOPANEL_DIARIZATION_MAX_SPEAKERS", "8"))
+# Pending audio beyond this is dropped (oldest first) if embedding falls behind.
+MAX_PENDING_SECONDS = float(os.getenv("ECHOPANEL_DIARIZATION_MAX_PENDING_S", "60"))
+
+_EMBEDDING_INFERENCE: Optional[Any] = None
+_EMBEDDING_LOCK = threading.Lock()
+
+EmbedFn = Callable[["np.ndarray", int], Optional["np.ndarray"]]
+
+
+def is_streaming_diarization_available() -> bool:
+    """Check if the speaker-embedding backend for streaming diarization is available."""
+    if not _diarization.HAS_NUMPY or not _diarization.HAS_TORCH_STACK:
+        return False
+    return bool(os.getenv("ECHOPANEL_HF_TOKEN"))
+
+
+def _import_embedding_stack() -> bool:
+    """Import torch and pyannote.audio's Inference/Model on first use."""
+    global torch, Inference, Model
+    if Inference is None:
+        if not _diarization._import_torch_stack():
+            return False
+        try:
+            from pyannote.audio import Inference as _Inference, Model as _Model
+        except Exception as e:  # pragma: no cover - optional dependency
+            logger.warning(f"Speaker embedding backend unavailable: {e}")
+            return False
+        torch, Inference, Model = _diarization.torch, _Inference, _Model
+    return True
+
+
+def resolve_diarization_mode() -> str:
+    """Resolve ECHOPANEL_DIARIZATION_MODE to 'streaming' or 'batch'."""
+    mode = DIARIZATION_MODE.strip().lower()
+    if mode == "batch":
+        return "batch"
+    if is_streaming_diarization_available():
+        return "streaming"
+    if mode == "streaming":
+        logger.warning("Streaming diarization requested but embedding backend unavailable; using batch")
+    return "batch"
+
+
+def _get_embedding_inference() -> Optional[Any]:
+    global _EMBEDDING_INFERENCE
+    if not _import_embedding_stack():
+        return None
+    with _EMBEDDING_LOCK:
+        if _EMBEDDING_INFERENCE is None:
+            token = os.getenv("ECHOPANEL_HF_TOKEN")
+            if not token:
+                return None
+            try:
+                model = Model.from_pretrained(EMBEDDING_MODEL, use_auth_token=token)
+                inference = Inference(model, window="whole")
+                if torch is not None and torch.cuda.is_available():
+                    inference.to(torch.device("cuda"))
+                _EMBEDDING_INFERENCE = inference
+                logger.debug(f"Loaded speaker embedding model {EMBEDDING_MODEL}")
+            except Exception as e:
+                logger.error(f"Failed to load speaker embedding model: {e}")
+                return None
+    return _EMBEDDING_INFERENCE
+
+
+def pyannote_embed(audio: "np.ndarray", sample_rate: int) -> Optional["np.ndarray"]:
+    """Default embedding backend: pyannote speaker-embedding model over a float32 window."""
+    inference = _get_embedding_inference()
+    if inference is None:
+        return None
+    import numpy as np
+
+    waveform = torch.from_numpy(np.ascontiguousarray(audio)).unsqueeze(0)
+    embedding = inference({"waveform": waveform, "sample_rate": sample_rate})
+    return np.asarray(embedding, dtype=np.float32).reshape(-1)
+
+
+class SpeakerRegistry:
+    """
+    Persistent speaker centroids with incremental cosine clustering.
+
+    Each embedding joins the most similar centroid above `threshold`
+    (running mean update) or opens a new speaker, up to `max_speakers`.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, max_speakers: int = MAX_SPEAKERS):
+        self.threshold = threshold
+        self.max_speakers = max_speakers
+        self._centroids: List["np.ndarray"] = []
+        self._counts: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._centroids)
+
+    def assign(self, embedding: "np.ndarray") -> int:
+        """Return the speaker index for this embedding, updating the registry."""
+        import numpy as np
+
+        norm = float(np.linalg.norm(embedding))
+        if norm <= 0.0 or not np.isfinite(norm):
+            raise ValueError("degenerate speaker embedding")
+        unit = embedding / norm
+
+        if self._centroids:
+            sims = np.stack(self._centroids) @ unit
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold or len(self._centroids) >= self.max_speakers:
+                n = self._counts[best]
+                centroid = self._centroids[best] * n + unit
+                self._centroids[best] = centroid / np.linalg.norm(centroid)
+                self._counts[best] = n + 1
+                return best
+
+        self._centroids.append(unit)
+        self._counts.append(1)
+        return len(self._centroids) - 1
+
+    def merge_similar(self, threshold: float = MERGE_THRESHOLD) -> Dict[int, int]:
+        """
+        Merge speakers whose centroids converged during the session.
+
+        Returns a mapping from every original speaker index to its surviving index.
+        """
+        mapping = {i: i for i in range(len(self._centroids))}
+        if len(self._centroids) < 2:
+            return mapping
+        import numpy as np
+
+        centroids = np.stack(self._centroids)
+        sims = centroids @ centroids.T
+        # Greedy: fold each speaker into the earliest similar survivor.
+        for j in range(1, len(self._centroids)):
+            for i in range(j):
+                if mapping[i] == i and sims[i, j] >= threshold:
+                    mapping[j] = i
+                    break
+
+        for j, i in mapping.items():
+            if i != j:
+                n_i, n_j = self._counts[i], self._counts[j]
+                merged = self._centroids[i] * n_i + self._centroids[j] * n_j
+                self._centroids[i] = merged / np.linalg.norm(merged)
+                self._counts[i] = n_i + n_j
+        return mapping
+
+
+class StreamingDiarizer:
+    """
+    Sliding-window online diarization for one audio source.
+
+    `feed()` is cheap and safe to call from the event loop; `process_pending()`
+    and `finalize()` do the embedding work and should run in a worker thread.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        embed_fn: Optional[EmbedFn] = None,
+        window_s: float = WINDOW_SECONDS,
+        step_s: float = STEP_SECONDS,
+        similarity_threshold: float = SIMILARITY_THRESHOLD,
+        max_speakers: int = MAX_SPEAKERS,
+        min_voiced_rms: float = 0.005,
+        max_pending_s: float = MAX_PENDING_SECONDS,
+    ):
+        if not _diarization.HAS_NUMPY:
+            raise RuntimeError("numpy is required for streaming diarization")
+        import numpy as np
+
+        self.sample_rate = sample_rate
+        self.embed_fn = embed_fn or pyannote_embed
+        self.window_samples = int(window_s * sample_rate)
+        self.step_samples = int(step_s * sample_rate)
+        self.min_voiced_rms = min_voiced_rms
+        self.max_pending_bytes = int(max_pending_s * sample_rate) * 2
+        self.registry = SpeakerRegistry(similarity_threshold, max_speakers)
+
+        self._pending = bytearray()
+        self._pending_lock = threading.Lock()
+        self._process_lock = threading.Lock()
+        # Trailing context: the last window of processed audio.
+        self._context = np.zeros(0, dtype=np.float32)
+        self._samples_processed = 0  # Samples consumed into labelled steps
+        self._samples_dropped = 0
+
+        # Live labels, keyed by registry index as a string.
+        self._aligner = SpeakerAligner()
+        self._segments_lock = threading.Lock()
+
+        self.stats = {
+            "steps_processed": 0,
+            "steps_unvoiced": 0,
+            "embedding_failures": 0,
+            "seconds_dropped": 0.0,
+        }
+
+    def feed(self, pcm_bytes: bytes) -> None:
+        """Queue PCM16 mono audio for the next processing pass."""
+        if not pcm_bytes:
+            return
+        with self._pending_lock:
+            self._pending.extend(pcm_bytes)
+            overflow = len(self._pending) - self.max_pending_bytes
+            if overflow > 0:
+                overflow -= overflow % 2
+                del self._pending[:overflow]
+                self._samples_dropped += overflow // 2
+                self.stats["seconds_dropped"] += overflow / 2 / self.sample_rate
+
+    def _take_pending(self, final: bool) -> Optional["np.ndarray"]:
+        with self._pending_lock:
+            n_bytes = len(self._pending) - len(self._pending) % 2
+            if not final:
+                n_bytes -= n_bytes % (self.step_samples * 2)
+            if n_bytes <= 0:
+                return None
+            chunk = bytes(self._pending[:n_bytes])
+            del self._pending[:n_bytes]
+            dropped, self._samples_dropped = self._samples_dropped, 0
+        # Dropped audio still advances the timeline so labels stay aligned with ASR.
+        self._samples_processed += dropped
+        import numpy as np
+
+        return np.frombuffer(chunk, dtype=np.int16).astype(np.float32) / 32768.0
+
+    def process_pending(self, final: bool = False) -> int:
+        """
+        Label all complete steps of pending audio.
+
+        Returns:
+            Number of steps processed.
+        """
+        import numpy as np
+
+        with self._process_lock:
+            audio = self._take_pending(final)
+            if audio is None:
+                return 0
+
+            steps = 0
+            offset = 0
+            min_tail = self.step_samples // 3
+            while offset < len(audio):
+                step = audio[offset:offset + self.step_samples]
+                offset += len(step)
+                if len(step) < self.step_samples and len(step) < min_tail:
+                    self._samples_processed += len(step)
+                    break
+                self._context = np.concatenate((self._context, step))[-self.window_samples:]
+                t0 = self._samples_processed / self.sample_rate
+                self._samples_processed += len(step)
+                t1 = self._samples_processed / self.sample_rate
+                self._label_step(step, t0, t1)
+                steps += 1
+            return steps
+
+    def _label_step(self, step: "np.ndarray", t0: float, t1: float) -> None:
+        import numpy as np
+
+        self.stats["steps_processed"] += 1
+        rms = float(np.sqrt(np.mean(step * step))) if len(step) else 0.0
+        if rms < self.min_voiced_rms:
+            self.stats["steps_unvoiced"] += 1
+            return
+        try:
+            embedding = self.embed_fn(self._context, self.sample_rate)
+            if embedding is None:
+                self.stats["embedding_failures"] += 1
+                return
+            speaker = self.registry.assign(np.asarray(embedding, dtype=np.float32).reshape(-1))
+        except Exception as e:
+            self.stats["embedding_failures"] += 1
+            logger.debug(f"Streaming diarization embedding failed: {e}")
+            return
+
+        with self._segments_lock:
+            self._aligner.add(t0, t1, str(speaker))
+
+    def speaker_for(self, t0: float, t1: float) -> Optional[str]:
+        """Live label for [t0, t1]: the speaker with the most overlap so far."""
+        with self._segments_lock:
+            speaker = self._aligner.speaker_for(t0, t1)
+        if speaker is None:
+            return None
+        return speaker_name(int(speaker))
+
+    def finalize(self) -> List[dict[str, Any]]:
+        """
+        Process the tail and reconcile speakers.
+
+        Returns segments in the same shape as `diarize_pcm`.
+        """
+        self.process_pending(final=True)
+        with self._process_lock:
+            mapping = self.registry.merge_similar()
+            with self._segments_lock:
+                raw = [
+                    SpeakerSegment(t0=s["t0"], t1=s["t1"], speaker=str(mapping[int(s["speaker"])]))
+                    for s in self._aligner.segments()
+                ]
+        merged = _merge_adjacent_segments(raw, gap_threshold=STEP_SECONDS)
+        # Not renumbered by appearance: names must match the live labels.
+        return [{"t0": s.t0, "t1": s.t1, "speaker": speaker_name(int(s.speaker))} for s in merged]
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["speakers"] = len(self.registry)
+        with self._segments_lock:
+            stats["segments"] = len(self._aligner)
+        return stats
@@ -0,0 +1,216 @@
+"""
+Mic/system echo-bleed detection for live sessions.
+
+With both the mic and system sources active, meeting audio played through the
+speakers leaks into the microphone and is transcribed on both lanes. That
+doubles inference for those spans and produces duplicate transcript lines.
+
+The detector keeps the short-time log-energy envelope (20 ms frames) of the
+system lane as a reference. Each mic chunk is checked before ASR:
+
+1. The envelope of the last WINDOW_MS of mic audio is correlated against the
+   system envelope at the aligned time, for every lag within +-MAX_LAG_MS.
+2. The lanes are aligned by the receive time of each lane's first chunk,
+   plus the lane audio clock. Mic audio dropped by realtime backpressure
+   still advances the mic clock, so drops do not shift the alignment.
+3. The lag search widens with the session's source clock spread (from
+   asr_last_t1_by_source), up to MAX_EXTRA_LAG_MS, to absorb drift between
+   the lanes.
+4. If the best normalised correlation is at least ECHOPANEL_BLEED_CORRELATION,
+   the mic chunk is mostly system bleed. It is replaced with silence, so
+   timestamps stay continuous. VAD skips it; with VAD off, chunked providers
+   skip chunks that are entirely digital silence (is_digital_silence).
+
+Everything runs as vectorised NumPy over frames: one reshape for the energies,
+and one sliding-window matrix product for all lags.
+
+Near-end speech over system audio (double talk) breaks the envelope
+correlation, so the user's own voice is kept. A silent system lane never
+suppresses anything. Only the realtime lane is filtered; the recording lane
+keeps the original mic audio.
+
+Environment:
+    ECHOPANEL_BLEED_DETECTION      Enable bleed suppression (1)
+    ECHOPANEL_BLEED_CORRELATION    Envelope correlation that counts as bleed (0.9)
+    ECHOPANEL_BLEED_WINDOW_MS      Mic history compared per decision (600)
+    ECHOPANEL_BLEED_MAX_LAG_MS     Acoustic + buffering lag searched each way (300)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np  # imported by the detector itself, off the server import path
+
+logger = logging.getLogger(__name__)
+
+BLEED_DETECTION = os.getenv("ECHOPANEL_BLEED_DETECTION", "1").strip().lower() not in {"0", "false", "no", "off"}
+CORRELATION_THRESHOLD = float(os.getenv("ECHOPANEL_BLEED_CORRELATION", "0.9"))
+WINDOW_MS = int(os.getenv("ECHOPANEL_BLEED_WINDOW_MS", "600"))
+MAX_LAG_MS = int(os.getenv("ECHOPANEL_BLEED_MAX_LAG_MS", "300"))
+MAX_EXTRA_LAG_MS = 500
+FRAME_MS = 20
+HISTORY_SECONDS = 10.0
+# log10 mean-square of a frame; below this a mic window is silence (VAD's job)
+SILENCE_LOG_ENERGY = -6.0
+# Envelope variation (log10 units) needed for a meaningful correlation
+MIN_ENVELOPE_STD = 0.05
+
+
+def _log_energies(pcm: bytes, carry: "np.ndarray", frame: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Per-frame log10 mean-square of PCM16 audio; returns (energies, leftover samples)."""
+    import numpy as np
+
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    if carry.size:
+        samples = np.concatenate((carry, samples))
+    n = samples.size // frame
+    frames = samples[: n * frame].reshape(n, frame)
+    return np.log10(np.mean(frames * frames, axis=1) + 1e-10), samples[n * frame:]
+
+
+class BleedDetector:
+    """Suppresses mic audio that is mostly system-audio bleed."""
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        threshold: float = CORRELATION_THRESHOLD,
+        window_ms: int = WINDOW_MS,
+        max_lag_ms: int = MAX_LAG_MS,
+    ):
+        import numpy as np
+
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.frame = sample_rate * FRAME_MS // 1000
+        self.window = max(2, window_ms // FRAME_MS)
+        self.max_lag = max_lag_ms // FRAME_MS
+        self._extra_lag = 0
+
+        # System envelope ring, indexed by absolute system frame number
+        self._capacity = int(HISTORY_SECONDS * 1000 / FRAME_MS)
+        self._sys_env = np.zeros(self._capacity, dtype=np.float32)
+        self._sys_frames = 0
+        self._sys_carry = np.empty(0, dtype=np.float32)
+
+        self._mic_env = np.empty(0, dtype=np.float32)  # last `window` mic frames
+        self._mic_samples = 0  # mic samples received up to the end of the last filtered or dropped chunk
+        self._mic_carry = np.empty(0, dtype=np.float32)
+
+        self._lane_start: Dict[str, float] = {}
+        self._stats: Dict[str, Any] = {
+            "mic_seconds": 0.0,
+            "suppressed_seconds": 0.0,
+            "suppressed_chunks": 0,
+            "windows_checked": 0,
+            "last_correlation": None,
+            "lag_ms": None,
+        }
+
+    # ------------------------------------------------------------------ inputs
+
+    def on_receive(self, source: str, chunk: bytes, received_at: Optional[float] = None) -> None:
+        """Record a received chunk; system audio extends the reference envelope."""
+        if source not in self._lane_start:
+            self._lane_start[source] = received_at if received_at is not None else time.perf_counter()
+        if source != "system":
+            return
+        import numpy as np
+
+        energies, self._sys_carry = _log_energies(chunk, self._sys_carry, self.frame)
+        if energies.size:
+            idx = (self._sys_frames + np.arange(energies.size)) % self._capacity
+            self._sys_env[idx] = energies
+            self._sys_frames += energies.size
+
+    def on_drop(self, source: str, nbytes: int) -> None:
+        """Advance the mic clock past audio the realtime lane dropped before filter_mic saw it."""
+        if source != "mic" or nbytes <= 0:
+            return
+        import numpy as np
+
+        self._mic_samples += nbytes // 2
+        # The envelope window must not splice audio from both sides of the gap.
+        self._mic_env = np.empty(0, dtype=np.float32)
+        self._mic_carry = np.empty(0, dtype=np.float32)
+
+    def set_clock_spread_ms(self, spread_ms: float) -> None:
+        """Widen the lag search by the lanes' current clock spread (capped)."""
+        self._extra_lag = int(min(max(spread_ms, 0.0), MAX_EXTRA_LAG_MS) // FRAME_MS)
+
+    # ------------------------------------------------------------------ decision
+
+    def filter_mic(self, chunk: bytes) -> bytes:
+        """The mic chunk for ASR: unchanged, or silence if it is system bleed."""
+        import numpy as np
+
+        energies, self._mic_carry = _log_energies(chunk, self._mic_carry, self.frame)
+        self._mic_env = np.concatenate((self._mic_env, energies))[-self.window:]
+        self._mic_samples += len(chunk) // 2
+        seconds = len(chunk) / (2 * self.sample_rate)
+        self._stats["mic_seconds"] += seconds
+
+        correlation = self._bleed_correlation()
+        if correlation is None or correlation < self.threshold:
+            return chunk
+        self._stats["suppressed_seconds"] += seconds
+        self._stats["suppressed_chunks"] += 1
+        return bytes(len(chunk))
+
+    def _bleed_correlation(self) -> Optional[float]:
+        """Best envelope correlation of the recent mic window with system audio (None if undecidable)."""
+        if "system" not in self._lane_start or "mic" not in self._lane_start or self._mic_env.size < self.window:
+            return None
+        mic = self._mic_env
+        if float(mic.mean()) < SILENCE_LOG_ENERGY:
+            return None
+
+        # Mic frame m was captured alongside system frame m + offset
+        offset = (self._lane_start["mic"] - self._lane_start["system"]) * 1000 / FRAME_MS
+        mic_end = (self._mic_samples - self._mic_carry.size) / self.frame
+        start = round(mic_end + offset) - self.window
+        lag = self.max_lag + self._extra_lag
+        lo = max(start - lag, self._sys_frames - self._capacity, 0)
+        hi = min(start + self.window + lag, self._sys_frames)
+        if hi - lo < self.window:
+            return None  # aligned system audio not received (or already forgotten)
+        import numpy as np
+        from numpy.lib.stride_tricks import sliding_window_view
+
+        reference = self._sys_env[np.arange(lo, hi) % self._capacity]
+        candidates = sliding_window_view(reference, self.window)  # (lags, window)
+        centered = candidates - candidates.mean(axis=1, keepdims=True)
+        mic_centered = mic - mic.mean()
+        norms = np.linalg.norm(centered, axis=1) * np.linalg.norm(mic_centered)
+        active = centered.std(axis=1) >= MIN_ENVELOPE_STD
+        if not active.any() or float(mic_centered.std()) < MIN_ENVELOPE_STD:
+            return None
+        correlations = np.where(active, centered @ mic_centered / np.maximum(norms, 1e-12), -1.0)
+        best = int(np.argmax(correlations))
+
+        self._stats["windows_checked"] += 1
+        self._stats["last_correlation"] = round(float(correlations[best]), 3)
+        self._stats["lag_ms"] = (lo + best - start) * FRAME_MS
+        return float(correlations[best])
+
+    # ------------------------------------------------------------------ status
+
+    @property
+    def suppressed_seconds(self) -> float:
+        """Seconds of mic audio replaced with silence because it was bleed.
+
+        VAD drops these spans; without VAD, providers skip every chunk that is
+        entirely suppressed, so at most a chunk's worth at each edge is decoded.
+        """
+        return self._stats["suppressed_seconds"]
+
+    def snapshot(self) -> Dict[str, Any]:
+        snap = dict(self._stats)
+        snap["mic_seconds"] = round(snap["mic_seconds"], 2)
+        snap["suppressed_seconds"] = round(snap["suppressed_seconds"], 2)
+        return snap
@@ -5,6 +5,7 @@ or other embedding models. It's designed to work with the Brain Dump
 storage system for semantic search capabilities.
 """
 
+import importlib.util
 import logging
 import math
 import os
@@ -48,10 +49,10 @@ class EmbeddingService:
         Returns:
             True if sentence-transformers is installed and working
         """
+        # Probe without importing: sentence-transformers pulls in torch
         try:
-            import sentence_transformers
-            return True
-        except ImportError:
+            return importlib.util.find_spec("sentence_transformers") is not None
+        except (ImportError, ValueError):
             return False
     
     def _load_model(self):
@@ -0,0 +1,275 @@
+"""
+Cross-session fair inference scheduler.
+
+ConcurrencyController has defined a mic-over-system priority since PR5, but
+the live path (put_audio -> per-session queue -> _asr_loop) never went
+through it. Every stream handed its decodes straight to an executor, so
+whichever session submitted most got the most inference. A long system-audio
+backlog could then delay everyone else's mic chunks.
+
+The scheduler owns the bounded inference executor, sized to the thread
+planner's largest plan. Every decode is a job on a flow: one flow per
+(session, source), taken from a contextvar that the ASR loop binds, just as
+the latency tracer does. When a worker frees up, the next job is chosen by
+self-clocked weighted fair queuing:
+
+- A job's finish tag is max(virtual time, the flow's last tag) + audio
+  seconds / weight.
+- The smallest tag runs next. On a tie, mic runs before system.
+- Weights are normalised within a session, so a session with two sources
+  gets the same share as one with a single source. Within that share, mic
+  outweighs system (ECHOPANEL_INFER_WEIGHT_MIC : _SYSTEM). A heavy session
+  cannot starve the others, and a user's own voice waits less than the
+  shared-screen audio.
+
+Under overload, jobs that waited past their source's deadline are dropped
+when they reach the front of the queue rather than run late. The caller gets
+InferenceDropped. Mic has the longer deadline, so system audio is shed first.
+Jobs submitted outside a live session (calibration, warmup) and end-of-stream
+flushes never expire.
+
+Environment:
+    ECHOPANEL_INFER_WORKERS             Concurrent decodes (thread planner's executor_workers)
+    ECHOPANEL_INFER_WEIGHT_MIC          Mic share within a session (3.0)
+    ECHOPANEL_INFER_WEIGHT_SYSTEM       System share within a session (1.0)
+    ECHOPANEL_INFER_DEADLINE_MIC_S      Max queue wait before a mic decode is dropped (6.0)
+    ECHOPANEL_INFER_DEADLINE_SYSTEM_S   Max queue wait before a system decode is dropped (3.0)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SOURCE_WEIGHTS: Dict[str, float] = {
+    "mic": float(os.getenv("ECHOPANEL_INFER_WEIGHT_MIC", "3.0")),
+    "system": float(os.getenv("ECHOPANEL_INFER_WEIGHT_SYSTEM", "1.0")),
+}
+SOURCE_DEADLINES_S: Dict[str, float] = {
+    "mic": float(os.getenv("ECHOPANEL_INFER_DEADLINE_MIC_S", "6.0")),
+    "system": float(os.getenv("ECHOPANEL_INFER_DEADLINE_SYSTEM_S", "3.0")),
+}
+# Dispatch order on equal finish tags
+_SOURCE_RANK = {"mic": 0, "system": 1}
+_DEFAULT_FLOW = ("", "")
+
+_current_flow: contextvars.ContextVar[Optional[Tuple[str, str]]] = contextvars.ContextVar(
+    "echopanel_inference_flow", default=None
+)
+
+
+class InferenceDropped(Exception):
+    """A decode waited past its deadline and was shed instead of run late."""
+
+
+@dataclass
+class _Job:
+    fn: Callable[[], Any]
+    future: asyncio.Future
+    finish_tag: float
+    enqueued_at: float
+    deadline: Optional[float]
+
+
+@dataclass
+class _Flow:
+    session: str
+    source: str
+    jobs: Deque[_Job] = field(default_factory=deque)
+    last_finish: float = 0.0
+    submitted: int = 0
+    dropped: int = 0
+    wait_s_total: float = 0.0
+    started: int = 0
+
+
+class InferenceScheduler:
+    """Weighted fair queuing of decodes across sessions onto a bounded executor."""
+
+    def __init__(self, workers: Optional[int] = None, clock: Callable[[], float] = time.monotonic):
+        if workers is None:
+            workers = int(os.getenv("ECHOPANEL_INFER_WORKERS", "0"))
+        if workers <= 0:
+            from .thread_planner import get_thread_planner
+
+            workers = get_thread_planner().executor_workers
+        self.workers = max(1, workers)
+        self._clock = clock
+        self._flows: Dict[Tuple[str, str], _Flow] = {}
+        self._virtual_time = 0.0
+        self._running = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {
+            "jobs_submitted": 0,
+            "jobs_run": 0,
+            "jobs_dropped": 0,
+            "peak_pending": 0,
+        }
+
+    # ------------------------------------------------------------------ flows
+
+    def open_flow(self, session: str, source: str) -> Tuple[str, str]:
+        key = (session, source)
+        if key not in self._flows:
+            self._flows[key] = _Flow(session, source, last_finish=self._virtual_time)
+        return key
+
+    def close_flow(self, key: Tuple[str, str]) -> None:
+        flow = self._flows.pop(key, None)
+        if flow is not None:
+            for job in flow.jobs:
+                if not job.future.done():
+                    job.future.cancel()
+
+    def weight(self, key: Tuple[str, str]) -> float:
+        """The flow's share: its source weight normalised over its session's open flows."""
+        session, source = key
+        own = SOURCE_WEIGHTS.get(source, 1.0)
+        total = sum(SOURCE_WEIGHTS.get(f.source, 1.0) for f in self._flows.values() if f.session == session)
+        return own / total if total > 0 else 1.0
+
+    # ------------------------------------------------------------------ jobs
+
+    async def run(self, fn: Callable[[], Any], audio_s: float, droppable: bool = True) -> Any:
+        """Run `fn` in the executor when the current flow's turn comes.
+
+        Raises InferenceDropped if the job is droppable and waited past its deadline.
+        """
+        loop = asyncio.get_running_loop()
+        key = _current_flow.get() or _DEFAULT_FLOW
+        if key not in self._flows:
+            self.open_flow(*key)
+        flow = self._flows[key]
+        now = self._clock()
+
+        start_tag = max(self._virtual_time, flow.last_finish)
+        flow.last_finish = start_tag + max(audio_s, 1e-3) / self.weight(key)
+        deadline_s = SOURCE_DEADLINES_S.get(flow.source) if droppable else None
+        job = _Job(fn, loop.create_future(), flow.last_finish, now,
+                   now + deadline_s if deadline_s is not None else None)
+        flow.jobs.append(job)
+        flow.submitted += 1
+        self._stats["jobs_submitted"] += 1
+        self._stats["peak_pending"] = max(self._stats["peak_pending"], self.pending)
+        self._dispatch()
+        return await job.future
+
+    def _next_flow(self) -> Optional[_Flow]:
+        best: Optional[_Flow] = None
+        for flow in self._flows.values():
+            while flow.jobs and flow.jobs[0].future.done():  # caller went away
+                flow.jobs.popleft()
+            if not flow.jobs:
+                continue
+            if best is None or (flow.jobs[0].finish_tag, _SOURCE_RANK.get(flow.source, 2)) < (
+                best.jobs[0].finish_tag, _SOURCE_RANK.get(best.source, 2)
+            ):
+                best = flow
+        return best
+
+    def _dispatch(self) -> None:
+        while self._running < self.workers:
+            flow = self._next_flow()
+            if flow is None:
+                return
+            job = flow.jobs.popleft()
+            self._virtual_time = max(self._virtual_time, job.finish_tag)
+            now = self._clock()
+            if job.deadline is not None and now > job.deadline:
+                flow.dropped += 1
+                self._stats["jobs_dropped"] += 1
+                logger.warning(f"Dropped {flow.source} decode for session {flow.session or '-'}: "
+                               f"waited {now - job.enqueued_at:.1f}s past a "
+                               f"{job.deadline - job.enqueued_at:.1f}s deadline")
+                job.future.set_exception(InferenceDropped(f"{flow.source} decode exceeded its deadline"))
+                continue
+            flow.started += 1
+            flow.wait_s_total += now - job.enqueued_at
+            self._running += 1
+            self._stats["jobs_run"] += 1
+            inner = asyncio.get_running_loop().run_in_executor(self.executor(), job.fn)
+            inner.add_done_callback(lambda f, job=job: self._on_done(job, f))
+
+    def _on_done(self, job: _Job, inner: asyncio.Future) -> None:
+        self._running -= 1
+        if not job.future.done():
+            if inner.cancelled():
+                job.future.cancel()
+            elif inner.exception() is not None:
+                job.future.set_exception(inner.exception())
+            else:
+                job.future.set_result(inner.result())
+        self._dispatch()
+
+    @property
+    def pending(self) -> int:
+        return sum(len(flow.jobs) for flow in self._flows.values())
+
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="asr-infer")
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "pending": self.pending,
+            "flows": {
+                f"{flow.session or '-'}:{flow.source or '-'}": {
+                    "weight": round(self.weight(key), 3),
+                    "queued": len(flow.jobs),
+                    "submitted": flow.submitted,
+                    "dropped": flow.dropped,
+                    "avg_wait_ms": round(flow.wait_s_total / flow.started * 1000, 1) if flow.started else 0.0,
+                }
+                for key, flow in self._flows.items()
+            },
+            **self._stats,
+        }
+
+
+def bind_flow(session: str, source: str) -> contextvars.Token:
+    """Attribute decodes submitted from this context to (session, source)."""
+    key = get_inference_scheduler().open_flow(session, source)
+    return _current_flow.set(key)
+
+
+def unbind_flow(token: contextvars.Token) -> None:
+    key = _current_flow.get()
+    _current_flow.reset(token)
+    if key is not None and _scheduler is not None:
+        _scheduler.close_flow(key)
+
+
+_scheduler: Optional[InferenceScheduler] = None
+
+
+def get_inference_scheduler() -> InferenceScheduler:
+    """Get the process-wide inference scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = InferenceScheduler()
+    return _scheduler
+
+
+def reset_inference_scheduler() -> None:
+    """Reset the global scheduler (for testing)."""
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.shutdown()
+    _scheduler = None
@@ -0,0 +1,334 @@
+"""
+Per-chunk end-to-end latency tracing for live sessions.
+
+Each audio chunk is stamped as it moves through the realtime lane:
+
+    receive -> enqueue -> dequeue -> VAD -> inference -> emit -> ws_send
+
+Chunks are correlated by audio time. Every dequeued chunk advances its
+source's audio cursor, so a segment's `t1` (provider audio time) maps back to
+the chunk that completed it and to that chunk's receive/enqueue/dequeue stamps.
+Providers report VAD and inference through `trace_vad()` / `trace_inference()`,
+which look up the source tracer the ASR loop installed in a contextvar, so
+provider interfaces stay unchanged and calls outside a live session are no-ops.
+
+Stages (all in milliseconds, aggregated per session with WindowedQuantiles):
+    ingest      receive -> enqueue (decode, recording lane, backpressure)
+    queue       enqueue -> dequeue (realtime queue wait)
+    buffer      dequeue -> inference start (chunk accumulation, VAD)
+    vad         one VAD decision
+    inference   one provider inference call
+    emit        inference end -> segment reaches the ASR loop
+    send        segment reaches the ASR loop -> ws_send completes
+    end_to_end  receive of the completing chunk -> ws_send completes
+    uplink      client capture timestamp -> receive (epoch timestamps only;
+                includes client/server clock skew)
+
+With ECHOPANEL_LATENCY_TRACE=1 each session also writes its spans as a
+Chrome trace-event JSON file (chrome://tracing, ui.perfetto.dev) to
+ECHOPANEL_LATENCY_TRACE_DIR when it ends.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .quantiles import WindowedQuantiles
+
+logger = logging.getLogger(__name__)
+
+LATENCY_TRACE_ENABLED = os.getenv("ECHOPANEL_LATENCY_TRACE", "0") == "1"
+LATENCY_TRACE_DIR = Path(os.getenv("ECHOPANEL_LATENCY_TRACE_DIR", "/tmp/echopanel_traces"))
+LATENCY_TRACE_MAX_EVENTS = int(os.getenv("ECHOPANEL_LATENCY_TRACE_MAX_EVENTS", "200000"))
+
+STAGES: Tuple[str, ...] = (
+    "ingest", "queue", "buffer", "vad", "inference", "emit", "send", "end_to_end", "uplink",
+)
+# Dequeued chunks kept for segment correlation (audio seconds behind the cursor)
+CHUNK_HISTORY_SECONDS = 120.0
+INFERENCE_SAMPLES_MAX = 200
+BYTES_PER_SAMPLE = 2
+# Client timestamps below this are stream-relative, not epoch seconds
+_EPOCH_TIMESTAMP_MIN = 1e9
+
+_current_source: contextvars.ContextVar[Optional["SourceTracer"]] = contextvars.ContextVar(
+    "echopanel_latency_source", default=None
+)
+
+
+class _Chunk:
+    __slots__ = ("nbytes", "received", "client_ts", "enqueued", "dequeued", "audio_end")
+
+    def __init__(self, nbytes: int, received: float, client_ts: Optional[float], enqueued: float):
+        self.nbytes = nbytes
+        self.received = received
+        self.client_ts = client_ts
+        self.enqueued = enqueued
+        self.dequeued = 0.0
+        self.audio_end = 0.0
+
+
+class Emission:
+    """A segment on its way to the client (returned by `SourceTracer.on_emit`)."""
+
+    __slots__ = ("t1", "emitted", "chunk", "inference", "vad")
+
+    def __init__(self, t1: float, emitted: float, chunk: Optional[_Chunk],
+                 inference: Optional[Tuple[float, float]], vad: Optional[Tuple[float, float]]):
+        self.t1 = t1
+        self.emitted = emitted
+        self.chunk = chunk
+        self.inference = inference
+        self.vad = vad
+
+
+class SourceTracer:
+    """Stamps for one source's realtime lane. Used from the event loop only."""
+
+    def __init__(self, session: "LatencyTracer", source: str, tid: int, sample_rate: int = 16000):
+        self.session = session
+        self.source = source
+        self.tid = tid
+        self.bytes_per_second = sample_rate * BYTES_PER_SAMPLE
+        self._pending: Deque[_Chunk] = deque()
+        self._chunks: Deque[_Chunk] = deque()
+        self._chunk_ends: Deque[float] = deque()
+        self._dequeued_bytes = 0
+        self._inference_cursor = 0.0
+        self._last_inference: Optional[Tuple[float, float]] = None
+        self._last_vad: Optional[Tuple[float, float]] = None
+        # (inference_s, audio_s) per provider call; feeds RTF in the metrics loop
+        self.inference_samples: Deque[Tuple[float, float]] = deque(maxlen=INFERENCE_SAMPLES_MAX)
+        self._new_samples: List[Tuple[float, float]] = []
+
+    @property
+    def audio_cursor(self) -> float:
+        """Seconds of audio handed to the provider so far."""
+        return self._dequeued_bytes / self.bytes_per_second
+
+    # -- ingest side ---------------------------------------------------------
+
+    def on_enqueue(self, nbytes: int, received: Optional[float] = None,
+                   client_ts: Optional[float] = None) -> None:
+        now = time.perf_counter()
+        self._pending.append(_Chunk(nbytes, received if received is not None else now, client_ts, now))
+
+    def on_drop(self, count: int) -> None:
+        """Oldest `count` queued chunks were evicted by backpressure."""
+        for _ in range(min(count, len(self._pending))):
+            self._pending.popleft()
+
+    def on_dequeue(self, nbytes: int) -> None:
+        now = time.perf_counter()
+        self._dequeued_bytes += nbytes
+        if not self._pending:
+            return
+        chunk = self._pending.popleft()
+        chunk.dequeued = now
+        chunk.audio_end = self.audio_cursor
+        self._chunks.append(chunk)
+        self._chunk_ends.append(chunk.audio_end)
+        horizon = chunk.audio_end - CHUNK_HISTORY_SECONDS
+        while self._chunk_ends[0] < horizon:
+            self._chunks.popleft()
+            self._chunk_ends.popleft()
+
+        stats = self.session.stages
+        stats["ingest"].observe((chunk.enqueued - chunk.received) * 1000)
+        stats["queue"].observe((now - chunk.enqueued) * 1000)
+        if chunk.client_ts is not None and chunk.client_ts >= _EPOCH_TIMESTAMP_MIN:
+            uplink_s = time.time() - (now - chunk.received) - chunk.client_ts
+            if uplink_s >= 0:
+                stats["uplink"].observe(uplink_s * 1000)
+
+    # -- provider side -------------------------------------------------------
+
+    def on_vad(self, start: float, end: float, has_speech: bool) -> None:
+        self._last_vad = (start, end)
+        self.session.stages["vad"].observe((end - start) * 1000)
+        self.session.add_event("vad", "asr", start, end, self.tid + 1, {"speech": has_speech})
+
+    def on_inference(self, start: float, end: float, audio_seconds: float = 0.0) -> None:
+        self._last_inference = (start, end)
+        cursor = self.audio_cursor
+        if audio_seconds <= 0:
+            audio_seconds = cursor - self._inference_cursor
+        self._inference_cursor = cursor
+        sample = (end - start, max(0.0, audio_seconds))
+        self.inference_samples.append(sample)
+        self._new_samples.append(sample)
+        self.session.stages["inference"].observe((end - start) * 1000)
+        self.session.add_event("inference", "asr", start, end, self.tid + 1,
+                               {"audio_s": round(sample[1], 3), "cursor_s": round(cursor, 3)})
+
+    def take_new_inferences(self) -> List[Tuple[float, float]]:
+        """(inference_s, audio_s) samples recorded since the last call."""
+        samples, self._new_samples = self._new_samples, []
+        return samples
+
+    # -- emission side -------------------------------------------------------
+
+    def _chunk_for(self, t1: float) -> Optional[_Chunk]:
+        if not self._chunks:
+            return None
+        i = bisect.bisect_left(self._chunk_ends, t1)
+        return self._chunks[min(i, len(self._chunks) - 1)]
+
+    def on_emit(self, t1: float) -> Emission:
+        """A segment ending at audio time `t1` reached the ASR loop."""
+        return Emission(t1, time.perf_counter(), self._chunk_for(t1), self._last_inference, self._last_vad)
+
+    def on_sent(self, emission: Emission, name: str = "segment") -> None:
+        """The segment's ws_send completed; record per-stage latencies."""
+        sent = time.perf_counter()
+        stats = self.session.stages
+        stats["send"].observe((sent - emission.emitted) * 1000)
+        chunk = emission.chunk
+        inference = emission.inference
+        if inference is not None:
+            stats["emit"].observe(max(0.0, emission.emitted - inference[1]) * 1000)
+            if chunk is not None:
+                buffer_start = min(chunk.dequeued, inference[0])
+                stats["buffer"].observe((inference[0] - buffer_start) * 1000)
+        if chunk is not None:
+            stats["end_to_end"].observe((sent - chunk.received) * 1000)
+        if self.session.tracing:
+            self._trace_segment(name, emission, sent)
+
+    def _trace_segment(self, name: str, emission: Emission, sent: float) -> None:
+        chunk = emission.chunk
+        inference = emission.inference
+        # Clamp to a monotonic sequence so child spans nest inside the segment span.
+        marks: List[Tuple[str, float]] = []
+        if chunk is not None:
+            marks += [("ingest", chunk.received), ("queue", chunk.enqueued), ("buffer", chunk.dequeued)]
+        if inference is not None:
+            marks += [("inference", inference[0]), ("emit", inference[1])]
+        marks += [("send", emission.emitted), ("", sent)]
+        stamps: List[float] = []
+        for _, t in marks:
+            stamps.append(max(t, stamps[-1]) if stamps else t)
+        args: Dict[str, Any] = {"t1": round(emission.t1, 3)}
+        if chunk is not None and chunk.client_ts is not None:
+            args["client_timestamp"] = chunk.client_ts
+        self.session.add_event(name, "segment", stamps[0], sent, self.tid, args)
+        for (stage, _), start, end in zip(marks, stamps, stamps[1:]):
+            self.session.add_event(stage, "stage", start, end, self.tid)
+
+
+class LatencyTracer:
+    """Per-session stage latency distributions and optional Chrome trace."""
+
+    def __init__(self, tracing: bool = LATENCY_TRACE_ENABLED, max_events: int = LATENCY_TRACE_MAX_EVENTS):
+        self.tracing = tracing
+        self.max_events = max_events
+        self.stages: Dict[str, WindowedQuantiles] = {stage: WindowedQuantiles() for stage in STAGES}
+        self._sources: Dict[str, SourceTracer] = {}
+        self._origin = time.perf_counter()
+        self._events: List[Dict[str, Any]] = []
+        self._events_dropped = 0
+        self._lock = threading.Lock()
+
+    def source(self, source: str, sample_rate: int = 16000) -> SourceTracer:
+        tracer = self._sources.get(source)
+        if tracer is None:
+            # Two Chrome threads per source: segment stages, then provider calls.
+            tracer = SourceTracer(self, source, tid=2 * len(self._sources) + 1, sample_rate=sample_rate)
+            self._sources[source] = tracer
+        return tracer
+
+    def add_event(self, name: str, cat: str, start: float, end: float, tid: int,
+                  args: Optional[Dict[str, Any]] = None) -> None:
+        if not self.tracing:
+            return
+        event: Dict[str, Any] = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": round((start - self._origin) * 1e6, 1),
+            "dur": round(max(0.0, end - start) * 1e6, 1),
+            "pid": 1,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            if len(self._events) >= self.max_events:
+                self._events_dropped += 1
+                return
+            self._events.append(event)
+
+    def summary(self, window: Optional[float] = 60.0) -> Dict[str, Dict[str, float]]:
+        """{stage: {"count", "mean", "max", "p50", "p95", "p99"}} in ms for stages with data."""
+        result = {}
+        for stage, stats in self.stages.items():
+            span = stats.recent(window) if window is not None else None
+            if stats.count(span):
+                result[stage] = {k: round(v, 2) for k, v in stats.snapshot(span).items()}
+        return result
+
+    def chrome_trace(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        meta: List[Dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": 1, "args": {"name": f"session {session_id or '-'}"}},
+        ]
+        for name, tracer in self._sources.items():
+            meta.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tracer.tid,
+                         "args": {"name": f"{name} segments"}})
+            meta.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tracer.tid + 1,
+                         "args": {"name": f"{name} asr"}})
+        with self._lock:
+            events = list(self._events)
+            dropped = self._events_dropped
+        return {
+            "traceEvents": meta + events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "session_id": session_id,
+                "events_dropped": dropped,
+                "stages_ms": self.summary(window=None),
+            },
+        }
+
+    def write_chrome_trace(self, session_id: Optional[str],
+                           directory: Path = LATENCY_TRACE_DIR) -> Optional[Path]:
+        """Write the session's trace JSON; returns the path (None if tracing is off)."""
+        if not self.tracing:
+            return None
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{session_id or 'session'}_{int(time.time())}.trace.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(session_id), f)
+        return path
+
+
+def bind_source(tracer: Optional[SourceTracer]) -> contextvars.Token:
+    """Make `tracer` the target of trace_vad()/trace_inference() in this context."""
+    return _current_source.set(tracer)
+
+
+def unbind_source(token: contextvars.Token) -> None:
+    _current_source.reset(token)
+
+
+def trace_vad(start: float, end: float, has_speech: bool) -> None:
+    """Record a VAD decision (perf_counter stamps) for the current live source."""
+    tracer = _current_source.get()
+    if tracer is not None:
+        tracer.on_vad(start, end, has_speech)
+
+
+def trace_inference(infer_ms: float, audio_seconds: float = 0.0) -> None:
+    """Record a provider inference that just finished for the current live source."""
+    tracer = _current_source.get()
+    if tracer is not None:
+        end = time.perf_counter()
+        tracer.on_inference(end - infer_ms / 1000.0, end, audio_seconds)
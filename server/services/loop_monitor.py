@@ -0,0 +1,185 @@
+"""
+Event-loop lag monitor and blocking-call watchdog.
+
+A heartbeat task sleeps for a short fixed interval and records how late the
+loop wakes it. The lag goes to /metrics (`event_loop_lag_ms` histogram and
+`event_loop_lag_seconds` gauge) and to windowed quantiles served by
+GET /debug/event-loop.
+
+Any synchronous work on the loop (embedding encodes, vector-store calls, file
+I/O) shows up as lag. Such work used to surface only as sporadic
+backpressure drops. With ECHOPANEL_LOOP_WATCHDOG=1, a daemon thread also
+notices when the heartbeat is overdue by more than the stall threshold. It
+then captures the loop thread's stack while the loop is still blocked, so the
+report names the blocking call rather than whatever runs after it.
+
+Heartbeats that arrive later than the stall threshold count as stalls
+(`event_loop_stalls_total`) whether or not the watchdog is running.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from .metrics_registry import get_registry
+from .quantiles import WindowedQuantiles
+
+logger = logging.getLogger(__name__)
+
+LOOP_MONITOR_INTERVAL_MS = float(os.getenv("ECHOPANEL_LOOP_MONITOR_INTERVAL_MS", "50"))
+LOOP_STALL_THRESHOLD_MS = float(os.getenv("ECHOPANEL_LOOP_STALL_THRESHOLD_MS", "250"))
+LOOP_WATCHDOG_ENABLED = os.getenv("ECHOPANEL_LOOP_WATCHDOG", "0") == "1"
+LOOP_STALL_REPORTS = int(os.getenv("ECHOPANEL_LOOP_STALL_REPORTS", "20"))
+STACK_DEPTH = 25  # innermost frames kept per captured stack
+
+
+class LoopMonitor:
+    """Heartbeat lag histogram plus an optional stack-capturing watchdog."""
+
+    def __init__(
+        self,
+        interval_ms: float = LOOP_MONITOR_INTERVAL_MS,
+        stall_threshold_ms: float = LOOP_STALL_THRESHOLD_MS,
+        watchdog: bool = LOOP_WATCHDOG_ENABLED,
+        max_reports: int = LOOP_STALL_REPORTS,
+    ):
+        self.interval_s = max(0.001, interval_ms / 1000.0)
+        self.stall_threshold_s = max(0.001, stall_threshold_ms / 1000.0)
+        self.watchdog = watchdog
+        self._lag_ms = WindowedQuantiles()
+        self._reports: Deque[Dict[str, Any]] = deque(maxlen=max(1, max_reports))
+        self._open_stall: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stalls_total = 0
+
+        registry = get_registry()
+        self._lag_histogram = registry.histogram("event_loop_lag_ms")
+        self._lag_gauge = registry.gauge("event_loop_lag_seconds")
+        self._stall_counter = registry.counter("event_loop_stalls")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the heartbeat (and watchdog thread) on the running loop."""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        if self.watchdog:
+            self._thread = threading.Thread(target=self._watch, name="echopanel-loop-watchdog", daemon=True)
+            self._thread.start()
+        logger.info(
+            "Event-loop monitor started (interval=%.0fms, stall>%.0fms, watchdog=%s)",
+            self.interval_s * 1000, self.stall_threshold_s * 1000, self.watchdog,
+        )
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join, 1.0)
+            self._thread = None
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            self.record_lag(max(0.0, loop.time() - expected))
+
+    def record_lag(self, lag_s: float) -> None:
+        """Record one heartbeat that woke `lag_s` late."""
+        self._last_beat = time.monotonic()
+        lag_ms = lag_s * 1000
+        self._lag_ms.observe(lag_ms)
+        self._lag_histogram.observe(lag_ms)
+        self._lag_gauge.set(lag_s)
+        with self._lock:
+            stall, self._open_stall = self._open_stall, None
+            if stall is not None:
+                stall["duration_ms"] = round(lag_ms, 1)
+            if lag_s < self.stall_threshold_s:
+                return
+            self.stalls_total += 1
+            if stall is None:
+                # Not caught in the act (watchdog off or stall shorter than its poll)
+                stall = {"detected_at": time.time(), "duration_ms": round(lag_ms, 1), "stack": None}
+                self._reports.append(stall)
+        self._stall_counter.inc()
+        logger.warning("Event loop blocked for %.0f ms%s", lag_ms,
+                       f" in {stall['blocking_frame']}" if stall.get("blocking_frame") else "")
+
+    def _watch(self) -> None:
+        poll_s = max(0.005, self.stall_threshold_s / 4)
+        while not self._stop.wait(poll_s):
+            beat = self._last_beat
+            overdue = time.monotonic() - beat - self.interval_s
+            if overdue < self.stall_threshold_s or self._open_stall is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id) if self._loop_thread_id else None
+            if frame is None:
+                continue
+            summary = traceback.extract_stack(frame)[-STACK_DEPTH:]
+            del frame
+            stack = [line.rstrip() for line in traceback.format_list(summary)]
+            top = summary[-1] if summary else None
+            report = {
+                "detected_at": time.time(),
+                "blocked_for_ms": round(overdue * 1000, 1),
+                "duration_ms": None,
+                "blocking_frame": f"{top.name} ({top.filename}:{top.lineno})" if top else None,
+                "stack": stack,
+            }
+            with self._lock:
+                # The loop may have woken while we were capturing; that stack is innocent.
+                if self._last_beat != beat or self._open_stall is not None:
+                    continue
+                self._open_stall = report
+                self._reports.append(report)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Lag quantiles per window and recent stall reports (newest first)."""
+        lag: Dict[str, Dict[str, float]] = {}
+        for window in self._lag_ms.windows:
+            lag[f"{window:g}s"] = {k: round(v, 2) for k, v in self._lag_ms.snapshot(window).items()}
+        with self._lock:
+            reports: List[Dict[str, Any]] = [dict(r) for r in reversed(self._reports)]
+        return {
+            "running": self.running,
+            "interval_ms": self.interval_s * 1000,
+            "stall_threshold_ms": self.stall_threshold_s * 1000,
+            "watchdog": self.watchdog,
+            "lag_ms": lag,
+            "stalls_total": self.stalls_total,
+            "stalls": reports,
+        }
+
+
+_monitor: Optional[LoopMonitor] = None
+
+
+def get_loop_monitor() -> LoopMonitor:
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopMonitor()
+    return _monitor
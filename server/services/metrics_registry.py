@@ -2,91 +2,283 @@
 Metrics Registry for EchoPanel Server
 
 Provides lightweight in-memory metrics collection for observability.
-Designed for single-server deployments (no external dependencies).
+Designed for single-server deployments (no external dependencies) and
+exported in the Prometheus text format at /metrics.
+
+Hot-path cost: metrics are grouped into families, and each labeled child is
+a pre-bound handle (`family.labels("mic")`). Counters and histograms write to
+a per-thread cell, so `inc()`/`observe()` take no lock and build no key
+strings; cells are summed only when the registry is scraped.
 """
 
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+import math
+import os
 import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from server.services.quantiles import DEFAULT_QUANTILES, WindowedQuantiles
+
+METRIC_PREFIX = "echopanel_"
+DEFAULT_BUCKETS = (100, 250, 500, 1000, 2000, 5000)
+EXPOSITION_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+SUMMARY_WINDOW_SECONDS = 60.0  # window behind exported summary quantiles
+
+_PROCESS_START_TIME = time.time()
+
+
+class _ThreadCells:
+    """Per-thread accumulator cells, summed on read.
+
+    Each thread only ever mutates its own cell, so writers need no lock and
+    cannot lose updates; the lock is taken once per (thread, metric) when a
+    cell is first created, and by readers snapshotting the cell list.
+    """
+
+    __slots__ = ("_local", "_cells", "_lock", "_width")
+
+    def __init__(self, width: int = 1):
+        self._local = threading.local()
+        self._cells: List[List[float]] = []
+        self._lock = threading.Lock()
+        self._width = width
+
+    def cell(self) -> List[float]:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = [0] * self._width
+            with self._lock:
+                self._cells.append(cell)
+            self._local.cell = cell
+            return cell
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            cells = list(self._cells)
+        totals = [0] * self._width
+        for cell in cells:
+            for i, value in enumerate(cell):
+                totals[i] += value
+        return totals
 
 
-@dataclass
 class Counter:
-    """Monotonically increasing counter."""
-    name: str
-    description: str
-    value: int = 0
-    labels: Dict[str, str] = field(default_factory=dict)
-    
+    """Monotonically increasing counter (one labeled child of a family)."""
+
+    __slots__ = ("name", "description", "labels", "_cells")
+
+    def __init__(self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+        self._cells = _ThreadCells()
+
     def inc(self, amount: int = 1) -> None:
-        self.value += amount
-    
+        self._cells.cell()[0] += amount
+
     def get(self) -> int:
-        return self.value
+        return self._cells.totals()[0]
+
+    @property
+    def value(self) -> int:
+        return self.get()
 
 
-@dataclass
 class Gauge:
     """Value that can go up or down."""
-    name: str
-    description: str
-    value: float = 0.0
-    labels: Dict[str, str] = field(default_factory=dict)
-    
-    def set(self, value: float) -> None:
+
+    __slots__ = ("name", "description", "labels", "value", "_lock")
+
+    def __init__(self, name: str, description: str = "", value: float = 0.0,
+                 labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
         self.value = value
-    
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self.value = value  # Single store; no lock needed
+
     def inc(self, amount: float = 1.0) -> None:
-        self.value += amount
-    
+        with self._lock:
+            self.value += amount
+
     def dec(self, amount: float = 1.0) -> None:
-        self.value -= amount
-    
+        with self._lock:
+            self.value -= amount
+
     def get(self) -> float:
         return self.value
 
 
-@dataclass
 class Histogram:
-    """Distribution of values into buckets."""
-    name: str
-    description: str
-    buckets: List[float] = field(default_factory=lambda: [100, 250, 500, 1000, 2000, 5000])
-    counts: Dict[float, int] = field(default_factory=dict)
-    sum_value: float = 0.0
-    count: int = 0
-    labels: Dict[str, str] = field(default_factory=dict)
-    
-    def __post_init__(self):
-        for bucket in self.buckets:
-            if bucket not in self.counts:
-                self.counts[bucket] = 0
-    
+    """Distribution of values into cumulative `le` buckets.
+
+    `observe()` bisects to the first bound >= value and bumps a single
+    per-thread slot; cumulative counts are computed at read time, with an
+    implicit +Inf bucket equal to the total count.
+    """
+
+    __slots__ = ("name", "description", "labels", "buckets", "_cells")
+
+    def __init__(self, name: str, description: str = "",
+                 buckets: Optional[Iterable[float]] = None,
+                 labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+        self.buckets = sorted(float(b) for b in (buckets or DEFAULT_BUCKETS) if not math.isinf(b))
+        # Slots: one per bound, one for +Inf, then sum.
+        self._cells = _ThreadCells(len(self.buckets) + 2)
+
     def observe(self, value: float) -> None:
-        self.sum_value += value
-        self.count += 1
-        for bucket in self.buckets:
-            if value <= bucket:
-                self.counts[bucket] += 1
-    
+        cell = self._cells.cell()
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def snapshot(self) -> Tuple[List[int], int, float]:
+        """(cumulative counts per bound, total count, sum)."""
+        totals = self._cells.totals()
+        cumulative, running = [], 0
+        for count in totals[:-2]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running + totals[-2], totals[-1]
+
+    @property
+    def count(self) -> int:
+        return self.snapshot()[1]
+
+    @property
+    def sum_value(self) -> float:
+        return self.snapshot()[2]
+
+    def get(self) -> Dict:
+        cumulative, count, total = self.snapshot()
+        buckets = {str(bound): n for bound, n in zip(self.buckets, cumulative)}
+        buckets["+Inf"] = count
+        return {"count": count, "sum": total, "buckets": buckets}
+
+
+class Summary(WindowedQuantiles):
+    """Streaming quantiles (10 s / 1 min / 10 min windows) as a labeled metric."""
+
+    def __init__(self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None):
+        super().__init__()
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+
     def get(self) -> Dict:
         return {
-            "count": self.count,
-            "sum": self.sum_value,
-            "buckets": {str(k): v for k, v in self.counts.items()}
-        }
+            f"{int(window)}s": self.snapshot(window) for window in self.windows
+        } | {"lifetime": self.snapshot(None)}
+
+
+class MetricFamily:
+    """All children of one metric name; `labels()` returns a bound child handle.
+
+    Bind handles once (at import or session start) and keep them: lookups
+    by label values are a dict hit, but holding the child skips even that.
+    """
+
+    def __init__(self, kind: str, name: str, description: str,
+                 labelnames: Tuple[str, ...] = (), buckets: Optional[Iterable[float]] = None):
+        self.kind = kind
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets else DEFAULT_BUCKETS
+        self._children: Dict[tuple, object] = {}  # sorted (name, value) pairs -> child
+        self._by_values: Dict[tuple, object] = {}  # positional label values -> child
+        self._lock = threading.Lock()
+
+    def _create(self, labels: Dict[str, str]):
+        if self.kind == "counter":
+            return Counter(self.name, self.description, labels)
+        if self.kind == "gauge":
+            return Gauge(self.name, self.description, labels=labels)
+        if self.kind == "summary":
+            return Summary(self.name, self.description, labels)
+        return Histogram(self.name, self.description, self.buckets, labels)
+
+    def labels(self, *values: str, **kwargs: str):
+        """Child for the given label values (positional in `labelnames` order, or by name)."""
+        if values and not kwargs:
+            child = self._by_values.get(values)
+            if child is None:
+                if len(values) != len(self.labelnames):
+                    raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+                child = self.labels(**dict(zip(self.labelnames, values)))
+                self._by_values[values] = child
+            return child
+        key = tuple(sorted((k, str(v)) for k, v in kwargs.items()))
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._create(dict(key))
+                    self._children[key] = child
+        return child
+
+    def children(self) -> List[object]:
+        with self._lock:
+            return list(self._children.values())
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{k}="{_escape_label(str(v))}"' for k, v in sorted(labels.items())]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+
+def _process_rss_bytes() -> Optional[int]:
+    """Current resident set size (psutil if installed, else /proc on Linux)."""
+    try:
+        import psutil  # optional dependency
+
+        return int(psutil.Process(os.getpid()).memory_info().rss)
+    except Exception:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
 
 
 class MetricsRegistry:
     """
     Central registry for all metrics.
-    
-    Thread-safe for concurrent access.
+
+    Thread-safe for concurrent access. Registration takes a lock; updating
+    an existing metric does not.
     """
-    
+
     _instance = None
     _lock = threading.Lock()
-    
+
     def __new__(cls):
         if cls._instance is None:
             with cls._lock:
@@ -94,105 +286,197 @@ class MetricsRegistry:
                     cls._instance = super().__new__(cls)
                     cls._instance._initialized = False
         return cls._instance
-    
+
     def __init__(self):
         if self._initialized:
             return
-        
-        self._counters: Dict[str, Counter] = {}
-        self._gauges: Dict[str, Gauge] = {}
-        self._histograms: Dict[str, Histogram] = {}
+
+        self._families: Dict[str, MetricFamily] = {}
+        self._collectors: List[Callable[[], None]] = []
         self._lock = threading.Lock()
-        
+
         # Initialize default metrics
         self._init_default_metrics()
-        
+
         self._initialized = True
-    
+
     def _init_default_metrics(self) -> None:
         """Initialize standard EchoPanel metrics."""
         # Counters
-        self.counter("audio_bytes_received", "Total audio bytes received")
-        self.counter("audio_frames_dropped", "Total audio frames dropped due to backpressure")
+        self.counter_family("audio_bytes_received", "Total audio bytes received", ("source",))
+        self.counter_family("audio_frames_dropped", "Total audio frames dropped due to backpressure", ("source",))
+        self.counter_family("audio_bytes_dropped", "Total audio bytes dropped due to backpressure", ("source",))
         self.counter("asr_chunks_processed", "Total ASR chunks processed")
         self.counter("asr_errors", "Total ASR processing errors")
         self.counter("ws_connections_total", "Total WebSocket connections")
         self.counter("ws_disconnects_total", "Total WebSocket disconnects")
-        
+
         # Gauges
-        self.gauge("queue_depth", "Current audio queue depth")
+        self.gauge_family("queue_depth", "Current audio queue depth", ("source",))
         self.gauge("active_sessions", "Number of active sessions")
         self.gauge("processing_lag_seconds", "Current processing lag behind realtime")
-        
+
         # Histograms
-        self.histogram("inference_time_ms", "ASR inference time in milliseconds", 
+        self.histogram("inference_time_ms", "ASR inference time in milliseconds",
                       buckets=[50, 100, 250, 500, 1000, 2000, 5000])
         self.histogram("processing_time_ms", "Total processing time per chunk in milliseconds",
                       buckets=[100, 250, 500, 1000, 2000, 5000, 10000])
-    
+
+        # Streaming quantiles
+        self.summary_family("asr_inference_ms", "ASR inference latency in milliseconds", ("provider",))
+
+        # Process metrics, refreshed at scrape time
+        self.gauge("process_resident_memory_bytes", "Resident memory size in bytes")
+        self.gauge("process_threads", "Number of Python threads")
+        self.gauge("process_cpu_seconds", "Total user and system CPU time in seconds")
+        self.gauge("process_start_time_seconds", "Start time of the process since unix epoch")
+        self.gauge("event_loop_lag_seconds", "Event loop scheduling lag from the last heartbeat")
+        self.histogram("event_loop_lag_ms", "Event loop heartbeat lag in milliseconds",
+                      buckets=[1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000])
+        self.counter("event_loop_stalls", "Heartbeats delayed past the loop stall threshold")
+        self.gauge("asr_model_resident_mb", "RSS charged to resident ASR model weights in MB")
+        self.counter("asr_model_evictions", "ASR model weights evicted by the residency manager")
+        self.register_collector(self._collect_process_metrics)
+
+    # ------------------------------------------------------------------ families
+
+    def _family(self, kind: str, name: str, description: str,
+                labelnames: Tuple[str, ...] = (), buckets: Optional[Iterable[float]] = None) -> MetricFamily:
+        family = self._families.get(name)
+        if family is None:
+            with self._lock:
+                family = self._families.get(name)
+                if family is None:
+                    family = MetricFamily(kind, name, description, labelnames, buckets)
+                    self._families[name] = family
+        if family.kind != kind:
+            raise ValueError(f"Metric {name} already registered as a {family.kind}")
+        if description and not family.description:
+            family.description = description
+        return family
+
+    def counter_family(self, name: str, description: str = "", labelnames: Iterable[str] = ()) -> MetricFamily:
+        """Get or create a counter family; bind children with `.labels(...)`."""
+        return self._family("counter", name, description, tuple(labelnames))
+
+    def gauge_family(self, name: str, description: str = "", labelnames: Iterable[str] = ()) -> MetricFamily:
+        """Get or create a gauge family; bind children with `.labels(...)`."""
+        return self._family("gauge", name, description, tuple(labelnames))
+
+    def histogram_family(self, name: str, description: str = "", labelnames: Iterable[str] = (),
+                         buckets: Optional[Iterable[float]] = None) -> MetricFamily:
+        """Get or create a histogram family; bind children with `.labels(...)`."""
+        return self._family("histogram", name, description, tuple(labelnames), buckets)
+
+    def summary_family(self, name: str, description: str = "", labelnames: Iterable[str] = ()) -> MetricFamily:
+        """Get or create a streaming-quantile family; bind children with `.labels(...)`."""
+        return self._family("summary", name, description, tuple(labelnames))
+
+    # ------------------------------------------------------------------ children (compat API)
+
     def counter(self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None) -> Counter:
         """Get or create a counter."""
-        key = self._make_key(name, labels)
-        with self._lock:
-            if key not in self._counters:
-                self._counters[key] = Counter(
-                    name=name,
-                    description=description,
-                    labels=labels or {}
-                )
-            return self._counters[key]
-    
+        return self._family("counter", name, description).labels(**(labels or {}))
+
     def gauge(self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None) -> Gauge:
         """Get or create a gauge."""
-        key = self._make_key(name, labels)
-        with self._lock:
-            if key not in self._gauges:
-                self._gauges[key] = Gauge(
-                    name=name,
-                    description=description,
-                    labels=labels or {}
-                )
-            return self._gauges[key]
-    
-    def histogram(self, name: str, description: str = "", 
+        return self._family("gauge", name, description).labels(**(labels or {}))
+
+    def histogram(self, name: str, description: str = "",
                   buckets: Optional[List[float]] = None,
                   labels: Optional[Dict[str, str]] = None) -> Histogram:
         """Get or create a histogram."""
-        key = self._make_key(name, labels)
-        with self._lock:
-            if key not in self._histograms:
-                self._histograms[key] = Histogram(
-                    name=name,
-                    description=description,
-                    buckets=buckets or [100, 250, 500, 1000, 2000, 5000],
-                    labels=labels or {}
-                )
-            return self._histograms[key]
-    
-    def get_all_metrics(self) -> Dict:
-        """Get all metrics as a dictionary."""
-        with self._lock:
-            return {
-                "counters": {k: {"name": v.name, "value": v.value, "labels": v.labels} 
-                            for k, v in self._counters.items()},
-                "gauges": {k: {"name": v.name, "value": v.value, "labels": v.labels}
-                          for k, v in self._gauges.items()},
-                "histograms": {k: {"name": v.name, **v.get(), "labels": v.labels}
-                              for k, v in self._histograms.items()}
-            }
-    
+        return self._family("histogram", name, description, buckets=buckets).labels(**(labels or {}))
+
+    def summary(self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None) -> Summary:
+        """Get or create a streaming-quantile summary."""
+        return self._family("summary", name, description).labels(**(labels or {}))
+
     def inc_counter(self, name: str, amount: int = 1, labels: Optional[Dict[str, str]] = None) -> None:
-        """Increment a counter by name."""
+        """Increment a counter by name (prefer a bound handle on hot paths)."""
         self.counter(name, labels=labels).inc(amount)
-    
+
     def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
         """Set a gauge value by name."""
         self.gauge(name, labels=labels).set(value)
-    
+
     def observe_histogram(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
         """Observe a value in a histogram."""
         self.histogram(name, labels=labels).observe(value)
-    
+
+    # ------------------------------------------------------------------ export
+
+    def register_collector(self, fn: Callable[[], None]) -> None:
+        """Run `fn` before each export (e.g. to refresh gauges read from elsewhere)."""
+        with self._lock:
+            self._collectors.append(fn)
+
+    def _collect(self) -> List[MetricFamily]:
+        with self._lock:
+            collectors = list(self._collectors)
+        for fn in collectors:
+            try:
+                fn()
+            except Exception:
+                pass  # A broken collector must not break the scrape
+        with self._lock:
+            return list(self._families.values())
+
+    def _collect_process_metrics(self) -> None:
+        rss = _process_rss_bytes()
+        if rss is not None:
+            self.set_gauge("process_resident_memory_bytes", rss)
+        self.set_gauge("process_threads", threading.active_count())
+        times = os.times()
+        self.set_gauge("process_cpu_seconds", times.user + times.system)
+        self.set_gauge("process_start_time_seconds", _PROCESS_START_TIME)
+
+    def get_all_metrics(self) -> Dict:
+        """Get all metrics as a dictionary."""
+        result = {"counters": {}, "gauges": {}, "histograms": {}, "summaries": {}}
+        for family in self._collect():
+            for child in family.children():
+                key = self._make_key(family.name, child.labels)
+                if family.kind == "counter":
+                    result["counters"][key] = {"name": family.name, "value": child.get(), "labels": child.labels}
+                elif family.kind == "gauge":
+                    result["gauges"][key] = {"name": family.name, "value": child.get(), "labels": child.labels}
+                elif family.kind == "summary":
+                    result["summaries"][key] = {"name": family.name, **child.get(), "labels": child.labels}
+                else:
+                    result["histograms"][key] = {"name": family.name, **child.get(), "labels": child.labels}
+        return result
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        lines: List[str] = []
+        for family in sorted(self._collect(), key=lambda f: f.name):
+            name = METRIC_PREFIX + family.name
+            if family.kind == "counter" and not name.endswith("_total"):
+                name += "_total"
+            lines.append(f"# HELP {name} {family.description.replace(chr(10), ' ')}".rstrip())
+            lines.append(f"# TYPE {name} {family.kind}")
+            for child in family.children():
+                if family.kind == "histogram":
+                    cumulative, count, total = child.snapshot()
+                    for bound, n in zip(child.buckets, cumulative):
+                        lines.append(f"{name}_bucket{_format_labels(child.labels, ('le', _format_value(bound)))} {n}")
+                    lines.append(f"{name}_bucket{_format_labels(child.labels, ('le', '+Inf'))} {count}")
+                    lines.append(f"{name}_sum{_format_labels(child.labels)} {_format_value(float(total))}")
+                    lines.append(f"{name}_count{_format_labels(child.labels)} {count}")
+                elif family.kind == "summary":
+                    values = child.quantiles(DEFAULT_QUANTILES, SUMMARY_WINDOW_SECONDS)
+                    for q, value in zip(DEFAULT_QUANTILES, values):
+                        lines.append(f"{name}{_format_labels(child.labels, ('quantile', _format_value(q)))} "
+                                     f"{_format_value(float(value))}")
+                    lifetime = child.snapshot(None, ())
+                    lines.append(f"{name}_sum{_format_labels(child.labels)} "
+                                 f"{_format_value(float(lifetime['mean'] * lifetime['count']))}")
+                    lines.append(f"{name}_count{_format_labels(child.labels)} {lifetime['count']}")
+                else:
+                    lines.append(f"{name}{_format_labels(child.labels)} {_format_value(child.get())}")
+        return "\n".join(lines) + "\n"
+
     def _make_key(self, name: str, labels: Optional[Dict[str, str]]) -> str:
         """Create a unique key for a metric with labels."""
         if not labels:
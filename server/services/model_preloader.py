@@ -22,16 +22,22 @@ import logging
 import os
 import sys
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum, auto
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Set, Tuple
 import numpy as np
 
 from .asr_providers import ASRProvider, ASRConfig, ASRProviderRegistry
+from .asr_stream import _get_default_config
+from .model_residency import get_model_residency, provider_weights_key
+from .quantiles import WindowedQuantiles
 
 logger = logging.getLogger(__name__)
 
+# Residency pin owner for the warmed default model
+_RESIDENCY_OWNER = "model_manager"
+
 def _get_process_rss_mb() -> Optional[float]:
     """Best-effort process RSS in MB (used for health endpoints/observability)."""
     try:
@@ -143,6 +149,7 @@ class ModelManager:
         # State
         self._state = ModelState.UNINITIALIZED
         self._provider: Optional[ASRProvider] = None
+        self._pinned_key: Optional[str] = None
         self._load_time_ms: float = 0.0
         self._warmup_time_ms: float = 0.0
         self._last_error: Optional[str] = None
@@ -160,7 +167,18 @@ class ModelManager:
         
         # Metrics
         self._inference_count: int = 0
-        self._total_inference_time_ms: float = 0.0
+        self._inference_stats = WindowedQuantiles()  # per-call latency (ms)
+
+        # Hot-swap: live streams follow the current generation and switch at
+        # their next chunk boundary; a generation's provider retires once idle.
+        self._generation = 0
+        self._swap_lock = asyncio.Lock()
+        self._swap_task: Optional[asyncio.Task] = None
+        self._stream_refs: Dict[int, int] = {}
+        self._generation_keys: Dict[int, Set[str]] = {}
+        self._retiring: Dict[int, Optional[ASRProvider]] = {}
+        self._retire_tasks: Set[asyncio.Task] = set()
+        self._swap_stats = {"swaps": 0, "swap_failures": 0, "last_swap_ms": 0.0, "retired": 0}
         
     @property
     def state(self) -> ModelState:
@@ -236,6 +254,11 @@ class ModelManager:
                 self._warmup_time_ms = (time.time() - start) * 1000
                 logger.info(f"Warmup complete in {self._warmup_time_ms:.1f}ms")
             
+            # The warmed default model must not be evicted for a config variant
+            self._pinned_key = provider_weights_key(self._provider)
+            if self._pinned_key:
+                get_model_residency().pin(self._pinned_key, _RESIDENCY_OWNER)
+
             # Mark as ready
             async with self._lock:
                 self._state = ModelState.READY
@@ -255,13 +278,8 @@ class ModelManager:
     async def _load_model(self) -> bool:
         """Load the model, trying fallback if primary fails."""
         try:
-            # Get provider - pass config if available so the right model is used
-            if self.provider_name and self.config:
-                self._provider = ASRProviderRegistry.get_provider(name=self.provider_name, config=self.config)
-            elif self.provider_name:
-                self._provider = ASRProviderRegistry.get_provider(name=self.provider_name)
-            else:
-                self._provider = ASRProviderRegistry.get_provider(config=self.config)
+            # Same config (and so the same cached instance) live streams default to
+            self._provider = ASRProviderRegistry.get_provider(name=self.provider_name, config=self.active_config())
             
             if not self._provider:
                 raise RuntimeError("No ASR provider available")
@@ -348,9 +366,10 @@ class ModelManager:
         
         return None
     
-    async def _warmup(self):
-        """Run warmup sequence."""
-        if not self._provider:
+    async def _warmup(self, provider: Optional[ASRProvider] = None):
+        """Run warmup sequence (on the loaded provider unless one is given)."""
+        provider = provider or self._provider
+        if not provider:
             raise RuntimeError("Provider not loaded")
         
         # Generate warmup audio (silence is fine for warmup)
@@ -370,7 +389,7 @@ class ModelManager:
             
             start = time.time()
             count = 0
-            async for _ in self._provider.transcribe_stream(audio_stream()):
+            async for _ in provider.transcribe_stream(audio_stream()):
                 count += 1
             
             elapsed = (time.time() - start) * 1000
@@ -394,7 +413,7 @@ class ModelManager:
                 async def audio_stream():
                     yield audio_bytes
                 
-                async for _ in self._provider.transcribe_stream(audio_stream()):
+                async for _ in provider.transcribe_stream(audio_stream()):
                     pass
             
             elapsed = (time.time() - start) * 1000
@@ -419,7 +438,7 @@ class ModelManager:
         self._load_time_ms = 0.0
         self._warmup_time_ms = 0.0
         self._inference_count = 0
-        self._total_inference_time_ms = 0.0
+        self._inference_stats.reset()
         self._ready_event.clear()
 
     async def unload(self, timeout: float = 10.0) -> bool:
@@ -435,6 +454,9 @@ class ModelManager:
             self._ready_event.clear()
 
         try:
+            if self._pinned_key:
+                get_model_residency().unpin(self._pinned_key, _RESIDENCY_OWNER)
+                self._pinned_key = None
             if provider is not None:
                 await self._run_provider_hook(provider, "stop_session", timeout=timeout)
                 await self._run_provider_hook(provider, "unload", timeout=timeout)
@@ -455,6 +477,158 @@ class ModelManager:
                 self._ready_event.set()
             return False
     
+    # ------------------------------------------------------------------ hot-swap
+
+    @property
+    def generation(self) -> int:
+        """Bumped on every completed hot-swap; 0 until the first one."""
+        return self._generation
+
+    def active_config(self) -> ASRConfig:
+        """Config of the model live streams use by default: the swapped-in one, else the environment's."""
+        return self.config or _get_default_config()
+
+    def acquire_stream(
+        self, default_config: ASRConfig, session_config: Optional[ASRConfig] = None,
+    ) -> Tuple[Optional[ASRProvider], int]:
+        """Provider a live stream should use now, and its generation.
+
+        Before the first swap streams keep using the registry provider for
+        `default_config`; afterwards they use the swapped-in provider. A
+        `session_config` (e.g. a cheaper config from admission control) is
+        served on the current provider type regardless of swaps.
+        Pair every call with release_stream(generation).
+        """
+        generation = self._generation
+        if session_config is not None:
+            provider = ASRProviderRegistry.get_provider(name=self.provider_name, config=session_config)
+        elif generation == 0:
+            provider = ASRProviderRegistry.get_provider(config=default_config)
+        else:
+            provider = self._provider
+        key = provider_weights_key(provider) if provider is not None else None
+        if key:
+            self._generation_keys.setdefault(generation, set()).add(key)
+        self._stream_refs[generation] = self._stream_refs.get(generation, 0) + 1
+        return provider, generation
+
+    def release_stream(self, generation: int) -> None:
+        """A stream stopped using `generation`; retire it if it was the last one."""
+        remaining = self._stream_refs.get(generation, 0) - 1
+        if remaining > 0:
+            self._stream_refs[generation] = remaining
+            return
+        self._stream_refs.pop(generation, None)
+        if generation in self._retiring:
+            self._schedule_retire(generation)
+
+    def _schedule_retire(self, generation: int) -> None:
+        task = asyncio.get_running_loop().create_task(self._retire(generation))
+        self._retire_tasks.add(task)
+        task.add_done_callback(self._retire_tasks.discard)
+
+    async def _retire(self, generation: int, timeout: float = 10.0) -> None:
+        """Unload a superseded generation once no stream uses it."""
+        if self._stream_refs.get(generation) or generation not in self._retiring:
+            return
+        provider = self._retiring.pop(generation)
+        keys = self._generation_keys.pop(generation, set())
+        if provider is not None:
+            keys.add(provider_weights_key(provider))
+        live_keys = set().union(*self._generation_keys.values()) | {self._pinned_key}
+        stale_keys = {key for key in keys - live_keys if key}
+        try:
+            # Every cached instance on the old weights, not just the manager's own
+            stale = [p for p in ASRProviderRegistry.cached_instances() if provider_weights_key(p) in stale_keys]
+            for old in stale:
+                await self._run_provider_hook(old, "unload", timeout=timeout)
+                ASRProviderRegistry.evict_provider_instance(old)
+            if provider is not None and provider is not self._provider and provider not in stale:
+                # Superseded config variant of weights that are still live
+                ASRProviderRegistry.evict_provider_instance(provider)
+            residency = get_model_residency()
+            for key in stale_keys:
+                residency.release(key)
+            self._swap_stats["retired"] += 1
+            logger.info(f"Hot-swap: retired generation {generation} ({', '.join(sorted(stale_keys)) or 'weights still live'})")
+        except Exception as e:
+            logger.warning(f"Hot-swap: failed to retire generation {generation}: {e}")
+
+    async def swap_model(
+        self,
+        provider_name: Optional[str] = None,
+        config: Optional[ASRConfig] = None,
+        timeout: float = 300.0,
+    ) -> bool:
+        """
+        Zero-downtime model switch (double-buffered).
+
+        Loads and warms the target while the current model keeps serving, then
+        bumps the generation so live streams move over at their next chunk
+        boundary (see asr_stream.stream_asr). The old provider is unloaded when
+        its last stream lets go of it.
+
+        Returns:
+            True if the target is now the active model
+        """
+        async with self._swap_lock:
+            provider_name = provider_name or self.provider_name or os.getenv("ECHOPANEL_ASR_PROVIDER", "faster_whisper")
+            config = replace(config) if config is not None else replace(self.active_config())
+            start = time.time()
+            try:
+                new = ASRProviderRegistry.get_provider(name=provider_name, config=config)
+                if new is None or not new.is_available:
+                    raise RuntimeError(f"Provider {provider_name} is not available")
+                if new is self._provider and self._state == ModelState.READY:
+                    return True
+
+                logger.info(f"Hot-swap: loading {provider_name}/{config.model_name} in the background...")
+                await self._run_provider_hook(new, "preload", timeout=timeout)
+                if self.warmup_config.enabled:
+                    await asyncio.wait_for(self._warmup(new), timeout=timeout)
+            except Exception as e:
+                self._swap_stats["swap_failures"] += 1
+                self._last_error = f"Hot-swap to {provider_name}/{config.model_name} failed: {e}"
+                logger.error(self._last_error)
+                return False
+
+            new_key = provider_weights_key(new)
+            residency = get_model_residency()
+            if new_key:
+                residency.pin(new_key, _RESIDENCY_OWNER)
+
+            # Atomic switch: streams compare generations between frames
+            async with self._lock:
+                old_provider, old_generation, old_key = self._provider, self._generation, self._pinned_key
+                self._provider = new
+                self._pinned_key = new_key
+                self.provider_name = provider_name
+                self.config = config
+                self._generation += 1
+                self._state = ModelState.READY
+                self._last_error = None
+                self._ready_event.set()
+
+            if old_key and old_key != new_key:
+                residency.unpin(old_key, _RESIDENCY_OWNER)
+            self._retiring[old_generation] = old_provider
+            if not self._stream_refs.get(old_generation):
+                self._schedule_retire(old_generation)
+
+            swap_ms = (time.time() - start) * 1000
+            self._swap_stats["swaps"] += 1
+            self._swap_stats["last_swap_ms"] = swap_ms
+            logger.info(f"Hot-swap complete: generation {self._generation} is {new.name}/{config.model_name} "
+                        f"({swap_ms:.0f}ms, {self._stream_refs.get(old_generation, 0)} stream(s) draining)")
+            return True
+
+    def request_swap(self, provider_name: Optional[str] = None, config: Optional[ASRConfig] = None) -> bool:
+        """Start swap_model in the background unless a swap is already running."""
+        if self._swap_task is not None and not self._swap_task.done():
+            return False
+        self._swap_task = asyncio.get_running_loop().create_task(self.swap_model(provider_name, config))
+        return True
+
     def get_provider(self) -> Optional[ASRProvider]:
         """Get the loaded provider (if ready)."""
         if self._state != ModelState.READY:
@@ -486,7 +660,7 @@ class ModelManager:
                 yield segment
         finally:
             elapsed = (time.time() - start) * 1000
-            self._total_inference_time_ms += elapsed
+            self._inference_stats.observe(elapsed)
     
     def health(self) -> ModelHealth:
         """Get current health status."""
@@ -507,18 +681,23 @@ class ModelManager:
     
     def get_stats(self) -> Dict[str, Any]:
         """Get performance statistics."""
-        avg_inference = (
-            self._total_inference_time_ms / self._inference_count
-            if self._inference_count > 0 else 0.0
-        )
-        
+        stats = self._inference_stats
         return {
             "state": self._state.name,
             "provider": self._provider.name if self._provider else None,
             "load_time_ms": round(self._load_time_ms, 1),
             "warmup_time_ms": round(self._warmup_time_ms, 1),
             "inference_count": self._inference_count,
-            "avg_inference_ms": round(avg_inference, 1),
+            "avg_inference_ms": round(stats.mean(), 1),
+            # Streaming quantiles over trailing windows: {"10s": {"count", "mean", "p50", ...}, ...}
+            "inference_ms": {
+                f"{int(window)}s": {k: round(v, 1) for k, v in stats.snapshot(window).items()}
+                for window in stats.windows
+            },
+            "generation": self._generation,
+            "streams_by_generation": dict(self._stream_refs),
+            **self._swap_stats,
+            "residency": get_model_residency().snapshot(),
         }
     
     async def wait_for_ready(self, timeout: float = 60.0) -> bool:
@@ -724,29 +903,16 @@ async def _background_model_download(manager: ModelManager) -> None:
 
 
 async def _hot_swap_model(manager: ModelManager, model_name: str) -> None:
-    """Unload current model and reload with the given model, preserving provider."""
-    import os
-
+    """Swap to the given whisper.cpp model while live sessions keep streaming."""
     try:
-        logger.info("Hot-swap: unloading current model...")
-        await manager.unload()
-
-        # Update env vars
-        os.environ["ECHOPANEL_WHISPER_MODEL"] = model_name
-
-        # Create new config for the target model
         new_config = ASRConfig(
             model_name=model_name,
             device="gpu",
             compute_type="q5_0",
             chunk_seconds=2,
         )
-        manager.provider_name = "whisper_cpp"
-        manager.config = new_config
-
-        # Reload
-        logger.info("Hot-swap: loading %s...", model_name)
-        success = await manager.initialize()
+        logger.info("Hot-swap: switching to %s...", model_name)
+        success = await manager.swap_model("whisper_cpp", new_config)
 
         async with manager._lock:
             manager._download_in_progress = False
@@ -755,11 +921,9 @@ async def _hot_swap_model(manager: ModelManager, model_name: str) -> None:
         if success:
             logger.info("Hot-swap complete: now using %s", model_name)
         else:
-            logger.error("Hot-swap failed for %s, reverting...", model_name)
+            # The previous model was never unloaded, so there is nothing to revert
+            logger.error("Hot-swap failed for %s, keeping current model", model_name)
             manager._download_error = f"Hot-swap to {model_name} failed"
-            # Revert env var and reload previous
-            os.environ["ECHOPANEL_WHISPER_MODEL"] = os.getenv("ECHOPANEL_WHISPER_MODEL", model_name)
-            await manager.initialize()
 
     except Exception as e:
         logger.error("Hot-swap error: %s", e)
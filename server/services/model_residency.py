@@ -0,0 +1,294 @@
+"""
+Model residency: shared ASR weights under a memory budget.
+
+ASRProviderRegistry caches one provider instance per full config key, which
+includes streaming parameters (chunk_seconds, VAD thresholds). Degrade-ladder
+steps and per-session config differences therefore create new instances, and
+each used to load its own copy of the same weights. Providers that hold
+weights in-process now acquire them here instead, keyed only by what
+determines the weights (provider, model, device, compute type), so config
+variants share one resident copy.
+
+Each load is charged the process RSS delta measured around the loader
+(model_preloader._get_process_rss_mb). When the resident total would exceed
+ECHOPANEL_MODEL_MEMORY_BUDGET_MB, least-recently-used models are evicted and
+their providers drop their references. Models pinned by an active session (or
+by the ModelManager for the warmed default) are never evicted.
+
+Usage:
+    residency = get_model_residency()
+    model = residency.acquire(key, loader, on_evict=self._on_weights_evicted)
+    residency.pin(key, session_id)      # while a session streams
+    residency.unpin(key, session_id)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from .metrics_registry import get_registry
+
+logger = logging.getLogger(__name__)
+
+# 0 disables the budget (never evict on memory grounds)
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("ECHOPANEL_MODEL_MEMORY_BUDGET_MB", "0"))
+
+
+def weights_key(provider_name: str, model_name: str, device: str, compute_type: str) -> str:
+    """Residency key: only the parameters that change the loaded weights."""
+    return f"{provider_name}|{model_name}|{device}|{compute_type}"
+
+
+def replica_key(base_key: str, variant: str) -> str:
+    """Key for a replica of `base_key` loaded with different runtime settings (e.g. threads).
+
+    Replicas are resident (and evicted) separately but share the pins of their base key.
+    """
+    return f"{base_key}#{variant}"
+
+
+def provider_weights_key(provider: Any) -> Optional[str]:
+    """Weights key for a (possibly VAD-wrapped) provider, or None if it has none."""
+    try:
+        return provider.weights_key
+    except Exception:
+        return None
+
+
+def _rss_mb() -> Optional[float]:
+    from .model_preloader import _get_process_rss_mb  # model_preloader imports the providers
+
+    return _get_process_rss_mb()
+
+
+@dataclass
+class ResidentModel:
+    """One resident set of weights."""
+    key: str
+    model: Any
+    rss_mb: float
+    load_ms: float
+    loaded_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.monotonic)
+    on_evict: List[Callable[[], Optional[Callable[[], None]]]] = field(default_factory=list)
+
+    def add_evict_callback(self, callback: Optional[Callable[[], None]]) -> None:
+        if callback is None:
+            return
+        # Don't keep providers alive through their callbacks
+        ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+        if any(existing() == callback for existing in self.on_evict):
+            return
+        self.on_evict.append(ref)
+
+
+class ModelResidency:
+    """LRU set of resident model weights with RSS accounting and session pins."""
+
+    def __init__(self, budget_mb: Optional[float] = None):
+        self.budget_mb = MODEL_MEMORY_BUDGET_MB if budget_mb is None else budget_mb
+        self._models: "OrderedDict[str, ResidentModel]" = OrderedDict()  # LRU first
+        self._pins: Dict[str, Set[str]] = {}
+        self._known_cost_mb: Dict[str, float] = {}  # survives eviction, used to make room before reloads
+        self._lock = threading.RLock()
+        # Loads are serialized so each RSS delta is attributable to one model
+        self._load_lock = threading.Lock()
+        self._stats = {
+            "loads": 0,
+            "hits": 0,
+            "evictions": 0,
+            "budget_overruns": 0,
+        }
+
+    # ------------------------------------------------------------------ acquire
+
+    def acquire(self, key: str, loader: Callable[[], Any],
+                on_evict: Optional[Callable[[], None]] = None) -> Any:
+        """Return the resident model for `key`, loading it with `loader` if needed.
+
+        `on_evict` is called (weakly held for bound methods) when the model is
+        evicted, so the caller can drop its own reference.
+        """
+        model = self._hit(key, on_evict)
+        if model is not None:
+            return model
+
+        with self._load_lock:
+            model = self._hit(key, on_evict)  # loaded while we waited
+            if model is not None:
+                return model
+
+            with self._lock:
+                self._evict_for(self._known_cost_mb.get(key, 0.0), exclude=key)
+
+            rss_before = _rss_mb()
+            start = time.perf_counter()
+            model = loader()
+            load_ms = (time.perf_counter() - start) * 1000
+            rss_after = _rss_mb()
+
+            measured = (rss_after - rss_before) if rss_before is not None and rss_after is not None else 0.0
+            # ru_maxrss (no psutil) is a high-water mark, so reloads can measure ~0
+            cost_mb = measured if measured > 1.0 else self._known_cost_mb.get(key, max(measured, 0.0))
+
+            with self._lock:
+                entry = ResidentModel(key=key, model=model, rss_mb=cost_mb, load_ms=load_ms)
+                entry.add_evict_callback(on_evict)
+                self._models[key] = entry
+                self._known_cost_mb[key] = cost_mb
+                self._stats["loads"] += 1
+                self._evict_for(0.0, exclude=key)
+                self._publish()
+
+        logger.info(f"Model resident: {key} (+{cost_mb:.0f} MB, {load_ms:.0f} ms, "
+                    f"total {self.resident_mb():.0f} MB / budget {self.budget_mb or 'unlimited'})")
+        return model
+
+    def _hit(self, key: str, on_evict: Optional[Callable[[], None]]) -> Any:
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                return None
+            entry.last_used = time.monotonic()
+            entry.add_evict_callback(on_evict)
+            self._models.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry.model
+
+    def is_resident(self, key: str) -> bool:
+        with self._lock:
+            return key in self._models
+
+    def touch(self, key: str) -> None:
+        """Mark `key` as recently used without acquiring it."""
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+                self._models.move_to_end(key)
+
+    # ------------------------------------------------------------------ pins
+
+    def pin(self, key: str, owner: str) -> None:
+        """Keep `key` resident while `owner` (e.g. a session id) is using it."""
+        with self._lock:
+            self._pins.setdefault(key, set()).add(owner)
+        self.touch(key)
+
+    def unpin(self, key: str, owner: str) -> None:
+        with self._lock:
+            owners = self._pins.get(key)
+            if owners is None:
+                return
+            owners.discard(owner)
+            if not owners:
+                del self._pins[key]
+            # Pinned models may have held the total over budget
+            self._evict_for(0.0)
+            self._publish()
+
+    def is_pinned(self, key: str) -> bool:
+        with self._lock:
+            return self._pinned(key)
+
+    def _pinned(self, key: str) -> bool:
+        return bool(self._pins.get(key) or self._pins.get(key.split("#", 1)[0]))
+
+    # ------------------------------------------------------------------ eviction
+
+    def resident_mb(self) -> float:
+        with self._lock:
+            return sum(entry.rss_mb for entry in self._models.values())
+
+    def _evict_for(self, needed_mb: float, exclude: Optional[str] = None) -> None:
+        """Evict LRU unpinned models until `needed_mb` more fits the budget. Caller holds _lock."""
+        if self.budget_mb <= 0:
+            return
+        while self.resident_mb() + needed_mb > self.budget_mb:
+            victim = next(
+                (key for key in self._models if key != exclude and not self._pinned(key)),
+                None,
+            )
+            if victim is None:
+                self._stats["budget_overruns"] += 1
+                logger.warning(f"Model memory budget exceeded: {self.resident_mb() + needed_mb:.0f} MB "
+                               f"> {self.budget_mb:.0f} MB with no evictable model")
+                return
+            self._evict(victim, reason="budget")
+
+    def _evict(self, key: str, reason: str) -> None:
+        entry = self._models.pop(key)
+        self._stats["evictions"] += 1
+        get_registry().inc_counter("asr_model_evictions")
+        for ref in entry.on_evict:
+            callback = ref()
+            if callback is None:
+                continue
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Eviction callback for {key} failed: {e}")
+        entry.model = None
+        logger.info(f"Model evicted ({reason}): {key} (-{entry.rss_mb:.0f} MB)")
+
+    def release(self, key: str) -> bool:
+        """Evict `key` (and its replicas) now unless pinned. Returns True if anything was evicted."""
+        with self._lock:
+            victims = [k for k in self._models if k == key or k.startswith(f"{key}#")]
+            if not victims or self._pinned(key):
+                return False
+            for victim in victims:
+                self._evict(victim, reason="release")
+            self._publish()
+            return True
+
+    def _publish(self) -> None:
+        get_registry().set_gauge("asr_model_resident_mb", self.resident_mb())
+
+    # ------------------------------------------------------------------ introspection
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "budget_mb": self.budget_mb,
+                "resident_mb": round(self.resident_mb(), 1),
+                "models": [
+                    {
+                        "key": entry.key,
+                        "rss_mb": round(entry.rss_mb, 1),
+                        "load_ms": round(entry.load_ms, 1),
+                        "idle_s": round(now - entry.last_used, 1),
+                        "pinned_by": len(self._pins.get(entry.key, ()) or self._pins.get(entry.key.split("#", 1)[0], ())),
+                    }
+                    for entry in reversed(self._models.values())  # most recent first
+                ],
+                **self._stats,
+            }
+
+
+_residency: Optional[ModelResidency] = None
+_residency_lock = threading.Lock()
+
+
+def get_model_residency() -> ModelResidency:
+    """Get the process-wide residency manager."""
+    global _residency
+    if _residency is None:
+        with _residency_lock:
+            if _residency is None:
+                _residency = ModelResidency()
+    return _residency
+
+
+def reset_model_residency() -> None:
+    """Reset the global residency manager (for testing)."""
+    global _residency
+    _residency = None
@@ -4,13 +4,12 @@ Hybrid OCR Pipeline for EchoPanel
 Combines PaddleOCR (fast) + SmolVLM (smart) for optimal slide processing.
 """
 
-import asyncio
 import logging
 import os
 import time
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 
 from PIL import Image
 
@@ -19,7 +18,8 @@ from .image_preprocess import ImagePreprocessor
 from .ocr_fusion import FusionEngine, HybridOCRResult
 from .ocr_layout_classifier import LayoutType
 from .ocr_paddle import PaddleOCRPipeline
-from .ocr_smolvlm import SmolVLMPipeline
+from .ocr_smolvlm import SmolVLMPipeline, SmolVLMResult
+from .ocr_vlm_scheduler import VLMScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +29,7 @@ OCR_CONFIDENCE_THRESHOLD = float(os.getenv("ECHOPANEL_OCR_CONFIDENCE_THRESHOLD",
 OCR_PERIODIC_VLM_INTERVAL = int(os.getenv("ECHOPANEL_OCR_PERIODIC_VLM_INTERVAL", "10"))
 OCR_ENABLE_DEDUP = os.getenv("ECHOPANEL_OCR_ENABLE_DEDUP", "true").lower() == "true"
 OCR_MAX_DIMENSION = int(os.getenv("ECHOPANEL_OCR_MAX_DIMENSION", "1280"))
+OCR_BACKFILL_RESULTS_MAX = int(os.getenv("ECHOPANEL_OCR_BACKFILL_RESULTS_MAX", "16"))
 
 
 class OCRMode(str, Enum):
@@ -72,13 +73,17 @@ class HybridOCRPipeline:
         
         self._context = ProcessingContext()
         self._last_hash = None
-        self._vlm_semaphore = asyncio.Semaphore(1)
+        self.scheduler = VLMScheduler(self.vlm, on_backfill=self._on_vlm_backfill)
+        self._backfill_results: Dict[str, List[HybridOCRResult]] = {}
+        self._backfill_listeners: Dict[str, Callable[[], None]] = {}
         
         self._stats = {
             "frames_processed": 0,
             "frames_duplicate": 0,
             "frames_paddle_only": 0,
             "frames_with_vlm": 0,
+            "frames_vlm_deferred": 0,
+            "frames_backfilled": 0,
             "frames_failed": 0,
             "vlm_triggers": {
                 "low_confidence": 0,
@@ -132,9 +137,9 @@ class HybridOCRPipeline:
             if self.mode == OCRMode.PADDLE_ONLY:
                 result = await self._process_paddle_only(image)
             elif self.mode == OCRMode.VLM_ONLY:
-                result = await self._process_vlm_only(image)
+                result = await self._process_vlm_only(image, session_id)
             else:
-                result = await self._process_hybrid(image, processing_mode)
+                result = await self._process_hybrid(image, processing_mode, session_id)
             
             processing_time = (time.time() - start_time) * 1000
             self._stats["frames_processed"] += 1
@@ -164,17 +169,16 @@ class HybridOCRPipeline:
         paddle_result = await self.paddle.process(image, detect_layout=True)
         return self.fusion.fuse(paddle_result, None)
     
-    async def _process_vlm_only(self, image: Image.Image) -> HybridOCRResult:
-        vlm_result = await self.vlm.process(image)
+    async def _process_vlm_only(self, image: Image.Image, session_id: str = "") -> HybridOCRResult:
+        vlm_result = await self.scheduler.submit(image, session_id=session_id, deferrable=False)
         return self.fusion.fuse(None, vlm_result)
     
-    async def _process_hybrid(self, image: Image.Image, mode: str) -> HybridOCRResult:
+    async def _process_hybrid(self, image: Image.Image, mode: str, session_id: str = "") -> HybridOCRResult:
         paddle_result = await self.paddle.process(image, detect_layout=True)
         
         if not paddle_result.success:
             logger.warning("PaddleOCR failed, falling back to VLM")
-            async with self._vlm_semaphore:
-                vlm_result = await self.vlm.process(image)
+            vlm_result = await self.scheduler.submit(image, session_id=session_id, mode=mode, deferrable=False)
             return self.fusion.fuse(None, vlm_result)
         
         should_run_vlm, trigger_reason = self._should_run_vlm(paddle_result, mode)
@@ -184,12 +188,52 @@ class HybridOCRPipeline:
         
         logger.debug(f"Running VLM enrichment (trigger: {trigger_reason})")
         
-        async with self._vlm_semaphore:
-            vlm_result = await self.vlm.process(image, paddle_context=paddle_result)
+        vlm_result = await self.scheduler.submit(
+            image,
+            paddle_context=paddle_result,
+            session_id=session_id,
+            mode=mode,
+            frame_key=str(self._context.frame_number),
+        )
+        if vlm_result is None:
+            # Over budget: serve the Paddle text now, enrichment arrives via backfill.
+            self._stats["frames_vlm_deferred"] += 1
+            return self.fusion.fuse(paddle_result, None)
         
         force_vlm_text = (mode == "query")
         return self.fusion.fuse(paddle_result, vlm_result, force_vlm_text)
     
+    def _on_vlm_backfill(self, session_id: str, frame_key: Optional[str], vlm_result: SmolVLMResult, paddle_result) -> None:
+        if not vlm_result.success:
+            return
+        result = self.fusion.fuse(paddle_result, vlm_result)
+        results = self._backfill_results.setdefault(session_id, [])
+        results.append(result)
+        if len(results) > OCR_BACKFILL_RESULTS_MAX:
+            del results[: len(results) - OCR_BACKFILL_RESULTS_MAX]
+        self._stats["frames_backfilled"] += 1
+        logger.debug(f"Backfilled VLM enrichment for session={session_id} frame={frame_key}")
+        listener = self._backfill_listeners.get(session_id)
+        if listener is not None:
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"Backfill listener failed for session={session_id}: {e}")
+    
+    def on_backfill_ready(self, session_id: str, callback: Callable[[], None]) -> None:
+        """Call `callback` (on the event loop) each time a backfill result for the session is ready to drain."""
+        self._backfill_listeners[session_id] = callback
+    
+    def drain_backfill_results(self, session_id: str) -> List[HybridOCRResult]:
+        """Return and clear enriched results completed by idle-time backfill."""
+        return self._backfill_results.pop(session_id, [])
+    
+    def end_session(self, session_id: str) -> None:
+        """Drop undelivered backfill results and scheduler state for a finished session."""
+        self._backfill_results.pop(session_id, None)
+        self._backfill_listeners.pop(session_id, None)
+        self.scheduler.drop_session(session_id)
+    
     def _should_run_vlm(self, paddle_result, mode: str):
         if mode == "query":
             self._stats["vlm_triggers"]["user_query"] += 1
@@ -236,7 +280,7 @@ class HybridOCRPipeline:
             image = Image.open(__import__('io').BytesIO(image_bytes))
             paddle_result = await self.paddle.process(image, detect_layout=False)
             
-            async with self._vlm_semaphore:
+            async with self.scheduler.exclusive():
                 answer = await self.vlm.answer_query(
                     image, query,
                     paddle_context=paddle_result if paddle_result.success else None
@@ -257,6 +301,7 @@ class HybridOCRPipeline:
                 "smolvlm": {"available": self.vlm.is_available(), "stats": self.vlm.get_stats()},
             },
             "fusion_stats": self.fusion.get_stats(),
+            "vlm_scheduler": self.scheduler.get_stats(),
             "pipeline_stats": self._get_pipeline_stats()
         }
     
@@ -282,6 +327,8 @@ class HybridOCRPipeline:
             "frames_duplicate": 0,
             "frames_paddle_only": 0,
             "frames_with_vlm": 0,
+            "frames_vlm_deferred": 0,
+            "frames_backfilled": 0,
             "frames_failed": 0,
             "vlm_triggers": {
                 "low_confidence": 0,
@@ -296,6 +343,7 @@ class HybridOCRPipeline:
             "total_paddle_time_ms": 0,
             "total_vlm_time_ms": 0,
         }
+        self.scheduler.reset_stats()
         self.paddle.reset_stats()
         self.vlm.reset_stats()
         self.fusion.reset_stats()
@@ -13,9 +13,11 @@ Layout types:
 """
 
 import logging
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
-from typing import Tuple
+from typing import Optional, Tuple
 
 import numpy as np
 from PIL import Image
@@ -39,6 +41,7 @@ class LayoutResult:
     layout_type: LayoutType
     confidence: float
     processing_time_ms: float
+    cached: bool = False  # True when served from the perceptual-hash memo
     
     def is_complex(self) -> bool:
         """Check if layout needs VLM enrichment."""
@@ -50,14 +53,35 @@ class LayoutClassifier:
     Lightweight layout classifier for slide content.
     
     Uses heuristics + simple CV analysis (no heavy ML model).
-    Fast (<10ms) and sufficient for trigger decisions.
+    Every frame is downscaled once to a fixed working resolution; all
+    feature kernels are vectorized NumPy over that small array and share one
+    grayscale conversion. Results are memoized by a 64-bit average hash of the
+    working image, and near-duplicates of the last classified frame skip
+    feature extraction entirely. Typical cost is ~1-3ms per frame.
     
     Future: Could use MobileNet CNN (~5MB) for better accuracy.
     """
     
-    def __init__(self):
+    # Working resolution (16:9, divisible by HASH_SIZE)
+    WORK_SIZE = (256, 144)
+    HASH_SIZE = 8
+    
+    def __init__(self, near_duplicate_threshold: int = 4, cache_size: int = 64):
+        """
+        Args:
+            near_duplicate_threshold: Max hash Hamming distance to reuse the last result
+            cache_size: Number of memoized results (keyed by exact hash)
+        """
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[int, Tuple[LayoutType, float]]" = OrderedDict()
+        self._last_hash: Optional[int] = None
+        self._last_result: Optional[Tuple[LayoutType, float]] = None
         self.stats = {
             "frames_processed": 0,
+            "frames_classified": 0,
+            "near_duplicate_skips": 0,
+            "cache_hits": 0,
             "total_time_ms": 0,
         }
     
@@ -71,18 +95,24 @@ class LayoutClassifier:
         Returns:
             LayoutResult with type and confidence
         """
-        import time
-        start = time.time()
+        start = time.perf_counter()
         
         try:
-            # Convert to numpy for analysis
-            img_array = np.array(image)
+            rgb, gray = self._prepare(image)
+            frame_hash = self._average_hash(gray)
             
-            # Run heuristics
-            features = self._extract_features(img_array)
-            layout_type, confidence = self._classify_from_features(features)
+            cached = self._lookup(frame_hash)
+            if cached is not None:
+                layout_type, confidence = cached
+            else:
+                features = self._extract_features(rgb if rgb is not None else gray, gray)
+                layout_type, confidence = self._classify_from_features(features)
+                self._remember(frame_hash, (layout_type, confidence))
+                self.stats["frames_classified"] += 1
+            self._last_hash = frame_hash
+            self._last_result = (layout_type, confidence)
             
-            processing_time = (time.time() - start) * 1000
+            processing_time = (time.perf_counter() - start) * 1000
             
             self.stats["frames_processed"] += 1
             self.stats["total_time_ms"] += processing_time
@@ -90,7 +120,8 @@ class LayoutClassifier:
             return LayoutResult(
                 layout_type=layout_type,
                 confidence=confidence,
-                processing_time_ms=processing_time
+                processing_time_ms=processing_time,
+                cached=cached is not None,
             )
             
         except Exception as e:
@@ -98,58 +129,96 @@ class LayoutClassifier:
             return LayoutResult(
                 layout_type=LayoutType.UNKNOWN,
                 confidence=0.0,
-                processing_time_ms=(time.time() - start) * 1000
+                processing_time_ms=(time.perf_counter() - start) * 1000
             )
     
-    def _extract_features(self, img_array: np.ndarray) -> dict:
+    def _prepare(self, image: Image.Image) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """Downscale once and return (rgb or None for grayscale input, gray) arrays."""
+        if image.mode == "L":
+            small = image.resize(self.WORK_SIZE, Image.Resampling.BILINEAR, reducing_gap=2.0)
+            return None, np.asarray(small, dtype=np.float32)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        small = image.resize(self.WORK_SIZE, Image.Resampling.BILINEAR, reducing_gap=2.0)
+        rgb = np.asarray(small, dtype=np.float32)
+        # ITU-R 601 luma, the same weights PIL uses for convert("L")
+        gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        return rgb, gray
+    
+    def _average_hash(self, gray: np.ndarray) -> int:
+        """64-bit average hash from block means of the working grayscale image."""
+        h, w = gray.shape
+        n = self.HASH_SIZE
+        blocks = gray[: h - h % n, : w - w % n].reshape(n, h // n, n, w // n).mean(axis=(1, 3))
+        bits = np.packbits((blocks > blocks.mean()).ravel())
+        return int.from_bytes(bits.tobytes(), "big")
+    
+    def _lookup(self, frame_hash: int) -> Optional[Tuple[LayoutType, float]]:
+        """Return a memoized result for this frame, if any."""
+        if self._last_hash is not None and self._last_result is not None:
+            if (frame_hash ^ self._last_hash).bit_count() <= self.near_duplicate_threshold:
+                self.stats["near_duplicate_skips"] += 1
+                return self._last_result
+        hit = self._cache.get(frame_hash)
+        if hit is not None:
+            self._cache.move_to_end(frame_hash)
+            self.stats["cache_hits"] += 1
+        return hit
+    
+    def _remember(self, frame_hash: int, result: Tuple[LayoutType, float]) -> None:
+        self._cache[frame_hash] = result
+        self._cache.move_to_end(frame_hash)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def clear_cache(self) -> None:
+        """Forget memoized results (e.g. at session end)."""
+        self._cache.clear()
+        self._last_hash = None
+        self._last_result = None
+    
+    def _extract_features(self, img_array: np.ndarray, gray: Optional[np.ndarray] = None) -> dict:
         """
         Extract visual features for classification.
         
+        Expects arrays already at the working resolution.
+        
         Features:
         - Line density (tables have many horizontal/vertical lines)
         - Color variance (charts have distinct colors)
         - Text density (text slides have uniform texture)
         - Shape complexity (diagrams have complex shapes)
         """
-        from scipy import ndimage
-        from skimage import feature
-        
-        # Convert to grayscale if needed
-        if len(img_array.shape) == 3:
-            gray = np.mean(img_array, axis=2).astype(np.uint8)
-        else:
-            gray = img_array
+        if gray is None:
+            gray = img_array if img_array.ndim == 2 else img_array @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        # Whole grey levels, as from an 8-bit image: flat regions then tie exactly
+        gray = np.rint(gray).astype(np.float32, copy=False)
         
-        # Resize for faster processing
-        h, w = gray.shape
-        if max(h, w) > 512:
-            scale = 512 / max(h, w)
-            new_h, new_w = int(h * scale), int(w * scale)
-            gray = ndimage.zoom(gray, (new_h/h, new_w/w), order=1)
+        # Shared gradients: used for both edge density and line detection
+        gx = np.abs(np.diff(gray, axis=1))
+        gy = np.abs(np.diff(gray, axis=0))
         
         features = {}
         
-        # 1. Edge density (Canny)
-        edges = feature.canny(gray / 255.0, sigma=1.0)
-        features["edge_density"] = np.sum(edges) / edges.size
+        # 1. Edge density (gradient magnitude threshold; thick edges, so ~3x Canny's density)
+        magnitude = gx[:-1, :] + gy[:, :-1]
+        features["edge_density"] = float(np.count_nonzero(magnitude > 12.0)) / magnitude.size
         
-        # 2. Line detection (Hough transform simplified)
-        # Count strong horizontal and vertical lines
-        h_lines, v_lines = self._detect_lines(gray)
+        # 2. Line detection: rows/columns with unusually strong gradients
+        h_lines, v_lines = self._detect_lines(gx, gy)
         features["horizontal_lines"] = h_lines
         features["vertical_lines"] = v_lines
         features["line_ratio"] = (h_lines + v_lines) / max(h_lines, v_lines, 1)
         
         # 3. Color analysis (if color image)
-        if len(img_array.shape) == 3:
-            # Count distinct colors
-            reshaped = img_array.reshape(-1, 3)
-            unique_colors = len(np.unique(reshaped, axis=0))
-            features["color_diversity"] = unique_colors / reshaped.shape[0]
+        if img_array.ndim == 3:
+            # Distinct colors, quantized to 7 bits/channel and packed into one int
+            q = img_array.astype(np.uint32) >> 1
+            packed = (q[:, :, 0] << 14) | (q[:, :, 1] << 7) | q[:, :, 2]
+            features["color_diversity"] = float(np.unique(packed).size) / packed.size
             
             # Saturation variance (charts often have saturated colors)
-            hsv = self._rgb_to_hsv(img_array)
-            features["saturation_std"] = np.std(hsv[:, :, 1])
+            features["saturation_std"] = float(np.std(self._saturation(img_array)))
         else:
             features["color_diversity"] = 0
             features["saturation_std"] = 0
@@ -163,83 +232,61 @@ class LayoutClassifier:
         
         return features
     
-    def _detect_lines(self, gray: np.ndarray) -> Tuple[int, int]:
-        """Detect horizontal and vertical lines."""
-        
+    def _detect_lines(self, gx: np.ndarray, gy: np.ndarray) -> Tuple[int, int]:
+        """Detect horizontal and vertical lines from precomputed gradients."""
         # Horizontal lines - look for rows with high variance
-        row_diff = np.abs(np.diff(gray.astype(float), axis=1))
-        h_edges = np.mean(row_diff, axis=1)
-        h_lines = np.sum(h_edges > np.percentile(h_edges, 95))
+        h_edges = gx.mean(axis=1)
+        h_lines = np.count_nonzero(h_edges > np.percentile(h_edges, 95))
         
         # Vertical lines
-        col_diff = np.abs(np.diff(gray.astype(float), axis=0))
-        v_edges = np.mean(col_diff, axis=0)
-        v_lines = np.sum(v_edges > np.percentile(v_edges, 95))
+        v_edges = gy.mean(axis=0)
+        v_lines = np.count_nonzero(v_edges > np.percentile(v_edges, 95))
         
         return int(h_lines), int(v_lines)
     
-    def _rgb_to_hsv(self, rgb: np.ndarray) -> np.ndarray:
-        """Convert RGB to HSV color space."""
-        rgb_norm = rgb / 255.0
-        maxc = np.max(rgb_norm, axis=2)
-        minc = np.min(rgb_norm, axis=2)
-        delta = maxc - minc
-        
-        # Hue
-        h = np.zeros_like(maxc)
-        mask = delta != 0
-        
-        r, g, b = rgb_norm[:, :, 0], rgb_norm[:, :, 1], rgb_norm[:, :, 2]
-        h[mask & (maxc == r)] = ((g - b) / delta)[mask & (maxc == r)] % 6
-        h[mask & (maxc == g)] = ((b - r) / delta + 2)[mask & (maxc == g)]
-        h[mask & (maxc == b)] = ((r - g) / delta + 4)[mask & (maxc == b)]
-        h = h / 6.0
-        
-        # Saturation
-        s = np.zeros_like(maxc)
-        s[maxc != 0] = delta[maxc != 0] / maxc[maxc != 0]
-        
-        # Value
-        v = maxc
-        
-        return np.stack([h, s, v], axis=2)
+    def _saturation(self, rgb: np.ndarray) -> np.ndarray:
+        """HSV saturation channel (0-1) without computing hue."""
+        # Elementwise over channel planes; reducing over a size-3 axis is far slower
+        r, g, b = rgb[:, :, 0], rgb[:, :, 1], rgb[:, :, 2]
+        maxc = np.maximum(np.maximum(r, g), b)
+        minc = np.minimum(np.minimum(r, g), b)
+        return np.divide(maxc - minc, maxc, out=np.zeros_like(maxc), where=maxc > 0)
     
     def _analyze_texture(self, gray: np.ndarray) -> float:
         """Analyze texture regularity (text has regular patterns)."""
-        from scipy import ndimage
-        
-        # Local binary pattern approximation
-        kernel = np.array([[-1, -1, -1],
-                          [-1,  8, -1],
-                          [-1, -1, -1]])
-        laplacian = ndimage.convolve(gray.astype(float), kernel)
+        # 8-neighbour Laplacian via shifted slices: 9*center - 3x3 box sum
+        p = np.pad(gray, 1, mode="edge")
+        box = (
+            p[:-2, :-2] + p[:-2, 1:-1] + p[:-2, 2:]
+            + p[1:-1, :-2] + p[1:-1, 1:-1] + p[1:-1, 2:]
+            + p[2:, :-2] + p[2:, 1:-1] + p[2:, 2:]
+        )
+        laplacian = 9.0 * gray - box
         
         # Measure uniformity
         hist, _ = np.histogram(laplacian, bins=50)
         # Uniform texture has peaked histogram
         uniformity = np.max(hist) / np.sum(hist)
-        return uniformity
+        return float(uniformity)
     
     def _detect_header_zone(self, gray: np.ndarray) -> bool:
         """Detect if there's a distinct header zone (title area)."""
-        h, w = gray.shape
-        top_zone = gray[:int(h*0.2), :]
-        rest = gray[int(h*0.2):, :]
+        h = gray.shape[0]
+        split = int(h * 0.2)
         
         # Header typically has higher contrast
-        top_contrast = np.std(top_zone)
-        rest_contrast = np.std(rest)
-        return top_contrast > rest_contrast * 1.5
+        top_contrast = np.std(gray[:split])
+        rest_contrast = np.std(gray[split:])
+        return bool(top_contrast > rest_contrast * 1.5)
     
     def _detect_footer_zone(self, gray: np.ndarray) -> bool:
         """Detect if there's a distinct footer zone."""
-        h, w = gray.shape
-        bottom_zone = gray[int(h*0.8):, :]
-        rest = gray[:int(h*0.8), :]
+        h = gray.shape[0]
+        split = int(h * 0.8)
         
-        bottom_contrast = np.std(bottom_zone)
-        rest_contrast = np.std(rest)
-        return bottom_contrast > rest_contrast * 1.2
+        bottom_contrast = np.std(gray[split:])
+        rest_contrast = np.std(gray[:split])
+        return bool(bottom_contrast > rest_contrast * 1.2)
     
     def _classify_from_features(self, features: dict) -> Tuple[LayoutType, float]:
         """
@@ -251,6 +298,9 @@ class LayoutClassifier:
         - Complex shapes + low text regularity → DIAGRAM
         - Regular texture + text-like pattern → TEXT
         - Mixed signals → MIXED
+        
+        Thresholds are tuned for features at WORK_SIZE: line counts are per
+        144 rows / 256 columns, and edge density counts thick gradient edges.
         """
         h_lines = features["horizontal_lines"]
         v_lines = features["vertical_lines"]
@@ -262,31 +312,31 @@ class LayoutClassifier:
         scores = {}
         
         # TABLE: Many horizontal and vertical lines
-        if h_lines > 5 and v_lines > 3:
-            scores[LayoutType.TABLE] = 0.8 + min(0.15, (h_lines + v_lines) / 50)
-        elif h_lines > 10 or v_lines > 8:
+        if h_lines > 2 and v_lines > 1:
+            scores[LayoutType.TABLE] = 0.8 + min(0.15, (h_lines + v_lines) / 25)
+        elif h_lines > 5 or v_lines > 4:
             scores[LayoutType.TABLE] = 0.7
         else:
             scores[LayoutType.TABLE] = 0.2
         
         # CHART: High color diversity, distinct regions
-        if color_div > 0.1 and sat_std > 0.3:
+        if color_div > 0.15 and sat_std > 0.3:
             scores[LayoutType.CHART] = 0.75 + min(0.2, color_div)
-        elif sat_std > 0.2:
+        elif sat_std > 0.15:
             scores[LayoutType.CHART] = 0.6
         else:
             scores[LayoutType.CHART] = 0.15
         
         # DIAGRAM: Complex edges, not table-like
-        if edge_density > 0.05 and scores[LayoutType.TABLE] < 0.5:
-            scores[LayoutType.DIAGRAM] = 0.7 + min(0.2, edge_density * 5)
+        if edge_density > 0.15 and scores[LayoutType.TABLE] < 0.5:
+            scores[LayoutType.DIAGRAM] = 0.7 + min(0.2, edge_density * 1.6)
         else:
             scores[LayoutType.DIAGRAM] = 0.2
         
         # TEXT: Regular texture, low color diversity
-        if texture_reg > 0.15 and color_div < 0.05:
+        if texture_reg > 0.09 and color_div < 0.08:
             scores[LayoutType.TEXT] = 0.8 + min(0.15, texture_reg)
-        elif texture_reg > 0.1:
+        elif texture_reg > 0.05:
             scores[LayoutType.TEXT] = 0.65
         else:
             scores[LayoutType.TEXT] = 0.3
@@ -311,4 +361,6 @@ class LayoutClassifier:
             stats["avg_time_ms"] = stats["total_time_ms"] / stats["frames_processed"]
         else:
             stats["avg_time_ms"] = 0
+        skipped = stats["near_duplicate_skips"] + stats["cache_hits"]
+        stats["skip_rate"] = skipped / stats["frames_processed"] if stats["frames_processed"] else 0
         return stats
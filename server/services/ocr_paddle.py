@@ -13,18 +13,22 @@ Features:
 """
 
 import asyncio
+import importlib.util
 import logging
 import os
 import re
 import time
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 
 import numpy as np
 from PIL import Image
 
 from .ocr_layout_classifier import LayoutClassifier, LayoutType
 
+if TYPE_CHECKING:
+    from paddleocr import PaddleOCR
+
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -33,13 +37,9 @@ PADDLE_LANG = os.getenv("ECHOPANEL_PADDLE_LANG", "en")
 PADDLE_USE_GPU = os.getenv("ECHOPANEL_PADDLE_USE_GPU", "false").lower() == "true"
 PADDLE_ENABLE_MKLDNN = os.getenv("ECHOPANEL_PADDLE_ENABLE_MKLDNN", "true").lower() == "true"
 
-# Try to import PaddleOCR
-try:
-    from paddleocr import PaddleOCR
-    PADDLE_AVAILABLE = True
-except ImportError:
-    PADDLE_AVAILABLE = False
-    PaddleOCR = None
+# PaddleOCR (and paddle) take seconds to import, so probe now and import on first pipeline
+PADDLE_AVAILABLE = importlib.util.find_spec("paddleocr") is not None
+if not PADDLE_AVAILABLE:
     logger.warning("PaddleOCR not installed. Run: pip install paddleocr")
 
 
@@ -119,7 +119,7 @@ class PaddleOCRPipeline:
         self.use_gpu = use_gpu if use_gpu is not None else PADDLE_USE_GPU
         self.enable_mkldnn = enable_mkldnn if enable_mkldnn is not None else PADDLE_ENABLE_MKLDNN
         
-        self._ocr: Optional[PaddleOCR] = None
+        self._ocr: Optional["PaddleOCR"] = None
         self._layout_classifier = LayoutClassifier()
         
         # Statistics
@@ -140,6 +140,8 @@ class PaddleOCRPipeline:
             return
         
         try:
+            from paddleocr import PaddleOCR
+
             self._ocr = PaddleOCR(
                 use_angle_cls=True,           # Use angle classifier
                 lang=self.lang,                # Language
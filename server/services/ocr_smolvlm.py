@@ -10,6 +10,7 @@ Upgrade from SmolVLM-256M:
 - Improved semantic understanding
 """
 
+import importlib.util
 import logging
 import os
 import re
@@ -22,12 +23,10 @@ from PIL import Image
 
 logger = logging.getLogger(__name__)
 
-try:
-    import torch
-    TORCH_AVAILABLE = True
-except ImportError:
-    torch = None
-    TORCH_AVAILABLE = False
+# torch and transformers take seconds to import: probe now, import in SmolVLMPipeline._initialize
+torch = None
+TORCH_AVAILABLE = importlib.util.find_spec("torch") is not None
+if not TORCH_AVAILABLE:
     logger.warning("PyTorch not installed; SmolVLM pipeline disabled")
 
 # Configuration
@@ -49,11 +48,8 @@ class FrameSamplingStrategy(str, Enum):
     KEYFRAME = "keyframe"  # Scene change detection
     FIRST = "first"  # First frame only
 
-try:
-    from transformers import AutoProcessor, AutoModelForVision2Seq
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    TRANSFORMERS_AVAILABLE = False
+TRANSFORMERS_AVAILABLE = importlib.util.find_spec("transformers") is not None
+if not TRANSFORMERS_AVAILABLE:
     logger.warning("Transformers not installed")
 
 
@@ -112,9 +108,13 @@ class SmolVLMPipeline:
         self._initialize()
     
     def _initialize(self):
+        global torch
         if not TRANSFORMERS_AVAILABLE or not TORCH_AVAILABLE or not SMOLVLM_ENABLED:
             return
         try:
+            import torch
+            from transformers import AutoModelForVision2Seq, AutoProcessor
+
             if self.device == "auto":
                 if torch.backends.mps.is_available():
                     self.device = "mps"
@@ -268,7 +268,72 @@ ENTITIES: <entities>"""
             logger.error(f"SmolVLM processing error: {e}")
             self._stats["frames_failed"] += 1
             return SmolVLMResult(error=str(e), processing_time_ms=(time.time() - start_time) * 1000)
-    
+
+    def process_batch(self, images: List[Image.Image], paddle_contexts: Optional[list] = None) -> List[SmolVLMResult]:
+        """Enrich several frames with one generate call.
+
+        Blocking; the VLM scheduler runs this in a worker thread. Prompts are
+        left-padded so every row generates from the end of its own prompt.
+        """
+        start_time = time.time()
+
+        if not images:
+            return []
+        if not self.is_available():
+            return [SmolVLMResult(error="SmolVLM not available") for _ in images]
+
+        contexts = list(paddle_contexts or [])
+        contexts += [None] * (len(images) - len(contexts))
+
+        try:
+            prompt_texts = []
+            for ctx in contexts:
+                messages = [{
+                    "role": "user",
+                    "content": [{"type": "image"}, {"type": "text", "text": self._build_prompt(ctx)}]
+                }]
+                prompt_texts.append(self._processor.apply_chat_template(messages, add_generation_prompt=True))
+
+            tokenizer = getattr(self._processor, "tokenizer", None)
+            if tokenizer is not None:
+                tokenizer.padding_side = "left"
+
+            inputs = self._processor(
+                text=prompt_texts,
+                images=[[image] for image in images],
+                return_tensors="pt",
+                padding=True,
+            )
+            inputs = inputs.to(self.device)
+
+            with torch.no_grad():
+                generated_ids = self._model.generate(
+                    **inputs,
+                    max_new_tokens=self.max_tokens,
+                    do_sample=False,
+                    num_beams=1,
+                )
+
+            outputs = self._processor.batch_decode(generated_ids, skip_special_tokens=True)
+            processing_time = (time.time() - start_time) * 1000
+            per_frame_ms = processing_time / len(images)
+
+            results = []
+            for output in outputs:
+                result = self._parse_output(output)
+                result.processing_time_ms = per_frame_ms
+                results.append(result)
+
+            self._stats["frames_processed"] += len(images)
+            self._stats["total_processing_time_ms"] += processing_time
+            self._stats["total_tokens_generated"] += sum(len(row) for row in generated_ids)
+            return results
+        except Exception as e:
+            logger.error(f"SmolVLM batch processing error: {e}")
+            self._stats["frames_failed"] += len(images)
+            elapsed = (time.time() - start_time) * 1000
+            return [SmolVLMResult(error=str(e), processing_time_ms=elapsed) for _ in images]
+
     async def answer_query(self, image: Image.Image, query: str, paddle_context=None) -> str:
         if not self.is_available():
             return "SmolVLM not available"
@@ -0,0 +1,401 @@
+"""
+VLM Enrichment Scheduler for EchoPanel
+
+SmolVLM is by far the most expensive OCR stage on CPU. Instead of running one
+generate call per frame, the scheduler:
+
+- Batches pending frames into a single SmolVLMPipeline.process_batch call
+- Enforces global and per-session compute budgets (seconds of VLM time per minute)
+- Serves interactive `query` frames before `quality` and background enrichment
+- Defers over-budget background frames to a bounded backfill queue that is
+  drained when the scheduler is idle, instead of dropping them
+
+Budgets are charged with the wall-clock time of each batch (split evenly across
+the frames in it). VLM work is serialized, so this is the CPU time the stage
+occupies.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from .ocr_smolvlm import SmolVLMResult
+
+logger = logging.getLogger(__name__)
+
+VLM_BATCH_SIZE = int(os.getenv("ECHOPANEL_VLM_BATCH_SIZE", "4"))
+VLM_BATCH_WINDOW_MS = float(os.getenv("ECHOPANEL_VLM_BATCH_WINDOW_MS", "50"))
+VLM_GLOBAL_BUDGET_S_PER_MIN = float(os.getenv("ECHOPANEL_VLM_GLOBAL_BUDGET_S_PER_MIN", "30"))
+VLM_SESSION_BUDGET_S_PER_MIN = float(os.getenv("ECHOPANEL_VLM_SESSION_BUDGET_S_PER_MIN", "15"))
+VLM_BACKFILL_MAX = int(os.getenv("ECHOPANEL_VLM_BACKFILL_MAX", "32"))
+
+BUDGET_WINDOW_S = 60.0
+
+
+class VLMPriority(IntEnum):
+    """Scheduling priority (lower runs first)."""
+    QUERY = 0
+    QUALITY = 1
+    BACKGROUND = 2
+    BACKFILL = 3
+
+
+def priority_for_mode(mode: Optional[str]) -> VLMPriority:
+    if mode == "query":
+        return VLMPriority.QUERY
+    if mode == "quality":
+        return VLMPriority.QUALITY
+    return VLMPriority.BACKGROUND
+
+
+class ComputeBudget:
+    """Sliding-window budget of compute seconds per minute.
+
+    A limit <= 0 disables the budget.
+    """
+
+    def __init__(self, seconds_per_minute: float, window_s: float = BUDGET_WINDOW_S):
+        self.limit = seconds_per_minute
+        self.window_s = window_s
+        self._charges: Deque[Tuple[float, float]] = deque()  # (timestamp, seconds)
+        self._used = 0.0
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window_s
+        while self._charges and self._charges[0][0] <= cutoff:
+            _, seconds = self._charges.popleft()
+            self._used -= seconds
+        if not self._charges:
+            self._used = 0.0
+
+    def used(self, now: Optional[float] = None) -> float:
+        self._prune(now if now is not None else time.monotonic())
+        return max(0.0, self._used)
+
+    def exhausted(self, now: Optional[float] = None) -> bool:
+        if self.limit <= 0:
+            return False
+        return self.used(now) >= self.limit
+
+    def charge(self, seconds: float, now: Optional[float] = None) -> None:
+        if seconds <= 0:
+            return
+        now = now if now is not None else time.monotonic()
+        self._prune(now)
+        self._charges.append((now, seconds))
+        self._used += seconds
+
+    def seconds_until_available(self, now: Optional[float] = None) -> float:
+        """Time until enough charges expire for the budget to have headroom."""
+        now = now if now is not None else time.monotonic()
+        if not self.exhausted(now):
+            return 0.0
+        excess = self._used - self.limit
+        for ts, seconds in self._charges:
+            excess -= seconds
+            if excess < 0:
+                return max(0.0, ts + self.window_s - now)
+        return self.window_s
+
+
+@dataclass
+class VLMRequest:
+    """A frame waiting for VLM enrichment."""
+    image: Image.Image
+    paddle_context: Any
+    session_id: str
+    priority: VLMPriority
+    submitted_at: float = field(default_factory=time.monotonic)
+    future: Optional[asyncio.Future] = None
+    frame_key: Optional[str] = None
+    dropped: bool = False
+
+
+class VLMScheduler:
+    """Priority, batching and budget scheduler in front of SmolVLMPipeline."""
+
+    def __init__(
+        self,
+        vlm,
+        batch_size: Optional[int] = None,
+        batch_window_ms: Optional[float] = None,
+        global_budget_s: Optional[float] = None,
+        session_budget_s: Optional[float] = None,
+        backfill_max: Optional[int] = None,
+        on_backfill: Optional[Callable[[str, Optional[str], SmolVLMResult, Any], None]] = None,
+    ):
+        self.vlm = vlm
+        self.batch_size = max(1, batch_size or VLM_BATCH_SIZE)
+        self.batch_window_s = (VLM_BATCH_WINDOW_MS if batch_window_ms is None else batch_window_ms) / 1000.0
+        self.session_budget_s = VLM_SESSION_BUDGET_S_PER_MIN if session_budget_s is None else session_budget_s
+        self.global_budget = ComputeBudget(VLM_GLOBAL_BUDGET_S_PER_MIN if global_budget_s is None else global_budget_s)
+        self.on_backfill = on_backfill
+
+        self._session_budgets: Dict[str, ComputeBudget] = {}
+        self._pending: List[Tuple[int, int, VLMRequest]] = []
+        self._backfill: Deque[VLMRequest] = deque()
+        self._in_flight: List[VLMRequest] = []
+        self._backfill_max = max(0, VLM_BACKFILL_MAX if backfill_max is None else backfill_max)
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._exclusive: Optional[asyncio.Lock] = None
+
+        self._stats = {
+            "frames_submitted": 0,
+            "frames_enriched": 0,
+            "frames_deferred": 0,
+            "frames_backfilled": 0,
+            "backfill_evicted": 0,
+            "batches_run": 0,
+            "total_vlm_seconds": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def submit(
+        self,
+        image: Image.Image,
+        paddle_context=None,
+        session_id: str = "",
+        mode: Optional[str] = None,
+        deferrable: bool = True,
+        frame_key: Optional[str] = None,
+    ) -> Optional[SmolVLMResult]:
+        """Schedule a frame for enrichment.
+
+        Returns the SmolVLMResult, or None when the frame was deferred to the
+        backfill queue because its session or the global budget is exhausted.
+        Query frames and non-deferrable frames always run.
+        """
+        self._ensure_worker()
+        self._stats["frames_submitted"] += 1
+        priority = priority_for_mode(mode)
+
+        if deferrable and priority == VLMPriority.BACKGROUND and self._over_budget(session_id):
+            self._defer(VLMRequest(
+                image=image,
+                paddle_context=paddle_context,
+                session_id=session_id,
+                priority=VLMPriority.BACKFILL,
+                frame_key=frame_key,
+            ))
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        request = VLMRequest(
+            image=image,
+            paddle_context=paddle_context,
+            session_id=session_id,
+            priority=priority,
+            future=future,
+            frame_key=frame_key,
+        )
+        heapq.heappush(self._pending, (int(priority), next(self._seq), request))
+        self._wakeup.set()
+        return await future
+
+    @asynccontextmanager
+    async def exclusive(self):
+        """Hold the VLM for a non-batched call (e.g. slide Q&A)."""
+        self._ensure_worker()
+        async with self._exclusive:
+            yield
+
+    def drop_session(self, session_id: str) -> int:
+        """Forget budget state and queued backfill for a finished session.
+
+        Frames of the session already in a running batch are marked dropped so
+        their result is neither charged to the session nor handed to on_backfill.
+        """
+        self._session_budgets.pop(session_id, None)
+        for request in self._in_flight:
+            if request.session_id == session_id:
+                request.dropped = True
+        before = len(self._backfill)
+        self._backfill = deque(r for r in self._backfill if r.session_id != session_id)
+        return before - len(self._backfill)
+
+    async def close(self) -> None:
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        for _, _, request in self._pending:
+            if request.future and not request.future.done():
+                request.future.set_result(SmolVLMResult(error="VLM scheduler closed"))
+        self._pending.clear()
+        self._backfill.clear()
+
+    def get_stats(self) -> dict:
+        stats = self._stats.copy()
+        stats["pending"] = len(self._pending)
+        stats["backfill_pending"] = len(self._backfill)
+        stats["global_budget_used_s"] = round(self.global_budget.used(), 2)
+        stats["global_budget_s_per_min"] = self.global_budget.limit
+        stats["session_budget_s_per_min"] = self.session_budget_s
+        stats["batch_size"] = self.batch_size
+        if stats["batches_run"] > 0:
+            stats["avg_batch_size"] = stats["frames_enriched"] / stats["batches_run"]
+        else:
+            stats["avg_batch_size"] = 0
+        return stats
+
+    def reset_stats(self) -> None:
+        for key in self._stats:
+            self._stats[key] = 0.0 if isinstance(self._stats[key], float) else 0
+
+    # ------------------------------------------------------------------
+    # Budgets
+    # ------------------------------------------------------------------
+
+    def _session_budget(self, session_id: str) -> ComputeBudget:
+        budget = self._session_budgets.get(session_id)
+        if budget is None:
+            budget = ComputeBudget(self.session_budget_s)
+            self._session_budgets[session_id] = budget
+        return budget
+
+    def _over_budget(self, session_id: str, now: Optional[float] = None) -> bool:
+        now = now if now is not None else time.monotonic()
+        return self.global_budget.exhausted(now) or self._session_budget(session_id).exhausted(now)
+
+    def _charge(self, requests: List[VLMRequest], seconds: float) -> None:
+        now = time.monotonic()
+        self.global_budget.charge(seconds, now)
+        share = seconds / len(requests)
+        for request in requests:
+            if not request.dropped:
+                self._session_budget(request.session_id).charge(share, now)
+        # Forget sessions whose window has fully drained so the map stays bounded.
+        for session_id in [s for s, b in self._session_budgets.items() if b.used(now) == 0.0]:
+            del self._session_budgets[session_id]
+
+    def _defer(self, request: VLMRequest) -> None:
+        self._stats["frames_deferred"] += 1
+        if self._backfill_max == 0:
+            self._stats["backfill_evicted"] += 1
+            return
+        if len(self._backfill) >= self._backfill_max:
+            # Oldest deferred frame is most likely superseded by newer slides.
+            self._backfill.popleft()
+            self._stats["backfill_evicted"] += 1
+        self._backfill.append(request)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _ensure_worker(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._exclusive = asyncio.Lock()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                idle_wait = self._backfill_wait()
+                if idle_wait == 0.0:
+                    await self._run_backfill()
+                    continue
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=idle_wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Give concurrent submitters a short window to join this batch,
+            # unless a user is waiting on a query.
+            if self._pending[0][0] > VLMPriority.QUERY and len(self._pending) < self.batch_size and self.batch_window_s > 0:
+                await asyncio.sleep(self.batch_window_s)
+
+            batch = [heapq.heappop(self._pending)[2] for _ in range(min(self.batch_size, len(self._pending)))]
+            results = await self._run_batch(batch)
+            for request, result in zip(batch, results):
+                if request.future and not request.future.done():
+                    request.future.set_result(result)
+
+    def _backfill_wait(self) -> Optional[float]:
+        """0.0 if a backfill frame can run now, seconds to wait, or None (wait for work)."""
+        if not self._backfill:
+            return None
+        now = time.monotonic()
+        waits = []
+        for request in self._backfill:
+            if not self._over_budget(request.session_id, now):
+                return 0.0
+            waits.append(max(
+                self.global_budget.seconds_until_available(now),
+                self._session_budget(request.session_id).seconds_until_available(now),
+            ))
+        return max(0.05, min(waits))
+
+    async def _run_backfill(self) -> None:
+        now = time.monotonic()
+        batch: List[VLMRequest] = []
+        remaining: Deque[VLMRequest] = deque()
+        # Newest frames first: they best reflect what is on screen.
+        while self._backfill:
+            request = self._backfill.pop()
+            if len(batch) < self.batch_size and not self._over_budget(request.session_id, now):
+                batch.append(request)
+            else:
+                remaining.appendleft(request)
+        self._backfill = remaining
+        if not batch:
+            return
+
+        results = await self._run_batch(batch)
+        for request, result in zip(batch, results):
+            self._stats["frames_backfilled"] += 1
+            if self.on_backfill is None or request.dropped:
+                continue
+            try:
+                self.on_backfill(request.session_id, request.frame_key, result, request.paddle_context)
+            except Exception as e:
+                logger.error(f"VLM backfill callback failed: {e}")
+
+    async def _run_batch(self, batch: List[VLMRequest]) -> List[SmolVLMResult]:
+        images = [r.image for r in batch]
+        contexts = [r.paddle_context for r in batch]
+        async with self._exclusive:
+            self._in_flight = batch
+            start = time.perf_counter()
+            try:
+                results = await asyncio.to_thread(self.vlm.process_batch, images, contexts)
+            except Exception as e:
+                logger.error(f"VLM batch failed: {e}")
+                results = [SmolVLMResult(error=str(e)) for _ in batch]
+            finally:
+                self._in_flight = []
+            elapsed = time.perf_counter() - start
+
+        if len(results) != len(batch):
+            results = list(results) + [SmolVLMResult(error="Missing batch result")] * (len(batch) - len(results))
+
+        self._charge(batch, elapsed)
+        self._stats["batches_run"] += 1
+        self._stats["frames_enriched"] += len(batch)
+        self._stats["total_vlm_seconds"] += elapsed
+        logger.debug(f"VLM batch of {len(batch)} frames took {elapsed * 1000:.0f}ms")
+        return results
@@ -0,0 +1,566 @@
+"""
+Offline re-transcription over the recording lane.
+
+After a session (or at idle time) the finalized recording-lane audio is
+split at silences into independent spans and transcribed across a process
+pool with a larger model than the realtime lane uses. Span results are
+stitched back into one transcript with overlap de-duplication and mapped to
+the realtime segment IDs (see transcript_ids) so clients can swap realtime
+segments for canonical ones.
+
+Workers run at lowered OS priority (nice) with a bounded thread count so a
+re-transcription job never competes with live sessions for CPU.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+from server.services.transcript_ids import generate_segment_id, normalize_segment_text
+
+if TYPE_CHECKING:
+    import numpy as np  # imported by the functions that touch audio, off the server import path
+
+logger = logging.getLogger(__name__)
+
+OFFLINE_TRANSCRIBE_ENABLED = os.getenv("ECHOPANEL_OFFLINE_TRANSCRIBE", "0") == "1"
+OFFLINE_MODEL = os.getenv("ECHOPANEL_OFFLINE_WHISPER_MODEL", "small.en")
+OFFLINE_DEVICE = os.getenv("ECHOPANEL_OFFLINE_WHISPER_DEVICE", "cpu")
+OFFLINE_COMPUTE = os.getenv("ECHOPANEL_OFFLINE_WHISPER_COMPUTE", "int8")
+OFFLINE_WORKERS = int(os.getenv("ECHOPANEL_OFFLINE_WORKERS", "0"))  # 0 = auto
+OFFLINE_CPU_THREADS = int(os.getenv("ECHOPANEL_OFFLINE_CPU_THREADS", "0"))  # per worker, 0 = auto
+OFFLINE_NICE = int(os.getenv("ECHOPANEL_OFFLINE_NICE", "10"))
+SPAN_TARGET_SECONDS = float(os.getenv("ECHOPANEL_OFFLINE_SPAN_S", "30"))
+SPAN_MAX_SECONDS = float(os.getenv("ECHOPANEL_OFFLINE_SPAN_MAX_S", "45"))
+SPAN_OVERLAP_SECONDS = float(os.getenv("ECHOPANEL_OFFLINE_OVERLAP_S", "1.0"))
+MIN_SILENCE_SECONDS = float(os.getenv("ECHOPANEL_OFFLINE_MIN_SILENCE_S", "0.3"))
+
+VAD_FRAME_SECONDS = 0.03
+VAD_MIN_RMS = 0.005  # float scale, matches the streaming diarizer's voiced gate
+VAD_NOISE_RATIO = 2.5
+SPAN_PAD_SECONDS = 0.2  # silence kept around trimmed span edges
+RMS_WINDOW_FRAMES = 2000  # frames converted per read (60 s at 30 ms frames)
+
+# (path, offset_bytes, num_bytes) as returned by RecordingStream.segment_files()
+AudioPart = Tuple[Path, int, int]
+# transcribe_fn(audio_float32, sample_rate) -> [(t0, t1, text), ...] relative to the span
+TranscribeFn = Callable[["np.ndarray", int], List[Tuple[float, float, str]]]
+
+
+@dataclass(frozen=True)
+class Span:
+    """A range of samples transcribed independently.
+
+    [start, end) is what the worker decodes; [own_start, own_end) is the part
+    whose segments this span is authoritative for. They differ only at hard
+    cuts, where neighbouring spans overlap to avoid cutting words in half.
+    """
+
+    start: int
+    end: int
+    own_start: int
+    own_end: int
+
+
+def _frame_rms(parts: Sequence[np.ndarray], frame: int) -> np.ndarray:
+    """Per-frame RMS over consecutive int16 parts, converting one window at a time."""
+    import numpy as np
+
+    from server.services.diarization import _iter_audio_windows
+
+    rms = []
+    for _, window in _iter_audio_windows(parts, frame * RMS_WINDOW_FRAMES):
+        n = len(window) // frame  # a trailing partial frame is ignored
+        if n:
+            frames = window[: n * frame].reshape(n, frame)
+            rms.append(np.sqrt(np.mean(frames * frames, axis=1)))
+    return np.concatenate(rms) if rms else np.zeros(0, dtype=np.float32)
+
+
+def split_at_silences(
+    audio: Union[np.ndarray, Sequence[np.ndarray]],
+    sample_rate: int = 16000,
+    target_s: float = SPAN_TARGET_SECONDS,
+    max_s: float = SPAN_MAX_SECONDS,
+    overlap_s: float = SPAN_OVERLAP_SECONDS,
+    min_silence_s: float = MIN_SILENCE_SECONDS,
+) -> List[Span]:
+    """Split int16 audio into spans cut at the silence nearest each target length.
+
+    `audio` is an int16 array (or `BlockPCMReader`) or a list of consecutive
+    ones, typically recording-lane segments opened with `open_recording_audio`;
+    it is read window by window, never materialized whole. Silence is an energy gate relative to the recording's own noise floor, so
+    this needs no model. If no silence falls within `max_s`, the span is hard
+    cut there with `overlap_s` of shared audio on each side. Silence at soft
+    span edges is trimmed, and spans with no voiced frame at all are dropped.
+    """
+    import numpy as np
+
+    parts = list(audio) if isinstance(audio, (list, tuple)) else [audio]
+    total = sum(len(part) for part in parts)
+    if total == 0:
+        return []
+    frame = max(1, int(VAD_FRAME_SECONDS * sample_rate))
+    rms = _frame_rms(parts, frame)
+    if len(rms) == 0:
+        return [Span(0, total, 0, total)]
+
+    # Above the noise floor, but never above half the loud level, so audio
+    # without any pauses still counts as voiced.
+    floor, loud = np.percentile(rms, [10, 90])
+    threshold = max(VAD_MIN_RMS, min(float(floor) * VAD_NOISE_RATIO, float(loud) * 0.5))
+    voiced = rms >= threshold
+
+    # Midpoints (in samples) of silent runs long enough to cut at.
+    edges = np.flatnonzero(np.diff(np.concatenate(([1], voiced.astype(np.int8), [1]))))
+    run_starts, run_ends = edges[0::2], edges[1::2]
+    long_runs = (run_ends - run_starts) * frame >= min_silence_s * sample_rate
+    cuts = ((run_starts[long_runs] + run_ends[long_runs]) * frame) // 2
+
+    target = int(target_s * sample_rate)
+    longest = max(target, int(max_s * sample_rate))
+    overlap = int(overlap_s * sample_rate)
+    pad = int(SPAN_PAD_SECONDS * sample_rate)
+
+    spans: List[Span] = []
+    pos = 0
+    lead = 0  # overlap carried into this span from a hard cut
+    while pos < total:
+        if total - pos <= longest:
+            cut, hard = total, False
+        else:
+            lo, hi = np.searchsorted(cuts, [pos + 1, pos + longest], side="right")
+            candidates = cuts[lo:hi]
+            if len(candidates):
+                cut = int(candidates[np.argmin(np.abs(candidates - (pos + target)))])
+                hard = False
+            else:
+                cut, hard = pos + longest, True
+        start = max(0, pos - lead)
+        end = min(total, cut + overlap) if hard else cut
+        f0, f1 = start // frame, min(len(rms), -(-end // frame))
+        voiced_frames = np.flatnonzero(voiced[f0:f1])
+        if len(voiced_frames):
+            # Skip leading/trailing silence at soft edges; it only costs decode time.
+            if not lead:
+                start = max(start, (f0 + int(voiced_frames[0])) * frame - pad)
+            if not hard:
+                end = min(end, (f0 + int(voiced_frames[-1]) + 1) * frame + pad)
+            spans.append(Span(start, end, pos, cut))
+        lead = overlap if hard else 0
+        pos = cut
+    return spans
+
+
+def _dedupe_boundary(previous: str, text: str, max_words: int = 8) -> str:
+    """Drop the longest word run that repeats the tail of `previous` from the head of `text`."""
+    prev_words = normalize_segment_text(previous).split()
+    words = text.split()
+    norm = [re.sub(r"[^\w']", "", w.lower()) for w in words]
+    prev_norm = [re.sub(r"[^\w']", "", w) for w in prev_words]
+    for k in range(min(max_words, len(prev_norm), len(norm)), 0, -1):
+        if prev_norm[-k:] == norm[:k]:
+            return " ".join(words[k:])
+    return text
+
+
+def stitch_spans(
+    spans: Sequence[Span],
+    results: Sequence[Sequence[Tuple[float, float, str]]],
+    sample_rate: int = 16000,
+) -> List[Tuple[float, float, str]]:
+    """Merge per-span results into one timeline (absolute seconds).
+
+    A segment belongs to the span that owns its midpoint, so segments decoded
+    twice in an overlap are kept once; words repeated across the boundary are
+    trimmed from the later segment.
+    """
+    merged: List[Tuple[float, float, str]] = []
+    for span, segments in zip(spans, results):
+        offset = span.start / sample_rate
+        own_start, own_end = span.own_start / sample_rate, span.own_end / sample_rate
+        first_in_span = True
+        for t0, t1, text in segments:
+            t0, t1 = t0 + offset, t1 + offset
+            if not own_start <= (t0 + t1) / 2 < own_end:
+                continue
+            text = (text or "").strip()
+            if first_in_span and merged and span.start < span.own_start:
+                text = _dedupe_boundary(" ".join(m[2] for m in merged[-3:]), text)
+            first_in_span = False
+            if text:
+                merged.append((t0, t1, text))
+    return merged
+
+
+def map_realtime_segments(
+    segments: List[dict],
+    realtime: Iterable[dict],
+) -> List[str]:
+    """Attach each realtime segment ID to the offline segment it overlaps most.
+
+    Fills `realtime_segment_ids` on `segments` in place and returns the IDs of
+    realtime segments with no overlapping offline segment.
+    """
+    from server.services.diarization import SpeakerAligner
+
+    aligner = SpeakerAligner(
+        {"t0": seg["t0"], "t1": seg["t1"], "speaker": str(i)} for i, seg in enumerate(segments)
+    )
+    for seg in segments:
+        seg["realtime_segment_ids"] = []
+    unmatched: List[str] = []
+    for rt in realtime:
+        segment_id = rt.get("segment_id")
+        if not segment_id:
+            continue
+        t0, t1 = float(rt.get("t0", 0.0)), float(rt.get("t1", 0.0))
+        match = aligner.speaker_for(t0, t1)
+        if match is None:
+            unmatched.append(segment_id)
+        else:
+            segments[int(match)]["realtime_segment_ids"].append(segment_id)
+    return unmatched
+
+
+# ---------------------------------------------------------------------------
+# Worker side (runs in pool processes)
+# ---------------------------------------------------------------------------
+
+_worker_fn: Optional[TranscribeFn] = None
+_worker_model = None
+_worker_settings: dict = {}
+
+
+def _lower_priority(nice: int) -> None:
+    if nice <= 0 or not hasattr(os, "nice"):
+        return
+    try:
+        os.nice(nice)
+    except OSError as e:
+        logger.debug(f"Could not lower offline worker priority: {e}")
+
+
+def _worker_init(transcribe_fn: Optional[TranscribeFn], settings: dict) -> None:
+    global _worker_fn, _worker_settings
+    _lower_priority(settings.get("nice", 0))
+    threads = str(settings.get("cpu_threads", 1))
+    os.environ.setdefault("OMP_NUM_THREADS", threads)
+    _worker_fn = transcribe_fn
+    _worker_settings = settings
+
+
+def _faster_whisper_transcribe(audio: np.ndarray, sample_rate: int) -> List[Tuple[float, float, str]]:
+    """Default worker transcriber: faster-whisper with the offline model."""
+    global _worker_model
+    if _worker_model is None:
+        from faster_whisper import WhisperModel
+
+        _worker_model = WhisperModel(
+            _worker_settings.get("model", OFFLINE_MODEL),
+            device=_worker_settings.get("device", OFFLINE_DEVICE),
+            compute_type=_worker_settings.get("compute_type", OFFLINE_COMPUTE),
+            cpu_threads=int(_worker_settings.get("cpu_threads", 1)),
+        )
+    segments, _info = _worker_model.transcribe(
+        audio,
+        beam_size=5,
+        language=_worker_settings.get("language"),
+        condition_on_previous_text=False,
+        vad_filter=False,
+    )
+    return [(float(s.start), float(s.end), s.text) for s in segments]
+
+
+def _read_span(parts: Sequence[AudioPart], start: int, end: int) -> np.ndarray:
+    """Read samples [start, end) across recording segments as float32."""
+    import numpy as np
+
+    from server.services.diarization import open_recording_audio
+
+    chunks = []
+    part_start = 0
+    for path, offset, nbytes in parts:
+        audio = open_recording_audio(path, offset, nbytes)
+        part_end = part_start + len(audio)
+        lo, hi = max(start, part_start), min(end, part_end)
+        if lo < hi:
+            chunks.append(np.asarray(audio[lo - part_start:hi - part_start], dtype=np.float32))
+        part_start = part_end
+        if part_start >= end:
+            break
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks) / 32768.0
+
+
+def _transcribe_span(parts: Sequence[AudioPart], span: Span, sample_rate: int) -> List[Tuple[float, float, str]]:
+    audio = _read_span(parts, span.start, span.end)
+    fn = _worker_fn or _faster_whisper_transcribe
+    return list(fn(audio, sample_rate))
+
+
+# ---------------------------------------------------------------------------
+# Coordinator
+# ---------------------------------------------------------------------------
+
+def _plan_workers(workers: int, cpu_threads: int) -> Tuple[int, int]:
+    """Pick pool size and per-worker threads, leaving half the cores for live sessions."""
+    budget = max(1, (os.cpu_count() or 2) // 2)
+    if workers <= 0:
+        workers = max(1, budget // max(1, cpu_threads or 2))
+    if cpu_threads <= 0:
+        cpu_threads = max(1, budget // workers)
+    return workers, cpu_threads
+
+
+class OfflineTranscriber:
+    """Re-transcribes finalized recording-lane audio across a process pool.
+
+    `transcribe_fn` replaces the faster-whisper worker transcriber; it must be
+    a picklable module-level function since it is sent to spawned workers.
+    """
+
+    def __init__(
+        self,
+        transcribe_fn: Optional[TranscribeFn] = None,
+        workers: int = OFFLINE_WORKERS,
+        cpu_threads: int = OFFLINE_CPU_THREADS,
+        model: str = OFFLINE_MODEL,
+        language: Optional[str] = None,
+        nice: int = OFFLINE_NICE,
+    ):
+        self._transcribe_fn = transcribe_fn
+        self._workers, self._cpu_threads = _plan_workers(workers, cpu_threads)
+        self._settings = {
+            "model": model,
+            "device": OFFLINE_DEVICE,
+            "compute_type": OFFLINE_COMPUTE,
+            "cpu_threads": self._cpu_threads,
+            "language": language,
+            "nice": nice,
+        }
+        self._stats = {
+            "jobs": 0,
+            "spans": 0,
+            "audio_seconds": 0.0,
+            "wall_seconds": 0.0,
+            "last_throughput": 0.0,
+        }
+
+    def transcribe(
+        self,
+        parts: Sequence[AudioPart],
+        sample_rate: int = 16000,
+        source: str = "system",
+        realtime_transcript: Iterable[dict] = (),
+        time_offset: float = 0.0,
+    ) -> dict:
+        """Transcribe one source's recording and map it onto its realtime segments.
+
+        Returns {"source", "segments", "unmatched_realtime_segment_ids", "stats"}
+        where each segment carries its own stable `segment_id` plus the
+        `realtime_segment_ids` it supersedes.
+        """
+        from server.services.diarization import open_recording_audio
+
+        started = time.perf_counter()
+        parts = [(Path(p), int(o), int(n)) for p, o, n in parts]
+        audio_parts = [open_recording_audio(*part) for part in parts]
+        audio_seconds = sum(len(a) for a in audio_parts) / sample_rate
+        spans = split_at_silences(audio_parts, sample_rate)
+        del audio_parts
+
+        results: List[List[Tuple[float, float, str]]] = []
+        if spans:
+            workers = min(self._workers, len(spans))
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_worker_init,
+                initargs=(self._transcribe_fn, self._settings),
+            ) as pool:
+                futures = [pool.submit(_transcribe_span, parts, span, sample_rate) for span in spans]
+                results = [f.result() for f in futures]
+
+        segments = []
+        for t0, t1, text in stitch_spans(spans, results, sample_rate):
+            t0, t1 = round(t0 + time_offset, 3), round(t1 + time_offset, 3)
+            segments.append({
+                "t0": t0,
+                "t1": t1,
+                "text": text,
+                "source": source,
+                "segment_id": generate_segment_id(source, t0, t1, text),
+            })
+        realtime = [seg for seg in realtime_transcript if (seg.get("source") or "system") == source]
+        unmatched = map_realtime_segments(segments, realtime)
+
+        wall_seconds = time.perf_counter() - started
+        throughput = audio_seconds / wall_seconds if wall_seconds > 0 else 0.0
+        self._stats["jobs"] += 1
+        self._stats["spans"] += len(spans)
+        self._stats["audio_seconds"] += audio_seconds
+        self._stats["wall_seconds"] += wall_seconds
+        self._stats["last_throughput"] = throughput
+        logger.info(
+            f"Offline transcription ({source}): {audio_seconds:.1f}s audio in {wall_seconds:.1f}s "
+            f"({throughput:.1f}x realtime, {len(spans)} spans, {self._workers} workers)"
+        )
+        return {
+            "source": source,
+            "segments": segments,
+            "unmatched_realtime_segment_ids": unmatched,
+            "stats": {
+                "audio_seconds": round(audio_seconds, 3),
+                "wall_seconds": round(wall_seconds, 3),
+                "audio_seconds_per_wall_second": round(throughput, 2),
+                "spans": len(spans),
+                "workers": self._workers,
+                "cpu_threads_per_worker": self._cpu_threads,
+                "model": self._settings["model"],
+            },
+        }
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["workers"] = self._workers
+        stats["cpu_threads_per_worker"] = self._cpu_threads
+        return stats
+
+
+def write_canonical_transcript(
+    session_id: str,
+    by_source: dict,
+    output_path: Path,
+) -> Path:
+    """Write per-source offline results as one JSON canonical transcript."""
+    segments = sorted(
+        (seg for result in by_source.values() for seg in result["segments"]),
+        key=lambda seg: seg["t0"],
+    )
+    payload = {
+        "session_id": session_id,
+        "transcript": segments,
+        "unmatched_realtime_segment_ids": sorted(
+            sid for result in by_source.values() for sid in result["unmatched_realtime_segment_ids"]
+        ),
+        "stats": {source: result["stats"] for source, result in by_source.items()},
+    }
+    output_path = Path(output_path)
+    tmp = output_path.with_suffix(output_path.suffix + ".tmp")
+    tmp.write_text(json.dumps(payload, indent=2))
+    os.replace(tmp, output_path)
+    return output_path
+
+
+_job_executor: Optional[ThreadPoolExecutor] = None
+_job_lock = threading.Lock()
+
+
+def _run_session_job(session_id, streams_by_source, transcript, output_path, sample_rate, flush_timeout):
+    transcriber = OfflineTranscriber()
+    by_source = {}
+    for source, stream in streams_by_source.items():
+        if not stream.wait_closed(timeout=flush_timeout):
+            logger.warning(f"Offline transcription: recording for {source} not closed, using flushed audio")
+        parts = stream.segment_files()
+        if parts:
+            by_source[source] = transcriber.transcribe(parts, sample_rate, source, transcript)
+    if not by_source:
+        return None
+    path = write_canonical_transcript(session_id, by_source, output_path)
+    logger.info(f"Canonical transcript written: {path}")
+    return path
+
+
+def submit_session_job(
+    session_id: str,
+    streams_by_source: dict,
+    transcript: Sequence[dict],
+    output_path: Path,
+    sample_rate: int = 16000,
+    flush_timeout: float = 30.0,
+) -> Future:
+    """Queue a post-session re-transcription of the session's recording streams.
+
+    Jobs run one at a time on a background thread (each fanning out to its own
+    process pool), so finishing sessions never wait on them.
+    """
+    global _job_executor
+    with _job_lock:
+        if _job_executor is None:
+            _job_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="echopanel-offline")
+        executor = _job_executor
+    future = executor.submit(
+        _run_session_job, session_id, dict(streams_by_source), list(transcript),
+        Path(output_path), sample_rate, flush_timeout,
+    )
+
+    def _log_failure(done: Future) -> None:
+        if not done.cancelled() and done.exception() is not None:
+            logger.error(f"Offline transcription failed for {session_id}: {done.exception()}")
+
+    future.add_done_callback(_log_failure)
+    return future
+
+
+def shutdown_offline_jobs(wait: bool = False) -> None:
+    """Drop queued jobs; optionally wait for the running one."""
+    global _job_executor
+    with _job_lock:
+        executor, _job_executor = _job_executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _file_part(path: Path) -> AudioPart:
+    """(path, data_offset, pcm16_bytes) for a standalone recording file."""
+    from server.services.pcm_codec import SUFFIX as EPCM_SUFFIX
+    from server.services.pcm_codec import BlockPCMReader
+    from server.services.recording_writer import WAV_HEADER_BYTES
+
+    if path.suffix == EPCM_SUFFIX:
+        return path, 0, len(BlockPCMReader(path)) * 2
+    offset = WAV_HEADER_BYTES if path.suffix == ".wav" else 0
+    return path, offset, max(0, path.stat().st_size - offset)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Re-transcribe recording-lane files from the command line (idle-time use)."""
+    parser = argparse.ArgumentParser(description="Offline re-transcription of recording-lane audio")
+    parser.add_argument("files", nargs="+", type=Path, help="Recording segments in order (.wav/.pcm/.epcm)")
+    parser.add_argument("--source", default="system")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--realtime", type=Path, help="final_summary JSON to map realtime segment IDs from")
+    parser.add_argument("--output", type=Path, required=True)
+    args = parser.parse_args(argv)
+
+    parts = [_file_part(path) for path in args.files]
+    realtime = []
+    session_id = args.output.stem
+    if args.realtime:
+        summary = json.loads(args.realtime.read_text())
+        summary = summary.get("json", summary)
+        realtime = summary.get("transcript", [])
+        session_id = summary.get("session_id") or session_id
+
+    result = OfflineTranscriber().transcribe(parts, args.sample_rate, args.source, realtime)
+    write_canonical_transcript(session_id, {args.source: result}, args.output)
+    print(json.dumps(result["stats"]))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
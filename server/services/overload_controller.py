@@ -0,0 +1,299 @@
+"""
+Predictive overload controller for live sessions.
+
+Each session's degrade ladder used to be driven by its own RTF samples. RTF
+only rises once inference has already fallen behind, so the ladder reacted
+after the realtime queue was full and put_audio was dropping frames. It also
+degraded every session independently, although they all share one CPU.
+
+The controller watches two leading signals per session source:
+
+- backlog slope: how fast the buffered audio (seconds) in the realtime queue
+  grows. A positive slope means audio arrives faster than it is decoded, and
+  put_audio starts dropping once the backlog reaches
+  ECHOPANEL_AUDIO_QUEUE_MAX_SECONDS.
+- inference cost: measured inference seconds per audio second.
+
+Both are EWMA-smoothed with time-based decay. A session's pressure is the
+larger of its inference cost and its backlog projected HORIZON_S ahead, as a
+fraction of the queue limit. Pressure therefore reaches 1.0 before any frame
+is dropped, and it is on the same scale as the ladder's RTF thresholds. The
+process pressure is the maximum over sessions, because they share the
+inference executor.
+
+Under pressure the controller steps one session at a time down its ladder,
+lowest priority first (newest session first on ties). It never pushes a
+session past the level the pressure maps to, and waits ACTION_INTERVAL_S for
+each action to take effect. Recovery needs pressure below the recovery
+threshold for RECOVERY_HOLD_S (hysteresis) and restores the highest-priority
+sessions first.
+
+Environment:
+    ECHOPANEL_PREDICTIVE_DEGRADE         Drive ladders from this controller (1; 0 = per-session RTF checks)
+    ECHOPANEL_DEGRADE_HORIZON_S          Backlog prediction horizon in seconds (3.0)
+    ECHOPANEL_DEGRADE_EWMA_TAU_S         EWMA time constant in seconds (3.0)
+    ECHOPANEL_DEGRADE_ACTION_INTERVAL_S  Minimum seconds between ladder steps (5.0)
+    ECHOPANEL_DEGRADE_RECOVERY_HOLD_S    Seconds of calm before a recovery step (15.0)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .degrade_ladder import DegradeLadder, DegradeLevel, DegradeThresholds
+
+logger = logging.getLogger(__name__)
+
+PREDICTIVE_DEGRADE = os.getenv("ECHOPANEL_PREDICTIVE_DEGRADE", "1").strip().lower() not in {"0", "false", "no", "off"}
+HORIZON_S = float(os.getenv("ECHOPANEL_DEGRADE_HORIZON_S", "3.0"))
+EWMA_TAU_S = float(os.getenv("ECHOPANEL_DEGRADE_EWMA_TAU_S", "3.0"))
+ACTION_INTERVAL_S = float(os.getenv("ECHOPANEL_DEGRADE_ACTION_INTERVAL_S", "5.0"))
+RECOVERY_HOLD_S = float(os.getenv("ECHOPANEL_DEGRADE_RECOVERY_HOLD_S", "15.0"))
+# Same limit put_audio drops at
+QUEUE_MAX_SECONDS = float(os.getenv("ECHOPANEL_AUDIO_QUEUE_MAX_SECONDS", "2.0"))
+# Several sessions' metrics loops call evaluate(); decide at most this often
+EVAL_INTERVAL_S = 0.5
+
+
+class Ewma:
+    """Exponentially weighted moving average with time-based decay."""
+
+    __slots__ = ("tau_s", "value")
+
+    def __init__(self, tau_s: float):
+        self.tau_s = tau_s
+        self.value: Optional[float] = None
+
+    def update(self, sample: float, dt: float) -> float:
+        """Blend in a sample that covers `dt` seconds."""
+        if self.value is None:
+            self.value = sample
+        elif dt > 0:
+            alpha = 1.0 - math.exp(-dt / self.tau_s) if self.tau_s > 0 else 1.0
+            self.value += alpha * (sample - self.value)
+        return self.value
+
+
+@dataclass
+class SourceSignals:
+    """Smoothed load signals for one source of a session."""
+    tau_s: float
+    backlog_s: Ewma = field(init=False)
+    slope: Ewma = field(init=False)  # backlog seconds gained per wall second
+    cost: Ewma = field(init=False)  # inference seconds per audio second
+    last_backlog_s: Optional[float] = None
+    last_backlog_at: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        self.backlog_s = Ewma(self.tau_s)
+        self.slope = Ewma(self.tau_s)
+        self.cost = Ewma(self.tau_s)
+
+    def observe_backlog(self, backlog_s: float, now: float) -> None:
+        if self.last_backlog_at is not None and now > self.last_backlog_at:
+            dt = now - self.last_backlog_at
+            self.slope.update((backlog_s - self.last_backlog_s) / dt, dt)
+            self.backlog_s.update(backlog_s, dt)
+        elif self.last_backlog_at is None:
+            self.backlog_s.update(backlog_s, 0.0)
+        self.last_backlog_s, self.last_backlog_at = backlog_s, now
+
+    def observe_inference(self, processing_s: float, audio_s: float) -> None:
+        if processing_s > 0 and audio_s > 0:
+            # Weighted by the audio the call covered, not by wall-clock gaps
+            self.cost.update(processing_s / audio_s, audio_s)
+
+    def projected_backlog_s(self, horizon_s: float) -> float:
+        backlog = self.backlog_s.value or 0.0
+        return backlog + max(0.0, self.slope.value or 0.0) * horizon_s
+
+    def pressure(self, horizon_s: float, queue_max_s: float) -> float:
+        fill = self.projected_backlog_s(horizon_s) / queue_max_s if queue_max_s > 0 else 0.0
+        return max(self.cost.value or 0.0, fill)
+
+
+@dataclass
+class SessionLoad:
+    """A live session known to the controller."""
+    key: str
+    ladder: DegradeLadder
+    priority: int = 0  # higher = more important, degraded last
+    joined_at: float = 0.0
+    sources: Dict[str, SourceSignals] = field(default_factory=dict)
+
+    def pressure(self, horizon_s: float, queue_max_s: float) -> float:
+        return max((s.pressure(horizon_s, queue_max_s) for s in self.sources.values()), default=0.0)
+
+
+class OverloadController:
+    """Drives session degrade ladders from predicted overload across sessions."""
+
+    def __init__(
+        self,
+        thresholds: Optional[DegradeThresholds] = None,
+        horizon_s: float = HORIZON_S,
+        tau_s: float = EWMA_TAU_S,
+        action_interval_s: float = ACTION_INTERVAL_S,
+        recovery_hold_s: float = RECOVERY_HOLD_S,
+        queue_max_s: float = QUEUE_MAX_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.thresholds = thresholds or DegradeThresholds()
+        self.horizon_s = horizon_s
+        self.tau_s = tau_s
+        self.action_interval_s = action_interval_s
+        self.recovery_hold_s = recovery_hold_s
+        self.queue_max_s = queue_max_s
+        self._clock = clock
+        self._sessions: Dict[str, SessionLoad] = {}
+        self._lock = asyncio.Lock()
+        self._pressure = 0.0
+        self._calm_since: Optional[float] = None
+        self._last_action_at = -math.inf
+        self._last_eval_at = -math.inf
+        self._stats = {
+            "degrade_steps": 0,
+            "recover_steps": 0,
+            "peak_pressure": 0.0,
+        }
+
+    # ------------------------------------------------------------------ sessions
+
+    def register(self, key: str, ladder: DegradeLadder, priority: int = 0) -> None:
+        self._sessions[key] = SessionLoad(key, ladder, priority, joined_at=self._clock())
+        logger.debug(f"Overload controller: session {key} registered (priority {priority})")
+
+    def unregister(self, key: str) -> None:
+        self._sessions.pop(key, None)
+
+    def _source(self, key: str, source: str) -> Optional[SourceSignals]:
+        session = self._sessions.get(key)
+        if session is None:
+            return None
+        signals = session.sources.get(source)
+        if signals is None:
+            signals = session.sources[source] = SourceSignals(self.tau_s)
+        return signals
+
+    def observe_backlog(self, key: str, source: str, backlog_s: float, now: Optional[float] = None) -> None:
+        """Record the realtime queue backlog (seconds of audio) for a session source."""
+        signals = self._source(key, source)
+        if signals is not None:
+            signals.observe_backlog(backlog_s, self._clock() if now is None else now)
+
+    def observe_inference(self, key: str, source: str, processing_s: float, audio_s: float) -> None:
+        """Record one measured inference call (processing seconds over audio seconds)."""
+        signals = self._source(key, source)
+        if signals is not None:
+            signals.observe_inference(processing_s, audio_s)
+
+    # ------------------------------------------------------------------ decisions
+
+    def _level_for(self, pressure: float) -> DegradeLevel:
+        if pressure >= self.thresholds.emergency:
+            return DegradeLevel.EMERGENCY
+        if pressure >= self.thresholds.degrade:
+            return DegradeLevel.DEGRADE
+        if pressure >= self.thresholds.warning:
+            return DegradeLevel.WARNING
+        return DegradeLevel.NORMAL
+
+    async def evaluate(self, now: Optional[float] = None) -> Optional[Tuple[str, str]]:
+        """Take at most one ladder step; returns (session key, "degrade"|"recover") if one was taken."""
+        now = self._clock() if now is None else now
+        if now - self._last_eval_at < EVAL_INTERVAL_S or self._lock.locked():
+            return None
+        async with self._lock:
+            self._last_eval_at = now
+            sessions = list(self._sessions.values())
+            pressure = max((s.pressure(self.horizon_s, self.queue_max_s) for s in sessions), default=0.0)
+            self._pressure = pressure
+            self._stats["peak_pressure"] = max(self._stats["peak_pressure"], pressure)
+
+            # Hysteresis: between the recovery and warning thresholds nothing moves
+            if pressure < self.thresholds.recovery:
+                if self._calm_since is None:
+                    self._calm_since = now
+            else:
+                self._calm_since = None
+
+            if now - self._last_action_at < self.action_interval_s:
+                return None
+
+            target = self._level_for(pressure)
+            if target > DegradeLevel.NORMAL:
+                victims = sorted(
+                    (s for s in sessions if s.ladder.state.level < target),
+                    key=lambda s: (s.priority, -s.joined_at),
+                )
+                if not victims:
+                    return None
+                session = victims[0]
+                await session.ladder.degrade_step(max_level=target)
+                self._stats["degrade_steps"] += 1
+                decision = "degrade"
+            elif self._calm_since is not None and now - self._calm_since >= self.recovery_hold_s:
+                candidates = sorted(
+                    (s for s in sessions if DegradeLevel.NORMAL < s.ladder.state.level < DegradeLevel.FAILOVER),
+                    key=lambda s: (-s.priority, s.joined_at),
+                )
+                if not candidates:
+                    return None
+                session = candidates[0]
+                await session.ladder.recover_step()
+                self._stats["recover_steps"] += 1
+                decision = "recover"
+            else:
+                return None
+
+            self._last_action_at = now
+            logger.info(f"Overload controller: {decision} session {session.key} "
+                        f"(priority {session.priority}) to {session.ladder.state.level.name} at pressure {pressure:.2f}")
+            return session.key, decision
+
+    # ------------------------------------------------------------------ status
+
+    @property
+    def pressure(self) -> float:
+        return self._pressure
+
+    def session_pressure(self, key: str) -> float:
+        session = self._sessions.get(key)
+        return session.pressure(self.horizon_s, self.queue_max_s) if session is not None else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "pressure": round(self._pressure, 3),
+            "sessions": {
+                key: {
+                    "priority": s.priority,
+                    "level": s.ladder.state.level.name,
+                    "pressure": round(s.pressure(self.horizon_s, self.queue_max_s), 3),
+                }
+                for key, s in self._sessions.items()
+            },
+            **self._stats,
+        }
+
+
+_controller: Optional[OverloadController] = None
+
+
+def get_overload_controller() -> OverloadController:
+    """Get the process-wide overload controller."""
+    global _controller
+    if _controller is None:
+        _controller = OverloadController()
+    return _controller
+
+
+def reset_overload_controller() -> None:
+    """Reset the global controller (for testing)."""
+    global _controller
+    _controller = None
@@ -0,0 +1,328 @@
+"""
+Block-compressed PCM (".epcm") for recording-lane storage.
+
+Lossless, seekable container for PCM16 mono audio in pure NumPy.
+
+Each block of `block_samples` samples is encoded like a FLAC "fixed"
+subframe: the polynomial predictor order 0-3 with the smallest residual is
+chosen per block and residuals are Rice coded with a per-partition
+parameter. Speech typically compresses to ~60% of raw PCM16.
+
+Layout:
+    header  b"EPCM" | version u8 | sample_rate u32 | block_samples u32
+    blocks  payload_len u32 | n_samples u32 | order u8 | payload
+    payload k u8 * n_partitions | unary_len u32 | unary bits | remainder bits
+    footer  (offset u64, first_sample u64) * n | n u32 | b"EIDX"
+
+The footer is a seek index written on close. Files without one (e.g. after a
+crash) are still readable: the reader rebuilds the index by walking block
+headers, so every fully written block is recoverable.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import struct
+from bisect import bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+import numpy as np
+
+MAGIC = b"EPCM"
+INDEX_MAGIC = b"EIDX"
+VERSION = 1
+SUFFIX = ".epcm"
+
+_HEADER = struct.Struct("<4sBII")
+_BLOCK = struct.Struct("<IIB")
+_INDEX_ENTRY = struct.Struct("<QQ")
+_FOOTER = struct.Struct("<I4s")
+
+BLOCK_SECONDS = float(os.getenv("ECHOPANEL_RECORDING_BLOCK_SECONDS", "1.0"))
+MAX_ORDER = 3
+PARTITION_SAMPLES = 256
+MAX_RICE_K = 20
+
+
+def _residual(samples: np.ndarray, order: int) -> np.ndarray:
+    """Order-k fixed-predictor residual (k-th difference with zero warm-up), exact in int32."""
+    residual = samples.astype(np.int32)
+    for _ in range(order):
+        residual = np.diff(residual, prepend=np.int32(0))
+    return residual
+
+
+def _integrate(residual: np.ndarray, order: int) -> np.ndarray:
+    samples = residual.astype(np.int64)
+    for _ in range(order):
+        samples = np.cumsum(samples)
+    return samples.astype(np.int16)
+
+
+def _rice_parameters(z: np.ndarray) -> np.ndarray:
+    """Per-partition Rice parameter k minimizing coded bits."""
+    n_parts = -(-len(z) // PARTITION_SAMPLES)
+    padded = np.zeros(n_parts * PARTITION_SAMPLES, dtype=np.uint32)
+    padded[:len(z)] = z
+    parts = padded.reshape(n_parts, PARTITION_SAMPLES).astype(np.uint64)
+    costs = np.stack([(parts >> k).sum(axis=1) + k * PARTITION_SAMPLES for k in range(MAX_RICE_K + 1)])
+    return np.argmin(costs, axis=0).astype(np.uint8)
+
+
+def encode_block(samples: np.ndarray) -> bytes:
+    """
+    Encode one block of int16 samples (block header included).
+
+    Residuals are zigzag-mapped and Rice coded with a per-partition k. The
+    unary quotients and fixed-width remainders go to separate bit streams so
+    both encode and decode are vectorized.
+    """
+    best_order, best_residual, best_cost = 0, None, None
+    for order in range(MAX_ORDER + 1):
+        residual = _residual(samples, order)
+        cost = int(np.abs(residual, dtype=np.int64).sum())
+        if best_cost is None or cost < best_cost:
+            best_order, best_residual, best_cost = order, residual, cost
+
+    z = ((best_residual << 1) ^ (best_residual >> 31)).astype(np.uint32)
+    ks = _rice_parameters(z)
+    k = np.repeat(ks, PARTITION_SAMPLES)[:len(z)].astype(np.uint32)
+    quotients = (z >> k).astype(np.int64)
+
+    # Unary stream: q zeros followed by a one, per sample.
+    ones = np.cumsum(quotients + 1) - 1
+    unary = np.zeros(int(ones[-1]) + 1 if len(ones) else 0, dtype=np.uint8)
+    unary[ones] = 1
+
+    # Remainder stream: low k bits per sample, MSB first.
+    offsets = np.cumsum(k, dtype=np.int64) - k
+    low = np.zeros(int(k.sum()), dtype=np.uint8)
+    for j in range(int(ks.max()) if len(ks) else 0):
+        sel = k > j
+        low[offsets[sel] + j] = (z[sel] >> (k[sel] - 1 - j)) & 1
+
+    unary_bytes = np.packbits(unary).tobytes()
+    payload = ks.tobytes() + struct.pack("<I", len(unary_bytes)) + unary_bytes + np.packbits(low).tobytes()
+    return _BLOCK.pack(len(payload), len(samples), best_order) + payload
+
+
+def decode_block(payload: bytes, n_samples: int, order: int) -> np.ndarray:
+    n_parts = -(-n_samples // PARTITION_SAMPLES)
+    ks = np.frombuffer(payload, dtype=np.uint8, count=n_parts)
+    (unary_len,) = struct.unpack_from("<I", payload, n_parts)
+    pos = n_parts + 4
+    unary = np.unpackbits(np.frombuffer(payload, dtype=np.uint8, count=unary_len, offset=pos))
+    low = np.unpackbits(np.frombuffer(payload, dtype=np.uint8, offset=pos + unary_len))
+
+    ones = np.flatnonzero(unary)[:n_samples]
+    quotients = np.diff(ones, prepend=-1) - 1
+    k = np.repeat(ks, PARTITION_SAMPLES)[:n_samples].astype(np.int64)
+    offsets = np.cumsum(k) - k
+    remainders = np.zeros(n_samples, dtype=np.int64)
+    for j in range(int(ks.max()) if n_parts else 0):
+        sel = k > j
+        remainders[sel] = (remainders[sel] << 1) | low[offsets[sel] + j]
+
+    z = (quotients << k) | remainders
+    residual = (z >> 1) ^ -(z & 1)
+    return _integrate(residual, order)
+
+
+class BlockPCMWriter:
+    """
+    Incremental .epcm writer with a file-like `write(bytes)`.
+
+    Whole blocks are encoded as PCM arrives; `commit()` forces the partial
+    tail out as a short block so readers see every byte. `close()` writes
+    the seek index.
+    """
+
+    def __init__(
+        self,
+        f: BinaryIO,
+        sample_rate: int = 16000,
+        block_samples: Optional[int] = None,
+    ):
+        self._f = f
+        self.sample_rate = sample_rate
+        self.block_samples = block_samples or max(1, int(BLOCK_SECONDS * sample_rate))
+        self._pending = bytearray()
+        self._index: List[Tuple[int, int]] = []
+        self.samples_written = 0
+        self.compressed_bytes = 0
+        self.finished = False
+        self.closed = False
+        f.write(_HEADER.pack(MAGIC, VERSION, sample_rate, self.block_samples))
+
+    def write(self, data: Union[bytes, memoryview]) -> int:
+        self._pending.extend(data)
+        block_bytes = self.block_samples * 2
+        whole = len(self._pending) - len(self._pending) % block_bytes
+        if whole:
+            samples = np.frombuffer(bytes(self._pending[:whole]), dtype="<i2")
+            del self._pending[:whole]
+            for start in range(0, len(samples), self.block_samples):
+                self._write_block(samples[start:start + self.block_samples])
+        return len(data)
+
+    def _write_block(self, samples: np.ndarray) -> None:
+        encoded = encode_block(samples)
+        self._index.append((self._f.tell(), self.samples_written))
+        self._f.write(encoded)
+        self.samples_written += len(samples)
+        self.compressed_bytes += len(encoded)
+
+    def commit(self) -> None:
+        """Encode buffered samples as a (possibly short) block."""
+        usable = len(self._pending) - len(self._pending) % 2
+        if usable:
+            samples = np.frombuffer(bytes(self._pending[:usable]), dtype="<i2")
+            del self._pending[:usable]
+            self._write_block(samples)
+
+    def flush(self) -> None:
+        self._f.flush()
+
+    def fileno(self) -> int:
+        return self._f.fileno()
+
+    def finish(self) -> None:
+        """Commit the tail and append the seek index; the file stays open (e.g. for fsync)."""
+        if self.finished:
+            return
+        self.commit()
+        for offset, first_sample in self._index:
+            self._f.write(_INDEX_ENTRY.pack(offset, first_sample))
+        self._f.write(_FOOTER.pack(len(self._index), INDEX_MAGIC))
+        self._f.flush()
+        self.finished = True
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.finish()
+        self._f.close()
+        self.closed = True
+
+
+class BlockPCMReader:
+    """
+    Random-access reader for .epcm files.
+
+    Behaves like a read-only int16 sequence: `len(reader)` and
+    `reader[a:b]` decode only the blocks covering the slice. A small LRU of
+    decoded blocks makes sequential windowed reads cheap.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        start_sample: int = 0,
+        num_samples: Optional[int] = None,
+        cache_blocks: int = 8,
+    ):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            magic, version, self.sample_rate, self.block_samples = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{self.path} is not an EPCM v{VERSION} file")
+            self._offsets, self._firsts, total = self._load_index(f)
+        self.total_samples = total
+        self._start = min(max(0, start_sample), total)
+        available = total - self._start
+        self._length = available if num_samples is None else max(0, min(num_samples, available))
+        self._cache: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._cache_blocks = cache_blocks
+
+    def _load_index(self, f: BinaryIO) -> Tuple[List[int], List[int], int]:
+        file_size = f.seek(0, io.SEEK_END)
+        if file_size >= _HEADER.size + _FOOTER.size:
+            f.seek(file_size - _FOOTER.size)
+            count, magic = _FOOTER.unpack(f.read(_FOOTER.size))
+            index_start = file_size - _FOOTER.size - count * _INDEX_ENTRY.size
+            if magic == INDEX_MAGIC and index_start >= _HEADER.size:
+                f.seek(index_start)
+                raw = f.read(count * _INDEX_ENTRY.size)
+                entries = [_INDEX_ENTRY.unpack_from(raw, i * _INDEX_ENTRY.size) for i in range(count)]
+                offsets = [e[0] for e in entries]
+                firsts = [e[1] for e in entries]
+                total = 0
+                if entries:
+                    f.seek(offsets[-1])
+                    _, n_samples, _ = _BLOCK.unpack(f.read(_BLOCK.size))
+                    total = firsts[-1] + n_samples
+                return offsets, firsts, total
+        return self._scan_blocks(f, file_size)
+
+    @staticmethod
+    def _scan_blocks(f: BinaryIO, file_size: int) -> Tuple[List[int], List[int], int]:
+        """Rebuild the index from block headers (unclosed or truncated file)."""
+        offsets, firsts, total = [], [], 0
+        pos = _HEADER.size
+        while pos + _BLOCK.size <= file_size:
+            f.seek(pos)
+            comp_len, n_samples, order = _BLOCK.unpack(f.read(_BLOCK.size))
+            end = pos + _BLOCK.size + comp_len
+            if order > MAX_ORDER or n_samples == 0 or end > file_size:
+                break
+            offsets.append(pos)
+            firsts.append(total)
+            total += n_samples
+            pos = end
+        return offsets, firsts, total
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _block(self, index: int) -> np.ndarray:
+        cached = self._cache.get(index)
+        if cached is not None:
+            self._cache.move_to_end(index)
+            return cached
+        with open(self.path, "rb") as f:
+            f.seek(self._offsets[index])
+            comp_len, n_samples, order = _BLOCK.unpack(f.read(_BLOCK.size))
+            block = decode_block(f.read(comp_len), n_samples, order)
+        self._cache[index] = block
+        while len(self._cache) > self._cache_blocks:
+            self._cache.popitem(last=False)
+        return block
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        """Samples [start, stop) relative to this reader's range."""
+        start = max(0, start)
+        stop = min(stop, self._length)
+        if stop <= start:
+            return np.zeros(0, dtype=np.int16)
+        abs_start, abs_stop = self._start + start, self._start + stop
+        out = np.empty(abs_stop - abs_start, dtype=np.int16)
+        # Committed short blocks make block sizes irregular, so locate by first-sample index.
+        i = bisect_right(self._firsts, abs_start) - 1
+        filled = 0
+        while filled < len(out):
+            block = self._block(i)
+            first = self._firsts[i]
+            lo = abs_start + filled - first
+            take = min(len(block) - lo, len(out) - filled)
+            out[filled:filled + take] = block[lo:lo + take]
+            filled += take
+            i += 1
+        return out
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+            data = self.read(start, stop)
+            return data if step == 1 else data[::step]
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("sample index out of range")
+        return self.read(key, key + 1)[0]
+
+    def __array__(self, dtype=None):
+        data = self.read(0, self._length)
+        return data if dtype is None else data.astype(dtype)
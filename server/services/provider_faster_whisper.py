@@ -11,20 +11,24 @@ Fixes applied:
 - P1: Model loaded at first _get_model call (consider moving to startup)
 
 v0.4: Added health metrics and capabilities (PR6)
+v0.5: Thread-planned model replicas and a bounded inference executor (thread_planner.py)
+v0.6: Decodes are scheduled fairly across sessions (inference_scheduler.py)
 """
 
 from __future__ import annotations
 
 import asyncio
-import os
 import platform
 import time
-from typing import AsyncIterator, Optional, List
+from typing import AsyncIterator, Dict, Optional, Tuple
 
 from .asr_providers import (
     ASRProvider, ASRConfig, ASRSegment, ASRProviderRegistry, AudioSource,
-    ASRHealth, ProviderCapabilities,
+    ASRHealth, ProviderCapabilities, is_digital_silence,
 )
+from .model_residency import get_model_residency, replica_key, weights_key
+from .inference_scheduler import InferenceDropped, get_inference_scheduler
+from .thread_planner import ThreadPlan, get_thread_planner
 
 try:
     import numpy as np
@@ -42,12 +46,15 @@ class FasterWhisperProvider(ASRProvider):
 
     def __init__(self, config: ASRConfig):
         super().__init__(config)
-        self._model: Optional["WhisperModel"] = None
+        self._model: Optional["WhisperModel"] = None  # Most recently used replica
+        self._replicas: Dict[str, "WhisperModel"] = {}  # ThreadPlan.key -> model
+        self._replica_loads: Dict[str, asyncio.Future] = {}
         # NOTE: Removed global _infer_lock - CTranslate2 models are thread-safe
         # Each transcribe_stream call runs independently for true per-session concurrency
-        self._infer_times: List[float] = []  # Track inference times for health
         self._model_loaded_at: Optional[float] = None
         self._chunks_processed = 0
+        # (model, device, compute_type), fixed at first resolution for every replica
+        self._params: Optional[Tuple[str, str, str]] = None
 
     @property
     def name(self) -> str:
@@ -73,31 +80,61 @@ class FasterWhisperProvider(ASRProvider):
             recommended_ram_gb=4.0,
         )
 
-    def _get_model(self) -> Optional["WhisperModel"]:
+    def _load_params(self) -> Tuple[str, str, str]:
+        """(model, device, compute_type) from the config after CPU fallbacks.
+
+        ECHOPANEL_WHISPER_* overrides are applied when the config is built
+        (asr_stream._get_default_config), never here: a degraded or swapped-in
+        config must load the model it names. Resolved once, so replicas loaded
+        later in the background match the first one even if the config changes.
+        """
+        if self._params is not None:
+            return self._params
+        model_name = self.config.model_name
+        device = self.config.device
+
+        # CTranslate2 does not support MPS/Metal. On macOS, fallback to CPU.
+        if device == "auto" and platform.system() == "Darwin":
+            device = "cpu"
+        elif device in {"mps", "metal"}:
+            device = "cpu"
+
+        compute_type = self.config.compute_type
+
+        # float16 variants are not supported on CPU, force int8.
+        if device == "cpu" and "float16" in compute_type:
+            compute_type = "int8"
+        self._params = (model_name, device, compute_type)
+        return self._params
+
+    @property
+    def weights_key(self) -> str:
+        return weights_key(self.name, *self._load_params())
+
+    def _get_model(self, plan: Optional[ThreadPlan] = None) -> Optional["WhisperModel"]:
         if not self.is_available:
             return None
-        
-        if self._model is None:
-            model_name = os.getenv("ECHOPANEL_WHISPER_MODEL", self.config.model_name)
-            device = os.getenv("ECHOPANEL_WHISPER_DEVICE", self.config.device)
-            
-            # CTranslate2 does not support MPS/Metal. On macOS, fallback to CPU.
-            if device == "auto" and platform.system() == "Darwin":
-                device = "cpu"
-            elif device in {"mps", "metal"}:
-                device = "cpu"
-            
-            compute_type = os.getenv("ECHOPANEL_WHISPER_COMPUTE", self.config.compute_type)
-            
-            # float16 variants are not supported on CPU, force int8.
-            if device == "cpu" and "float16" in compute_type:
-                compute_type = "int8"
-                self.log("Forced compute_type='int8' for CPU execution (float16 variant unsupported)")
-            
-            self.log(f"Loading model={model_name} device={device} compute={compute_type}")
-            
+
+        plan = plan or get_thread_planner().current_plan()
+        model = self._replicas.get(plan.key)
+        if model is None:
+            model_name, device, compute_type = self._load_params()
+
+            def load() -> "WhisperModel":
+                if compute_type != self.config.compute_type:
+                    self.log("Forced compute_type='int8' for CPU execution (float16 variant unsupported)")
+                self.log(f"Loading model={model_name} device={device} compute={compute_type} "
+                         f"cpu_threads={plan.cpu_threads} num_workers={plan.num_workers}")
+                return WhisperModel(model_name, device=device, compute_type=compute_type,
+                                    cpu_threads=plan.cpu_threads, num_workers=plan.num_workers)
+
             try:
-                self._model = WhisperModel(model_name, device=device, compute_type=compute_type)
+                # Shared with every config variant of the same weights (chunk size, VAD, language)
+                model = get_model_residency().acquire(
+                    replica_key(weights_key(self.name, model_name, device, compute_type), plan.key), load,
+                    on_evict=self._on_weights_evicted,
+                )
+                self._replicas[plan.key] = model
                 self._model_loaded_at = time.time()
                 self._health.model_resident = True
                 self._health.model_loaded_at = self._model_loaded_at
@@ -107,9 +144,52 @@ class FasterWhisperProvider(ASRProvider):
                 self._health.last_error = str(e)
                 self._health.consecutive_errors += 1
                 raise e
-        
+
+        self._model = model
+        return model
+
+    def _model_for_chunk(self) -> Optional["WhisperModel"]:
+        """Replica planned for the current number of active streams.
+
+        A replica that is not loaded yet loads in the background while the
+        stream keeps decoding on the one it has.
+        """
+        plan = get_thread_planner().current_plan()
+        model = self._replicas.get(plan.key)
+        if model is not None:
+            self._model = model
+            return model
+        if plan.key not in self._replica_loads:
+            future = asyncio.get_running_loop().run_in_executor(None, self._get_model, plan)
+            self._replica_loads[plan.key] = future
+            future.add_done_callback(lambda f, key=plan.key: self._replica_load_done(key, f))
         return self._model
 
+    def _replica_load_done(self, key: str, future: asyncio.Future) -> None:
+        self._replica_loads.pop(key, None)
+        if not future.cancelled() and future.exception() is not None:
+            self.log(f"Replica {key} failed to load: {future.exception()}")
+
+    async def preload(self) -> None:
+        """Load (or share) the weights in a worker thread."""
+        # The shared plan is the common case (mic + system streams)
+        await asyncio.to_thread(self._get_model, get_thread_planner().plans[-1])
+
+    def _on_weights_evicted(self) -> None:
+        """Residency evicted one of our replicas; drop it (the next stream reloads)."""
+        residency = get_model_residency()
+        base = self.weights_key
+        self._replicas = {
+            key: model for key, model in self._replicas.items()
+            if residency.is_resident(replica_key(base, key))
+        }
+        if self._model not in self._replicas.values():
+            self._model = next(iter(self._replicas.values()), None)
+        if not self._replicas:
+            self._model_loaded_at = None
+            self._health.model_resident = False
+            self._health.model_loaded_at = None
+
     async def transcribe_stream(
         self,
         pcm_stream: AsyncIterator[bytes],
@@ -117,7 +197,21 @@ class FasterWhisperProvider(ASRProvider):
         source: Optional[AudioSource] = None,
     ) -> AsyncIterator[ASRSegment]:
         """Transcribe audio stream using faster-whisper."""
-        
+        planner = get_thread_planner()
+        with planner.track_stream():
+            segments = self._transcribe_chunks(pcm_stream, sample_rate, source)
+            try:
+                async for segment in segments:
+                    yield segment
+            finally:
+                await segments.aclose()
+
+    async def _transcribe_chunks(
+        self,
+        pcm_stream: AsyncIterator[bytes],
+        sample_rate: int,
+        source: Optional[AudioSource],
+    ) -> AsyncIterator[ASRSegment]:
         bytes_per_sample = 2
         chunk_seconds = self.config.chunk_seconds
         chunk_bytes = int(sample_rate * chunk_seconds * bytes_per_sample)
@@ -126,8 +220,10 @@ class FasterWhisperProvider(ASRProvider):
         chunk_count = 0
 
         self.log(f"Started streaming, chunk_bytes={chunk_bytes} ({chunk_seconds}s)")
+        scheduler = get_inference_scheduler()
 
-        model = self._get_model()
+        # Don't load on the event loop when a replica is already resident
+        model = self._model_for_chunk() if self._replicas else self._get_model()
         if model is None or np is None:
             self.log("ASR unavailable: missing faster-whisper or numpy")
             yield ASRSegment(
@@ -156,6 +252,10 @@ class FasterWhisperProvider(ASRProvider):
                 t1 = (processed_samples + chunk_samples) / sample_rate
                 processed_samples += chunk_samples
 
+                if is_digital_silence(audio_bytes):
+                    self.log(f"Skipping chunk #{chunk_count} t={t0:.1f}-{t1:.1f}s: digital silence")
+                    continue
+
                 self.log(f"Processing chunk #{chunk_count}, {len(audio_bytes)} bytes, t={t0:.1f}-{t1:.1f}s")
 
                 audio = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
@@ -169,32 +269,34 @@ class FasterWhisperProvider(ASRProvider):
                 else:
                     self.log(f"DEBUG: Audio OK - min={audio_min:.4f}, max={audio_max:.4f}, mean={audio_mean:.4f}")
 
-                infer_start = time.perf_counter()
+                model = self._model_for_chunk() or model
                 
                 def _transcribe():
                     # CTranslate2 models are thread-safe - no lock needed
                     # This allows true per-session concurrency instead of global serialization
+                    # Timed in the worker so scheduler queue wait doesn't count as inference
+                    infer_start = time.perf_counter()
                     segments, info = model.transcribe(
                         audio,
                         vad_filter=False,  # Force OFF for testing
                         language=self.config.language,
                     )
-                    return list(segments), info
+                    return list(segments), info, (time.perf_counter() - infer_start) * 1000
 
-                segments, info = await asyncio.to_thread(_transcribe)
+                audio_duration_sec = len(audio_bytes) / (sample_rate * bytes_per_sample)
+                try:
+                    segments, info, infer_ms = await scheduler.run(_transcribe, audio_duration_sec)
+                except InferenceDropped as e:
+                    # Overloaded: skip this chunk rather than fall further behind
+                    self.log(f"Chunk #{chunk_count} t={t0:.1f}-{t1:.1f}s dropped: {e}")
+                    continue
                 
-                infer_ms = (time.perf_counter() - infer_start) * 1000
-                self._infer_times.append(infer_ms)
+                self._record_inference(infer_ms, audio_duration_sec)
                 self._chunks_processed += 1
-                
-                # Keep only last 100 measurements
-                if len(self._infer_times) > 100:
-                    self._infer_times = self._infer_times[-100:]
                 detected_lang = getattr(info, 'language', None)
                 
                 # Calculate RTF (Real-Time Factor) - critical metric for streaming performance
                 # RTF = processing_time / audio_time. < 1.0 means faster than real-time (good)
-                audio_duration_sec = len(audio_bytes) / (sample_rate * bytes_per_sample)
                 rtf = (infer_ms / 1000.0) / audio_duration_sec if audio_duration_sec > 0 else 0.0
                 
                 # Log with RTF - this is the key metric for diagnosing backpressure
@@ -258,18 +360,22 @@ class FasterWhisperProvider(ASRProvider):
                 self.log(f"Skipping final chunk: low energy ({audio_energy:.4f})")
                 return
 
+            model = self._model_for_chunk() or model
+
             def _transcribe():
                 # CTranslate2 models are thread-safe - no lock needed
+                infer_start = time.perf_counter()
                 segments, info = model.transcribe(
                     audio,
                     vad_filter=True,  # P2 Fix: Always use VAD for final chunk
                     language=self.config.language,
                 )
-                return list(segments), info
+                return list(segments), info, (time.perf_counter() - infer_start) * 1000
 
-            infer_start = time.perf_counter()
-            segments, info = await asyncio.to_thread(_transcribe)
-            infer_ms = (time.perf_counter() - infer_start) * 1000
+            # The end-of-stream flush is never shed
+            segments, info, infer_ms = await scheduler.run(
+                _transcribe, len(audio_bytes) / (sample_rate * bytes_per_sample), droppable=False
+            )
             detected_lang = getattr(info, 'language', None)
             
             # Calculate RTF for final chunk
@@ -311,26 +417,19 @@ class FasterWhisperProvider(ASRProvider):
         """Get health metrics for faster-whisper provider."""
         health = await super().health()
         
-        # Calculate RTF from inference times
-        if self._infer_times:
-            avg_ms = sum(self._infer_times) / len(self._infer_times)
-            sorted_times = sorted(self._infer_times)
-            p95_ms = sorted_times[int(len(sorted_times) * 0.95)] if len(sorted_times) > 1 else avg_ms
-            p99_ms = sorted_times[int(len(sorted_times) * 0.99)] if len(sorted_times) > 1 else avg_ms
-            
+        # Calculate RTF from inference times (base health() fills avg/p95/p99
+        # from the shared streaming quantiles)
+        if self._infer_stats.count():
             # Assume 4s chunks (configurable)
             chunk_seconds = self.config.chunk_seconds
-            rtf = (avg_ms / 1000.0) / chunk_seconds
+            rtf = (health.avg_infer_ms / 1000.0) / chunk_seconds
             
             # Log RTF to help debug
-            self.log(f"RTF: {rtf:.2f} (avg_infer={avg_ms:.0f}ms for {chunk_seconds}s chunk, p95={p95_ms:.0f}ms)")
+            self.log(f"RTF: {rtf:.2f} (avg_infer={health.avg_infer_ms:.0f}ms for {chunk_seconds}s chunk, p95={health.p95_infer_ms:.0f}ms)")
             
             health.realtime_factor = rtf
-            health.avg_infer_ms = avg_ms
-            health.p95_infer_ms = p95_ms
-            health.p99_infer_ms = p99_ms
         
-        health.model_resident = self._model is not None
+        health.model_resident = bool(self._replicas)
         health.model_loaded_at = self._model_loaded_at
         health.chunks_processed = self._chunks_processed
         
@@ -338,9 +437,13 @@ class FasterWhisperProvider(ASRProvider):
 
     async def unload(self) -> None:
         """Release model reference so memory can be reclaimed."""
+        if self._replicas:
+            # Other config variants may still share (or have pinned) the weights
+            get_model_residency().release(self.weights_key)
         self._model = None
+        self._replicas = {}
         self._model_loaded_at = None
-        self._infer_times.clear()
+        self._infer_stats.reset()
         self._chunks_processed = 0
         await super().unload()
 
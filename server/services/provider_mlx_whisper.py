@@ -26,7 +26,7 @@ from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import AsyncIterator, Optional
 
-from .asr_providers import ASRProvider, ASRConfig, ASRSegment, ASRProviderRegistry, AudioSource
+from .asr_providers import ASRProvider, ASRConfig, ASRSegment, ASRProviderRegistry, AudioSource, is_digital_silence
 
 
 # Map standard model names to mlx-community model IDs
@@ -71,7 +71,6 @@ class MLXWhisperProvider(ASRProvider):
 
     def __init__(self, config: ASRConfig):
         super().__init__(config)
-        self._infer_times: list[float] = []
         self._chunks_processed = 0
         self._model_cache_dir = Path("~/.cache/whisper-mlx").expanduser()
         self._model_path: Optional[str] = None
@@ -225,6 +224,9 @@ class MLXWhisperProvider(ASRProvider):
                 t1 = (processed_samples + chunk_samples) / sample_rate
                 processed_samples += chunk_samples
                 
+                if is_digital_silence(audio_bytes):
+                    continue
+                
                 # Convert to numpy float32
                 audio_array = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
                 
@@ -240,7 +242,7 @@ class MLXWhisperProvider(ASRProvider):
                     )
                     
                     infer_time = time.perf_counter() - infer_start
-                    self._infer_times.append(infer_time)
+                    self._record_inference(infer_time * 1000, chunk_samples / sample_rate)
                     self._chunks_processed += 1
                     
                     # Extract text
@@ -269,7 +271,7 @@ class MLXWhisperProvider(ASRProvider):
                     )
         
         # Process any remaining buffer
-        if buffer:
+        if buffer and not is_digital_silence(buffer):
             t0 = processed_samples / sample_rate
             chunk_samples = len(buffer) // bytes_per_sample
             t1 = (processed_samples + chunk_samples) / sample_rate
@@ -300,14 +302,15 @@ class MLXWhisperProvider(ASRProvider):
 
     async def health(self) -> dict:
         """Return health metrics."""
-        if not self._infer_times:
+        if not self._infer_stats.count():
             return {
                 "status": "idle",
                 "realtime_factor": 0.0,
                 "chunks_processed": 0,
             }
         
-        avg_infer = sum(self._infer_times) / len(self._infer_times)
+        avg_infer_ms, p95_infer_ms, _ = self._inference_summary()
+        avg_infer = avg_infer_ms / 1000
         chunk_seconds = self.config.chunk_seconds
         rtf = avg_infer / chunk_seconds if chunk_seconds > 0 else 0
         
@@ -316,6 +319,7 @@ class MLXWhisperProvider(ASRProvider):
             "realtime_factor": rtf,
             "chunks_processed": self._chunks_processed,
             "avg_infer_ms": avg_infer * 1000,
+            "p95_infer_ms": p95_infer_ms,
             "model_cached": self._model_path is not None,
         }
 
@@ -340,7 +344,7 @@ class MLXWhisperProvider(ASRProvider):
             self._thread_pool = None
         
         self._model_path = None
-        self._infer_times.clear()
+        self._infer_stats.reset()
         self._chunks_processed = 0
         await super().unload()
 
@@ -23,7 +23,8 @@ from typing import AsyncIterator, Optional
 
 import numpy as np
 
-from .asr_providers import ASRProvider, ASRConfig, ASRSegment, ASRProviderRegistry, AudioSource
+from .asr_providers import ASRProvider, ASRConfig, ASRSegment, ASRProviderRegistry, AudioSource, is_digital_silence
+from .model_residency import get_model_residency
 
 
 class ONNXWhisperProvider(ASRProvider):
@@ -42,7 +43,6 @@ class ONNXWhisperProvider(ASRProvider):
 
     def __init__(self, config: ASRConfig):
         super().__init__(config)
-        self._infer_times: list[float] = []
         self._chunks_processed = 0
         self._session = None
         self._model_dir = Path(os.getenv("WHISPER_ONNX_MODEL_DIR", "~/.cache/whisper-onnx")).expanduser()
@@ -89,10 +89,11 @@ class ONNXWhisperProvider(ASRProvider):
             
             self.log(f"Using providers: {providers}")
             
-            # Load session
-            self._session = ort.InferenceSession(
-                str(model_path),
-                providers=providers
+            # Load session (shared by config variants that differ only in streaming params)
+            self._session = get_model_residency().acquire(
+                self.weights_key,
+                lambda: ort.InferenceSession(str(model_path), providers=providers),
+                on_evict=self._on_weights_evicted,
             )
             
             self.log(f"ONNX model loaded: {model_path}")
@@ -105,6 +106,14 @@ class ONNXWhisperProvider(ASRProvider):
             self.log(f"Error loading ONNX model: {e}")
             return False
 
+    async def preload(self) -> None:
+        if self._session is None and not await asyncio.to_thread(self._load_model):
+            raise RuntimeError(f"ONNX model {self.config.model_name} failed to load")
+
+    def _on_weights_evicted(self) -> None:
+        """Residency evicted the session; the next stream reloads it."""
+        self._session = None
+
     @property
     def name(self) -> str:
         return "onnx_whisper"
@@ -180,6 +189,9 @@ class ONNXWhisperProvider(ASRProvider):
                 t1 = (processed_samples + chunk_samples) / sample_rate
                 processed_samples += chunk_samples
                 
+                if is_digital_silence(audio_bytes):
+                    continue
+                
                 # Convert to numpy
                 _audio_array = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
                 
@@ -195,7 +207,7 @@ class ONNXWhisperProvider(ASRProvider):
                     text = "[ONNX inference not yet implemented]"
                     
                     infer_time = time.perf_counter() - infer_start
-                    self._infer_times.append(infer_time)
+                    self._record_inference(infer_time * 1000, chunk_samples / sample_rate)
                     self._chunks_processed += 1
                     
                     if text:
@@ -236,14 +248,15 @@ class ONNXWhisperProvider(ASRProvider):
 
     async def health(self) -> dict:
         """Return health metrics."""
-        if not self._infer_times:
+        if not self._infer_stats.count():
             return {
                 "status": "idle",
                 "realtime_factor": 0.0,
                 "chunks_processed": 0,
             }
         
-        avg_infer = sum(self._infer_times) / len(self._infer_times)
+        avg_infer_ms, p95_infer_ms, _ = self._inference_summary()
+        avg_infer = avg_infer_ms / 1000
         chunk_seconds = self.config.chunk_seconds
         rtf = avg_infer / chunk_seconds if chunk_seconds > 0 else 0
         
@@ -252,13 +265,16 @@ class ONNXWhisperProvider(ASRProvider):
             "realtime_factor": rtf,
             "chunks_processed": self._chunks_processed,
             "avg_infer_ms": avg_infer * 1000,
+            "p95_infer_ms": p95_infer_ms,
             "model_loaded": self._session is not None,
         }
 
     async def unload(self) -> None:
         """Clean up."""
+        if self._session is not None:
+            get_model_residency().release(self.weights_key)
         self._session = None
-        self._infer_times.clear()
+        self._infer_stats.reset()
         self._chunks_processed = 0
         await super().unload()
 
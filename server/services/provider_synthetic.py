@@ -0,0 +1,353 @@
+"""
+Synthetic ASR Provider (calibrated cost model)
+
+A CPU-free stand-in for faster-whisper, for scale testing the scheduler,
+backpressure and the degrade ladder with 100+ sessions on one box. It
+consumes PCM like a real chunked provider: it buffers `chunk_seconds` of
+audio, "infers", then reads more. It emits deterministic segments, and its
+inference latency follows a cost model instead of burning CPU:
+
+    latency = overhead_ms + ms_per_audio_s * audio_seconds   (x jitter)
+
+Each chunk is submitted to the shared inference scheduler like a
+faster-whisper decode, so cross-session fair queuing and deadline drops
+apply; the end-of-stream flush is not droppable. A running job holds a
+scheduler worker while its cost is served by a process-wide pool of
+simulated cores. While more calls are in flight than there are cores, each
+progresses at cores/in_flight speed (processor sharing), so latency
+stretches under contention the way CPU-bound inference does.
+
+Configuration:
+    ECHOPANEL_ASR_PROVIDER=synthetic
+    ECHOPANEL_SYNTH_OVERHEAD_MS        fixed cost per call (default 120)
+    ECHOPANEL_SYNTH_MS_PER_AUDIO_S     cost per audio second (default 150, ~RTF 0.15)
+    ECHOPANEL_SYNTH_CORES              simulated cores (default: os.cpu_count())
+    ECHOPANEL_SYNTH_JITTER             +/- fractional jitter (default 0.1)
+    ECHOPANEL_SYNTH_SEED               jitter/text seed (default 0)
+    ECHOPANEL_SYNTH_CALIBRATION        scripts/benchmark_asr_engines.py --output JSON;
+                                       fits overhead and per-second cost from it
+    ECHOPANEL_SYNTH_CALIBRATION_ENGINE engine to fit (default faster-whisper)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+import weakref
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+
+from .asr_providers import (
+    ASRProvider, ASRConfig, ASRSegment, ASRProviderRegistry, AudioSource, ProviderCapabilities, is_digital_silence,
+)
+from .inference_scheduler import InferenceDropped, get_inference_scheduler
+
+logger = logging.getLogger(__name__)
+
+SYNTH_OVERHEAD_MS = float(os.getenv("ECHOPANEL_SYNTH_OVERHEAD_MS", "120"))
+SYNTH_MS_PER_AUDIO_S = float(os.getenv("ECHOPANEL_SYNTH_MS_PER_AUDIO_S", "150"))
+SYNTH_CORES = int(os.getenv("ECHOPANEL_SYNTH_CORES", "0")) or (os.cpu_count() or 4)
+SYNTH_JITTER = float(os.getenv("ECHOPANEL_SYNTH_JITTER", "0.1"))
+SYNTH_SEED = int(os.getenv("ECHOPANEL_SYNTH_SEED", "0"))
+SYNTH_CALIBRATION = os.getenv("ECHOPANEL_SYNTH_CALIBRATION", "")
+SYNTH_CALIBRATION_ENGINE = os.getenv("ECHOPANEL_SYNTH_CALIBRATION_ENGINE", "faster-whisper")
+
+_WORDS = (
+    "the", "team", "agreed", "to", "ship", "next", "week", "after", "review", "of",
+    "budget", "numbers", "and", "risks", "we", "need", "owner", "for", "follow", "up",
+    "on", "customer", "feedback", "launch", "plan", "timeline", "action", "item", "decision", "call",
+)
+WORDS_PER_SECOND = 2.5
+
+
+@dataclass(frozen=True)
+class CostModel:
+    """Uncontended inference latency: overhead_ms + ms_per_audio_s * seconds."""
+
+    overhead_ms: float = SYNTH_OVERHEAD_MS
+    ms_per_audio_s: float = SYNTH_MS_PER_AUDIO_S
+    jitter: float = SYNTH_JITTER
+    source: str = "defaults"
+
+    def cost_ms(self, audio_seconds: float, rng: Optional[random.Random] = None) -> float:
+        base = self.overhead_ms + self.ms_per_audio_s * audio_seconds
+        if rng is not None and self.jitter > 0:
+            base *= 1.0 + rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, base)
+
+
+def calibrate_from_benchmark(path: Path, engine: str = SYNTH_CALIBRATION_ENGINE,
+                             jitter: float = SYNTH_JITTER) -> CostModel:
+    """Fit a CostModel to `scripts/benchmark_asr_engines.py --output` results.
+
+    Two or more audio durations give a least-squares fit of overhead and
+    per-second cost. A single point keeps the default overhead (or none, if
+    the point is cheaper than that) and attributes the rest to audio.
+    """
+    data = json.loads(Path(path).read_text())
+    points = [
+        (float(r["audio_duration_s"]), float(r["inference_time_ms"]))
+        for r in data.get("results", [])
+        if r.get("engine") == engine and not r.get("errors")
+        and float(r.get("audio_duration_s", 0)) > 0 and float(r.get("inference_time_ms", 0)) > 0
+    ]
+    if not points:
+        raise ValueError(f"No usable '{engine}' results in {path}")
+
+    label = f"{path}:{engine}"
+    xs = [x for x, _ in points]
+    if len(set(xs)) >= 2:
+        n = len(points)
+        mean_x = sum(xs) / n
+        mean_y = sum(y for _, y in points) / n
+        var_x = sum((x - mean_x) ** 2 for x in xs)
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+        slope = max(0.0, slope)
+        overhead = max(0.0, mean_y - slope * mean_x)
+        return CostModel(overhead, slope, jitter, label)
+
+    audio_s = xs[0]
+    infer_ms = sum(y for _, y in points) / len(points)
+    overhead = SYNTH_OVERHEAD_MS if infer_ms > SYNTH_OVERHEAD_MS else 0.0
+    return CostModel(overhead, (infer_ms - overhead) / audio_s, jitter, label)
+
+
+class CorePool:
+    """Processor-sharing simulation of `cores` CPUs for one event loop.
+
+    Each job carries its remaining uncontended work in seconds. With n jobs
+    in flight each one progresses at min(1, cores / n) per wall-clock second.
+    One timer fires at the next completion; no polling.
+    """
+
+    def __init__(self, cores: int, loop: asyncio.AbstractEventLoop):
+        self.cores = max(1, cores)
+        self._jobs: Dict[asyncio.Future, float] = {}
+        self._last = loop.time()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.peak_in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._jobs)
+
+    def _rate(self) -> float:
+        n = len(self._jobs)
+        return 1.0 if n <= self.cores else self.cores / n
+
+    def _advance(self) -> None:
+        now = asyncio.get_running_loop().time()
+        if self._jobs:
+            done = (now - self._last) * self._rate()
+            for fut in self._jobs:
+                self._jobs[fut] -= done
+        self._last = now
+
+    def _reschedule(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for fut, remaining in list(self._jobs.items()):
+            if remaining <= 1e-6:
+                del self._jobs[fut]
+                if not fut.done():
+                    fut.set_result(None)
+        if self._jobs:
+            delay = min(self._jobs.values()) / self._rate()
+            self._timer = asyncio.get_running_loop().call_later(max(0.0, delay), self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._advance()
+        self._reschedule()
+
+    async def run(self, work_s: float) -> None:
+        """Wait until `work_s` seconds of uncontended work have been served."""
+        self._advance()
+        fut = asyncio.get_running_loop().create_future()
+        self._jobs[fut] = max(0.0, work_s)
+        self.peak_in_flight = max(self.peak_in_flight, len(self._jobs))
+        self._reschedule()
+        try:
+            await fut
+        finally:
+            if fut in self._jobs:  # cancelled mid-flight
+                self._advance()
+                del self._jobs[fut]
+                self._reschedule()
+
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, CorePool]" = weakref.WeakKeyDictionary()
+
+
+def get_core_pool(cores: int = SYNTH_CORES) -> CorePool:
+    """The running loop's shared pool (all synthetic provider instances contend here)."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = CorePool(cores, loop)
+    return pool
+
+
+def synthetic_text(seed: int, source: str, index: int, audio_seconds: float) -> str:
+    """Deterministic pseudo-sentence for chunk `index` of `source`."""
+    rng = random.Random(zlib.crc32(f"{seed}:{source}:{index}".encode()))
+    n_words = max(1, round(audio_seconds * WORDS_PER_SECOND))
+    return " ".join(rng.choice(_WORDS) for _ in range(n_words)).capitalize() + "."
+
+
+class SyntheticProvider(ASRProvider):
+    """
+    Deterministic ASR provider with a calibrated latency/contention model.
+
+    Digitally silent chunks (all zero samples) are skipped without inference,
+    like the real chunked providers; every other chunk produces one final
+    unless the inference scheduler drops it.
+    """
+
+    def __init__(self, config: ASRConfig, cost_model: Optional[CostModel] = None,
+                 cores: int = SYNTH_CORES, seed: int = SYNTH_SEED):
+        super().__init__(config)
+        self._cores = cores
+        self._seed = seed
+        self._chunks_processed = 0
+        self.cost_model = cost_model or self._default_cost_model()
+
+    @staticmethod
+    def _default_cost_model() -> CostModel:
+        if SYNTH_CALIBRATION:
+            try:
+                model = calibrate_from_benchmark(Path(SYNTH_CALIBRATION))
+                logger.info(
+                    f"Synthetic ASR calibrated from {model.source}: "
+                    f"{model.overhead_ms:.0f}ms + {model.ms_per_audio_s:.0f}ms/s"
+                )
+                return model
+            except Exception as e:
+                logger.warning(f"Synthetic ASR calibration failed ({e}); using defaults")
+        return CostModel()
+
+    @property
+    def name(self) -> str:
+        return "synthetic"
+
+    @property
+    def is_available(self) -> bool:
+        return True
+
+    @property
+    def capabilities(self) -> ProviderCapabilities:
+        return ProviderCapabilities(
+            supports_streaming=True,
+            supports_batch=True,
+            min_ram_gb=0.1,
+            recommended_ram_gb=0.1,
+        )
+
+    async def transcribe_stream(
+        self,
+        pcm_stream: AsyncIterator[bytes],
+        sample_rate: int = 16000,
+        source: Optional[AudioSource] = None,
+    ) -> AsyncIterator[ASRSegment]:
+        bytes_per_sample = 2
+        chunk_seconds = self.config.chunk_seconds
+        chunk_bytes = int(sample_rate * chunk_seconds * bytes_per_sample)
+        chunk_bytes -= chunk_bytes % bytes_per_sample
+        source_name = source.value if source is not None else "system"
+        rng = random.Random(zlib.crc32(f"{self._seed}:{source_name}".encode()))
+        pool = get_core_pool(self._cores)
+        scheduler = get_inference_scheduler()
+        loop = asyncio.get_running_loop()
+        buffer = bytearray()
+        processed_samples = 0
+        index = 0
+
+        async def _infer(audio_bytes: bytes, droppable: bool = True) -> Optional[ASRSegment]:
+            nonlocal processed_samples, index
+            chunk_samples = len(audio_bytes) // bytes_per_sample
+            t0 = processed_samples / sample_rate
+            t1 = (processed_samples + chunk_samples) / sample_rate
+            processed_samples += chunk_samples
+            audio_s = chunk_samples / sample_rate
+            if is_digital_silence(audio_bytes):
+                return None
+            work_s = self.cost_model.cost_ms(audio_s, rng) / 1000.0
+
+            def _decode() -> float:
+                # Occupies the scheduler worker for the simulated decode, like a
+                # real provider's executor thread; timed here so queue wait doesn't count.
+                infer_start = time.perf_counter()
+                asyncio.run_coroutine_threadsafe(pool.run(work_s), loop).result()
+                return (time.perf_counter() - infer_start) * 1000
+
+            try:
+                infer_ms = await scheduler.run(_decode, audio_s, droppable=droppable)
+            except InferenceDropped as e:
+                logger.debug(f"Synthetic {source_name} chunk t={t0:.1f}-{t1:.1f}s dropped: {e}")
+                return None
+            self._record_inference(infer_ms, audio_s)
+            self._chunks_processed += 1
+            index += 1
+            return ASRSegment(
+                text=synthetic_text(self._seed, source_name, index - 1, audio_s),
+                t0=t0,
+                t1=t1,
+                confidence=0.9,
+                is_final=True,
+                source=source,
+                language=self.config.language or "en",
+            )
+
+        async for chunk in pcm_stream:
+            buffer.extend(chunk)
+            while len(buffer) >= chunk_bytes:
+                audio_bytes = bytes(buffer[:chunk_bytes])
+                del buffer[:chunk_bytes]
+                segment = await _infer(audio_bytes)
+                if segment is not None:
+                    yield segment
+
+        if len(buffer) >= bytes_per_sample:
+            segment = await _infer(bytes(buffer[: len(buffer) - len(buffer) % bytes_per_sample]), droppable=False)
+            if segment is not None:
+                yield segment
+
+    async def health(self) -> dict:
+        """Return health metrics, including simulated contention."""
+        pool = _pools.get(asyncio.get_running_loop())
+        result = {
+            "status": "active" if self._infer_stats.count() else "idle",
+            "realtime_factor": 0.0,
+            "chunks_processed": self._chunks_processed,
+            "cost_model": {
+                "overhead_ms": self.cost_model.overhead_ms,
+                "ms_per_audio_s": self.cost_model.ms_per_audio_s,
+                "source": self.cost_model.source,
+            },
+            "cores": self._cores,
+            "in_flight": pool.in_flight if pool else 0,
+            "peak_in_flight": pool.peak_in_flight if pool else 0,
+        }
+        if self._infer_stats.count():
+            avg_infer_ms, p95_infer_ms, _ = self._inference_summary()
+            chunk_seconds = self.config.chunk_seconds
+            result["realtime_factor"] = avg_infer_ms / 1000 / chunk_seconds if chunk_seconds > 0 else 0.0
+            result["avg_infer_ms"] = avg_infer_ms
+            result["p95_infer_ms"] = p95_infer_ms
+        return result
+
+    async def unload(self) -> None:
+        self._infer_stats.reset()
+        self._chunks_processed = 0
+        await super().unload()
+
+
+# Register the provider
+ASRProviderRegistry.register("synthetic", SyntheticProvider)
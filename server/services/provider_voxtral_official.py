@@ -55,7 +55,7 @@ import time
 from typing import AsyncIterator, Optional
 from dataclasses import dataclass
 
-from .asr_providers import ASRProvider, ASRConfig, ASRSegment, ASRProviderRegistry, AudioSource
+from .asr_providers import ASRProvider, ASRConfig, ASRSegment, ASRProviderRegistry, AudioSource, is_digital_silence
 
 
 # Model configuration
@@ -109,7 +109,6 @@ class VoxtralOfficialProvider(ASRProvider):
             streaming_delay_ms=int(os.getenv("VOXTRAL_STREAMING_DELAY_MS", str(DEFAULT_STREAMING_DELAY_MS))),
         )
         
-        self._infer_times: list[float] = []
         self._chunks_processed = 0
         self._session: Optional[any] = None
         
@@ -338,19 +337,22 @@ class VoxtralOfficialProvider(ASRProvider):
                 t1 = (processed_samples + chunk_samples) / sample_rate
                 processed_samples += chunk_samples
                 
+                if is_digital_silence(audio_bytes):
+                    continue
+                
                 infer_start = time.perf_counter()
                 
                 segment = await self._transcribe_with_vllm(audio_bytes, t0, t1)
                 
                 infer_time = time.perf_counter() - infer_start
-                self._infer_times.append(infer_time)
+                self._record_inference(infer_time * 1000, chunk_samples / sample_rate)
                 self._chunks_processed += 1
                 
                 if segment:
                     yield segment
         
         # Process any remaining buffer
-        if buffer:
+        if buffer and not is_digital_silence(buffer):
             t0 = processed_samples / sample_rate
             chunk_samples = len(buffer) // bytes_per_sample
             t1 = (processed_samples + chunk_samples) / sample_rate
@@ -365,7 +367,7 @@ class VoxtralOfficialProvider(ASRProvider):
         loop = asyncio.get_event_loop()
         vllm_healthy = await loop.run_in_executor(None, self._check_vllm_health)
         
-        if not self._infer_times:
+        if not self._infer_stats.count():
             return {
                 "status": "idle" if not vllm_healthy else "ready",
                 "vllm_url": self.voxtral_config.vllm_url,
@@ -375,7 +377,8 @@ class VoxtralOfficialProvider(ASRProvider):
                 "chunks_processed": 0,
             }
         
-        avg_infer = sum(self._infer_times) / len(self._infer_times)
+        avg_infer_ms, p95_infer_ms, _ = self._inference_summary()
+        avg_infer = avg_infer_ms / 1000
         delay_seconds = self.voxtral_config.streaming_delay_ms / 1000.0
         rtf = avg_infer / delay_seconds if delay_seconds > 0 else 0
         
@@ -387,13 +390,14 @@ class VoxtralOfficialProvider(ASRProvider):
             "realtime_factor": rtf,
             "chunks_processed": self._chunks_processed,
             "avg_infer_ms": avg_infer * 1000,
+            "p95_infer_ms": p95_infer_ms,
             "model": MODEL_ID,
         }
 
     async def unload(self) -> None:
         """Clean up resources."""
         self._session = None
-        self._infer_times.clear()
+        self._infer_stats.reset()
         self._chunks_processed = 0
         await super().unload()
 
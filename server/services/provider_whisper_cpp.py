@@ -26,7 +26,7 @@ import time
 from pathlib import Path
 from typing import AsyncIterator, Optional
 
-from .asr_providers import ASRProvider, ASRConfig, ASRSegment, ASRProviderRegistry, AudioSource
+from .asr_providers import ASRProvider, ASRConfig, ASRSegment, ASRProviderRegistry, AudioSource, is_digital_silence
 
 
 class WhisperCppProvider(ASRProvider):
@@ -63,7 +63,6 @@ class WhisperCppProvider(ASRProvider):
         self.model_path = self._get_model_path()
         self._process: Optional[asyncio.subprocess.Process] = None
         self._session_lock = asyncio.Lock()
-        self._infer_times: list[float] = []
         self._chunks_processed = 0
         
     def _get_model_path(self) -> Path:
@@ -131,19 +130,21 @@ class WhisperCppProvider(ASRProvider):
 
     def get_performance_stats(self) -> dict:
         """Get performance statistics."""
-        if not self._infer_times:
+        if not self._infer_stats.count():
             return {
                 "avg_inference_ms": 0.0,
                 "realtime_factor": 0.0,
                 "chunks_processed": 0,
             }
         
-        avg_infer = sum(self._infer_times) / len(self._infer_times)
+        avg_infer_ms, p95_infer_ms, _ = self._inference_summary()
+        avg_infer = avg_infer_ms / 1000
         chunk_seconds = self.config.chunk_seconds
         rtf = avg_infer / chunk_seconds if chunk_seconds > 0 else 0
         
         return {
             "avg_inference_ms": avg_infer * 1000,
+            "p95_inference_ms": p95_infer_ms,
             "realtime_factor": rtf,
             "chunks_processed": self._chunks_processed,
         }
@@ -271,6 +272,9 @@ class WhisperCppProvider(ASRProvider):
                 t1 = (processed_samples + chunk_samples) / sample_rate
                 processed_samples += chunk_samples
                 
+                if is_digital_silence(audio_bytes):
+                    continue
+                
                 # Write to temp WAV file (whisper.cpp needs WAV format)
                 import tempfile
                 import wave
@@ -302,9 +306,7 @@ class WhisperCppProvider(ASRProvider):
                     stdout, stderr = await proc.communicate()
                     infer_time = time.perf_counter() - infer_start
                     
-                    self._infer_times.append(infer_time)
-                    if len(self._infer_times) > 1000:
-                        self._infer_times.pop(0)
+                    self._record_inference(infer_time * 1000, chunk_samples / sample_rate)
                     self._chunks_processed += 1
                     
                     # Parse output
@@ -327,7 +329,7 @@ class WhisperCppProvider(ASRProvider):
                     os.unlink(temp_path)
         
         # Process any remaining buffer
-        if buffer:
+        if buffer and not is_digital_silence(buffer):
             t0 = processed_samples / sample_rate
             chunk_samples = len(buffer) // bytes_per_sample
             t1 = (processed_samples + chunk_samples) / sample_rate
@@ -380,7 +382,8 @@ class WhisperCppProvider(ASRProvider):
                 "chunks_processed": 0,
             }
         
-        avg_infer = sum(self._infer_times) / len(self._infer_times) if self._infer_times else 0
+        avg_infer_ms, p95_infer_ms, _ = self._inference_summary() if self._infer_stats.count() else (0.0, 0.0, 0.0)
+        avg_infer = avg_infer_ms / 1000
         chunk_seconds = self.config.chunk_seconds
         rtf = avg_infer / chunk_seconds if chunk_seconds > 0 else 0
         
@@ -389,6 +392,7 @@ class WhisperCppProvider(ASRProvider):
             "realtime_factor": rtf,
             "chunks_processed": self._chunks_processed,
             "avg_infer_ms": avg_infer * 1000,
+            "p95_infer_ms": p95_infer_ms,
             "model_path": str(self.model_path),
             "model_exists": self.model_path.exists(),
         }
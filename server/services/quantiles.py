@@ -0,0 +1,254 @@
+"""
+Streaming quantiles with time-decayed windows.
+
+Latency distributions (ASR inference, model calls, metrics summaries) are
+kept as log-bucketed sketches in the style of DDSketch / HDR histograms:
+a value lands in bucket ceil(log_gamma(v)), so any quantile is reported with
+bounded relative error (1% by default) and memory grows with the dynamic
+range of the data, not the number of samples.
+
+`observe()` is O(1). Each time window (10 s, 1 min and 10 min by default) is
+a ring of ten slices, so expiry happens a slice at a time and a query merges
+at most ten small bucket maps. Query results are cached until the next
+observation or slice rollover, so many readers polling the same stats (for
+example every session's metrics loop calling provider.health()) cost a dict
+lookup each.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_WINDOWS: Tuple[float, ...] = (10.0, 60.0, 600.0)
+DEFAULT_QUANTILES: Tuple[float, ...] = (0.5, 0.95, 0.99)
+SLICES_PER_WINDOW = 10
+RELATIVE_ACCURACY = 0.01
+MIN_TRACKED_VALUE = 1e-9  # values at or below this count into the zero bucket
+
+
+class QuantileSketch:
+    """Mergeable log-bucketed sketch of non-negative values."""
+
+    __slots__ = ("_gamma_log", "buckets", "zero_count", "count", "sum", "max")
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._gamma_log = math.log(gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def index(self, value: float) -> Optional[int]:
+        """Bucket index for `value` (None for the zero bucket)."""
+        if value <= MIN_TRACKED_VALUE:
+            return None
+        return math.ceil(math.log(value) / self._gamma_log)
+
+    def observe(self, value: float, index: Optional[int] = -1) -> None:
+        """Add `value`; pass a precomputed `index()` to skip the log."""
+        if index == -1:
+            index = self.index(value)
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        if index is None:
+            self.zero_count += 1
+        else:
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def clear(self) -> None:
+        self.buckets.clear()
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def _bucket_value(self, index: int) -> float:
+        # Midpoint (in relative terms) of (gamma^(i-1), gamma^i]
+        gamma = math.exp(self._gamma_log)
+        return 2 * math.exp(index * self._gamma_log) / (gamma + 1)
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        """Values at each quantile in `qs` (each in [0, 1]); 0.0 when empty."""
+        if self.count == 0:
+            return [0.0 for _ in qs]
+        last = self.count - 1
+        ranks = sorted((max(0.0, min(1.0, q)) * last, i) for i, q in enumerate(qs))
+        result = [0.0] * len(qs)
+        # The top rank is the exact maximum, which is tracked separately.
+        while ranks and ranks[-1][0] >= last:
+            result[ranks.pop()[1]] = self.max
+        seen = self.zero_count
+        pending = 0
+        while pending < len(ranks) and ranks[pending][0] < seen:
+            result[ranks[pending][1]] = 0.0
+            pending += 1
+        for index in sorted(self.buckets):
+            if pending == len(ranks):
+                break
+            seen += self.buckets[index]
+            value = min(self._bucket_value(index), self.max)
+            while pending < len(ranks) and ranks[pending][0] < seen:
+                result[ranks[pending][1]] = value
+                pending += 1
+        for _, i in ranks[pending:]:
+            result[i] = self.max
+        return result
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles((q,))[0]
+
+
+class _Ring:
+    """SLICES_PER_WINDOW sketches covering the trailing `span` seconds."""
+
+    __slots__ = ("span", "slice_s", "sketches", "slice_ids")
+
+    def __init__(self, span: float, relative_accuracy: float):
+        self.span = span
+        self.slice_s = span / SLICES_PER_WINDOW
+        self.sketches = [QuantileSketch(relative_accuracy) for _ in range(SLICES_PER_WINDOW)]
+        self.slice_ids = [-1] * SLICES_PER_WINDOW
+
+    def current(self, now: float) -> Tuple[int, QuantileSketch]:
+        slice_id = int(now // self.slice_s)
+        pos = slice_id % SLICES_PER_WINDOW
+        sketch = self.sketches[pos]
+        if self.slice_ids[pos] != slice_id:
+            sketch.clear()
+            self.slice_ids[pos] = slice_id
+        return slice_id, sketch
+
+    def merged(self, now: float, relative_accuracy: float) -> QuantileSketch:
+        oldest = int(now // self.slice_s) - SLICES_PER_WINDOW + 1
+        result = QuantileSketch(relative_accuracy)
+        for slice_id, sketch in zip(self.slice_ids, self.sketches):
+            if slice_id >= oldest:
+                result.merge(sketch)
+        return result
+
+
+class WindowedQuantiles:
+    """Streaming quantiles over trailing time windows plus a lifetime total.
+
+    Thread-safe. `window` arguments take one of the configured window lengths
+    in seconds, or None for everything observed since the last reset.
+    """
+
+    def __init__(
+        self,
+        windows: Iterable[float] = DEFAULT_WINDOWS,
+        relative_accuracy: float = RELATIVE_ACCURACY,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._accuracy = relative_accuracy
+        self._clock = clock
+        self._rings = {float(w): _Ring(float(w), relative_accuracy) for w in windows}
+        self._lifetime = QuantileSketch(relative_accuracy)
+        self._lock = threading.Lock()
+        self._version = 0
+        self._cache: Dict[Optional[float], Tuple[tuple, QuantileSketch]] = {}
+        self._quantile_cache: Dict[tuple, List[float]] = {}
+
+    @property
+    def windows(self) -> Tuple[float, ...]:
+        return tuple(self._rings)
+
+    def observe(self, value: float) -> None:
+        now = self._clock()
+        index = self._lifetime.index(value)
+        with self._lock:
+            self._version += 1
+            self._lifetime.observe(value, index)
+            for ring in self._rings.values():
+                ring.current(now)[1].observe(value, index)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._lifetime.clear()
+            for ring in self._rings.values():
+                ring.slice_ids = [-1] * SLICES_PER_WINDOW
+            self._cache.clear()
+
+    def _sketch(self, window: Optional[float]) -> QuantileSketch:
+        """Sketch for `window`; cached until new data or a slice expires."""
+        with self._lock:
+            if window is None:
+                return self._lifetime
+            ring = self._rings.get(float(window))
+            if ring is None:
+                raise ValueError(f"Unknown window {window}s (configured: {self.windows})")
+            now = self._clock()
+            key = (self._version, int(now // ring.slice_s))
+            cached = self._cache.get(ring.span)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+            merged = ring.merged(now, self._accuracy)
+            self._cache[ring.span] = (key, merged)
+            self._quantile_cache.clear()
+            return merged
+
+    def count(self, window: Optional[float] = None) -> int:
+        return self._sketch(window).count
+
+    def mean(self, window: Optional[float] = None) -> float:
+        sketch = self._sketch(window)
+        return sketch.sum / sketch.count if sketch.count else 0.0
+
+    def max(self, window: Optional[float] = None) -> float:
+        return self._sketch(window).max
+
+    def quantile(self, q: float, window: Optional[float] = None) -> float:
+        return self.quantiles((q,), window)[0]
+
+    def quantiles(self, qs: Sequence[float] = DEFAULT_QUANTILES, window: Optional[float] = None) -> List[float]:
+        sketch = self._sketch(window)
+        if window is None:
+            with self._lock:
+                return sketch.quantiles(qs)
+        # Window sketches are immutable once merged; memoize per sketch.
+        key = (id(sketch), tuple(qs))
+        cached = self._quantile_cache.get(key)
+        if cached is None:
+            cached = sketch.quantiles(qs)
+            if len(self._quantile_cache) > 32:
+                self._quantile_cache.clear()
+            self._quantile_cache[key] = cached
+        return list(cached)
+
+    def snapshot(self, window: Optional[float] = None,
+                 qs: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, float]:
+        """{"count", "mean", "max", "p50", "p95", "p99"} for one window."""
+        sketch = self._sketch(window)
+        with self._lock:
+            values = sketch.quantiles(qs)
+            result = {
+                "count": sketch.count,
+                "mean": sketch.sum / sketch.count if sketch.count else 0.0,
+                "max": sketch.max,
+            }
+        for q, value in zip(qs, values):
+            result[f"p{q * 100:g}"] = value
+        return result
+
+    def recent(self, window: float = 60.0) -> Optional[float]:
+        """Smallest configured window >= `window` that holds data, else None (lifetime)."""
+        for span in sorted(self._rings):
+            if span >= window and self.count(span):
+                return span
+        return None
@@ -0,0 +1,478 @@
+"""
+Recording Writer (TCK-20260213-074 follow-up)
+
+Moves recording-lane and debug-dump disk I/O off the event loop.
+
+Ingest calls `RecordingStream.write()`, which only appends the chunk to a
+per-stream deque (append/popleft are atomic in CPython, so producer and
+consumer never take a lock). One writer thread per process drains every
+stream in coalesced batches, rotates segment files, applies the fsync policy
+and runs retention cleanup on a timer. A slow disk delays only the writer
+thread, never ASR ingest.
+
+Segment files are named `<base>.wav`, `<base>.part001.wav`, ... so the first
+segment keeps the historical single-file name. Formats are "wav", "pcm" and
+"epcm" (lossless block-compressed PCM with a seek index, see pcm_codec.py).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# fsync policy: "none" (OS decides), "interval" (every FSYNC_INTERVAL_S), "always" (every batch)
+RECORDING_FSYNC_POLICY = os.getenv("ECHOPANEL_RECORDING_FSYNC", "interval")
+RECORDING_FSYNC_INTERVAL_S = float(os.getenv("ECHOPANEL_RECORDING_FSYNC_INTERVAL_S", "5"))
+# How often the writer drains streams when no one asks for a flush.
+RECORDING_FLUSH_INTERVAL_MS = float(os.getenv("ECHOPANEL_RECORDING_FLUSH_INTERVAL_MS", "200"))
+# Rotate to a new segment file after this much audio (0 disables rotation).
+RECORDING_SEGMENT_SECONDS = float(os.getenv("ECHOPANEL_RECORDING_SEGMENT_SECONDS", "1800"))
+RECORDING_RETENTION_INTERVAL_S = float(os.getenv("ECHOPANEL_RECORDING_RETENTION_INTERVAL_S", "300"))
+# Wake the writer early once this much audio is pending for a stream.
+RECORDING_HIGH_WATER_BYTES = int(os.getenv("ECHOPANEL_RECORDING_HIGH_WATER_BYTES", str(256 * 1024)))
+
+WAV_HEADER_BYTES = 44
+# "epcm" is pcm_codec.SUFFIX; the codec (and numpy) load with the first epcm segment.
+_FORMAT_SUFFIX = {"wav": ".wav", "pcm": ".pcm", "epcm": ".epcm"}
+
+
+def write_wav_header(f, sample_rate: int, num_samples: int) -> None:
+    """Write a standard WAV file header.
+
+    WAV format:
+    - RIFF header (12 bytes)
+    - fmt chunk (24 bytes)
+    - data chunk header (8 bytes)
+    """
+    # Calculate sizes
+    bits_per_sample = 16
+    byte_rate = sample_rate * 2  # 16-bit mono
+    data_size = num_samples * 2  # 16-bit samples
+    riff_size = 36 + data_size  # 44 bytes header - 8 (RIFF size field)
+
+    # RIFF header
+    f.write(b'RIFF')
+    f.write(struct.pack('<I', riff_size))
+    f.write(b'WAVE')
+
+    # fmt chunk
+    f.write(b'fmt ')
+    f.write(struct.pack('<I', 16))  # Subchunk1Size (16 for PCM)
+    f.write(struct.pack('<H', 1))   # AudioFormat (1 = PCM)
+    f.write(struct.pack('<H', 1))   # NumChannels (1 = mono)
+    f.write(struct.pack('<I', sample_rate))
+    f.write(struct.pack('<I', byte_rate))
+    f.write(struct.pack('<H', 2))   # BlockAlign (NumChannels * BitsPerSample/8)
+    f.write(struct.pack('<H', bits_per_sample))
+
+    # data chunk
+    f.write(b'data')
+    f.write(struct.pack('<I', data_size))
+
+
+class _Segment:
+    """One rotated segment: a file per format plus the PCM bytes written so far."""
+
+    def __init__(self, index: int, paths: Dict[str, Path]):
+        self.index = index
+        self.paths = paths
+        self.files: Dict[str, object] = {}
+        self.bytes_written = 0
+
+
+class RecordingStream:
+    """
+    Append-only audio stream written by the shared writer thread.
+
+    `write()` is safe to call from the event loop. `flush()` and
+    `wait_closed()` block and belong in a worker thread.
+    """
+
+    def __init__(
+        self,
+        writer: "RecordingWriter",
+        base_path: Path,
+        formats: Sequence[str],
+        sample_rate: int = 16000,
+        segment_seconds: float = RECORDING_SEGMENT_SECONDS,
+        fsync_policy: str = RECORDING_FSYNC_POLICY,
+    ):
+        self._writer = writer
+        self.base_path = Path(base_path)
+        self.formats = tuple(f for f in formats if f in _FORMAT_SUFFIX)
+        self.sample_rate = sample_rate
+        self.segment_bytes = int(segment_seconds * sample_rate) * 2 if segment_seconds > 0 else 0
+        self.fsync_policy = fsync_policy
+
+        self._buffer: Deque[bytes] = deque()
+        self.enqueued_bytes = 0  # Producer side only
+        self.written_bytes = 0  # Writer thread only (bytes handed to the OS or encoder, or dropped)
+        self.readable_bytes = 0  # Bytes a reader can see on disk (epcm buffers up to one block)
+        self._commit_target = 0  # Highest byte count a flush() is waiting to read
+        self.dropped_bytes = 0
+        self._closing = False
+        self._closed = threading.Event()
+        self._cond = threading.Condition()
+        self._segments: List[_Segment] = []
+        self._current: Optional[_Segment] = None
+        self._failed = False
+        self._last_fsync = time.monotonic()
+
+    # ------------------------------------------------------------------ producer side
+
+    def write(self, chunk: bytes) -> None:
+        """Queue a chunk for the writer thread (never blocks on disk)."""
+        if not chunk or self._closing:
+            return
+        self._buffer.append(chunk)
+        self.enqueued_bytes += len(chunk)
+        if self.enqueued_bytes - self.written_bytes >= RECORDING_HIGH_WATER_BYTES:
+            self._writer.wake()
+
+    def close(self) -> None:
+        """Stop accepting audio; the writer drains what is queued and finalizes files."""
+        self._closing = True
+        self._writer.wake()
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """Block until every chunk written before this call is readable on disk."""
+        target = self.enqueued_bytes
+        self._commit_target = max(self._commit_target, target)
+        self._writer.wake()
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self.readable_bytes >= target or self._closed.is_set(), timeout=timeout
+            )
+
+    def wait_closed(self, timeout: Optional[float] = 10.0) -> bool:
+        return self._closed.wait(timeout)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    @property
+    def primary_path(self) -> Optional[Path]:
+        """Path of the first segment (WAV preferred), matching the historical single-file name."""
+        paths = self._segment_paths(0)
+        return paths.get("wav") or paths.get("pcm")
+
+    def segment_files(self) -> List[Tuple[Path, int, int]]:
+        """On-disk audio as (path, data_offset, num_bytes) per segment, in order.
+
+        Raw PCM is preferred over WAV, then compressed epcm (offsets and sizes
+        are in PCM16 bytes for every format). Call `flush()` first to include
+        recent audio.
+        """
+        with self._cond:
+            segments = [(seg.paths, seg.bytes_written) for seg in self._segments]
+        result = []
+        for paths, num_bytes in segments:
+            if num_bytes <= 0:
+                continue
+            if "pcm" in paths:
+                result.append((paths["pcm"], 0, num_bytes))
+            elif "wav" in paths:
+                result.append((paths["wav"], WAV_HEADER_BYTES, num_bytes))
+            elif "epcm" in paths:
+                result.append((paths["epcm"], 0, num_bytes))
+        return result
+
+    def _segment_paths(self, index: int) -> Dict[str, Path]:
+        stem = self.base_path.name if index == 0 else f"{self.base_path.name}.part{index:03d}"
+        return {fmt: self.base_path.with_name(stem + _FORMAT_SUFFIX[fmt]) for fmt in self.formats}
+
+    # ------------------------------------------------------------------ writer thread
+
+    def _service(self, now: float, stats: dict) -> None:
+        """Drain queued audio into the current segment(s); finalize if closing."""
+        closing = self._closing
+        chunks = []
+        while True:
+            try:
+                chunks.append(self._buffer.popleft())
+            except IndexError:
+                break
+
+        if chunks:
+            data = b"".join(chunks)
+            start = time.perf_counter()
+            self._write_batch(data, stats)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            stats["batches_written"] += 1
+            stats["bytes_written"] += len(data)
+            stats["max_batch_bytes"] = max(stats["max_batch_bytes"], len(data))
+            stats["max_write_ms"] = max(stats["max_write_ms"], elapsed_ms)
+            with self._cond:
+                self.written_bytes += len(data)
+
+        # epcm buffers up to one block; commit it only for a waiting flush(),
+        # since committing every batch would leave tiny blocks.
+        if self.readable_bytes < self.written_bytes and (
+            "epcm" not in self.formats or self.readable_bytes < self._commit_target
+        ):
+            encoder = self._current.files.get("epcm") if self._current is not None else None
+            if encoder is not None:
+                encoder.commit()
+                encoder.flush()
+            self._mark_readable()
+
+        if self._current is not None:
+            if self.fsync_policy == "always" and chunks:
+                self._fsync(self._current, stats)
+            elif self.fsync_policy == "interval" and now - self._last_fsync >= RECORDING_FSYNC_INTERVAL_S:
+                self._fsync(self._current, stats)
+
+        if closing and not self._buffer:
+            if self._current is not None:
+                self._finalize_segment(self._current, stats)
+                self._current = None
+            with self._cond:
+                self._closed.set()
+                self._cond.notify_all()
+
+    def _mark_readable(self) -> None:
+        with self._cond:
+            self.readable_bytes = self.written_bytes
+            self._cond.notify_all()
+
+    def _write_batch(self, data: bytes, stats: dict) -> None:
+        view = memoryview(data)
+        while view:
+            if self._failed:
+                self.dropped_bytes += len(view)
+                return
+            segment = self._current or self._open_segment(stats)
+            if segment is None:
+                continue
+            room = len(view)
+            if self.segment_bytes:
+                room = min(room, self.segment_bytes - segment.bytes_written)
+            part = view[:room]
+            try:
+                for f in segment.files.values():
+                    f.write(part)
+                    f.flush()
+            except Exception as e:
+                stats["write_errors"] += 1
+                logger.error(f"Recording write failed for {self.base_path}: {e}")
+            with self._cond:
+                segment.bytes_written += len(part)
+            view = view[room:]
+            if self.segment_bytes and segment.bytes_written >= self.segment_bytes:
+                self._finalize_segment(segment, stats)
+                self._current = None
+
+    def _open_segment(self, stats: dict) -> Optional[_Segment]:
+        segment = _Segment(len(self._segments), self._segment_paths(len(self._segments)))
+        try:
+            self.base_path.parent.mkdir(parents=True, exist_ok=True)
+            for fmt, path in segment.paths.items():
+                # Restrictive permissions (owner read/write only)
+                fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+                f = os.fdopen(fd, "w+b")
+                if fmt == "epcm":
+                    from server.services.pcm_codec import BlockPCMWriter
+
+                    f = BlockPCMWriter(f, self.sample_rate)
+                segment.files[fmt] = f
+                if fmt == "wav":
+                    # Placeholder header, rewritten with real sizes on finalize
+                    write_wav_header(f, self.sample_rate, 0)
+            logger.info(f"Recording segment opened: {list(segment.paths.values())}")
+        except Exception as e:
+            stats["write_errors"] += 1
+            logger.error(f"Failed to open recording segment for {self.base_path}: {e}")
+            for f in segment.files.values():
+                try:
+                    f.close()
+                except Exception:
+                    pass
+            self._failed = True
+            return None
+        with self._cond:
+            self._segments.append(segment)
+        self._current = segment
+        return segment
+
+    def _fsync(self, segment: _Segment, stats: dict) -> None:
+        self._last_fsync = time.monotonic()
+        for f in segment.files.values():
+            try:
+                f.flush()
+                os.fsync(f.fileno())
+                stats["fsyncs"] += 1
+            except Exception as e:
+                logger.warning(f"Recording fsync failed for {self.base_path}: {e}")
+
+    def _finalize_segment(self, segment: _Segment, stats: dict) -> None:
+        for fmt, f in segment.files.items():
+            try:
+                if fmt == "wav":
+                    f.seek(0)
+                    write_wav_header(f, self.sample_rate, segment.bytes_written // 2)
+                elif fmt == "epcm":
+                    f.finish()
+                if self.fsync_policy != "none":
+                    f.flush()
+                    os.fsync(f.fileno())
+                    stats["fsyncs"] += 1
+                f.close()
+            except Exception as e:
+                stats["write_errors"] += 1
+                logger.error(f"Failed to finalize recording {segment.paths.get(fmt)}: {e}")
+        duration_sec = segment.bytes_written / 2 / self.sample_rate
+        logger.info(
+            f"Recording segment finalized: {list(segment.paths.values())} "
+            f"({duration_sec:.1f}s, {segment.bytes_written} bytes)"
+        )
+        stats["segments_finalized"] += 1
+
+
+class RecordingWriter:
+    """Process-wide writer thread servicing every open RecordingStream."""
+
+    def __init__(
+        self,
+        flush_interval_ms: float = RECORDING_FLUSH_INTERVAL_MS,
+        retention_interval_s: float = RECORDING_RETENTION_INTERVAL_S,
+    ):
+        self.flush_interval_s = flush_interval_ms / 1000.0
+        self.retention_interval_s = retention_interval_s
+        self._streams: List[RecordingStream] = []
+        self._streams_lock = threading.Lock()
+        self._retention_tasks: Dict[str, Callable[[], None]] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_retention: Optional[float] = None
+        self.stats = {
+            "streams_opened": 0,
+            "batches_written": 0,
+            "bytes_written": 0,
+            "max_batch_bytes": 0,
+            "max_write_ms": 0.0,
+            "fsyncs": 0,
+            "segments_finalized": 0,
+            "write_errors": 0,
+            "retention_runs": 0,
+        }
+
+    def open_stream(
+        self,
+        base_path: Path,
+        formats: Sequence[str],
+        sample_rate: int = 16000,
+        segment_seconds: float = RECORDING_SEGMENT_SECONDS,
+        fsync_policy: str = RECORDING_FSYNC_POLICY,
+    ) -> RecordingStream:
+        """Register a stream. Files are created lazily by the writer thread."""
+        stream = RecordingStream(self, base_path, formats, sample_rate, segment_seconds, fsync_policy)
+        with self._streams_lock:
+            self._streams.append(stream)
+            self.stats["streams_opened"] += 1
+        self._ensure_started()
+        return stream
+
+    def add_retention_task(self, name: str, task: Callable[[], None]) -> None:
+        """Run `task` from the writer thread every retention interval (first run is immediate)."""
+        if name not in self._retention_tasks:
+            self._retention_tasks[name] = task
+            self._last_retention = None
+            self._ensure_started()
+            self.wake()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="echopanel-recording-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            self._service_all()
+        self._service_all()
+
+    def _service_all(self) -> None:
+        now = time.monotonic()
+        with self._streams_lock:
+            streams = list(self._streams)
+        for stream in streams:
+            try:
+                stream._service(now, self.stats)
+            except Exception as e:  # pragma: no cover - defensive guard
+                self.stats["write_errors"] += 1
+                logger.error(f"Recording writer failed for {stream.base_path}: {e}")
+        finished = [s for s in streams if s.closed]
+        if finished:
+            with self._streams_lock:
+                self._streams = [s for s in self._streams if not s.closed]
+
+        due = self._last_retention is None or now - self._last_retention >= self.retention_interval_s
+        if self._retention_tasks and due:
+            self._last_retention = now
+            self.stats["retention_runs"] += 1
+            for name, task in list(self._retention_tasks.items()):
+                try:
+                    task()
+                except Exception as e:
+                    logger.warning(f"Recording retention task {name} failed: {e}")
+
+    def shutdown(self, timeout: float = 10.0) -> bool:
+        """Close every stream, drain, and stop the writer thread."""
+        with self._streams_lock:
+            streams = list(self._streams)
+        for stream in streams:
+            stream.close()
+        thread = self._thread
+        if thread is None:
+            return True
+        self._stop.set()
+        self.wake()
+        thread.join(timeout)
+        self._thread = None
+        return not thread.is_alive()
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        with self._streams_lock:
+            stats["open_streams"] = len(self._streams)
+            stats["pending_bytes"] = sum(s.enqueued_bytes - s.written_bytes for s in self._streams)
+        return stats
+
+
+_WRITER: Optional[RecordingWriter] = None
+_WRITER_LOCK = threading.Lock()
+
+
+def get_recording_writer() -> RecordingWriter:
+    """Get the process-wide recording writer."""
+    global _WRITER
+    with _WRITER_LOCK:
+        if _WRITER is None:
+            _WRITER = RecordingWriter()
+        return _WRITER
+
+
+def shutdown_recording_writer(timeout: float = 10.0) -> bool:
+    """Drain and stop the process-wide writer (called at app shutdown)."""
+    global _WRITER
+    with _WRITER_LOCK:
+        writer, _WRITER = _WRITER, None
+    if writer is None:
+        return True
+    return writer.shutdown(timeout)
@@ -21,6 +21,7 @@ import asyncio
 import base64
 import logging
 import os
+import threading
 import time
 from dataclasses import dataclass
 from typing import Optional
@@ -159,7 +160,8 @@ class ScreenOCRPipeline:
     async def process_frame(
         self,
         image_bytes: bytes,
-        skip_duplicates: bool = True
+        skip_duplicates: bool = True,
+        session_id: str = ""
     ) -> OCResult:
         """
         Process a screen capture frame.
@@ -169,6 +171,7 @@ class ScreenOCRPipeline:
         Args:
             image_bytes: Raw image data (JPEG, PNG, etc.)
             skip_duplicates: Whether to skip duplicate frames
+            session_id: Session identifier (used for per-session VLM budgets)
             
         Returns:
             OCResult with extracted text and metadata
@@ -176,13 +179,14 @@ class ScreenOCRPipeline:
         # Prefer hybrid pipeline when its engines are actually available.
         # Otherwise, fall back to legacy tesseract/mocked path.
         if self._hybrid and self._hybrid.is_available():
-            return await self._process_hybrid(image_bytes, skip_duplicates)
+            return await self._process_hybrid(image_bytes, skip_duplicates, session_id)
         return await self._process_tesseract(image_bytes, skip_duplicates)
     
     async def _process_hybrid(
         self,
         image_bytes: bytes,
-        skip_duplicates: bool
+        skip_duplicates: bool,
+        session_id: str = ""
     ) -> OCResult:
         """Process using hybrid pipeline."""
         start_time = time.time()
@@ -191,6 +195,7 @@ class ScreenOCRPipeline:
             # Use hybrid pipeline
             hybrid_result = await self._hybrid.process_frame(
                 image_bytes,
+                session_id=session_id,
                 skip_duplicates=skip_duplicates
             )
             
@@ -440,7 +445,7 @@ class OCRFrameHandler:
             )
         
         # Process frame
-        result = await self.pipeline.process_frame(image_bytes)
+        result = await self.pipeline.process_frame(image_bytes, session_id=session_id)
         
         # Index to RAG if appropriate
         if index_to_rag and result.should_index:
@@ -532,16 +537,28 @@ Layout: {result.layout_type}"""
 
 # Singleton instance
 _ocr_handler: Optional[OCRFrameHandler] = None
+# Startup warmup builds the handler in an executor thread; a request arriving
+# meanwhile must wait for that build instead of loading PaddleOCR/SmolVLM twice.
+_ocr_handler_lock = threading.Lock()
 
 
 def get_ocr_handler() -> OCRFrameHandler:
     """Get or create OCR frame handler singleton."""
     global _ocr_handler
     if _ocr_handler is None:
-        _ocr_handler = OCRFrameHandler()
+        with _ocr_handler_lock:
+            if _ocr_handler is None:
+                _ocr_handler = OCRFrameHandler()
     return _ocr_handler
 
 
+async def get_ocr_handler_async() -> OCRFrameHandler:
+    """get_ocr_handler() for the event loop: a build (or wait on warmup's build) runs in a worker thread."""
+    if _ocr_handler is not None:
+        return _ocr_handler
+    return await asyncio.to_thread(get_ocr_handler)
+
+
 def reset_ocr_handler():
     """Reset OCR handler (for testing)."""
     global _ocr_handler
@@ -554,5 +571,6 @@ __all__ = [
     'ScreenOCRPipeline',
     'OCRFrameHandler',
     'get_ocr_handler',
+    'get_ocr_handler_async',
     'reset_ocr_handler',
 ]
@@ -0,0 +1,321 @@
+"""
+Startup warmup orchestrator.
+
+Only the ASR model used to be warmed at startup (and embeddings, serially on
+the event loop). VAD, the RAG store, the diarization pipeline and the OCR
+pipelines (PaddleOCR + SmolVLM) loaded on their first request, so the first
+user of each feature paid seconds of latency.
+
+The orchestrator warms the selected components concurrently: synchronous
+loaders run in worker threads and async ones on the loop. Each component has a
+timeout, may declare dependencies, and reports its own readiness so /health
+can expose it per component. The ASR path goes live as soon as "asr" is
+ready, without waiting for OCR or embeddings.
+
+A loader returns a truthy value when the component is ready, False when it is
+unavailable on this machine (missing dependency, disabled), and raises on
+failure. A thread loader that outlives its timeout keeps running and the
+component becomes ready if it finishes later.
+
+Environment:
+    ECHOPANEL_WARMUP_COMPONENTS     Components to warm (asr,vad,embeddings,rag,diarization,ocr)
+    ECHOPANEL_WARMUP_BLOCKING       Components startup waits for before serving (asr)
+    ECHOPANEL_WARMUP_CONCURRENCY    Loaders running at once (3)
+    ECHOPANEL_WARMUP_TIMEOUT_<NAME> Per-component timeout in seconds (e.g. ..._OCR=300)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPONENTS = "asr,vad,embeddings,rag,diarization,ocr"
+WARMUP_CONCURRENCY = int(os.getenv("ECHOPANEL_WARMUP_CONCURRENCY", "3"))
+
+
+class ComponentState(Enum):
+    PENDING = "pending"
+    WAITING = "waiting"  # for dependencies or a loader slot
+    LOADING = "loading"
+    READY = "ready"
+    UNAVAILABLE = "unavailable"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+
+
+@dataclass
+class WarmupComponent:
+    """One warmable component."""
+    name: str
+    load: Callable[[], Union[Any, Awaitable[Any]]]
+    timeout_s: float = 60.0
+    # Must be READY first; otherwise this component is marked unavailable
+    requires: Tuple[str, ...] = ()
+    # Must finish first (any outcome); orders heavy loads behind latency-critical ones
+    after: Tuple[str, ...] = ()
+    is_async: bool = False
+
+
+@dataclass
+class ComponentStatus:
+    name: str
+    state: ComponentState = ComponentState.PENDING
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    detail: Optional[str] = None
+    late: bool = False  # became ready after its timeout
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def elapsed_ms(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        end = self.finished_at or time.perf_counter()
+        return round((end - self.started_at) * 1000, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"state": self.state.value, "ready": self.state is ComponentState.READY}
+        if self.elapsed_ms is not None:
+            result["elapsed_ms"] = self.elapsed_ms
+        if self.detail:
+            result["detail"] = self.detail
+        if self.late:
+            result["late"] = True
+        return result
+
+
+class StartupWarmup:
+    """Warms components concurrently with dependency ordering and per-component timeouts."""
+
+    def __init__(self, concurrency: int = WARMUP_CONCURRENCY):
+        self._components: Dict[str, WarmupComponent] = {}
+        self._status: Dict[str, ComponentStatus] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._concurrency = max(1, concurrency)
+
+    def register(self, component: WarmupComponent) -> None:
+        self._components[component.name] = component
+
+    @property
+    def components(self) -> List[str]:
+        return list(self._components)
+
+    # ------------------------------------------------------------------ run
+
+    def start(self, selected: Optional[Iterable[str]] = None) -> None:
+        """Schedule the selected components (all registered ones if None)."""
+        names = list(self._components) if selected is None else [n for n in selected if n in self._components]
+        unknown = [] if selected is None else [n for n in selected if n not in self._components]
+        if unknown:
+            logger.warning(f"Unknown warmup components ignored: {unknown}")
+
+        self._status = {name: ComponentStatus(name) for name in names}
+        semaphore = asyncio.Semaphore(self._concurrency)
+        for name in names:
+            self._tasks.append(asyncio.create_task(self._run(self._components[name], semaphore),
+                                                   name=f"warmup:{name}"))
+        logger.info(f"Startup warmup: {names} (concurrency {self._concurrency})")
+
+    async def _run(self, component: WarmupComponent, semaphore: asyncio.Semaphore) -> None:
+        status = self._status[component.name]
+        status.state = ComponentState.WAITING
+        try:
+            for dep in component.requires + component.after:
+                dep_status = self._status.get(dep)
+                if dep_status is None:
+                    if dep in component.requires:
+                        self._finish(status, ComponentState.UNAVAILABLE, f"requires {dep} (not selected)")
+                        return
+                    continue
+                await dep_status.done.wait()
+                if dep in component.requires and dep_status.state is not ComponentState.READY:
+                    self._finish(status, ComponentState.UNAVAILABLE, f"requires {dep} ({dep_status.state.value})")
+                    return
+
+            async with semaphore:
+                status.state = ComponentState.LOADING
+                status.started_at = time.perf_counter()
+                if component.is_async:
+                    result = await asyncio.wait_for(component.load(), timeout=component.timeout_s)
+                else:
+                    future = asyncio.get_running_loop().run_in_executor(None, component.load)
+                    done, _ = await asyncio.wait({future}, timeout=component.timeout_s)
+                    if not done:
+                        # Threads can't be cancelled; let it finish and report late readiness
+                        future.add_done_callback(lambda f: self._late_result(component.name, f))
+                        raise asyncio.TimeoutError()
+                    result = future.result()
+            if result is False:
+                self._finish(status, ComponentState.UNAVAILABLE, "not available on this machine")
+            else:
+                self._finish(status, ComponentState.READY)
+        except asyncio.TimeoutError:
+            self._finish(status, ComponentState.TIMEOUT, f"exceeded {component.timeout_s:.0f}s")
+        except asyncio.CancelledError:
+            self._finish(status, ComponentState.FAILED, "cancelled")
+            raise
+        except Exception as e:
+            self._finish(status, ComponentState.FAILED, f"{type(e).__name__}: {e}")
+
+    def _finish(self, status: ComponentStatus, state: ComponentState, detail: Optional[str] = None) -> None:
+        status.state = state
+        status.detail = detail
+        status.finished_at = time.perf_counter()
+        status.done.set()
+        log = logger.info if state in {ComponentState.READY, ComponentState.UNAVAILABLE} else logger.warning
+        log(f"Warmup {status.name}: {state.value}" + (f" ({detail})" if detail else "")
+            + (f" in {status.elapsed_ms:.0f}ms" if status.elapsed_ms is not None else ""))
+
+    def _late_result(self, name: str, future: asyncio.Future) -> None:
+        status = self._status.get(name)
+        if status is None or future.cancelled() or future.exception() is not None or future.result() is False:
+            return
+        status.state = ComponentState.READY
+        status.late = True
+        status.finished_at = time.perf_counter()
+        logger.info(f"Warmup {name}: ready after timeout in {status.elapsed_ms:.0f}ms")
+
+    async def wait_for(self, names: Iterable[str]) -> bool:
+        """Wait until the given components finish; True if all are ready."""
+        statuses = [self._status[n] for n in names if n in self._status]
+        await asyncio.gather(*(s.done.wait() for s in statuses))
+        return all(s.state is ComponentState.READY for s in statuses)
+
+    async def cancel(self) -> None:
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    # ------------------------------------------------------------------ readiness
+
+    def is_ready(self, name: str) -> bool:
+        status = self._status.get(name)
+        return status is not None and status.state is ComponentState.READY
+
+    def status(self, name: str) -> Optional[Dict[str, Any]]:
+        status = self._status.get(name)
+        return status.to_dict() if status is not None else None
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: status.to_dict() for name, status in self._status.items()}
+
+
+# ---------------------------------------------------------------------------
+# Default components
+# ---------------------------------------------------------------------------
+
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _timeout(name: str, default: float) -> float:
+    return float(os.getenv(f"ECHOPANEL_WARMUP_TIMEOUT_{name.upper()}", str(default)))
+
+
+async def _warm_asr() -> bool:
+    from .model_preloader import get_model_manager, initialize_model_at_startup
+
+    if not await initialize_model_at_startup():
+        raise RuntimeError(get_model_manager().health().last_error or "model initialization failed")
+    return True
+
+
+def _warm_vad() -> bool:
+    from .vad_asr_wrapper import _get_default_backend
+
+    try:
+        loaded = _get_default_backend()._load()
+    except ImportError:
+        return False
+    return loaded is not None and loaded != (None, None)
+
+
+def _warm_embeddings() -> bool:
+    from .embeddings import get_embedding_service
+
+    service = get_embedding_service()
+    if not service.is_available():
+        return False
+    service.encode(["warmup"])  # loads the model and initializes the first batch path
+    return True
+
+
+def _warm_rag() -> bool:
+    from .rag_store import get_rag_store
+
+    get_rag_store()  # reads the persisted index
+    return True
+
+
+async def _warm_diarization() -> bool:
+    from .diarization import prewarm_diarization_pipeline
+
+    # prewarm has its own timeout (ECHOPANEL_DIARIZATION_PREWARM_TIMEOUT)
+    return await prewarm_diarization_pipeline(
+        timeout_seconds=float(os.getenv("ECHOPANEL_DIARIZATION_PREWARM_TIMEOUT", "120"))
+    )
+
+
+def _warm_ocr() -> bool:
+    from . import screen_ocr
+
+    if not screen_ocr.OCR_ENABLED:
+        return False
+    # Builds the hybrid pipeline: PaddleOCR and SmolVLM load in its constructor
+    return screen_ocr.get_ocr_handler().enabled
+
+
+def default_components() -> List[WarmupComponent]:
+    diarization_timeout = float(os.getenv("ECHOPANEL_DIARIZATION_PREWARM_TIMEOUT", "120"))
+    return [
+        WarmupComponent("asr", _warm_asr, timeout_s=_timeout("asr", 300), is_async=True),
+        WarmupComponent("vad", _warm_vad, timeout_s=_timeout("vad", 60)),
+        WarmupComponent("embeddings", _warm_embeddings, timeout_s=_timeout("embeddings", 120)),
+        WarmupComponent("rag", _warm_rag, timeout_s=_timeout("rag", 30), after=("embeddings",)),
+        # Heavy torch loads queue behind ASR so they don't slow the live path's warmup
+        WarmupComponent("diarization", _warm_diarization, timeout_s=_timeout("diarization", diarization_timeout + 5),
+                        after=("asr",), is_async=True),
+        WarmupComponent("ocr", _warm_ocr, timeout_s=_timeout("ocr", 300), after=("asr",)),
+    ]
+
+
+def selected_components() -> List[str]:
+    names = [n.strip() for n in os.getenv("ECHOPANEL_WARMUP_COMPONENTS", DEFAULT_COMPONENTS).split(",") if n.strip()]
+    if not _env_flag("ECHOPANEL_PREWARM_DIARIZATION", default=True):
+        names = [n for n in names if n != "diarization"]
+    return names
+
+
+def blocking_components() -> List[str]:
+    return [n.strip() for n in os.getenv("ECHOPANEL_WARMUP_BLOCKING", "asr").split(",") if n.strip()]
+
+
+_warmup: Optional[StartupWarmup] = None
+
+
+def get_startup_warmup() -> StartupWarmup:
+    """Get the process-wide warmup orchestrator with the default components."""
+    global _warmup
+    if _warmup is None:
+        _warmup = StartupWarmup()
+        for component in default_components():
+            _warmup.register(component)
+    return _warmup
+
+
+def reset_startup_warmup() -> None:
+    """Reset the global orchestrator (for testing)."""
+    global _warmup
+    _warmup = None
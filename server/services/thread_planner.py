@@ -0,0 +1,175 @@
+"""
+CTranslate2 thread planning for concurrent sessions.
+
+WhisperModel defaults to cpu_threads=0 (all cores per call) and one worker,
+and every decode went through asyncio.to_thread on the default executor. With
+several live streams each transcribe call spun up a full set of intra-op
+threads, so N streams ran N x cores threads and oversubscribed the CPU.
+
+The planner splits the cores between concurrent decodes: a plan for W
+concurrent streams loads the model with num_workers=W and cpu_threads=cores//W
+so that W parallel calls use the cores once. Decodes run on the inference
+scheduler's bounded executor (inference_scheduler.py), sized to the largest
+plan, so excess streams queue instead of adding threads.
+
+To adapt as streams join and leave, the planner keeps a small ladder of plans
+(ECHOPANEL_CT2_REPLICAS, default 2: a solo plan with every core on one worker,
+and a shared plan for ECHOPANEL_EXPECTED_CONCURRENCY streams). The provider
+picks the replica for the current number of active streams at every chunk;
+replicas are loaded lazily and are ordinary residency entries, so the memory
+budget can evict an idle one.
+
+Environment:
+    ECHOPANEL_CT2_CORES                Cores to plan for (physical cores if psutil, else os.cpu_count())
+    ECHOPANEL_EXPECTED_CONCURRENCY     Concurrent decode streams to plan for (2)
+    ECHOPANEL_CT2_REPLICAS             Plans (model replicas) in the ladder (2; 1 = static plan)
+    ECHOPANEL_CT2_CPU_THREADS          Fixed cpu_threads (disables adaptation)
+    ECHOPANEL_CT2_NUM_WORKERS          Fixed num_workers (disables adaptation)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+logger = logging.getLogger(__name__)
+
+
+def _detect_cores() -> int:
+    override = int(os.getenv("ECHOPANEL_CT2_CORES", "0"))
+    if override > 0:
+        return override
+    if HAS_PSUTIL:
+        # Intra-op threads gain little from SMT siblings
+        physical = psutil.cpu_count(logical=False)
+        if physical:
+            return physical
+    return os.cpu_count() or 4
+
+
+@dataclass(frozen=True)
+class ThreadPlan:
+    """WhisperModel threading for up to `num_workers` concurrent decodes."""
+    cpu_threads: int
+    num_workers: int
+
+    @property
+    def key(self) -> str:
+        """Suffix distinguishing replicas of the same weights in residency."""
+        return f"t{self.cpu_threads}w{self.num_workers}"
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class ThreadPlanner:
+    """Derives CTranslate2 thread plans from cores and active streams."""
+
+    def __init__(self, cores: Optional[int] = None, expected_streams: Optional[int] = None,
+                 replicas: Optional[int] = None):
+        self.cores = max(1, cores or _detect_cores())
+        self.expected_streams = max(1, expected_streams or int(os.getenv("ECHOPANEL_EXPECTED_CONCURRENCY", "2")))
+        self.replicas = max(1, replicas or int(os.getenv("ECHOPANEL_CT2_REPLICAS", "2")))
+        self.plans = self._build_ladder()
+        self._active = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "streams_started": 0,
+            "peak_active_streams": 0,
+            "plan_switches": 0,
+        }
+        self._last_plan: Optional[ThreadPlan] = None
+        logger.info(f"CT2 thread plans for {self.cores} cores: "
+                    f"{[p.key for p in self.plans]} (executor {self.executor_workers} workers)")
+
+    def plan_for(self, streams: int) -> ThreadPlan:
+        """Plan that shares the cores evenly between `streams` concurrent decodes."""
+        workers = min(max(1, streams), self.cores)
+        return ThreadPlan(cpu_threads=max(1, self.cores // workers), num_workers=workers)
+
+    def _build_ladder(self) -> List[ThreadPlan]:
+        threads = int(os.getenv("ECHOPANEL_CT2_CPU_THREADS", "0"))
+        workers = int(os.getenv("ECHOPANEL_CT2_NUM_WORKERS", "0"))
+        if threads > 0 or workers > 0:
+            fixed = self.plan_for(workers or self.expected_streams)
+            return [ThreadPlan(cpu_threads=threads or fixed.cpu_threads, num_workers=fixed.num_workers)]
+
+        top = min(self.expected_streams, self.cores)
+        if self.replicas == 1 or top == 1:
+            return [self.plan_for(top)]
+        # Geometric steps from 1 stream to the expected concurrency
+        steps = self.replicas - 1
+        counts = sorted({max(1, round(top ** (i / steps))) for i in range(self.replicas)})
+        return [self.plan_for(n) for n in counts]
+
+    @property
+    def executor_workers(self) -> int:
+        return max(plan.num_workers for plan in self.plans)
+
+    def current_plan(self) -> ThreadPlan:
+        """Smallest plan that covers the active streams (the largest if none does)."""
+        with self._lock:
+            active = max(1, self._active)
+            plan = next((p for p in self.plans if p.num_workers >= active), self.plans[-1])
+            previous, self._last_plan = self._last_plan, plan
+            if previous is not None and plan != previous:
+                self._stats["plan_switches"] += 1
+        if previous is not None and plan != previous:
+            logger.info(f"CT2 plan {previous.key} -> {plan.key} ({active} active streams)")
+        return plan
+
+    @contextmanager
+    def track_stream(self) -> Iterator[None]:
+        """Count a decode stream as active for plan selection."""
+        with self._lock:
+            self._active += 1
+            self._stats["streams_started"] += 1
+            self._stats["peak_active_streams"] = max(self._stats["peak_active_streams"], self._active)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            active = self._active
+        return {
+            "cores": self.cores,
+            "expected_streams": self.expected_streams,
+            "active_streams": active,
+            "plans": [plan.to_dict() for plan in self.plans],
+            "current_plan": (self._last_plan or self.plans[-1]).to_dict(),
+            "executor_workers": self.executor_workers,
+            **self._stats,
+        }
+
+
+_planner: Optional[ThreadPlanner] = None
+_planner_lock = threading.Lock()
+
+
+def get_thread_planner() -> ThreadPlanner:
+    """Get the process-wide thread planner."""
+    global _planner
+    if _planner is None:
+        with _planner_lock:
+            if _planner is None:
+                _planner = ThreadPlanner()
+    return _planner
+
+
+def reset_thread_planner() -> None:
+    """Reset the global planner (for testing)."""
+    global _planner
+    _planner = None
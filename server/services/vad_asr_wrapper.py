@@ -33,12 +33,14 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
 from dataclasses import dataclass
 from typing import AsyncIterator, Optional, Dict, Any
 
 import numpy as np
 
 from .asr_providers import ASRProvider, ASRConfig, ASRSegment, AudioSource
+from .latency_trace import trace_vad
 
 logger = logging.getLogger(__name__)
 
@@ -369,6 +371,10 @@ class VADASRWrapper(ASRProvider):
     @property
     def is_available(self) -> bool:
         return self._provider.is_available
+
+    @property
+    def weights_key(self) -> str:
+        return self._provider.weights_key
     
     def _check_vad_available(self) -> bool:
         """Check if VAD backend is available, try to load if not."""
@@ -468,9 +474,11 @@ class VADASRWrapper(ASRProvider):
                 audio_float = self._pcm_to_float(audio_bytes)
                 
                 # Check for speech
+                vad_start = time.perf_counter()
                 has_speech = await asyncio.get_event_loop().run_in_executor(
                     None, self._has_speech, audio_float
                 )
+                trace_vad(vad_start, time.perf_counter(), has_speech)
                 
                 if has_speech:
                     self._stats.speech_frames += chunk_samples
@@ -511,9 +519,11 @@ class VADASRWrapper(ASRProvider):
             audio_bytes = bytes(buffer)
             audio_float = self._pcm_to_float(audio_bytes)
             
+            vad_start = time.perf_counter()
             has_speech = await asyncio.get_event_loop().run_in_executor(
                 None, self._has_speech, audio_float
             )
+            trace_vad(vad_start, time.perf_counter(), has_speech)
             
             if has_speech:
                 async def single_chunk():
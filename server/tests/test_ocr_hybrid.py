@@ -40,6 +40,108 @@ class TestLayoutClassifier(unittest.TestCase):
         table = LayoutResult(LayoutType.TABLE, 0.8, 10)
         self.assertTrue(table.is_complex())
 
+    def test_near_duplicate_skips_classification(self):
+        img_array = np.zeros((600, 800, 3), dtype=np.uint8)
+        img_array[100:300, 100:400] = [255, 0, 0]
+        first = self.classifier.classify(Image.fromarray(img_array))
+        img_array[590:600, 790:800] = [0, 255, 0]  # cursor-sized change
+        second = self.classifier.classify(Image.fromarray(img_array))
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertEqual(second.layout_type, first.layout_type)
+        stats = self.classifier.get_stats()
+        self.assertEqual(stats["frames_classified"], 1)
+        self.assertEqual(stats["near_duplicate_skips"], 1)
+
+    def test_memoized_by_hash(self):
+        slide_a = np.zeros((600, 800, 3), dtype=np.uint8)
+        slide_a[:300] = 255
+        slide_b = np.zeros((600, 800, 3), dtype=np.uint8)
+        slide_b[:, :400] = 255
+        for arr in (slide_a, slide_b, slide_a):
+            self.classifier.classify(Image.fromarray(arr))
+        stats = self.classifier.get_stats()
+        self.assertEqual(stats["frames_classified"], 2)
+        self.assertEqual(stats["cache_hits"], 1)
+
+    def test_grayscale_input(self):
+        result = self.classifier.classify(Image.new('L', (1920, 1080), color=128))
+        self.assertNotEqual(result.layout_type, LayoutType.UNKNOWN)
+
+
+def _reference_slides():
+    """Deterministic 1280x720 reference slides, built without fonts."""
+    w, h = 1280, 720
+    rng = np.random.default_rng(3)
+
+    blank = np.full((h, w, 3), 255, dtype=np.uint8)
+
+    rect = np.zeros((h, w, 3), dtype=np.uint8)
+    rect[120:360, 160:640] = [255, 0, 0]
+
+    bars = blank.copy()
+    for i, color in enumerate([(231, 76, 60), (52, 152, 219), (46, 204, 113), (241, 196, 15)]):
+        bars[200 + 80 * i:640, 200 + 220 * i:360 + 220 * i] = color
+
+    words = blank.copy()
+    for row in range(9):
+        x = 100
+        while x < 1100:
+            word = int(rng.integers(30, 120))
+            words[150 + 55 * row:172 + 55 * row, x:x + word] = 30
+            x += word + 18
+
+    noise = np.random.default_rng(0).integers(0, 255, (h // 8, w // 8, 3)).astype(np.uint8)
+    photo = np.asarray(Image.fromarray(noise).resize((w, h), Image.Resampling.BICUBIC))
+
+    inset = words.copy()
+    inset[h - 216:, w - 384:] = photo[:216, :384]
+
+    ramp = np.linspace(0, 1, w)[None, :, None]
+    gradient = np.broadcast_to(
+        np.array([30, 60, 140]) * ramp + np.array([240, 240, 250]) * (1 - ramp), (h, w, 3)
+    ).astype(np.uint8)
+
+    faded = (words * 0.9 + photo * 0.1).astype(np.uint8)
+
+    return {
+        "blank": blank,
+        "rect": rect,
+        "bars": bars,
+        "words": words,
+        "photo": photo,
+        "photo_inset": inset,
+        "gradient": gradient,
+        "faded_photo": faded,
+    }
+
+
+class TestLayoutFeatureParity(unittest.TestCase):
+    """The working-resolution feature path keeps the previous classifier's decisions.
+
+    Expected labels come from the full-resolution scipy/skimage feature path
+    (Canny edges, exact color counts) that the NumPy kernels replaced.
+    """
+
+    EXPECTED = {
+        "blank": LayoutType.TEXT,
+        "rect": LayoutType.TEXT,
+        "bars": LayoutType.TEXT,
+        "words": LayoutType.TEXT,
+        "photo": LayoutType.TABLE,
+        "photo_inset": LayoutType.TABLE,
+        "gradient": LayoutType.TEXT,
+        "faded_photo": LayoutType.TABLE,
+    }
+
+    def test_reference_slides_keep_their_layout(self):
+        classifier = LayoutClassifier(cache_size=0)
+        for name, slide in _reference_slides().items():
+            classifier.clear_cache()
+            with self.subTest(slide=name):
+                result = classifier.classify(Image.fromarray(slide))
+                self.assertEqual(result.layout_type, self.EXPECTED[name])
+
 
 class TestFusionEngine(unittest.TestCase):
     def setUp(self):
@@ -130,6 +232,35 @@ class TestIntegrationAsync(unittest.IsolatedAsyncioTestCase):
         except ImportError as e:
             self.skipTest(f"Import error: {e}")
 
+    async def test_end_session_clears_backfill(self):
+        try:
+            from services.ocr_hybrid import HybridOCRPipeline
+        except ImportError as e:
+            self.skipTest(f"Import error: {e}")
+        pipeline = HybridOCRPipeline()
+        pipeline._on_vlm_backfill("s", "1", SmolVLMResult(text="late"), None)
+        pipeline.scheduler._session_budget("s").charge(1.0)
+        pipeline.end_session("s")
+        self.assertEqual(pipeline.drain_backfill_results("s"), [])
+        self.assertNotIn("s", pipeline.scheduler._session_budgets)
+
+    async def test_backfill_listener_fires_when_result_is_ready(self):
+        try:
+            from services.ocr_hybrid import HybridOCRPipeline
+        except ImportError as e:
+            self.skipTest(f"Import error: {e}")
+        pipeline = HybridOCRPipeline()
+        delivered = []
+        pipeline.on_backfill_ready("s", lambda: delivered.extend(pipeline.drain_backfill_results("s")))
+        pipeline._on_vlm_backfill("s", "1", SmolVLMResult(text="late"), None)
+        pipeline._on_vlm_backfill("other", "2", SmolVLMResult(text="elsewhere"), None)
+        self.assertEqual(len(delivered), 1)
+        self.assertEqual(pipeline.drain_backfill_results("s"), [])
+
+        pipeline.end_session("s")
+        pipeline._on_vlm_backfill("s", "3", SmolVLMResult(text="after end"), None)
+        self.assertEqual(len(delivered), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,159 @@
+"""Tests for the batched, budgeted VLM enrichment scheduler."""
+
+import asyncio
+import threading
+import unittest
+
+from PIL import Image
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.ocr_smolvlm import SmolVLMResult
+from services.ocr_vlm_scheduler import ComputeBudget, VLMScheduler
+
+
+class FakeVLM:
+    """Records batch sizes; each batch takes `delay` seconds."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def process_batch(self, images, paddle_contexts=None):
+        self.release.wait(timeout=2)
+        self.batches.append([ctx for ctx in paddle_contexts])
+        if self.delay:
+            import time
+            time.sleep(self.delay)
+        return [SmolVLMResult(text=f"text-{ctx}") for ctx in paddle_contexts]
+
+
+def _image():
+    return Image.new("RGB", (8, 8), color="white")
+
+
+class TestComputeBudget(unittest.TestCase):
+    def test_exhausted_and_expiry(self):
+        budget = ComputeBudget(seconds_per_minute=1.0, window_s=10.0)
+        budget.charge(0.6, now=100.0)
+        self.assertFalse(budget.exhausted(now=100.0))
+        budget.charge(0.6, now=101.0)
+        self.assertTrue(budget.exhausted(now=101.0))
+        self.assertAlmostEqual(budget.seconds_until_available(now=101.0), 9.0)
+        self.assertFalse(budget.exhausted(now=110.5))
+
+    def test_zero_limit_disables(self):
+        budget = ComputeBudget(seconds_per_minute=0)
+        budget.charge(100.0)
+        self.assertFalse(budget.exhausted())
+
+
+class TestVLMScheduler(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_frames_are_batched(self):
+        vlm = FakeVLM()
+        scheduler = VLMScheduler(vlm, batch_size=4, batch_window_ms=20, global_budget_s=0, session_budget_s=0)
+        results = await asyncio.gather(*(
+            scheduler.submit(_image(), paddle_context=i, session_id="s") for i in range(4)
+        ))
+        await scheduler.close()
+        self.assertEqual([r.text for r in results], ["text-0", "text-1", "text-2", "text-3"])
+        self.assertEqual(len(vlm.batches), 1)
+
+    async def test_query_runs_before_background(self):
+        vlm = FakeVLM()
+        vlm.release.clear()
+        scheduler = VLMScheduler(vlm, batch_size=1, batch_window_ms=0, global_budget_s=0, session_budget_s=0)
+        first = asyncio.create_task(scheduler.submit(_image(), paddle_context="busy", session_id="s"))
+        await asyncio.sleep(0.05)  # worker is now blocked on the first batch
+        background = asyncio.create_task(scheduler.submit(_image(), paddle_context="bg", session_id="s"))
+        query = asyncio.create_task(scheduler.submit(_image(), paddle_context="q", session_id="s", mode="query"))
+        await asyncio.sleep(0.01)
+        vlm.release.set()
+        await asyncio.gather(first, background, query)
+        await scheduler.close()
+        self.assertEqual([b[0] for b in vlm.batches], ["busy", "q", "bg"])
+
+    async def test_over_budget_frames_are_deferred_then_backfilled(self):
+        backfilled = []
+        vlm = FakeVLM()
+        scheduler = VLMScheduler(
+            vlm,
+            batch_size=2,
+            batch_window_ms=0,
+            global_budget_s=0,
+            session_budget_s=0.001,
+            on_backfill=lambda sid, key, result, ctx: backfilled.append((sid, key, result.text)),
+        )
+        scheduler._session_budget("s").charge(1.0)
+
+        result = await scheduler.submit(_image(), paddle_context="late", session_id="s", frame_key="7")
+        self.assertIsNone(result)
+        self.assertEqual(scheduler.get_stats()["backfill_pending"], 1)
+
+        # Query mode is never deferred, even over budget.
+        answer = await scheduler.submit(_image(), paddle_context="q", session_id="s", mode="query")
+        self.assertEqual(answer.text, "text-q")
+
+        # Once the session's window drains, the idle worker backfills the frame.
+        scheduler._session_budgets.pop("s")
+        scheduler._wakeup.set()
+        for _ in range(50):
+            if backfilled:
+                break
+            await asyncio.sleep(0.01)
+        await scheduler.close()
+        self.assertEqual(backfilled, [("s", "7", "text-late")])
+        self.assertEqual(scheduler.get_stats()["frames_deferred"], 1)
+
+    async def test_backfill_queue_is_bounded(self):
+        scheduler = VLMScheduler(FakeVLM(), global_budget_s=0.001, session_budget_s=0, backfill_max=2)
+        scheduler.global_budget.charge(5.0)
+        for i in range(4):
+            self.assertIsNone(await scheduler.submit(_image(), paddle_context=i, session_id="s"))
+        stats = scheduler.get_stats()
+        await scheduler.close()
+        self.assertEqual(stats["backfill_pending"], 2)
+        self.assertEqual(stats["backfill_evicted"], 2)
+
+    async def test_dropped_session_leaves_nothing_behind(self):
+        backfilled = []
+        vlm = FakeVLM()
+        vlm.release.clear()
+        scheduler = VLMScheduler(
+            vlm,
+            batch_size=1,
+            batch_window_ms=0,
+            global_budget_s=0,
+            session_budget_s=0.001,
+            on_backfill=lambda sid, key, result, ctx: backfilled.append(sid),
+        )
+        # One backfill frame is running, another is still queued.
+        scheduler._session_budget("s").charge(1.0)
+        for i in range(2):
+            self.assertIsNone(await scheduler.submit(_image(), paddle_context=i, session_id="s"))
+        scheduler._session_budgets.pop("s")
+        scheduler._wakeup.set()
+        for _ in range(50):
+            if scheduler._in_flight:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(len(scheduler._in_flight), 1)
+
+        self.assertEqual(scheduler.drop_session("s"), 1)
+        vlm.release.set()
+        for _ in range(50):
+            if not scheduler._in_flight:
+                break
+            await asyncio.sleep(0.01)
+        await scheduler.close()
+        self.assertEqual(backfilled, [])
+        self.assertEqual(scheduler.get_stats()["backfill_pending"], 0)
+        self.assertNotIn("s", scheduler._session_budgets)
+
+
+if __name__ == '__main__':
+    unittest.main()
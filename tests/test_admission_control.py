@@ -0,0 +1,110 @@
+from server.services.admission_control import AdmissionController, AdmissionVerdict, SessionRequest
+from server.services.asr_providers import ASRConfig
+
+
+def _request(model="small.en", vad=False, sources=2, **kwargs):
+    return SessionRequest(config=ASRConfig(model_name=model, vad_enabled=vad), sources=sources, **kwargs)
+
+
+def test_admits_by_cost_then_degrades_then_rejects_with_retry_hint():
+    admission = AdmissionController(capacity=2.0, utilization=0.8)  # budget 1.6
+
+    # small.en, two sources, no VAD: 2 x 0.3 = 0.6
+    first = admission.admit("a", _request())
+    assert first.verdict is AdmissionVerdict.ACCEPT
+    assert admission.load() == first.demand
+
+    # medium.en without VAD (1.4) no longer fits in the remaining 1.0; with VAD (0.84) it does
+    second = admission.admit("b", _request("medium.en"))
+    assert second.verdict is AdmissionVerdict.DEGRADED
+    assert (second.config.model_name, second.config.vad_enabled) == ("medium.en", True)
+
+    # 0.16 left: even tiny.en with VAD for two sources + OCR doesn't fit
+    third = admission.admit("c", _request("medium.en", ocr=True))
+    assert third.verdict is AdmissionVerdict.REJECT
+    assert third.retry_after_s >= 30
+    assert admission.snapshot()["sessions"] == 2
+
+    # A mic-only tiny.en session still fits
+    assert admission.admit("d", _request("tiny.en", vad=True, sources=1)).admitted
+
+    admission.release("b")
+    assert admission.admit("c", _request("medium.en", ocr=True)).admitted
+
+
+def test_measured_rtf_replaces_estimates_and_feeds_history():
+    admission = AdmissionController(capacity=1.0, utilization=1.0)
+    admission.admit("a", _request("base.en", sources=1))
+    assert admission.load() == admission.rtf_estimate("base.en", False)
+
+    # The session turns out far more expensive than the static table says
+    for _ in range(20):
+        admission.observe("a", "mic", 0.9)
+    assert admission.load() > 0.8
+    second = admission.admit("b", _request("base.en"))
+    assert second.verdict is AdmissionVerdict.DEGRADED
+    assert second.config.model_name == "tiny.en"
+
+    admission.release("a")
+    assert admission.rtf_estimate("base.en", False) > 0.8
+    assert admission.snapshot()["rtf_history"]["base.en"] > 0.8
+
+
+class _FakeSegment:
+    def __init__(self, text):
+        self.text, self.start, self.end, self.avg_logprob = text, 0.0, 1.0, -0.1
+
+
+class _FakeWhisperModel:
+    """Transcribes every chunk as the name of the model it was loaded with."""
+
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def transcribe(self, audio, **kwargs):
+        return [_FakeSegment(self.model_name)], type("Info", (), {"language": "en"})()
+
+
+def test_degraded_session_streams_on_the_offered_model(monkeypatch):
+    import asyncio
+
+    import numpy as np
+
+    from server.services import model_preloader, model_residency, provider_faster_whisper
+    from server.services.asr_providers import ASRProviderRegistry
+    from server.services.asr_stream import _get_default_config, stream_asr
+
+    monkeypatch.setattr(provider_faster_whisper, "WhisperModel", _FakeWhisperModel)
+    monkeypatch.setenv("ECHOPANEL_ASR_PROVIDER", "faster_whisper")
+    monkeypatch.setenv("ECHOPANEL_WHISPER_MODEL", "medium.en")
+    monkeypatch.setenv("ECHOPANEL_WHISPER_DEVICE", "cpu")
+    monkeypatch.setenv("ECHOPANEL_ASR_VAD", "0")
+    monkeypatch.setenv("ECHOPANEL_ASR_CHUNK_SECONDS", "1")
+    model_preloader.reset_model_manager()
+    model_residency.reset_model_residency()
+
+    # medium.en (0.7) and medium.en with VAD (0.42) don't fit; small.en with VAD does
+    admission = AdmissionController(capacity=0.3, utilization=1.0)
+    decision = admission.admit("a", SessionRequest(config=_get_default_config(), sources=1))
+    assert decision.verdict is AdmissionVerdict.DEGRADED
+    assert decision.config.model_name == "small.en"
+
+    t = np.arange(2 * 16000) / 16000
+    pcm = (np.sin(2 * np.pi * 220 * t) * 4000).astype("<i2").tobytes()
+
+    async def transcribe():
+        async def frames():
+            for i in range(0, len(pcm), 640):
+                yield pcm[i:i + 640]
+        return [event["text"] async for event in stream_asr(frames(), 16000, "mic", config=decision.config)
+                if event["type"] == "asr_final"]
+
+    try:
+        assert asyncio.run(transcribe()) == [decision.config.model_name] * 2
+        # Still the offered model after the server hot-swapped its default
+        model_preloader.get_model_manager()._generation = 1
+        assert asyncio.run(transcribe()) == [decision.config.model_name] * 2
+    finally:
+        model_preloader.reset_model_manager()
+        model_residency.reset_model_residency()
+        ASRProviderRegistry._instances.clear()
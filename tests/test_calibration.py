@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from server.services import calibration
+from server.services.calibration import CalibrationProfile, CalibrationResult, load_profile, run_calibration
+from server.services.capability_detector import CapabilityDetector, MachineProfile
+
+MACHINE = MachineProfile(
+    ram_gb=16.0, cpu_cores=8, cpu_percent=5.0, has_mps=False, has_cuda=False,
+    cuda_devices=0, os_name="Linux", arch="x86_64",
+)
+
+
+def _result(model, rtf_1, rtf_2, provider="faster_whisper", rss=300.0):
+    return CalibrationResult(provider=provider, model=model, compute_type="int8", device="cpu",
+                             rtf_by_streams={1: rtf_1, 2: rtf_2}, peak_rss_mb=rss, rss_delta_mb=rss)
+
+
+def test_recommends_largest_model_meeting_target_at_expected_concurrency(monkeypatch):
+    monkeypatch.setattr(calibration, "TARGET_RTF", 0.5)
+    monkeypatch.setattr(calibration, "EXPECTED_CONCURRENCY", 2)
+    profile = CalibrationProfile(machine=MACHINE.to_dict(), streams=2, audio_seconds=10, results=[
+        _result("tiny.en", 0.05, 0.09),
+        _result("base.en", 0.12, 0.25),
+        _result("small.en", 0.30, 0.62),  # fine alone, too slow for two meetings
+        _result("medium.en", 0.90, 1.80),
+    ])
+
+    rec = CapabilityDetector().recommend(MACHINE, calibration=profile)
+
+    assert (rec.provider, rec.model, rec.calibrated) == ("faster_whisper", "base.en", True)
+    assert rec.fallback.model == "tiny.en"
+    assert rec.to_dict()["calibrated"] is True
+
+    # Interpolated between measured points; single-stream planning allows small.en
+    monkeypatch.setattr(calibration, "EXPECTED_CONCURRENCY", 1)
+    assert CapabilityDetector().recommend(MACHINE, calibration=profile).model == "small.en"
+
+
+def test_profile_for_other_hardware_is_ignored(tmp_path):
+    path = tmp_path / "machine_profile.json"
+    calibration.save_profile(CalibrationProfile(machine=MACHINE.to_dict(), streams=2, audio_seconds=10,
+                                                results=[_result("base.en", 0.1, 0.2)]), path)
+
+    assert load_profile(MACHINE.to_dict(), path).results[0].rtf_at(2) == pytest.approx(0.2)
+    other = dict(MACHINE.to_dict(), cpu_cores=4)
+    assert load_profile(other, path) is None
+
+
+def test_run_calibration_measures_and_persists(tmp_path, monkeypatch):
+    monkeypatch.setenv("ECHOPANEL_CALIBRATION_CANDIDATES", "synthetic:tiny.en:int8,synthetic:base.en:int8")
+    path = tmp_path / "machine_profile.json"
+
+    profile = asyncio.run(run_calibration(streams=2, audio_seconds=2.0, target_rtf=5.0, path=path))
+
+    assert [r.model for r in profile.results] == ["tiny.en", "base.en"]
+    for result in profile.results:
+        assert result.ok, result.error
+        assert set(result.rtf_by_streams) == {1, 2}
+        assert all(rtf > 0 for rtf in result.rtf_by_streams.values())
+    saved = load_profile(CapabilityDetector().detect().to_dict(), path)
+    assert saved is not None and len(saved.results) == 2
@@ -0,0 +1,137 @@
+import numpy as np
+
+from server.services.echo_bleed import BleedDetector
+
+RATE = 16000
+CHUNK = 1600  # 100 ms
+
+
+def _speech_like(seconds, seed):
+    """Noise shaped by random syllables (80-300 ms) and pauses."""
+    rng = np.random.default_rng(seed)
+    envelope = np.empty(0)
+    while envelope.size < seconds * RATE:
+        syllable = int(rng.uniform(0.08, 0.3) * RATE)
+        level = rng.uniform(0.1, 0.6) if rng.random() > 0.2 else 0.005
+        envelope = np.concatenate((envelope, np.full(syllable, level) * np.hanning(syllable) ** 0.5))
+    envelope = envelope[: int(seconds * RATE)]
+    return envelope * rng.standard_normal(envelope.size)
+
+
+def _pcm(x):
+    return (np.clip(x, -1, 1) * 32767).astype(np.int16).tobytes()
+
+
+def _run(detector, system, mic):
+    out = bytearray()
+    for i in range(0, len(system), CHUNK * 2):
+        detector.on_receive("system", system[i:i + CHUNK * 2], received_at=i / (2 * RATE))
+        detector.on_receive("mic", mic[i:i + CHUNK * 2], received_at=i / (2 * RATE))
+        out += detector.filter_mic(mic[i:i + CHUNK * 2])
+    return bytes(out)
+
+
+def test_bleed_is_suppressed_and_counted():
+    system = _speech_like(6.0, seed=1)
+    # Speaker bleed: quieter, 60 ms acoustic delay, plus a little room noise
+    delay = int(0.06 * RATE)
+    bleed = 0.3 * np.concatenate((np.zeros(delay), system[:-delay]))
+    bleed += 0.002 * np.random.default_rng(9).standard_normal(bleed.size)
+    detector = BleedDetector(RATE)
+
+    out = _run(detector, _pcm(system), _pcm(bleed))
+
+    snap = detector.snapshot()
+    assert detector.suppressed_seconds > 4.0
+    assert snap["last_correlation"] >= 0.9
+    assert abs(snap["lag_ms"] + 60) <= 20
+    assert len(out) == len(_pcm(bleed))  # timeline preserved
+    assert not any(out[-CHUNK * 2:])
+
+
+def test_own_voice_is_kept():
+    system = _speech_like(6.0, seed=1)
+    voice = _speech_like(6.0, seed=2)
+    detector = BleedDetector(RATE)
+
+    out = _run(detector, _pcm(system), _pcm(voice + 0.1 * system))
+
+    assert detector.suppressed_seconds < 0.5
+    assert out == _pcm(voice + 0.1 * system)
+
+    # Without a system lane nothing is compared
+    solo = BleedDetector(RATE)
+    solo.on_receive("mic", _pcm(voice), received_at=0.0)
+    assert solo.filter_mic(_pcm(voice)) == _pcm(voice)
+
+
+def test_dropped_mic_audio_keeps_lanes_aligned():
+    system = _pcm(_speech_like(8.0, seed=1))
+    delay = int(0.06 * RATE)
+    bleed = 0.3 * np.concatenate((np.zeros(delay), _speech_like(8.0, seed=1)[:-delay]))
+    mic = _pcm(bleed + 0.002 * np.random.default_rng(9).standard_normal(bleed.size))
+    detector = BleedDetector(RATE)
+
+    # Realtime backpressure drops 0.5 s of mic audio after it was received
+    dropped = range(20, 25)
+    for n, i in enumerate(range(0, len(system), CHUNK * 2)):
+        detector.on_receive("system", system[i:i + CHUNK * 2], received_at=i / (2 * RATE))
+        detector.on_receive("mic", mic[i:i + CHUNK * 2], received_at=i / (2 * RATE))
+        if n in dropped:
+            detector.on_drop("mic", CHUNK * 2)
+        else:
+            detector.filter_mic(mic[i:i + CHUNK * 2])
+
+    snap = detector.snapshot()
+    assert abs(snap["lag_ms"] + 60) <= 20
+    assert snap["last_correlation"] >= 0.9
+
+
+class _CountingWhisperModel:
+    """Fake faster-whisper model that records the audio it is asked to decode."""
+
+    def __init__(self, model_name, **kwargs):
+        self.decoded = []
+
+    def transcribe(self, audio, **kwargs):
+        self.decoded.append(audio.size)
+        return [], type("Info", (), {"language": "en"})()
+
+
+def test_suppressed_mic_is_not_decoded_without_vad(monkeypatch):
+    import asyncio
+
+    from server.services import model_residency, provider_faster_whisper
+    from server.services.asr_providers import ASRConfig, ASRProviderRegistry, AudioSource
+
+    monkeypatch.setattr(provider_faster_whisper, "WhisperModel", _CountingWhisperModel)
+    model_residency.reset_model_residency()
+
+    system = _speech_like(6.0, seed=1)
+    delay = int(0.06 * RATE)
+    bleed = 0.3 * np.concatenate((np.zeros(delay), system[:-delay]))
+    bleed += 0.002 * np.random.default_rng(9).standard_normal(bleed.size)
+    detector = BleedDetector(RATE)
+    filtered = _run(detector, _pcm(system), _pcm(bleed))
+
+    async def run(provider):
+        async def frames():
+            for i in range(0, len(filtered), CHUNK * 2):
+                yield filtered[i:i + CHUNK * 2]
+        return [s async for s in provider.transcribe_stream(frames(), RATE, AudioSource.MICROPHONE)]
+
+    try:
+        # VAD off (ECHOPANEL_ASR_VAD=0 or the ladder's reduce-quality step): no wrapper in the path
+        provider = ASRProviderRegistry.get_provider(
+            "faster_whisper", ASRConfig(model_name="base.en", device="cpu", chunk_seconds=1, vad_enabled=False))
+        assert type(provider) is provider_faster_whisper.FasterWhisperProvider
+        asyncio.run(run(provider))
+        model = provider._get_model()
+    finally:
+        model_residency.reset_model_residency()
+        ASRProviderRegistry._instances.clear()
+
+    silent_chunks = sum(not any(filtered[i:i + 2 * RATE]) for i in range(0, len(filtered), 2 * RATE))
+    assert detector.suppressed_seconds > 4.0
+    assert silent_chunks >= 4
+    assert len(model.decoded) == 6 - silent_chunks
@@ -0,0 +1,280 @@
+"""
+Hot-path micro-benchmarks with regression gates.
+
+Times the per-frame and per-segment code paths against stored baselines in
+tests/hot_path_baselines.json and fails when a benchmark regresses past the
+tolerance. Opt-in, since wall-clock timings don't belong in every test run:
+
+    ECHOPANEL_BENCH=1 pytest -q tests/test_hot_path_benchmarks.py -s
+    ECHOPANEL_BENCH=1 ECHOPANEL_BENCH_UPDATE=1 pytest -q tests/test_hot_path_benchmarks.py
+
+Each result is the best-of-N time per call. It is divided by a fixed
+pure-Python reference workload timed in the same run, so baselines recorded
+on one machine remain comparable on a faster or slower one.
+ECHOPANEL_BENCH_TOLERANCE (default 0.5) is the allowed fractional slowdown.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import os
+import random
+import time
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+import pytest
+
+BENCH_ENABLED = os.getenv("ECHOPANEL_BENCH", "0") == "1"
+BENCH_UPDATE = os.getenv("ECHOPANEL_BENCH_UPDATE", "0") == "1"
+BENCH_TOLERANCE = float(os.getenv("ECHOPANEL_BENCH_TOLERANCE", "0.5"))
+BASELINE_PATH = Path(__file__).with_name("hot_path_baselines.json")
+REPEATS = 5
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(not BENCH_ENABLED, reason="set ECHOPANEL_BENCH=1 to run hot-path benchmarks"),
+]
+
+_WORDS = (
+    "we", "should", "ship", "the", "release", "on", "Friday", "Alice", "will", "follow", "up", "with",
+    "Acme", "about", "the", "budget", "risk", "decided", "to", "move", "deadline", "action", "item",
+    "review", "numbers", "next", "week", "Bob", "owns", "the", "launch", "plan", "in", "Berlin",
+)
+
+
+def _best_per_call(fn: Callable[[], None], number: int) -> float:
+    """Best-of-REPEATS seconds per call of `fn`."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def _reference_workload() -> None:
+    total = 0
+    for i in range(20000):
+        total += i * i % 7
+    "-".join(str(i) for i in range(500))
+
+
+@pytest.fixture(scope="module")
+def reference_s() -> float:
+    return _best_per_call(_reference_workload, 20)
+
+
+def _transcript(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    segments = []
+    for i in range(n):
+        segments.append({
+            "type": "asr_final",
+            "t0": i * 2.0,
+            "t1": i * 2.0 + 1.8,
+            "text": " ".join(rng.choice(_WORDS) for _ in range(12)),
+            "source": "mic" if i % 2 else "system",
+            "confidence": 0.9,
+        })
+    return segments
+
+
+def _load_baselines() -> Dict[str, float]:
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text()).get("benchmarks", {})
+    return {}
+
+
+def _check(name: str, seconds: float, reference: float) -> None:
+    normalized = seconds / reference
+    baselines = _load_baselines()
+    print(f"\n[bench] {name}: {seconds * 1e6:.1f} us/call ({normalized:.4f} x reference)")
+    if BENCH_UPDATE:
+        baselines[name] = round(normalized, 6)
+        BASELINE_PATH.write_text(json.dumps({
+            "note": "Per-call time / reference workload time; refresh with ECHOPANEL_BENCH_UPDATE=1",
+            "benchmarks": dict(sorted(baselines.items())),
+        }, indent=2) + "\n")
+        return
+    baseline = baselines.get(name)
+    if baseline is None:
+        pytest.skip(f"no baseline for {name}; record one with ECHOPANEL_BENCH_UPDATE=1")
+    limit = baseline * (1 + BENCH_TOLERANCE)
+    assert normalized <= limit, (
+        f"{name} regressed: {normalized:.4f} x reference vs baseline {baseline:.4f} "
+        f"(limit {limit:.4f}, tolerance {BENCH_TOLERANCE:.0%})"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Per-frame paths
+# ---------------------------------------------------------------------------
+
+def test_bench_put_audio(reference_s):
+    from server.api import ws_live_listener as ws
+
+    frame = bytes(640)  # 20 ms of 16 kHz PCM16
+
+    async def run() -> float:
+        state = ws.SessionState()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def put_and_drain() -> None:
+            for _ in range(100):
+                await ws.put_audio(queue, frame, state=state, source="mic")
+            while not queue.empty():
+                queue.get_nowait()
+                state.latency.source("mic").on_dequeue(len(frame))
+
+        best = float("inf")
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            for _ in range(5):
+                await put_and_drain()
+            best = min(best, (time.perf_counter() - start) / 500)
+        return best
+
+    recording_lane = ws.RECORDING_LANE_ENABLED
+    ws.RECORDING_LANE_ENABLED = False
+    try:
+        _check("put_audio", asyncio.run(run()), reference_s)
+    finally:
+        ws.RECORDING_LANE_ENABLED = recording_lane
+
+
+def test_bench_queue_bytes(reference_s):
+    from server.api.ws_live_listener import _queue_bytes
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(100):  # 2 s backlog of 20 ms frames
+        queue.put_nowait(bytes(640))
+    _check("queue_bytes_100_frames", _best_per_call(lambda: _queue_bytes(queue), 2000), reference_s)
+
+
+def test_bench_ws_send_serialization(reference_s):
+    from server.api import ws_live_listener as ws
+
+    class _Socket:
+        async def send_text(self, text: str) -> None:
+            pass
+
+    event = _transcript(1)[0] | {"segment_id": "seg_" + "0" * 16}
+
+    async def run() -> float:
+        state = ws.SessionState(session_id="bench-session", attempt_id="attempt-1", connection_id="conn-1")
+        socket = _Socket()
+        best = float("inf")
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            for _ in range(1000):
+                await ws.ws_send(state, socket, event)
+            best = min(best, (time.perf_counter() - start) / 1000)
+        return best
+
+    _check("ws_send_asr_final", asyncio.run(run()), reference_s)
+
+
+# ---------------------------------------------------------------------------
+# Per-segment paths
+# ---------------------------------------------------------------------------
+
+def test_bench_generate_segment_id(reference_s):
+    from server.services.transcript_ids import generate_segment_id
+
+    text = " ".join(_WORDS[:12])
+    _check("generate_segment_id",
+           _best_per_call(lambda: generate_segment_id("mic", 12.34, 14.5, text), 5000), reference_s)
+
+
+@pytest.mark.parametrize("n", [1000, 10000])
+def test_bench_extract_entities_incremental(reference_s, n):
+    from server.services.analysis_stream import extract_entities_incremental
+
+    transcript = _transcript(n)
+    prev, last_t1 = extract_entities_incremental(transcript[:-5], 0.0, {})
+    _check(f"extract_entities_incremental_{n}",
+           _best_per_call(lambda: extract_entities_incremental(transcript, last_t1, prev), 5), reference_s)
+
+
+@pytest.mark.parametrize("n", [1000, 10000])
+def test_bench_extract_cards_incremental(reference_s, n):
+    from server.services.analysis_stream import extract_cards_incremental
+
+    transcript = _transcript(n)
+    prev, last_t1 = extract_cards_incremental(transcript[:-5], 0.0, {}, use_llm=False)
+    _check(f"extract_cards_incremental_{n}",
+           _best_per_call(lambda: extract_cards_incremental(transcript, last_t1, prev, use_llm=False), 5),
+           reference_s)
+
+
+@pytest.mark.parametrize("n", [1000, 10000])
+def test_bench_merge_transcript_with_speakers(reference_s, n):
+    from server.services.diarization import merge_transcript_with_speakers
+
+    transcript = _transcript(n)
+    speakers = [
+        {"t0": i * 5.0, "t1": i * 5.0 + 5.0, "speaker": f"Speaker {i % 4 + 1}"}
+        for i in range(int(n * 2.0 / 5.0) + 1)
+    ]
+    _check(f"merge_transcript_with_speakers_{n}",
+           _best_per_call(lambda: merge_transcript_with_speakers(transcript, speakers), 3), reference_s)
+
+
+# ---------------------------------------------------------------------------
+# RAG and screen dedup
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope="module")
+def rag_stores(tmp_path_factory) -> Dict[int, object]:
+    from server.services.rag_store import LocalRAGStore
+
+    rng = random.Random(3)
+    stores = {}
+    for n_chunks in (1000, 10000):
+        store = LocalRAGStore(store_path=tmp_path_factory.mktemp("rag") / "store.json",
+                              chunk_words=120, overlap_words=30)
+        per_doc = 500
+        for d in range(n_chunks // per_doc):
+            # 90 new words per chunk with the default 30-word overlap
+            text = " ".join(rng.choice(_WORDS) for _ in range(per_doc * 90 + 30))
+            store.index_document(f"doc {d}", text, generate_embeddings=False)
+        stores[n_chunks] = store
+    return stores
+
+
+@pytest.mark.parametrize("n_chunks", [1000, 10000])
+def test_bench_rag_query(reference_s, rag_stores, n_chunks):
+    store = rag_stores[n_chunks]
+    _check(f"rag_query_{n_chunks}_chunks",
+           _best_per_call(lambda: store.query("budget risk for the Berlin launch", top_k=5), 3), reference_s)
+
+
+def _screenshot_png(seed: int) -> Tuple[object, bytes]:
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    image = Image.new("RGB", (1280, 720), "white")
+    draw = ImageDraw.Draw(image)
+    for i in range(30):
+        draw.rectangle([40, 20 + i * 22, 40 + rng.randint(200, 1100), 34 + i * 22], fill=(40, 40, 40))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return image, buffer.getvalue()
+
+
+def test_bench_perceptual_hash_and_dedup(reference_s):
+    pytest.importorskip("PIL")
+    from server.services.image_hash import ImageDeduplicator, PerceptualHash
+
+    image, png = _screenshot_png(1)
+    hasher = PerceptualHash()
+    _check("perceptual_hash_compute_720p", _best_per_call(lambda: hasher.compute_hash(image), 10), reference_s)
+
+    dedup = ImageDeduplicator(max_history=100)
+    for seed in range(2, 102):
+        dedup.is_duplicate(_screenshot_png(seed)[1])
+    _check("image_dedup_is_duplicate_720p", _best_per_call(lambda: dedup.is_duplicate(png), 10), reference_s)
@@ -0,0 +1,73 @@
+"""Cold-start budget for `import server.main`.
+
+Heavy optional stacks must stay import-on-first-use: ASR providers register
+lazily and chromadb, torch, sentence-transformers, paddle and transformers
+are imported by the code paths that use them. numpy is imported by the audio
+code (diarization, bleed detection, the .epcm codec) when a session first
+touches audio.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+IMPORT_BUDGET_MS = float(os.getenv("ECHOPANEL_IMPORT_BUDGET_MS", "2500"))
+
+HEAVY_MODULES = [
+    "chromadb",
+    "ctranslate2",
+    "faster_whisper",
+    "numpy",
+    "onnxruntime",
+    "paddle",
+    "paddleocr",
+    "pyannote.audio",
+    "sentence_transformers",
+    "torch",
+    "transformers",
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import server.main
+elapsed_ms = (time.perf_counter() - start) * 1000
+heavy = json.loads(sys.argv[1])
+print(json.dumps({
+    "elapsed_ms": elapsed_ms,
+    "heavy": sorted(m for m in heavy if m in sys.modules),
+    "providers": sorted(m for m in sys.modules if m.startswith("server.services.provider_")),
+}))
+"""
+
+
+def _cold_import():
+    env = dict(os.environ)
+    env.pop("ECHOPANEL_ASR_PROVIDER", None)
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE, json.dumps(HEAVY_MODULES)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_server_import_stays_lazy_and_within_budget():
+    report = _cold_import()
+
+    assert report["heavy"] == []
+    assert report["providers"] == []
+    assert report["elapsed_ms"] < IMPORT_BUDGET_MS, f"import server.main took {report['elapsed_ms']:.0f} ms"
+
+
+def test_selected_provider_imports_on_first_use():
+    from server.services.asr_providers import ASRProviderRegistry
+
+    assert ASRProviderRegistry.is_registered("synthetic")
+    assert "faster_whisper" in ASRProviderRegistry.names()
+    provider_class = ASRProviderRegistry.provider_class("synthetic")
+    assert provider_class is not None and provider_class.__module__ == "server.services.provider_synthetic"
+    assert ASRProviderRegistry.provider_class("not-a-provider") is None
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+import pytest
+
+from server.services.inference_scheduler import (
+    InferenceDropped,
+    InferenceScheduler,
+    bind_flow,
+    reset_inference_scheduler,
+    unbind_flow,
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    reset_inference_scheduler()
+    yield
+    reset_inference_scheduler()
+
+
+async def _submit(scheduler, session, source, audio_s, label, order, droppable=True):
+    """Queue a job attributed to (session, source) that records when it runs."""
+    token = bind_flow(session, source)
+    scheduler.open_flow(session, source)
+    task = asyncio.ensure_future(scheduler.run(lambda: order.append(label), audio_s, droppable=droppable))
+    unbind_flow(token)
+    await asyncio.sleep(0)  # let it enqueue
+    return task
+
+
+def test_heavy_session_cannot_starve_another_sessions_mic():
+    scheduler = InferenceScheduler(workers=1)
+    order = []
+
+    async def run():
+        gate = threading.Event()
+        blocker = asyncio.ensure_future(scheduler.run(gate.wait, 0.1, droppable=False))
+        await asyncio.sleep(0)
+        scheduler.open_flow("b", "mic")
+        scheduler.open_flow("b", "system")
+        tasks = [await _submit(scheduler, "a", "system", 4.0, f"a{i}", order) for i in range(4)]
+        tasks.append(await _submit(scheduler, "b", "system", 4.0, "b-system", order))
+        tasks.append(await _submit(scheduler, "b", "mic", 4.0, "b-mic", order))
+        gate.set()
+        await asyncio.gather(blocker, *tasks)
+
+    asyncio.run(run())
+
+    # a's backlog was queued first, yet b's mic runs right after a's head job
+    assert order[:3] == ["a0", "b-mic", "a1"]
+    assert sorted(order) == sorted(["a0", "a1", "a2", "a3", "b-system", "b-mic"])
+    assert scheduler.snapshot()["jobs_dropped"] == 0
+
+
+def test_overload_sheds_stale_system_decodes_before_mic():
+    clock = [0.0]
+    scheduler = InferenceScheduler(workers=1, clock=lambda: clock[0])
+    order = []
+
+    async def run():
+        gate = threading.Event()
+        blocker = asyncio.ensure_future(scheduler.run(gate.wait, 0.1, droppable=False))
+        await asyncio.sleep(0)
+        system = await _submit(scheduler, "a", "system", 2.0, "system", order)
+        mic = await _submit(scheduler, "a", "mic", 2.0, "mic", order)
+        flush = await _submit(scheduler, "a", "system", 2.0, "flush", order, droppable=False)
+        clock[0] = 4.0  # past the system deadline (3s), within the mic one (6s)
+        gate.set()
+        await blocker
+        results = await asyncio.gather(system, mic, flush, return_exceptions=True)
+        return results
+
+    results = asyncio.run(run())
+
+    assert isinstance(results[0], InferenceDropped)
+    assert order == ["mic", "flush"]
+    assert scheduler.snapshot()["jobs_dropped"] == 1
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import time
+
+from server.services.latency_trace import (
+    LatencyTracer,
+    bind_source,
+    trace_inference,
+    trace_vad,
+    unbind_source,
+)
+
+
+def _feed(tracer, frames=4, nbytes=3200):
+    for _ in range(frames):
+        tracer.on_enqueue(nbytes)
+    for _ in range(frames):
+        tracer.on_dequeue(nbytes)
+
+
+def _now_pair():
+    end = time.perf_counter()
+    return end - 0.05, end
+
+
+def test_segment_stages_are_correlated_by_audio_time():
+    session = LatencyTracer(tracing=True)
+    tracer = session.source("mic")
+    _feed(tracer)  # 4 x 0.1 s
+    token = bind_source(tracer)
+    try:
+        trace_vad(0.0, 0.0, True)
+        trace_inference(5.0, audio_seconds=0.4)
+    finally:
+        unbind_source(token)
+
+    emission = tracer.on_emit(0.25)
+    assert emission.chunk is tracer._chunks[2]  # chunk covering (0.2, 0.3]
+    tracer.on_sent(emission, "asr_final")
+
+    summary = session.summary()
+    for stage in ("ingest", "queue", "buffer", "vad", "inference", "emit", "send", "end_to_end"):
+        assert summary[stage]["count"] >= 1, stage
+    assert summary["ingest"]["count"] == 4
+    assert abs(summary["inference"]["p50"] - 5.0) < 0.1
+    assert tracer.take_new_inferences() == [(tracer.inference_samples[0][0], 0.4)]
+    assert tracer.take_new_inferences() == []
+
+
+def test_dropped_chunks_do_not_shift_correlation_and_inference_audio_falls_back_to_cursor():
+    session = LatencyTracer(tracing=False)
+    tracer = session.source("system")
+    for _ in range(3):
+        tracer.on_enqueue(3200)
+    tracer.on_drop(2)  # backpressure evicted the two oldest
+    assert len(tracer._pending) == 1
+    tracer.on_dequeue(3200)
+    tracer.on_enqueue(6400)
+    tracer.on_dequeue(6400)
+    assert abs(tracer.audio_cursor - 0.3) < 1e-9
+
+    tracer.on_inference(1.0, 1.5)  # provider gave no audio duration
+    (inference_s, audio_s), = tracer.take_new_inferences()
+    assert abs(inference_s - 0.5) < 1e-9
+    assert abs(audio_s - 0.3) < 1e-9
+    # Tracing off: stage stats only, no spans buffered
+    assert not [e for e in session.chrome_trace()["traceEvents"] if e["ph"] == "X"]
+
+
+def test_trace_calls_outside_a_live_session_are_noops():
+    trace_inference(12.0, 1.0)
+    trace_vad(0.0, 0.001, False)
+
+
+def test_chrome_trace_file_nests_stage_spans(tmp_path):
+    session = LatencyTracer(tracing=True)
+    tracer = session.source("mic")
+    _feed(tracer, frames=2)
+    tracer.on_inference(*_now_pair(), audio_seconds=0.2)
+    tracer.on_sent(tracer.on_emit(0.2))
+
+    path = session.write_chrome_trace("sess-1", directory=tmp_path)
+    data = json.loads(path.read_text())
+    events = [e for e in data["traceEvents"] if e["ph"] == "X"]
+    segment = next(e for e in events if e["cat"] == "segment")
+    stages = [e for e in events if e["cat"] == "stage"]
+    assert [e["name"] for e in stages] == ["ingest", "queue", "buffer", "inference", "emit", "send"]
+    for e in stages:
+        assert e["tid"] == segment["tid"]
+        assert segment["ts"] <= e["ts"]
+        assert e["ts"] + e["dur"] <= segment["ts"] + segment["dur"] + 1
+    assert data["otherData"]["session_id"] == "sess-1"
+    assert "end_to_end" in data["otherData"]["stages_ms"]
+    assert LatencyTracer(tracing=False).write_chrome_trace("x", directory=tmp_path) is None
+
+
+def test_asr_loop_rtf_uses_measured_inference_time():
+    from server.api import ws_live_listener as ws_module
+
+    class _Socket:
+        def __init__(self):
+            self.sent = []
+
+        async def send_text(self, text):
+            self.sent.append(json.loads(text))
+
+    async def fake_stream_asr(pcm_stream, sample_rate=16000, source=None, **kwargs):
+        async for _ in pcm_stream:
+            pass
+        trace_inference(250.0, audio_seconds=1.0)
+        yield {"type": "asr_final", "text": "hi", "t0": 0.0, "t1": 1.0, "source": source}
+
+    async def run():
+        state = ws_module.SessionState()
+        queue = asyncio.Queue()
+        for _ in range(50):
+            await ws_module.put_audio(queue, bytes(640), state=state, source="mic")
+        await queue.put(None)
+        socket = _Socket()
+        original = ws_module.stream_asr
+        ws_module.stream_asr = fake_stream_asr
+        try:
+            await ws_module._asr_loop(socket, state, queue, "mic")
+        finally:
+            ws_module.stream_asr = original
+        return state, socket
+
+    state, socket = asyncio.run(run())
+    assert socket.sent[0]["type"] == "asr_final"
+    assert abs(state.processing_time_total - 0.25) < 1e-3
+    assert abs(state.audio_time_processed - 1.0) < 1e-9
+    samples = list(state.asr_samples_by_source["mic"])
+    assert abs(ws_module._compute_recent_rtf(samples) - 0.25) < 1e-3
+    summary = state.latency.summary()
+    assert summary["queue"]["count"] == 50
+    assert summary["end_to_end"]["count"] == 1
@@ -0,0 +1,76 @@
+import importlib.util
+import wave
+from pathlib import Path
+
+import numpy as np
+
+_SPEC = importlib.util.spec_from_file_location(
+    "echopanel_load_test", Path(__file__).resolve().parents[1] / "scripts" / "load_test.py"
+)
+load_test = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(load_test)
+
+
+def _result(i, latencies, first_audio=100.0, first_final=101.5, dropped=0, frames=1000, rtf=()):
+    r = load_test.SessionResult(session_id=f"s{i}", sources=["system"])
+    r.first_audio_at = first_audio
+    r.first_final_at = first_final
+    r.final_latencies = list(latencies)
+    r.dropped_frames = dropped
+    r.frames_sent = frames
+    r.rtf_samples = list(rtf)
+    return r
+
+
+def test_report_aggregates_sessions_and_flags_slo_breaches():
+    results = [
+        _result(0, [1.0, 2.0, 3.0], rtf=[(1.0, 0.4), (12.0, 0.6)]),
+        _result(1, [4.0, 9.0], dropped=40, rtf=[(2.0, 1.4)]),
+        _result(2, [], first_final=None),
+    ]
+    failed = load_test.SessionResult(session_id="s3", sources=["mic"])
+    failed.error = "ConnectionRefusedError: nope"
+    report = load_test.build_report(results + [failed], [(0.0, 100.0), (11.0, 180.0)], 30.0)
+
+    assert report["sessions"] == 4
+    assert report["sessions_failed"] == 1
+    assert report["sessions_without_final"] == 1
+    assert report["finals"] == 5
+    assert report["final_latency"]["p50"] == 3.0
+    assert report["final_latency"]["max"] == 9.0
+    assert report["time_to_first_final"]["p50"] == 1.5
+    assert report["drop_ratio"] == round(40 / 3000, 4)
+    assert report["rss_mb"]["max"] == 180.0
+    assert [p["t"] for p in report["server_rtf"]["timeline"]] == [0.0, 10.0]
+
+    breaches = load_test.check_slos(report, load_test.SLO(ttff_s=10, p95_s=5, drop_ratio=0.01, rtf=1.0))
+    text = " | ".join(breaches)
+    assert "final latency p95" in text
+    assert "drop ratio" in text
+    assert "server RTF p95" in text
+    assert "failed sessions 1 > 0" in text
+    assert "never produced a final" in text
+
+    ok = load_test.build_report(results[:1], [], 10.0)
+    assert load_test.check_slos(ok, load_test.SLO(ttff_s=10, p95_s=5, drop_ratio=0.01, rtf=1.0)) == []
+
+
+def test_load_pcm_downmixes_resamples_and_frames_loop(tmp_path):
+    path = tmp_path / "stereo44k.wav"
+    t = np.arange(44100) / 44100
+    tone = (np.sin(2 * np.pi * 440 * t) * 8000).astype("<i2")
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(44100)
+        wf.writeframes(np.repeat(tone, 2).tobytes())
+
+    pcm = load_test.load_pcm(path)
+    assert len(pcm) == 16000 * 2
+    assert len(load_test.frame_at(pcm, 0)) == load_test.FRAME_BYTES
+    n_frames = len(pcm) // load_test.FRAME_BYTES
+    assert load_test.frame_at(pcm, n_frames + 3) == load_test.frame_at(pcm, 3)
+
+    assert load_test.plan_sources(0, ["system", "both"]) == ["system"]
+    assert load_test.plan_sources(1, ["system", "both"]) == ["system", "mic"]
+    assert load_test.metrics_url("wss://host:9/ws/live-listener") == "https://host:9/metrics"
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from server.services.loop_monitor import LoopMonitor
+
+
+def _blocking_sync_call(seconds):
+    time.sleep(seconds)
+
+
+def test_heartbeat_records_lag_and_counts_stalls_without_watchdog():
+    monitor = LoopMonitor(interval_ms=5, stall_threshold_ms=100, watchdog=False)
+
+    async def run():
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        _blocking_sync_call(0.15)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(run())
+    snap = monitor.snapshot()
+    assert not snap["running"]
+    assert snap["lag_ms"]["10s"]["count"] >= 3
+    assert snap["lag_ms"]["10s"]["max"] >= 100
+    assert snap["stalls_total"] == 1
+    assert snap["stalls"][0]["stack"] is None
+    assert snap["stalls"][0]["duration_ms"] >= 100
+
+
+def test_watchdog_captures_the_blocking_stack():
+    monitor = LoopMonitor(interval_ms=5, stall_threshold_ms=50, watchdog=True)
+
+    async def run():
+        await monitor.start()
+        await asyncio.sleep(0.02)
+        _blocking_sync_call(0.3)
+        await asyncio.sleep(0.02)
+        await monitor.stop()
+
+    asyncio.run(run())
+    stall = monitor.snapshot()["stalls"][0]
+    assert stall["duration_ms"] >= 250
+    assert "_blocking_sync_call" in stall["blocking_frame"]
+    assert any("_blocking_sync_call" in line for line in stall["stack"])
+
+
+def test_debug_event_loop_endpoint():
+    from server.main import app
+
+    client = TestClient(app)
+    response = client.get("/debug/event-loop")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ok"
+    assert set(body["lag_ms"]) == {"10s", "60s", "600s"}
+    assert "stalls" in body
@@ -0,0 +1,94 @@
+"""Tests for the metrics registry primitives and Prometheus exposition."""
+
+import threading
+
+from server.services.metrics_registry import MetricsRegistry, get_registry
+
+
+def _fresh_registry() -> MetricsRegistry:
+    # The registry is a process singleton; build an isolated instance for tests.
+    registry = object.__new__(MetricsRegistry)
+    registry._initialized = False
+    MetricsRegistry.__init__(registry)
+    return registry
+
+
+def test_counter_threads_aggregate_at_scrape():
+    registry = _fresh_registry()
+    family = registry.counter_family("frames", "Frames", ("source",))
+    mic = family.labels("mic")
+
+    def work():
+        for _ in range(10000):
+            mic.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert mic.value == 80000
+    # Positional, keyword and legacy dict access all reach the same child.
+    assert family.labels(source="mic") is mic
+    assert registry.counter("frames", labels={"source": "mic"}) is mic
+    registry.inc_counter("frames", 5, labels={"source": "mic"})
+    assert mic.get() == 80005
+
+
+def test_histogram_buckets_are_cumulative_with_le_semantics():
+    registry = _fresh_registry()
+    hist = registry.histogram("latency_ms", "Latency", buckets=[10, 100])
+    for value in (5, 10, 11, 100, 1000):
+        hist.observe(value)
+
+    data = hist.get()
+    assert data["buckets"] == {"10.0": 2, "100.0": 4, "+Inf": 5}
+    assert data["count"] == 5 and data["sum"] == 1126
+
+    text = registry.render_prometheus()
+    assert 'echopanel_latency_ms_bucket{le="10"} 2' in text
+    assert 'echopanel_latency_ms_bucket{le="+Inf"} 5' in text
+    assert "echopanel_latency_ms_count 5" in text
+    assert "# TYPE echopanel_latency_ms histogram" in text
+
+
+def test_exposition_format_and_process_metrics():
+    registry = _fresh_registry()
+    registry.counter_family("audio_bytes_received").labels('we"ird').inc(3)
+    registry.counter("ws_connections_total").inc()
+    text = registry.render_prometheus()
+
+    assert "# TYPE echopanel_audio_bytes_received_total counter" in text
+    assert 'echopanel_audio_bytes_received_total{source="we\\"ird"} 3' in text
+    assert "echopanel_ws_connections_total 1" in text  # no double _total suffix
+    assert "echopanel_process_threads " in text
+    assert "echopanel_process_resident_memory_bytes " in text
+    assert text.endswith("\n")
+
+
+def test_metrics_endpoint_serves_text_exposition():
+    from fastapi.testclient import TestClient
+
+    from server.main import app
+
+    get_registry().counter_family("audio_bytes_received").labels("system").inc(1)
+    with TestClient(app) as client:
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "echopanel_audio_bytes_received_total" in response.text
+    assert "echopanel_event_loop_lag_seconds" in response.text
+
+
+def test_summary_exports_quantiles():
+    registry = _fresh_registry()
+    summary = registry.summary_family("asr_inference_ms", "Inference", ("provider",)).labels("fw")
+    for v in range(1, 101):
+        summary.observe(float(v))
+
+    text = registry.render_prometheus()
+    assert "# TYPE echopanel_asr_inference_ms summary" in text
+    assert 'echopanel_asr_inference_ms{provider="fw",quantile="0.5"}' in text
+    assert 'echopanel_asr_inference_ms_count{provider="fw"} 100' in text
+    assert registry.get_all_metrics()["summaries"]["asr_inference_ms{provider=fw}"]["60s"]["count"] == 100
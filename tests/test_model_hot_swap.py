@@ -0,0 +1,167 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from server.services import model_preloader, model_residency, provider_faster_whisper
+from server.services.asr_providers import ASRConfig, ASRProviderRegistry
+from server.services.asr_stream import stream_asr
+from server.services.model_preloader import WarmupConfig, get_model_manager
+from server.services.model_residency import get_model_residency
+from server.services.thread_planner import get_thread_planner
+
+FRAME = 640  # 20 ms at 16 kHz
+
+
+@pytest.fixture
+def synthetic_env(monkeypatch):
+    monkeypatch.setenv("ECHOPANEL_ASR_PROVIDER", "synthetic")
+    monkeypatch.setenv("ECHOPANEL_WHISPER_MODEL", "synthetic-a")
+    monkeypatch.setenv("ECHOPANEL_ASR_VAD", "0")
+    monkeypatch.setenv("ECHOPANEL_ASR_CHUNK_SECONDS", "1")
+    monkeypatch.setenv("ECHOPANEL_SYNTH_OVERHEAD_MS", "1")
+    monkeypatch.setenv("ECHOPANEL_SYNTH_MS_PER_AUDIO_S", "1")
+    model_preloader.reset_model_manager()
+    yield
+    model_preloader.reset_model_manager()
+    ASRProviderRegistry._instances.clear()
+
+
+def _speech(seconds):
+    t = np.arange(int(seconds * 16000)) / 16000
+    return (np.sin(2 * np.pi * 220 * t) * 4000).astype("<i2").tobytes()
+
+
+def test_live_stream_switches_model_at_chunk_boundary_without_dropping_audio(synthetic_env):
+    async def run():
+        manager = get_model_manager(
+            provider_name="synthetic",
+            warmup_config=WarmupConfig(level2_duration_ms=0, warmup_audio_seconds=0.1),
+        )
+        pcm = _speech(3.5)
+
+        async def frames():
+            for i in range(0, len(pcm), FRAME):
+                if i == 75 * FRAME:  # 1.5 s in, mid-chunk
+                    assert await manager.swap_model(
+                        "synthetic", ASRConfig(model_name="synthetic-b", chunk_seconds=1)
+                    )
+                    assert manager.generation == 1
+                yield pcm[i:i + FRAME]
+
+        events = []
+        async for event in stream_asr(frames(), 16000, "mic"):
+            events.append(event)
+        await asyncio.sleep(0)  # let the retired generation unload
+        return events, manager
+
+    events, manager = asyncio.run(run())
+
+    # Old model finished its in-progress chunk (1-2 s), new model picked up at 2 s
+    assert [(e["t0"], e["t1"]) for e in events] == [(0.0, 1.0), (1.0, 2.0), (2.0, 3.0), (3.0, 3.5)]
+    stats = manager.get_stats()
+    assert stats["generation"] == 1
+    assert stats["swaps"] == 1
+    assert stats["streams_by_generation"] == {}
+    assert stats["retired"] == 1
+    assert all("synthetic-a" not in key for key in ASRProviderRegistry._instances)
+    assert os.environ["ECHOPANEL_WHISPER_MODEL"] == "synthetic-a"  # swaps don't rewrite the environment
+
+
+def test_failed_swap_keeps_current_model(synthetic_env):
+    async def run():
+        manager = get_model_manager(provider_name="synthetic")
+        ok = await manager.swap_model("not-a-provider", ASRConfig(model_name="x"))
+        return ok, manager
+
+    ok, manager = asyncio.run(run())
+    assert ok is False
+    assert manager.generation == 0
+    assert manager.get_stats()["swap_failures"] == 1
+    assert os.environ["ECHOPANEL_WHISPER_MODEL"] == "synthetic-a"
+
+
+class _FakeWhisperModel:
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+
+def test_retire_unloads_superseded_faster_whisper_weights(monkeypatch):
+    monkeypatch.setattr(provider_faster_whisper, "WhisperModel", _FakeWhisperModel)
+    # The documented override names a third model; it must not leak into either instance
+    monkeypatch.setenv("ECHOPANEL_WHISPER_MODEL", "medium.en")
+    model_preloader.reset_model_manager()
+    model_residency.reset_model_residency()
+    try:
+        old = ASRProviderRegistry.get_provider(
+            "faster_whisper", ASRConfig(model_name="base.en", device="cpu", compute_type="int8"))
+        new = ASRProviderRegistry.get_provider(
+            "faster_whisper", ASRConfig(model_name="small.en", device="cpu", compute_type="int8"))
+        plan = get_thread_planner().plans[-1]
+        assert old._get_model(plan).model_name == "base.en"
+        assert new._get_model(plan).model_name == "small.en"
+        assert old.weights_key == "faster_whisper|base.en|cpu|int8"
+
+        # State swap_model leaves behind: generation 0 (old) retiring, generation 1 (new) active
+        manager = get_model_manager(provider_name="faster_whisper")
+        manager._provider = new
+        manager._pinned_key = new.weights_key
+        manager._generation = 1
+        manager._retiring[0] = old
+        manager._generation_keys[0] = {old.weights_key}
+        asyncio.run(manager._retire(0))
+
+        residency = get_model_residency()
+        assert old not in ASRProviderRegistry.cached_instances()
+        assert new in ASRProviderRegistry.cached_instances()
+        assert not old._replicas
+        assert not any(k.startswith(old.weights_key) for k in (m["key"] for m in residency.snapshot()["models"]))
+        assert residency.is_resident(f"{new.weights_key}#{plan.key}")
+        assert manager.get_stats()["retired"] == 1
+    finally:
+        model_preloader.reset_model_manager()
+        model_residency.reset_model_residency()
+        ASRProviderRegistry._instances.clear()
+
+
+def test_ladder_steps_reconfigure_only_their_own_session(synthetic_env):
+    from server.api import ws_live_listener as ws_module
+    from server.services.degrade_ladder import DegradeLadder, DegradeLevel
+
+    async def run():
+        manager = get_model_manager(provider_name="synthetic")
+        pcm = _speech(4.0)
+
+        async def session(source, steps):
+            state = ws_module.SessionState()
+            state.asr_config = ASRConfig(model_name="base.en", chunk_seconds=1)
+            state.degrade_ladder = DegradeLadder(provider=None, config=state.asr_config)
+
+            async def frames():
+                for i in range(0, len(pcm), FRAME):
+                    if i == 60 * FRAME:  # 1.2 s in, mid-chunk
+                        for _ in range(steps):
+                            await state.degrade_ladder.degrade_step()
+                    yield pcm[i:i + FRAME]
+
+            events = [e async for e in stream_asr(frames(), 16000, source,
+                                                  session_config=lambda: ws_module._session_asr_config(state))]
+            return state, events
+
+        (a, a_events), (b, b_events) = await asyncio.gather(session("system", 2), session("mic", 1))
+        return manager, a, a_events, b, b_events
+
+    manager, a, a_events, b, b_events = asyncio.run(run())
+
+    assert (a.degrade_ladder.state.level, b.degrade_ladder.state.level) == (DegradeLevel.DEGRADE, DegradeLevel.WARNING)
+    # Each session moved to its own ladder config at its next chunk boundary (2 s chunks from 2 s)
+    spans = [(0.0, 1.0), (1.0, 2.0), (2.0, 4.0)]
+    assert [(e["t0"], e["t1"]) for e in a_events] == spans
+    assert [(e["t0"], e["t1"]) for e in b_events] == spans
+    keys = set(ASRProviderRegistry._instances)
+    assert "synthetic|tiny.en|auto|int8|None|0|2" in keys  # a: smaller model
+    assert "synthetic|base.en|auto|int8|None|0|2" in keys  # b: same model, longer chunks
+    # No process-wide swap
+    assert manager.generation == 0
+    assert manager.get_stats()["swaps"] == 0
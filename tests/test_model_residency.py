@@ -0,0 +1,77 @@
+import pytest
+
+from server.services import model_residency
+from server.services.asr_providers import ASRConfig
+from server.services.model_residency import ModelResidency
+from server.services.provider_synthetic import SyntheticProvider
+
+
+@pytest.fixture
+def fake_rss(monkeypatch):
+    """Process RSS that grows by whatever the loaders allocate."""
+    rss = {"mb": 500.0}
+    monkeypatch.setattr(model_residency, "_rss_mb", lambda: rss["mb"])
+    return rss
+
+
+def _loader(rss, cost_mb, calls, name):
+    def load():
+        calls.append(name)
+        rss["mb"] += cost_mb
+        return object()
+    return load
+
+
+def test_config_variants_share_one_resident_copy(fake_rss):
+    residency = ModelResidency(budget_mb=0)
+    fast = SyntheticProvider(ASRConfig(model_name="base.en", chunk_seconds=2.0, vad_enabled=True))
+    slow = SyntheticProvider(ASRConfig(model_name="base.en", chunk_seconds=4.0, vad_enabled=False, language="de"))
+    other = SyntheticProvider(ASRConfig(model_name="small.en", chunk_seconds=2.0))
+    assert fast.weights_key == slow.weights_key != other.weights_key
+
+    calls = []
+    a = residency.acquire(fast.weights_key, _loader(fake_rss, 300, calls, "base"))
+    b = residency.acquire(slow.weights_key, _loader(fake_rss, 300, calls, "base"))
+    assert a is b
+    assert calls == ["base"]
+    snap = residency.snapshot()
+    assert snap["resident_mb"] == 300.0
+    assert (snap["loads"], snap["hits"]) == (1, 1)
+
+
+def test_evicts_least_recently_used_unpinned_model_over_budget(fake_rss):
+    residency = ModelResidency(budget_mb=1000)
+    calls, evicted = [], []
+
+    residency.acquire("a", _loader(fake_rss, 400, calls, "a"), on_evict=lambda: evicted.append("a"))
+    residency.acquire("b", _loader(fake_rss, 400, calls, "b"), on_evict=lambda: evicted.append("b"))
+    residency.pin("a", "session-1")
+    residency.acquire("b", _loader(fake_rss, 400, calls, "b"))  # hit: b is now most recent
+    residency.acquire("c", _loader(fake_rss, 400, calls, "c"))
+
+    # a is least recently used but pinned, so b goes
+    assert evicted == ["b"]
+    assert [m["key"] for m in residency.snapshot()["models"]] == ["c", "a"]
+    assert residency.resident_mb() == 800
+
+    # Reloading b makes room up front using its remembered cost
+    fake_rss["mb"] = 500.0  # ru_maxrss-style high-water mark: reload measures nothing new
+    residency.acquire("b", lambda: object())
+    assert [m["key"] for m in residency.snapshot()["models"]] == ["b", "a"]
+    assert residency.resident_mb() == 800
+
+
+def test_pinned_models_hold_until_unpinned(fake_rss):
+    residency = ModelResidency(budget_mb=500)
+    evicted = []
+    residency.acquire("a", _loader(fake_rss, 400, [], "a"), on_evict=lambda: evicted.append("a"))
+    residency.pin("a", "session-1")
+    residency.acquire("b", _loader(fake_rss, 400, [], "b"))
+
+    assert evicted == []
+    assert residency.snapshot()["budget_overruns"] == 1
+    assert residency.release("a") is False
+
+    residency.unpin("a", "session-1")
+    assert evicted == ["a"]
+    assert residency.resident_mb() == 400
@@ -0,0 +1,121 @@
+"""Tests for offline re-transcription over the recording lane."""
+
+import json
+
+import numpy as np
+
+from server.services import offline_transcriber
+from server.services.offline_transcriber import (
+    OfflineTranscriber,
+    Span,
+    map_realtime_segments,
+    split_at_silences,
+    stitch_spans,
+    write_canonical_transcript,
+)
+from server.services.recording_writer import RecordingWriter
+
+SR = 16000
+
+
+def _bursts(n: int, on_s: float = 2.0, off_s: float = 0.5) -> np.ndarray:
+    t = np.arange(int(on_s * SR)) / SR
+    tone = (np.sin(2 * np.pi * 300 * t) * 8000).astype(np.int16)
+    gap = np.zeros(int(off_s * SR), dtype=np.int16)
+    return np.concatenate([np.concatenate([tone, gap]) for _ in range(n)])
+
+
+def burst_transcriber(audio, sample_rate):
+    """Picklable fake model: one segment per voiced run."""
+    frame = sample_rate // 100
+    n = len(audio) // frame
+    voiced = np.abs(audio[: n * frame]).reshape(n, frame).max(axis=1) > 0.05
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+    return [(s * frame / sample_rate, e * frame / sample_rate, "hello world") for s, e in zip(edges[0::2], edges[1::2])]
+
+
+def test_split_cuts_only_in_silence_and_drops_silent_spans():
+    audio = np.concatenate([_bursts(24), np.zeros(20 * SR, dtype=np.int16)])
+    spans = split_at_silences(audio, SR, target_s=10, max_s=15)
+
+    assert len(spans) >= 4
+    for span in spans:
+        assert span.own_start <= span.start < span.end <= span.own_end
+        assert span.own_end - span.own_start <= 15 * SR
+        # Every cut lands inside a gap between bursts.
+        assert span.own_end == len(audio) or span.own_end % int(2.5 * SR) >= 2 * SR
+    assert spans[-1].end <= 60 * SR  # trailing 20 s of silence not decoded
+
+
+def test_split_hard_cuts_overlap_when_there_is_no_silence():
+    audio = (np.sin(np.arange(50 * SR) / 5) * 8000).astype(np.int16)
+    spans = split_at_silences(audio, SR, target_s=10, max_s=20, overlap_s=1.0)
+
+    assert [s.own_start for s in spans] == [0, 20 * SR, 40 * SR]
+    assert spans[1].start == 19 * SR and spans[0].end == 21 * SR
+    assert spans[-1].own_end == len(audio)
+
+
+def test_split_reads_segment_parts_window_by_window(monkeypatch):
+    audio = np.concatenate([_bursts(24), np.zeros(20 * SR, dtype=np.int16)])
+    whole = split_at_silences(audio, SR, target_s=10, max_s=15)
+
+    # Rotated segments that don't end on frame boundaries, read a few frames at a time
+    monkeypatch.setattr(offline_transcriber, "RMS_WINDOW_FRAMES", 7)
+    bounds = [0, 7 * SR + 123, 31 * SR + 7, len(audio)]
+    parts = [audio[a:b] for a, b in zip(bounds, bounds[1:])]
+    assert split_at_silences(parts, SR, target_s=10, max_s=15) == whole
+
+
+def test_stitch_keeps_overlap_segments_once_and_trims_repeated_words():
+    spans = [Span(0, 21 * SR, 0, 20 * SR), Span(19 * SR, 30 * SR, 20 * SR, 30 * SR)]
+    results = [
+        [(0.0, 18.5, "we should ship"), (18.5, 20.8, "it today")],
+        [(-0.0, 1.0, "ship it"), (1.0, 3.0, "ship it today please"), (3.0, 5.0, "next item")],
+    ]
+    merged = stitch_spans(spans, results, SR)
+
+    assert [m[2] for m in merged] == ["we should ship", "it today", "please", "next item"]
+    assert merged[-1][:2] == (22.0, 24.0)
+
+
+def test_map_realtime_segments_by_max_overlap():
+    offline = [{"t0": 0.0, "t1": 5.0}, {"t0": 5.0, "t1": 9.0}]
+    realtime = [
+        {"t0": 0.0, "t1": 4.0, "segment_id": "a"},
+        {"t0": 3.5, "t1": 8.0, "segment_id": "b"},
+        {"t0": 20.0, "t1": 21.0, "segment_id": "c"},
+    ]
+    unmatched = map_realtime_segments(offline, realtime)
+
+    assert offline[0]["realtime_segment_ids"] == ["a"]
+    assert offline[1]["realtime_segment_ids"] == ["b"]
+    assert unmatched == ["c"]
+
+
+def test_transcribe_recording_across_process_pool(tmp_path):
+    audio = _bursts(16)
+    writer = RecordingWriter(flush_interval_ms=10)
+    stream = writer.open_stream(tmp_path / "s", ("epcm",), SR, segment_seconds=15.0)
+    stream.write(audio.tobytes())
+    stream.close()
+    assert stream.wait_closed(timeout=5)
+    writer.shutdown()
+
+    realtime = [{"t0": 2.5 * i, "t1": 2.5 * i + 2.0, "segment_id": f"rt{i}", "source": "mic"} for i in range(16)]
+    transcriber = OfflineTranscriber(burst_transcriber, workers=2, cpu_threads=1, nice=0)
+    result = transcriber.transcribe(stream.segment_files(), SR, "mic", realtime)
+
+    segments = result["segments"]
+    assert len(segments) == 16
+    for i, seg in enumerate(segments):
+        assert abs(seg["t0"] - 2.5 * i) < 0.05
+        assert seg["realtime_segment_ids"] == [f"rt{i}"]
+        assert seg["segment_id"].startswith("seg_")
+    assert result["unmatched_realtime_segment_ids"] == []
+    assert result["stats"]["audio_seconds"] == 40.0
+    assert result["stats"]["audio_seconds_per_wall_second"] > 0
+
+    out = write_canonical_transcript("sess", {"mic": result}, tmp_path / "sess.canonical.json")
+    payload = json.loads(out.read_text())
+    assert payload["session_id"] == "sess" and len(payload["transcript"]) == 16
@@ -0,0 +1,75 @@
+import asyncio
+
+from server.services.asr_providers import ASRConfig
+from server.services.degrade_ladder import DegradeLadder, DegradeLevel
+from server.services.overload_controller import OverloadController
+
+
+class _Provider:
+    name = "mock"
+
+
+def _ladder():
+    return DegradeLadder(provider=_Provider(), config=ASRConfig(model_name="small.en", chunk_seconds=4))
+
+
+def _controller():
+    clock = [0.0]
+    controller = OverloadController(horizon_s=3.0, tau_s=1.0, action_interval_s=5.0,
+                                    recovery_hold_s=10.0, queue_max_s=2.0, clock=lambda: clock[0])
+    return controller, clock
+
+
+def test_growing_backlog_degrades_lowest_priority_before_drops():
+    controller, clock = _controller()
+    low, high = _ladder(), _ladder()
+    controller.register("low", low, priority=-1)
+    controller.register("high", high, priority=5)
+
+    async def run():
+        decisions = []
+        # Backlog grows 0.3s per second: still well under the 2s drop limit
+        for t in range(6):
+            clock[0] = float(t)
+            for key in ("low", "high"):
+                controller.observe_backlog(key, "system", 0.3 * t)
+                controller.observe_inference(key, "system", 0.4, 1.0)
+            decisions.append(await controller.evaluate())
+        return [d for d in decisions if d]
+
+    decisions = asyncio.run(run())
+
+    assert 0.3 * 5 < 2.0
+    assert decisions[0] == ("low", "degrade")
+    assert low.state.level > DegradeLevel.NORMAL
+    assert high.state.level == DegradeLevel.NORMAL
+    assert controller.pressure >= controller.thresholds.warning
+
+
+def test_recovery_waits_for_sustained_calm_and_restores_high_priority_first():
+    controller, clock = _controller()
+    low, high = _ladder(), _ladder()
+    controller.register("low", low, priority=0)
+    controller.register("high", high, priority=1)
+
+    async def run():
+        await low.degrade_step()
+        await high.degrade_step()
+        # Inside the hysteresis band (recovery 0.7 < 0.75 < warning 0.8): nothing moves
+        for t in range(0, 30, 1):
+            clock[0] = float(t)
+            controller.observe_inference("low", "mic", 0.75, 1.0)
+            assert await controller.evaluate() is None
+        # Calm: the first step waits out the hold, then the important session recovers first
+        decisions = []
+        for t in range(30, 60, 1):
+            clock[0] = float(t)
+            controller.observe_inference("low", "mic", 0.1, 1.0)
+            decisions.append(await controller.evaluate())
+        return [(t, d) for t, d in zip(range(30, 60), decisions) if d]
+
+    decisions = asyncio.run(run())
+
+    assert decisions[0][0] >= 30 + controller.recovery_hold_s
+    assert [d for _, d in decisions[:2]] == [("high", "recover"), ("low", "recover")]
+    assert low.state.level == high.state.level == DegradeLevel.NORMAL
@@ -0,0 +1,83 @@
+"""Tests for the block-compressed recording format (.epcm)."""
+
+import numpy as np
+import pytest
+
+from server.services.pcm_codec import BlockPCMReader, BlockPCMWriter, decode_block, encode_block
+
+
+def _speechlike(seconds: float, sample_rate: int = 16000) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    signal = envelope * (4000 * np.sin(2 * np.pi * 220 * t) + 1500 * np.sin(2 * np.pi * 660 * t))
+    return (signal + rng.normal(0, 200, len(t))).astype(np.int16)
+
+
+def _write(path, samples, block_samples=1600, close=True, chunk=700):
+    writer = BlockPCMWriter(open(path, "wb"), 16000, block_samples=block_samples)
+    raw = samples.tobytes()
+    for i in range(0, len(raw), chunk):
+        writer.write(raw[i:i + chunk])
+    if close:
+        writer.close()
+    return writer
+
+
+@pytest.mark.parametrize("samples", [
+    np.random.default_rng(0).integers(-32768, 32768, 5000).astype(np.int16),
+    np.zeros(300, dtype=np.int16),
+    np.array([32767, -32768] * 200, dtype=np.int16),
+    np.array([5], dtype=np.int16),
+])
+def test_block_roundtrip_is_lossless(samples):
+    encoded = encode_block(samples)
+    assert np.array_equal(decode_block(encoded[9:], len(samples), encoded[8]), samples)
+
+
+def test_file_roundtrip_random_access_and_ratio(tmp_path):
+    samples = _speechlike(3.0)
+    path = tmp_path / "a.epcm"
+    _write(path, samples)
+
+    reader = BlockPCMReader(path)
+    assert len(reader) == len(samples)
+    assert np.array_equal(reader[:], samples)
+    assert np.array_equal(reader[12345:23456], samples[12345:23456])
+    assert reader[-1] == samples[-1]
+    assert path.stat().st_size < samples.nbytes * 0.75
+
+
+def test_reader_sub_range(tmp_path):
+    samples = _speechlike(1.0)
+    path = tmp_path / "b.epcm"
+    _write(path, samples)
+
+    reader = BlockPCMReader(path, start_sample=1000, num_samples=500)
+    assert len(reader) == 500
+    assert np.array_equal(np.asarray(reader), samples[1000:1500])
+
+
+def test_unclosed_file_recovers_committed_blocks(tmp_path):
+    samples = _speechlike(1.0)
+    path = tmp_path / "crash.epcm"
+    writer = _write(path, samples, close=False)
+    writer.flush()  # Simulated crash: no tail commit, no seek index
+
+    reader = BlockPCMReader(path)
+    whole_blocks = len(samples) - len(samples) % 1600
+    assert len(reader) == whole_blocks
+    assert np.array_equal(reader[:], samples[:whole_blocks])
+
+
+def test_committed_short_blocks_keep_offsets(tmp_path):
+    samples = _speechlike(0.5)
+    path = tmp_path / "c.epcm"
+    writer = BlockPCMWriter(open(path, "wb"), 16000, block_samples=1600)
+    writer.write(samples[:1000].tobytes())
+    writer.commit()  # short block
+    writer.write(samples[1000:].tobytes())
+    writer.close()
+
+    reader = BlockPCMReader(path)
+    assert np.array_equal(reader[900:2700], samples[900:2700])
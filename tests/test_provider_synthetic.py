@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from server.services import inference_scheduler
+from server.services.asr_providers import ASRConfig, ASRProviderRegistry, AudioSource
+from server.services.inference_scheduler import InferenceScheduler, bind_flow, unbind_flow
+from server.services.provider_synthetic import (
+    CorePool,
+    CostModel,
+    SyntheticProvider,
+    calibrate_from_benchmark,
+)
+
+
+def _speech(seconds, sample_rate=16000):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (np.sin(2 * np.pi * 220 * t) * 4000).astype("<i2").tobytes()
+
+
+async def _frames(pcm, frame_bytes=640):
+    for i in range(0, len(pcm), frame_bytes):
+        yield pcm[i:i + frame_bytes]
+
+
+def _provider(cores=4):
+    config = ASRConfig(model_name="synthetic", chunk_seconds=0.5)
+    return SyntheticProvider(config, cost_model=CostModel(30.0, 100.0, 0.0), cores=cores)
+
+
+def test_registered_and_emits_deterministic_timed_segments():
+    assert "synthetic" in ASRProviderRegistry._providers
+
+    async def run():
+        provider = _provider()
+        pcm = _speech(1.0) + bytes(16000)  # 1 s speech + 0.5 s digital silence
+        segments = [s async for s in provider.transcribe_stream(_frames(pcm), 16000, AudioSource.MICROPHONE)]
+        return segments, await provider.health()
+
+    segments, health = asyncio.run(run())
+    assert [(s.t0, s.t1) for s in segments] == [(0.0, 0.5), (0.5, 1.0)]  # silence chunk skipped
+    assert all(s.is_final and s.source == AudioSource.MICROPHONE for s in segments)
+    assert health["chunks_processed"] == 2  # no inference spent on the silent chunk
+    # 30 ms + 100 ms/s * 0.5 s, uncontended
+    assert 75 <= health["avg_infer_ms"] <= 120
+
+    again, _ = asyncio.run(run())
+    assert [s.text for s in again] == [s.text for s in segments]
+
+
+def test_decodes_go_through_the_inference_scheduler(monkeypatch):
+    scheduler = InferenceScheduler(workers=1)
+    monkeypatch.setattr(inference_scheduler, "_scheduler", scheduler)
+    monkeypatch.setitem(inference_scheduler.SOURCE_DEADLINES_S, "system", 0.05)
+
+    async def session(name):
+        token = bind_flow(name, "system")
+        try:
+            provider = _provider()
+            return [s async for s in provider.transcribe_stream(_frames(_speech(1.2)), 16000, AudioSource.SYSTEM)]
+        finally:
+            unbind_flow(token)
+
+    async def run():
+        return await asyncio.gather(session("a"), session("b"))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        scheduler.shutdown()
+    stats = scheduler.snapshot()
+    # One worker, ~80 ms decodes and a 50 ms deadline: the second session's
+    # head chunk waits too long and is shed; the final partial chunks are flushes.
+    assert stats["jobs_submitted"] == 6
+    assert stats["jobs_dropped"] >= 1
+    assert sum(len(r) for r in results) == stats["jobs_run"]
+    assert all(r and r[-1].t1 == pytest.approx(1.2) for r in results)
+
+
+def test_core_pool_shares_capacity_between_concurrent_calls():
+    async def run(n, cores):
+        pool = CorePool(cores, asyncio.get_running_loop())
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(pool.run(0.1) for _ in range(n)))
+        return loop.time() - start, pool.peak_in_flight
+
+    uncontended, _ = asyncio.run(run(2, cores=2))
+    contended, peak = asyncio.run(run(4, cores=2))
+    assert uncontended == pytest.approx(0.1, abs=0.04)
+    assert contended == pytest.approx(0.2, abs=0.05)
+    assert peak == 4
+
+
+def test_calibrates_cost_model_from_benchmark_output(tmp_path):
+    path = tmp_path / "bench.json"
+    path.write_text(json.dumps({"results": [
+        {"engine": "faster-whisper", "audio_duration_s": 10.0, "inference_time_ms": 1200.0, "errors": []},
+        {"engine": "faster-whisper", "audio_duration_s": 30.0, "inference_time_ms": 3200.0, "errors": []},
+        {"engine": "mlx-whisper", "audio_duration_s": 30.0, "inference_time_ms": 900.0, "errors": []},
+        {"engine": "faster-whisper", "audio_duration_s": 0, "inference_time_ms": 0, "errors": ["boom"]},
+    ]}))
+    model = calibrate_from_benchmark(path, "faster-whisper")
+    assert model.overhead_ms == pytest.approx(200.0)
+    assert model.ms_per_audio_s == pytest.approx(100.0)
+
+    single = calibrate_from_benchmark(path, "mlx-whisper")
+    assert single.cost_ms(30.0) == pytest.approx(900.0)
+
+    with pytest.raises(ValueError):
+        calibrate_from_benchmark(path, "whisper.cpp")
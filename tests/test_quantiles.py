@@ -0,0 +1,79 @@
+"""Tests for streaming quantile sketches and time-decayed windows."""
+
+import numpy as np
+import pytest
+
+from server.services.quantiles import QuantileSketch, WindowedQuantiles
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sketch_quantiles_within_relative_error():
+    values = np.random.default_rng(3).lognormal(mean=5, sigma=1, size=20000)
+    sketch = QuantileSketch()
+    for v in values:
+        sketch.observe(float(v))
+
+    for q in (0.5, 0.9, 0.95, 0.99):
+        exact = float(np.quantile(values, q))
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.03)
+    assert sketch.quantile(1.0) == pytest.approx(values.max())
+    assert sketch.count == len(values)
+
+
+def test_sketch_handles_zero_and_empty():
+    sketch = QuantileSketch()
+    assert sketch.quantiles((0.5, 0.99)) == [0.0, 0.0]
+    for v in (0.0, 0.0, 0.0, 10.0):
+        sketch.observe(v)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == 10.0
+
+
+def test_windows_expire_old_observations():
+    clock = FakeClock()
+    stats = WindowedQuantiles(windows=(10, 60), clock=clock)
+    for _ in range(100):
+        stats.observe(500.0)
+    clock.now += 30
+    for _ in range(100):
+        stats.observe(100.0)
+
+    assert stats.count(10) == 100
+    assert stats.quantile(0.99, 10) == pytest.approx(100.0, rel=0.02)
+    assert stats.count(60) == 200
+    assert stats.quantile(0.99, 60) == pytest.approx(500.0, rel=0.02)
+    assert stats.count() == 200
+
+    clock.now += 61
+    assert stats.count(60) == 0
+    assert stats.recent(10) is None  # nothing recent: callers fall back to lifetime
+    assert stats.mean() == pytest.approx(300.0)
+
+    with pytest.raises(ValueError):
+        stats.count(5)
+
+
+def test_window_queries_are_cached_until_new_data():
+    clock = FakeClock()
+    stats = WindowedQuantiles(windows=(10,), clock=clock)
+    stats.observe(1.0)
+    first = stats._sketch(10)
+    assert stats._sketch(10) is first
+    stats.observe(2.0)
+    assert stats._sketch(10) is not first
+    snapshot = stats.snapshot(10)
+    assert snapshot["count"] == 2 and snapshot["max"] == 2.0 and "p99" in snapshot
+
+
+def test_reset_clears_everything():
+    stats = WindowedQuantiles(windows=(10,))
+    stats.observe(5.0)
+    stats.reset()
+    assert stats.count() == 0 and stats.count(10) == 0
@@ -0,0 +1,127 @@
+"""Tests for the background recording-lane writer."""
+
+import struct
+import threading
+import time
+
+from server.services.recording_writer import RecordingWriter, WAV_HEADER_BYTES
+
+
+def _wav_data_size(path):
+    header = path.read_bytes()[:WAV_HEADER_BYTES]
+    return struct.unpack("<I", header[40:44])[0]
+
+
+def test_frames_are_coalesced_into_batches(tmp_path):
+    writer = RecordingWriter(flush_interval_ms=50)
+    stream = writer.open_stream(tmp_path / "s", ("pcm",), 16000)
+    for i in range(100):
+        stream.write(bytes([i % 256]) * 640)
+    assert stream.flush(timeout=5)
+    writer.shutdown()
+
+    assert (tmp_path / "s.pcm").stat().st_size == 64000
+    assert writer.stats["batches_written"] < 10
+
+
+def test_segments_rotate_and_wav_headers_are_finalized(tmp_path):
+    writer = RecordingWriter(flush_interval_ms=10)
+    stream = writer.open_stream(tmp_path / "rec", ("wav", "pcm"), 10, segment_seconds=1.0)
+    stream.write(b"\x01\x00" * 25)  # 2.5 segments
+    stream.close()
+    assert stream.wait_closed(timeout=5)
+    writer.shutdown()
+
+    assert [(p.name, n) for p, _, n in stream.segment_files()] == [
+        ("rec.pcm", 20), ("rec.part001.pcm", 20), ("rec.part002.pcm", 10),
+    ]
+    assert stream.primary_path == tmp_path / "rec.wav"
+    assert _wav_data_size(tmp_path / "rec.wav") == 20
+    assert _wav_data_size(tmp_path / "rec.part002.wav") == 10
+    assert (tmp_path / "rec.part001.wav").stat().st_mode & 0o777 == 0o600
+
+
+def test_fsync_always_policy(tmp_path):
+    writer = RecordingWriter(flush_interval_ms=10)
+    stream = writer.open_stream(tmp_path / "f", ("pcm",), 16000, fsync_policy="always")
+    stream.write(b"\x00" * 64)
+    assert stream.flush(timeout=5)
+    writer.shutdown()
+    assert writer.stats["fsyncs"] >= 1
+
+
+def test_slow_disk_does_not_block_ingest(tmp_path, monkeypatch):
+    from server.services import recording_writer
+
+    gate = threading.Event()
+    original = recording_writer.RecordingStream._write_batch
+
+    def slow_write_batch(self, data, stats):
+        gate.wait(timeout=5)
+        original(self, data, stats)
+
+    monkeypatch.setattr(recording_writer.RecordingStream, "_write_batch", slow_write_batch)
+    writer = RecordingWriter(flush_interval_ms=5)
+    stream = writer.open_stream(tmp_path / "slow", ("pcm",), 16000)
+
+    start = time.perf_counter()
+    for _ in range(200):
+        stream.write(b"\x00" * 640)
+    elapsed = time.perf_counter() - start
+    gate.set()
+    assert stream.flush(timeout=5)
+    writer.shutdown()
+
+    assert elapsed < 0.1
+    assert (tmp_path / "slow.pcm").stat().st_size == 200 * 640
+
+
+def test_retention_runs_on_writer_thread(tmp_path):
+    calls = []
+    writer = RecordingWriter(flush_interval_ms=5, retention_interval_s=3600)
+    writer.add_retention_task("test", lambda: calls.append(threading.current_thread().name))
+    writer.add_retention_task("test", lambda: calls.append("duplicate"))
+    for _ in range(100):
+        if calls:
+            break
+        time.sleep(0.01)
+    writer.shutdown()
+    assert calls == ["echopanel-recording-writer"]
+
+
+def test_unwritable_path_drops_without_blocking_flush(tmp_path):
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_bytes(b"")
+    writer = RecordingWriter(flush_interval_ms=5)
+    stream = writer.open_stream(blocker / "x", ("pcm",), 16000)
+    stream.write(b"\x00" * 10)
+    assert stream.flush(timeout=5)
+    writer.shutdown()
+    assert stream.dropped_bytes == 10
+    assert writer.stats["write_errors"] == 1
+
+
+def test_epcm_stream_is_readable_after_flush_and_rotates(tmp_path):
+    import numpy as np
+
+    from server.services.diarization import open_recording_audio
+
+    samples = (np.sin(np.arange(30000) / 10) * 3000).astype(np.int16)
+    writer = RecordingWriter(flush_interval_ms=10)
+    stream = writer.open_stream(tmp_path / "c", ("epcm",), 16000, segment_seconds=1.0)
+    stream.write(samples[:20000].tobytes())
+    assert stream.flush(timeout=5)
+
+    # Readable mid-stream, including the partial block the flush committed
+    parts = [open_recording_audio(*located) for located in stream.segment_files()]
+    assert np.array_equal(np.concatenate([p[:] for p in parts]), samples[:20000])
+
+    stream.write(samples[20000:].tobytes())
+    stream.close()
+    assert stream.wait_closed(timeout=5)
+    writer.shutdown()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["c.epcm", "c.part001.epcm"]
+    parts = [open_recording_audio(*located) for located in stream.segment_files()]
+    assert [len(p) for p in parts] == [16000, 14000]
+    assert np.array_equal(np.concatenate([p[:] for p in parts]), samples)
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+
+from server.services.startup_warmup import StartupWarmup, WarmupComponent
+
+
+def test_components_warm_concurrently_with_dependency_order():
+    order = []
+
+    def slow(name, seconds=0.2, result=True):
+        def load():
+            order.append(f"{name}:start")
+            time.sleep(seconds)
+            order.append(f"{name}:end")
+            return result
+        return load
+
+    async def fast_asr():
+        order.append("asr:start")
+        await asyncio.sleep(0.05)
+        order.append("asr:end")
+        return True
+
+    async def run():
+        warmup = StartupWarmup(concurrency=3)
+        warmup.register(WarmupComponent("asr", fast_asr, is_async=True))
+        warmup.register(WarmupComponent("embeddings", slow("embeddings")))
+        warmup.register(WarmupComponent("rag", slow("rag", 0.01), after=("embeddings",)))
+        warmup.register(WarmupComponent("ocr", slow("ocr", 0.2, result=False), after=("asr",)))
+        warmup.register(WarmupComponent("vlm", slow("vlm", 0.01), requires=("ocr",)))
+        start = time.perf_counter()
+        warmup.start()
+
+        # ASR goes live while the slower components are still loading
+        assert await warmup.wait_for(["asr"])
+        assert warmup.snapshot()["embeddings"]["state"] == "loading"
+
+        await warmup.wait_for(warmup.components)
+        return warmup, time.perf_counter() - start
+
+    warmup, elapsed = asyncio.run(run())
+    snap = warmup.snapshot()
+
+    assert elapsed < 0.35  # embeddings and ocr overlapped
+    assert order.index("rag:start") > order.index("embeddings:end")
+    assert order.index("ocr:start") > order.index("asr:end")
+    assert {name: s["state"] for name, s in snap.items()} == {
+        "asr": "ready", "embeddings": "ready", "rag": "ready", "ocr": "unavailable", "vlm": "unavailable",
+    }
+    assert snap["vlm"]["detail"] == "requires ocr (unavailable)"
+
+
+def test_timed_out_thread_loader_reports_late_readiness():
+    release = threading.Event()
+
+    async def run():
+        warmup = StartupWarmup()
+        warmup.register(WarmupComponent("ocr", lambda: release.wait(5), timeout_s=0.05))
+        warmup.register(WarmupComponent("broken", lambda: 1 / 0))
+        warmup.start()
+
+        assert not await warmup.wait_for(["ocr", "broken"])
+        assert warmup.status("ocr")["state"] == "timeout"
+        assert warmup.status("broken")["detail"].startswith("ZeroDivisionError")
+
+        release.set()
+        for _ in range(100):
+            if warmup.is_ready("ocr"):
+                break
+            await asyncio.sleep(0.01)
+        return warmup.status("ocr")
+
+    status = asyncio.run(run())
+    assert status["ready"] and status["late"]
+
+
+def test_request_during_ocr_warmup_waits_for_the_same_handler(monkeypatch):
+    from server.services import screen_ocr, startup_warmup
+
+    built = []
+    building = threading.Event()
+
+    class SlowHandler:
+        enabled = True
+
+        def __init__(self):
+            built.append(self)
+            building.set()
+            time.sleep(0.2)  # PaddleOCR + SmolVLM load
+
+    monkeypatch.setattr(screen_ocr, "OCRFrameHandler", SlowHandler)
+    monkeypatch.setattr(screen_ocr, "OCR_ENABLED", True)
+    screen_ocr.reset_ocr_handler()
+
+    async def run():
+        warm = asyncio.create_task(asyncio.to_thread(startup_warmup._warm_ocr))
+        await asyncio.to_thread(building.wait, 2)
+        # A screen_frame arrives while warmup is still constructing the handler
+        handler = await screen_ocr.get_ocr_handler_async()
+        return await warm, handler
+
+    try:
+        warmed, handler = asyncio.run(run())
+    finally:
+        screen_ocr.reset_ocr_handler()
+    assert warmed
+    assert len(built) == 1 and handler is built[0]
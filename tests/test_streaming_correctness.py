@@ -9,6 +9,7 @@ import os
 import threading
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import numpy as np
 import pytest
 
 
@@ -93,22 +94,19 @@ class TestDualLanePipeline:
     """
 
     @pytest.mark.asyncio
-    async def test_recording_lane_writes_all_frames(self):
+    async def test_recording_lane_writes_all_frames(self, tmp_path):
         """Verify recording lane writes all frames even when realtime lane drops."""
         from server.api.ws_live_listener import put_audio, SessionState, _init_recording_lane, _finalize_recording_lane
-        from unittest.mock import patch, MagicMock
+        from unittest.mock import patch
         
         state = SessionState()
         state.session_id = "test_session"
         q: asyncio.Queue = asyncio.Queue(maxsize=100)
         
-        # Mock recording lane directory and enable it
+        # Point the recording lane at a temp directory and enable it
         with patch("server.api.ws_live_listener.RECORDING_LANE_ENABLED", True):
             with patch("server.api.ws_live_listener.RECORDING_LANE_FORMAT", "pcm"):
-                with patch("server.api.ws_live_listener.RECORDING_LANE_DIR") as mock_dir:
-                    mock_dir.mkdir = MagicMock()
-                    mock_dir.__truediv__ = MagicMock(return_value=MagicMock())
-                    
+                with patch("server.api.ws_live_listener.RECORDING_LANE_DIR", tmp_path):
                     # Initialize recording lane
                     _init_recording_lane(state, "system", 16000)
                     
@@ -120,8 +118,14 @@ class TestDualLanePipeline:
                     # Verify frames went to realtime queue
                     assert q.qsize() == 3
                     
-                    # Verify recording lane tracked bytes (would be written to file)
+                    # Verify recording lane tracked bytes
                     assert state.recording_bytes_written.get("system", 0) == 18  # 6 bytes * 3 frames
+                    
+                    # The writer thread persists every byte
+                    stream = state.recording_streams["system"]
+                    path = _finalize_recording_lane(state, "system", 16000)
+                    assert stream.wait_closed(timeout=5)
+                    assert path.read_bytes() == b"frame1frame2frame3"
 
     def test_wav_header_writing(self):
         """Verify WAV header is written with correct format."""
@@ -241,6 +245,48 @@ class TestDiarizationMerge:
 
         assert result[0]["speaker"] == "Speaker 1"
 
+    def test_merge_prefers_max_overlap_over_midpoint(self):
+        from server.services.diarization import merge_transcript_with_speakers
+
+        transcript = [{"t0": 0.0, "t1": 4.0, "text": "long turn"}]  # Midpoint 2.0 is in Speaker 2
+        speakers = [
+            {"t0": 0.0, "t1": 1.8, "speaker": "Speaker 1"},
+            {"t0": 1.9, "t1": 2.1, "speaker": "Speaker 2"},
+            {"t0": 2.1, "t1": 4.0, "speaker": "Speaker 1"},
+        ]
+
+        result = merge_transcript_with_speakers(transcript, speakers)
+
+        assert result[0]["speaker"] == "Speaker 1"
+
+    def test_aligner_handles_nested_and_point_queries(self):
+        from server.services.diarization import SpeakerAligner
+
+        aligner = SpeakerAligner([
+            {"t0": 0.0, "t1": 100.0, "speaker": "Speaker 1"},  # Long turn spanning later ones
+            {"t0": 10.0, "t1": 12.0, "speaker": "Speaker 2"},
+            {"t0": 50.0, "t1": 51.0, "speaker": "Speaker 3"},
+        ])
+
+        assert aligner.speaker_for(10.5, 11.5) == "Speaker 1"  # ties keep the earlier segment
+        assert aligner.speaker_for(60.0, 61.0) == "Speaker 1"
+        assert aligner.speaker_for(50.5, 50.5) == "Speaker 1"
+        assert aligner.speaker_for(200.0, 201.0) is None
+
+    def test_aligner_incremental_add_extends_contiguous_turns(self):
+        from server.services.diarization import SpeakerAligner
+
+        aligner = SpeakerAligner()
+        aligner.add(0.0, 1.5, "A")
+        aligner.add(1.5, 3.0, "A")
+        aligner.add(3.0, 4.5, "B")
+        aligner.add(1.0, 1.2, "C")  # Out-of-order insert
+
+        assert len(aligner) == 3
+        assert aligner.speaker_for(2.0, 2.5) == "A"
+        assert aligner.speaker_for(3.5, 4.0) == "B"
+        assert aligner.segments()[1] == {"t0": 1.0, "t1": 1.2, "speaker": "C"}
+
 
 class TestSourceAwareDiarization:
     """Tests for source-aware diarization merge in ws handler."""
@@ -276,24 +322,57 @@ class TestSourceAwareDiarization:
         assert merged[0]["speaker"] == "Speaker 2"
 
     @pytest.mark.asyncio
-    async def test_run_diarization_per_source_invokes_each_buffer(self):
+    async def test_run_diarization_per_source_reads_recording_lane(self, tmp_path):
+        import server.api.ws_live_listener as wsl
         from server.api.ws_live_listener import SessionState, _run_diarization_per_source
 
         state = SessionState(diarization_enabled=True, sample_rate=16000)
-        state.pcm_buffers_by_source = {
-            "system": bytearray(b"\x00\x00" * 4),
-            "mic": bytearray(b"\x00\x00" * 4),
-        }
+        with patch.object(wsl, "RECORDING_LANE_DIR", tmp_path), patch.object(wsl, "RECORDING_LANE_FORMAT", "pcm"):
+            for source, samples in (("system", [1, 2, 3, 4]), ("mic", [5, 6, 7, 8])):
+                wsl._init_recording_lane(state, source, 16000)
+                wsl._write_recording_lane(state, source, np.array(samples, dtype=np.int16).tobytes())
 
-        def fake_diarize_pcm(pcm_bytes, sample_rate):
+        seen = {}
+
+        def fake_diarize_pcm(samples, sample_rate):
             assert sample_rate == 16000
+            assert isinstance(samples, np.memmap)
+            seen[int(samples[0])] = list(samples)
             return [{"t0": 0.0, "t1": 1.0, "speaker": "Speaker 1"}]
 
         with patch("server.api.ws_live_listener.diarize_pcm", side_effect=fake_diarize_pcm):
             result = await _run_diarization_per_source(state)
 
+        wsl._close_all_recording_lanes(state)
         assert set(result.keys()) == {"system", "mic"}
         assert result["system"][0]["speaker"] == "Speaker 1"
+        assert seen == {1: [1, 2, 3, 4], 5: [5, 6, 7, 8]}
+
+    @pytest.mark.asyncio
+    async def test_run_diarization_maps_only_trailing_window_across_segments(self, tmp_path):
+        import server.api.ws_live_listener as wsl
+        from server.api.ws_live_listener import SessionState, _run_diarization_per_source
+        from server.services.recording_writer import RecordingWriter
+
+        state = SessionState(diarization_enabled=True, sample_rate=2, diarization_max_bytes=8)
+        writer = RecordingWriter(flush_interval_ms=10)
+        # 1.5s segments at 2 Hz: samples [0,1,2] [3,4,5] land in two WAV files
+        state.recording_streams["mic"] = writer.open_stream(tmp_path / "mic", ("wav",), 2, segment_seconds=1.5)
+        wsl._write_recording_lane(state, "mic", np.arange(6, dtype=np.int16).tobytes())
+        state.recording_bytes_written["mic"] = 12
+
+        def fake_diarize_pcm(parts, sample_rate):
+            assert [list(p) for p in parts] == [[2], [3, 4, 5]]
+            return [{"t0": 0.0, "t1": 1.0, "speaker": "Speaker 1"}]
+
+        with patch.object(wsl, "RECORDING_LANE_ENABLED", True):
+            with patch("server.api.ws_live_listener.diarize_pcm", side_effect=fake_diarize_pcm):
+                result = await _run_diarization_per_source(state)
+
+        writer.shutdown()
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["mic.part001.wav", "mic.wav"]
+        # Timestamps are shifted back onto the session timeline (2 samples skipped at 2 Hz).
+        assert result["mic"] == [{"t0": 1.0, "t1": 2.0, "speaker": "Speaker 1"}]
 
 
 class TestStagedFeatureTelemetry:
@@ -0,0 +1,170 @@
+"""Tests for online (streaming) speaker diarization."""
+
+import numpy as np
+import pytest
+
+from server.services.diarization_stream import SpeakerRegistry, StreamingDiarizer
+
+SR = 16000
+
+
+def _tone(freq: float, seconds: float) -> bytes:
+    t = np.arange(int(SR * seconds)) / SR
+    return (np.sin(2 * np.pi * freq * t) * 8000).astype(np.int16).tobytes()
+
+
+def _band_embed(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Toy embedding: energy in coarse spectral bands of the last second."""
+    spectrum = np.abs(np.fft.rfft(audio[-sample_rate:]))
+    return np.array([band.sum() for band in np.array_split(spectrum[:2000], 8)], dtype=np.float32)
+
+
+def _diarizer(**kwargs) -> StreamingDiarizer:
+    return StreamingDiarizer(sample_rate=SR, embed_fn=_band_embed, window_s=1.0, step_s=0.5, **kwargs)
+
+
+def test_live_labels_follow_speaker_changes():
+    diarizer = _diarizer()
+    diarizer.feed(_tone(150, 2.0))
+    diarizer.feed(_tone(900, 2.0))
+    diarizer.feed(_tone(150, 2.0))
+    assert diarizer.process_pending() == 12
+
+    assert diarizer.speaker_for(0.0, 1.5) == "Speaker 1"
+    assert diarizer.speaker_for(2.5, 3.5) == "Speaker 2"
+    assert diarizer.speaker_for(4.5, 5.5) == "Speaker 1"
+    assert diarizer.speaker_for(10.0, 11.0) is None
+
+
+def test_only_complete_steps_are_processed_until_final():
+    diarizer = _diarizer()
+    diarizer.feed(_tone(150, 1.2))
+    assert diarizer.process_pending() == 2
+    segments = diarizer.finalize()
+    assert segments == [{"t0": 0.0, "t1": pytest.approx(1.2), "speaker": "Speaker 1"}]
+
+
+def test_silence_is_not_labelled():
+    diarizer = _diarizer()
+    diarizer.feed(bytes(SR * 2 * 2))  # 2s of PCM16 silence
+    diarizer.feed(_tone(150, 1.0))
+    segments = diarizer.finalize()
+    assert len(segments) == 1
+    assert segments[0]["t0"] == pytest.approx(2.0)
+    assert diarizer.get_stats()["steps_unvoiced"] == 4
+
+
+def test_pending_audio_is_bounded_and_timeline_preserved():
+    diarizer = _diarizer(max_pending_s=1.0)
+    diarizer.feed(_tone(150, 3.0))
+    assert diarizer.get_stats()["seconds_dropped"] == pytest.approx(2.0)
+    segments = diarizer.finalize()
+    assert segments[0]["t0"] == pytest.approx(2.0)
+
+
+def test_registry_reconciliation_merges_converged_speakers():
+    registry = SpeakerRegistry(threshold=0.99, max_speakers=4)
+    a = registry.assign(np.array([1.0, 0.0, 0.0]))
+    b = registry.assign(np.array([0.9, 0.3, 0.0]))
+    c = registry.assign(np.array([0.0, 0.0, 1.0]))
+    assert (a, b, c) == (0, 1, 2)
+    mapping = registry.merge_similar(threshold=0.9)
+    assert mapping == {0: 0, 1: 0, 2: 2}
+
+
+@pytest.mark.asyncio
+async def test_session_uses_streaming_diarizers_at_stop():
+    from server.api.ws_live_listener import (
+        SessionState,
+        _append_diarization_audio,
+        _live_speaker_label,
+        _run_diarization_per_source,
+    )
+
+    state = SessionState(diarization_enabled=True, sample_rate=SR, diarization_mode="streaming")
+    state.diarizers_by_source["mic"] = _diarizer()
+    _append_diarization_audio(state, "microphone", _tone(150, 1.0))
+    assert list(state.diarizers_by_source) == ["mic"]
+
+    state.diarizers_by_source["mic"].process_pending()
+    assert _live_speaker_label(state, "mic", 0.0, 1.0) == "Speaker 1"
+
+    result = await _run_diarization_per_source(state)
+    assert list(result) == ["mic"]
+    assert result["mic"][0]["speaker"] == "Speaker 1"
+
+
+def test_batch_diarization_links_speakers_across_memmap_windows(tmp_path, monkeypatch):
+    pytest.importorskip("torch")
+    from types import SimpleNamespace
+
+    from server.services import diarization
+
+    class FakeAnnotation:
+        def __init__(self, duration):
+            self.duration = duration
+
+        def labels(self):
+            return ["SPEAKER_00"]
+
+        def itertracks(self, yield_label=False):
+            yield SimpleNamespace(start=0.0, end=self.duration), None, "SPEAKER_00"
+
+    calls = []
+
+    def fake_pipeline(inputs, return_embeddings=False):
+        waveform = inputs["waveform"]
+        calls.append(waveform.shape[-1])
+        # Window 0 and 2 are the same voice, window 1 is someone else.
+        embedding = [1.0, 0.0] if len(calls) != 2 else [0.0, 1.0]
+        return FakeAnnotation(waveform.shape[-1] / inputs["sample_rate"]), np.array([embedding])
+
+    monkeypatch.setattr(diarization, "_get_pipeline", lambda: fake_pipeline)
+    path = tmp_path / "mic.pcm"
+    path.write_bytes(np.ones(30, dtype=np.int16).tobytes())
+
+    segments = diarization.diarize_pcm(diarization.open_pcm_memmap(path), sample_rate=10, window_seconds=1.0)
+
+    assert calls == [10, 10, 10]
+    assert [(s["t0"], s["t1"], s["speaker"]) for s in segments] == [
+        (0.0, 1.0, "Speaker 1"),
+        (1.0, 2.0, "Speaker 2"),
+        (2.0, 3.0, "Speaker 1"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_final_transcript_keeps_live_speaker_names():
+    from server.api.ws_live_listener import (
+        SessionState,
+        _live_speaker_label,
+        _merge_transcript_with_source_diarization,
+        _run_diarization_per_source,
+    )
+
+    voices = {150: [1.0, 0.0, 0.0], 400: [0.9, 0.3, 0.0], 900: [0.0, 0.0, 1.0]}
+
+    def voice_embed(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+        peak = int(np.argmax(np.abs(np.fft.rfft(audio[-sample_rate:]))))
+        return np.array(voices[min(voices, key=lambda f: abs(f - peak))], dtype=np.float32)
+
+    # 150 Hz and 400 Hz open separate speakers live but converge at finalize.
+    diarizer = StreamingDiarizer(
+        sample_rate=SR, embed_fn=voice_embed, window_s=1.0, step_s=0.5, similarity_threshold=0.99
+    )
+    state = SessionState(diarization_enabled=True, sample_rate=SR, diarization_mode="streaming")
+    state.diarizers_by_source["mic"] = diarizer
+    for freq in (150, 400, 900):
+        diarizer.feed(_tone(freq, 2.0))
+    diarizer.process_pending()
+
+    transcript = []
+    for t0 in (0.5, 2.5, 4.5):
+        event = {"t0": t0, "t1": t0 + 1.0, "text": "x", "source": "mic"}
+        event["speaker"] = _live_speaker_label(state, "mic", event["t0"], event["t1"])
+        transcript.append(event)
+    assert [e["speaker"] for e in transcript] == ["Speaker 1", "Speaker 2", "Speaker 3"]
+
+    final = _merge_transcript_with_source_diarization(transcript, await _run_diarization_per_source(state))
+    # The merged speaker folds into Speaker 1; the others keep their live names.
+    assert [e["speaker"] for e in final] == ["Speaker 1", "Speaker 1", "Speaker 3"]
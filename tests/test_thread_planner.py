@@ -0,0 +1,79 @@
+from server.services import model_residency, provider_faster_whisper
+from server.services.asr_providers import ASRConfig
+from server.services.model_residency import ModelResidency, replica_key
+from server.services.provider_faster_whisper import FasterWhisperProvider
+from server.services.thread_planner import ThreadPlan, ThreadPlanner
+
+
+def test_plans_split_cores_between_concurrent_streams(monkeypatch):
+    monkeypatch.delenv("ECHOPANEL_CT2_CPU_THREADS", raising=False)
+    monkeypatch.delenv("ECHOPANEL_CT2_NUM_WORKERS", raising=False)
+    planner = ThreadPlanner(cores=8, expected_streams=4, replicas=3)
+
+    assert planner.plans == [ThreadPlan(8, 1), ThreadPlan(4, 2), ThreadPlan(2, 4)]
+    assert planner.executor_workers == 4
+    assert planner.plan_for(16) == ThreadPlan(1, 8)  # never more workers than cores
+
+    static = ThreadPlanner(cores=8, expected_streams=4, replicas=1)
+    assert static.plans == [ThreadPlan(2, 4)]
+
+
+def test_plan_follows_active_streams():
+    planner = ThreadPlanner(cores=8, expected_streams=2, replicas=2)
+    assert planner.current_plan() == ThreadPlan(8, 1)
+
+    with planner.track_stream(), planner.track_stream():
+        assert planner.current_plan() == ThreadPlan(4, 2)
+        with planner.track_stream():
+            # Beyond the expected concurrency the largest plan queues on the executor
+            assert planner.current_plan() == ThreadPlan(4, 2)
+
+    assert planner.current_plan() == ThreadPlan(8, 1)
+    snap = planner.snapshot()
+    assert (snap["active_streams"], snap["peak_active_streams"], snap["plan_switches"]) == (0, 3, 2)
+
+
+def test_fixed_thread_env_disables_adaptation(monkeypatch):
+    monkeypatch.setenv("ECHOPANEL_CT2_CPU_THREADS", "3")
+    planner = ThreadPlanner(cores=8, expected_streams=2, replicas=2)
+    assert planner.plans == [ThreadPlan(3, 2)]
+
+
+def test_replicas_share_base_pins_and_release():
+    residency = ModelResidency(budget_mb=0)
+    base = "faster_whisper|base.en|cpu|int8"
+    solo, shared = replica_key(base, "t8w1"), replica_key(base, "t4w2")
+    residency.acquire(solo, object)
+    residency.acquire(shared, object)
+
+    residency.pin(base, "model_manager")
+    assert residency.is_pinned(solo) and residency.is_pinned(shared)
+    assert residency.release(base) is False
+
+    residency.unpin(base, "model_manager")
+    assert residency.release(base) is True
+    assert not residency.is_resident(solo) and not residency.is_resident(shared)
+
+
+class _FakeWhisperModel:
+    def __init__(self, model_name, device, compute_type, cpu_threads, num_workers):
+        self.params = (model_name, device, compute_type, cpu_threads, num_workers)
+
+
+def test_replicas_load_the_weights_first_resolved(monkeypatch):
+    monkeypatch.setattr(provider_faster_whisper, "WhisperModel", _FakeWhisperModel)
+    model_residency.reset_model_residency()
+    try:
+        provider = FasterWhisperProvider(ASRConfig(model_name="small.en", device="cpu", compute_type="float16"))
+        solo = provider._get_model(ThreadPlan(8, 1))
+
+        # Neither the environment nor a later config change reaches the next replica
+        monkeypatch.setenv("ECHOPANEL_WHISPER_MODEL", "base.en")
+        provider.config.model_name = "tiny.en"
+        shared = provider._get_model(ThreadPlan(4, 2))
+
+        assert solo.params == ("small.en", "cpu", "int8", 8, 1)
+        assert shared.params == ("small.en", "cpu", "int8", 4, 2)
+        assert provider.weights_key == "faster_whisper|small.en|cpu|int8"
+    finally:
+        model_residency.reset_model_residency()
@@ -108,7 +108,8 @@ class TestWhisperCppProvider:
             provider = WhisperCppProvider(config)
         
         # Simulate some inference times
-        provider._infer_times = [0.5, 0.6, 0.4]
+        for infer_ms in (500, 600, 400):
+            provider._record_inference(infer_ms)
         provider._chunks_processed = 3
         
         stats = provider.get_performance_stats()
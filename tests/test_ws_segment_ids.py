@@ -13,7 +13,7 @@ def test_asr_final_includes_segment_id(monkeypatch):
     from server.api import ws_live_listener as ws_module
     from server.services.transcript_ids import generate_segment_id
 
-    async def fake_stream_asr(_pcm_stream, sample_rate=16000, source=None):
+    async def fake_stream_asr(_pcm_stream, sample_rate=16000, source=None, **kwargs):
         yield {
             "type": "asr_final",
             "text": "Hello world",